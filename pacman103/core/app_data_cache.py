@@ -0,0 +1,354 @@
+"""
+A cache of the appData images made by executing the data specs of the cores
+of a network on the host, so that running a script again does not generate
+the data of the cores whose inputs have not changed.
+
+Each entry is a copy of the image of a core, in a file named by the hash of
+its inputs, and a pickle of the targets and memory map made with it.  The
+hash is a SHA-1 hash of a canonical description of:
+
+* the vertex of the core, and the atoms, key and resources of its subvertex;
+* the edges, keys, masks and synapse sublists of the subedges into and out of
+  the subvertex, and the subvertices and placements at their other ends; the
+  sublists of the subedges out of the subvertex are those of the synapse
+  lists of their edges, which the delay extensions write to their data;
+* the processor of the core and the address in SDRAM at which its image
+  starts;
+* the [Machine] and [SpecExecution] sections of the config, the run time,
+  time step and time scale factor, and the random number generators and
+  distributions declared;
+* the source of the data spec generator and executor, and of the modules of
+  the models.
+
+The data of cores which draw on the global random number generators, such as
+Poisson sources without a seed, is generated every time and never cached.
+"""
+
+import cPickle as pickle
+import glob
+import hashlib
+import inspect
+import logging
+import os
+import random
+import shutil
+
+import numpy
+
+from pacman103 import conf
+from pacman103.core import data_spec_executor
+from pacman103.core.mapper.mapping_cache import Describer, \
+    MAPPING_ATTRIBUTES, get_vertices
+from pacman103.core.utilities import memory_utils, packet_conversions
+from pacman103.lib import data_spec_constants, data_spec_gen, lib_map
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SECTIONS = ("Machine", "SpecExecution")
+
+#the synapse lists of the edges are described a sublist at a time instead
+EDGE_EXCLUDED_ATTRIBUTES = MAPPING_ATTRIBUTES + ("synapse_list",)
+
+#the results of looking a core up in the cache
+HIT = "hit"
+MISS = "miss"
+UNCACHED = "uncached"
+
+
+class AppDataCache(object):
+    """
+    A directory of the appData images of cores, holding at most max_entries
+    of them.
+
+    :param string directory: the directory of the entries.
+    :param int max_entries: the most entries to keep.
+    """
+
+    #the version of the format of the entries, which invalidates all the
+    # entries when changed
+    VERSION = 1
+    IMAGE_SUFFIX = ".dat"
+    ENTRY_SUFFIX = ".core"
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def from_config():
+        """
+        Returns the appData cache set up in the [App_data_cache] section of
+        the config, or None if it is not enabled
+        """
+        if not conf.config.getboolean("App_data_cache", "enable"):
+            return None
+        directory = conf.config.get("App_data_cache", "directory")
+        if directory == "None":
+            components = os.path.abspath(lib_map.__file__).split(os.sep)
+            directory = os.path.join(
+                os.sep, *(components[1:components.index("pacman103")] +
+                          ["app_data_cache"]))
+        return AppDataCache(directory,
+                            conf.config.getint("App_data_cache",
+                                               "max_entries"))
+
+    def get_path(self, core_hash, suffix):
+        return os.path.join(self.directory, core_hash + suffix)
+
+    def load(self, core_hash, f_out):
+        """
+        Copies the image with the hash to f_out and returns its entry, or
+        returns None if it is not in the cache
+        """
+        entry_path = self.get_path(core_hash, self.ENTRY_SUFFIX)
+        image_path = self.get_path(core_hash, self.IMAGE_SUFFIX)
+        if not os.path.exists(entry_path):
+            return None
+        try:
+            with open(entry_path, "rb") as entry_file:
+                entry = pickle.load(entry_file)
+            if entry["version"] != self.VERSION:
+                raise ValueError("entry of version {}".format(
+                    entry["version"]))
+            if os.path.getsize(image_path) != entry["image_size"]:
+                raise ValueError("image of {} bytes instead of {}".format(
+                    os.path.getsize(image_path), entry["image_size"]))
+            shutil.copyfile(image_path, f_out)
+        except Exception as e:
+            logger.warning("Could not reuse the appData {} from the cache, "
+                           "generating it again: {}".format(core_hash, e))
+            self.remove(core_hash)
+            return None
+
+        #mark the entry as most recently used
+        os.utime(entry_path, None)
+        return entry
+
+    def save(self, core_hash, f_out, entry):
+        """
+        Stores the image f_out and its entry under the hash
+        """
+        entry["version"] = self.VERSION
+        entry["image_size"] = os.path.getsize(f_out)
+        image_path = self.get_path(core_hash, self.IMAGE_SUFFIX)
+        shutil.copyfile(f_out, image_path + ".tmp")
+        os.rename(image_path + ".tmp", image_path)
+
+        #the entry is written last, so that it is only found with its image
+        entry_path = self.get_path(core_hash, self.ENTRY_SUFFIX)
+        with open(entry_path + ".tmp", "wb") as entry_file:
+            pickle.dump(entry, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(entry_path + ".tmp", entry_path)
+
+    def remove(self, core_hash):
+        for suffix in (self.ENTRY_SUFFIX, self.IMAGE_SUFFIX):
+            path = self.get_path(core_hash, suffix)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until there are at most
+        max_entries
+        """
+        paths = sorted(glob.glob(os.path.join(self.directory,
+                                              "*" + self.ENTRY_SUFFIX)),
+                       key=os.path.getmtime)
+        for path in paths[:max(len(paths) - self.max_entries, 0)]:
+            logger.debug("Evicting {} from the appData cache".format(path))
+            self.remove(os.path.basename(path)[:-len(self.ENTRY_SUFFIX)])
+
+
+class AppDataCacheStatistics(object):
+    """
+    Summary of the cores looked up in the appData cache by
+    :py:func:`pacman103.core.output_generator.generate_output_raw`.
+    """
+
+    def __init__(self):
+        #the (x, y, p, label, lo_atom, hi_atom, result) of each core
+        self.cores = list()
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+
+    def add(self, placement, result, elapsed):
+        subvertex = placement.subvertex
+        x, y, p = placement.processor.get_coordinates()
+        self.cores.append((x, y, p, subvertex.vertex.label, subvertex.lo_atom,
+                           subvertex.hi_atom, result))
+        if result == HIT:
+            self.hit_time += elapsed
+        else:
+            self.miss_time += elapsed
+
+    def count(self, result):
+        return len([core for core in self.cores if core[-1] == result])
+
+    @property
+    def n_hits(self):
+        return self.count(HIT)
+
+    @property
+    def n_misses(self):
+        return self.count(MISS)
+
+    @property
+    def n_uncached(self):
+        return self.count(UNCACHED)
+
+
+class CoreHasher(object):
+    """
+    Hashes the inputs of the data of the cores of the network of a
+    datastore.  The parts of the hash shared by all the cores, and the
+    descriptions of the vertices and edges, are made when it is created, and
+    so before any data is generated.  The vertices include those which are
+    not added to the datastore, such as the delay extensions.
+    """
+
+    def __init__(self, dao):
+        vertices = get_vertices(dao)
+        self.vertex_indices = dict([(id(vertex), index)
+                                    for index, vertex in
+                                    enumerate(vertices)])
+        self.edge_indices = dict([(id(edge), index)
+                                  for index, edge in enumerate(dao.edges)])
+
+        self.hash = hashlib.sha1()
+        describer = Describer(self.hash, self.vertex_indices,
+                              self.edge_indices)
+        self.hash.update("version {}\n".format(AppDataCache.VERSION))
+        for section in CONFIG_SECTIONS:
+            if conf.config.has_section(section):
+                describer.describe((section, sorted(conf.config.items(section))))
+        describer.describe((dao.run_time, dao.machineTimeStep,
+                            dao.time_scale_factor, dao.app_id))
+        describer.describe(dao.rngs)
+        describer.describe(dao.randDists)
+
+        #the source of the models and of the modules they use to write their
+        # data, so that changes to the way data is written invalidate the
+        # entries
+        source_files = set()
+        for module in (data_spec_gen, data_spec_constants, data_spec_executor,
+                       lib_map, memory_utils, packet_conversions):
+            source_files.add(os.path.abspath(inspect.getsourcefile(module)))
+        for item in vertices + dao.edges + dao.subedges:
+            for cls in inspect.getmro(type(item)):
+                if cls is not object:
+                    source_files.update(glob.glob(os.path.join(
+                        os.path.dirname(os.path.abspath(
+                            inspect.getsourcefile(cls))), "*.py")))
+        for source_file in sorted(source_files):
+            with open(source_file, "rb") as f:
+                self.hash.update(hashlib.sha1(f.read()).digest())
+
+        self.vertex_digests = dict()
+        for vertex in vertices:
+            vertex_hash = hashlib.sha1()
+            Describer(vertex_hash, self.vertex_indices,
+                      self.edge_indices).describe_object(vertex)
+            self.vertex_digests[id(vertex)] = vertex_hash.digest()
+        self.edge_digests = dict()
+        for edge in dao.edges:
+            edge_hash = hashlib.sha1()
+            Describer(edge_hash, self.vertex_indices, self.edge_indices,
+                      EDGE_EXCLUDED_ATTRIBUTES).describe_object(edge)
+            self.edge_digests[id(edge)] = edge_hash.digest()
+
+    def describe_end(self, subvertex):
+        """
+        Returns a description of the subvertex at the other end of a subedge
+        """
+        coordinates = None
+        if subvertex.placement is not None:
+            coordinates = subvertex.placement.processor.get_coordinates()
+        return (self.vertex_indices.get(id(subvertex.vertex)),
+                subvertex.lo_atom, subvertex.hi_atom, subvertex.key,
+                coordinates)
+
+    def get_hash(self, placement, start_addr):
+        """
+        Returns the hexadecimal hash of the inputs of the data of the core of
+        the placement, whose image starts at start_addr
+        """
+        core_hash = self.hash.copy()
+        describer = Describer(core_hash, self.vertex_indices,
+                              self.edge_indices)
+        subvertex = placement.subvertex
+        describer.describe((placement.processor.get_coordinates(), start_addr,
+                            self.vertex_digests[id(subvertex.vertex)],
+                            subvertex.lo_atom, subvertex.hi_atom,
+                            subvertex.key, subvertex.resources))
+        for subedge in subvertex.in_subedges:
+            describer.describe(("in", self.edge_digests[id(subedge.edge)],
+                                self.describe_end(subedge.presubvertex),
+                                subedge.key, subedge.mask,
+                                subedge.key_mask_combo, subedge.pruneable))
+            if hasattr(subedge, "get_synapse_sublist"):
+                describer.describe(subedge.get_synapse_sublist())
+        for subedge in subvertex.out_subedges:
+            describer.describe(("out", self.edge_digests[id(subedge.edge)],
+                                self.describe_end(subedge.postsubvertex),
+                                subedge.key, subedge.mask,
+                                subedge.key_mask_combo, subedge.pruneable))
+            synapse_list = getattr(subedge.edge, "synapse_list", None)
+            if synapse_list is not None:
+                post = subedge.postsubvertex
+                describer.describe(synapse_list.create_atom_sublist(
+                    subvertex.lo_atom, subvertex.hi_atom, post.lo_atom,
+                    post.hi_atom))
+        return core_hash.hexdigest()
+
+
+def get_random_states():
+    """
+    Returns the states of the global random number generators
+    """
+    return numpy.random.get_state(), random.getstate()
+
+
+def random_states_equal(states, other_states):
+    (numpy_state, python_state) = states
+    (other_numpy_state, other_python_state) = other_states
+    return (python_state == other_python_state and
+            all([numpy.array_equal(item, other_item)
+                 for item, other_item in zip(numpy_state,
+                                             other_numpy_state)]))
+
+
+def describe_memory_map(memory_slots):
+    """
+    Returns the memory map of the slots of a spec executor, as kept in
+    dao.memMaps, with the memory of each slot replaced by whether it is
+    written to the image
+    """
+    in_image = set([id(slot) for slot in memory_slots._utilised_regions])
+    return [[i, s.wr_ptr_aligned, s.wr_ptr_offset, s.size, id(s) in in_image,
+             s.unfilled]
+            if s is not None else [i, 0, 0, 0, False, False]
+            for (i, s) in enumerate(memory_slots)]
+
+
+def restore_memory_map(description, f_out):
+    """
+    Returns the memory map of describe_memory_map, with the memory of each
+    slot read back from the image
+    """
+    image = numpy.fromfile(f_out, dtype='uint32')
+    offset = 0
+    memory_map = list()
+    for (i, wr_ptr_aligned, wr_ptr_offset, size, in_image, unfilled) in \
+            description:
+        if size == 0:
+            memory = []
+        elif in_image:
+            memory = image[offset:offset + size].copy()
+            offset += size
+        else:
+            memory = numpy.zeros(size, dtype='uint32')
+        memory_map.append([i, wr_ptr_aligned, wr_ptr_offset, size, memory,
+                           unfilled])
+    return memory_map
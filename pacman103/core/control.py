@@ -6,8 +6,10 @@ from pacman103.core.spinnman.interfaces.iptag import IPTag
 
 from pacman103.core import dao, output_generator, reports
 from pacman103.core.mapper import partitioner_algorithms, \
-    placer_algorithms, key_allocator_algorithms, routing_algorithms
+    placer_algorithms, placement_refinement_algorithms, \
+    key_allocator_algorithms, routing_algorithms
 from pacman103.core.mapper.router.router import Router
+from pacman103.core.mapper.mapping_cache import MappingCache
 
 from pacman103 import conf
 from pacman103.core.process_bar import ProgressBar
@@ -44,6 +46,10 @@ class Controller(object):
         placer_algorithms, "Placer"
     )
 
+    placement_refiners_list = conf.get_valid_components(
+        placement_refinement_algorithms, "Refiner"
+    )
+
     key_allocator_algorithms_list = conf.get_valid_components(
         key_allocator_algorithms, "KeyAllocator"
     )
@@ -142,7 +148,9 @@ class Controller(object):
         Loads the simulation executables and data structures to the board via
         the transceiver.
         """
-        self.txrx.load_targets(self.dao)
+        statistics = self.txrx.load_targets(self.dao)
+        if conf.config.getboolean("Reports", "reportsEnabled"):
+            reports.generate_load_report(self.dao, statistics)
 
     def map_model(self):
         """Map an input graph to a SpiNNaker machine via the partitioning,
@@ -162,8 +170,19 @@ class Controller(object):
         if enabledReports:
             reports.generate_network_report(self.dao)
             reports.generate_machine_report(self.dao)
+
+        #restore the mapping of the same network to the same machine if it
+        # has been cached, setting the flags of the stages restored
+        mapping_cache = None
+        restored = False
+        if not self.dao.done_partitioner:
+            mapping_cache = MappingCache.from_config()
+        if mapping_cache is not None:
+            fingerprint, restored = mapping_cache.load(self.dao)
+
         #check if each flag has been set before running a method
         #partitioning verts into subverts
+        placing = not self.dao.done_placer
         if not self.dao.done_partitioner:
             self.execute_partitioning()
 
@@ -171,6 +190,10 @@ class Controller(object):
         # (can be done by preivous systems if merged)
         if not self.dao.done_placer:
             self.execute_placer()
+
+        # refining the placements made, before keys are allocated from them
+        if placing:
+            self.execute_placement_refinement(enabledReports)
         if enabledReports:
             reports.generate_placement_reports(self.dao)
 
@@ -186,6 +209,9 @@ class Controller(object):
         if enabledReports:
             reports.generate_routing_report(self.dao)
 
+        if mapping_cache is not None and not restored:
+            mapping_cache.save(self.dao, fingerprint)
+
         #if not self.dao.done_inverse_mapper:
         #    InverseMapper.build_inverse_map(self.dao)
         if enabledReports:
@@ -216,6 +242,22 @@ class Controller(object):
             raise ValueError("Invalid partitioner algorithm specified. "
                              " I don't know '%s'." % e)
 
+    def execute_placement_refinement(self, enabledReports):
+        """Handle the execution of the placement refiner, if there is one
+        """
+        refiner_name = conf.config.get("Placer", "refiner")
+        if refiner_name == "None":
+            return
+        try:
+            refiner_class = Controller.placement_refiners_list[refiner_name]
+        except KeyError as e:
+            raise ValueError("Invalid placement refiner specified. "
+                             " I don't know '%s'." % e)
+        statistics = refiner_class(self.dao).refine()
+        if enabledReports:
+            reports.generate_placement_refinement_report(self.dao,
+                                                         statistics)
+
     def execute_key_alloc(self):
         """Handle the execution of a key allocator
         """
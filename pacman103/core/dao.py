@@ -66,6 +66,8 @@ class DAO( object ):
         self.memMaps = dict()
         self.specExecutor = data_spec_executor.SpecExecutor()
         self.useHostBasedSpecExecutor = True
+        self.specExecDirect = True
+        self.writeExecutedSpecs = False
         self.rngs = dict()
         self.randDists = dict()
         self.writeTextSpecs = True
@@ -484,6 +484,13 @@ class SpecExecutor(object):
         if not self.use_src1_reg:
             region = (self.cmd >> 8) & 0xF
 
+        self.switch_focus(region)
+
+    def switch_focus(self, region):
+        """Switch the current memory focus to the given region.
+
+        Used directly by a DataSpec to avoid encoding a SWITCH_FOCUS command.
+        """
         if self.memory_slots[region] is None:
             raise Exception(
                 "Switching focus to unreserved memory region [%d]." % region
@@ -512,25 +519,53 @@ class SpecExecutor(object):
         data_len = 2 ** ((self.cmd >> 12) & 0x3)  # 2 bit field for length
 
         # Perform the writes
-        self._write_to_mem_array(
-            value=value, n_bytes=data_len, repeat=n_repeats
-        )
+        self.write_value(value, data_len, n_repeats)
+
+    def write_value(self, value, n_bytes, repeat=1):
+        """Write a value of the given size in bytes one or more times to the
+        current memory region.
+
+        Used directly by a DataSpec to avoid encoding a WRITE command.
+        """
+        memory_slot = self.current_memory
+        if (n_bytes == 4 and repeat > 1 and memory_slot.wr_ptr_offset == 0):
+            # Aligned repeated words can be filled in one go
+            aligned = memory_slot.wr_ptr_aligned
+            if aligned + repeat > memory_slot.size:
+                raise exceptions.SpecExecCmdException(
+                    "Cannot write %d words from word %d of memory slot of "
+                    "size %d." % (repeat, aligned, memory_slot.size)
+                )
+            memory_slot.memory[aligned:aligned + repeat] = value & 0xFFFFFFFF
+            memory_slot.wr_ptr_aligned = aligned + repeat
+        else:
+            self._write_to_mem_array(
+                value=value, n_bytes=n_bytes, repeat=repeat
+            )
 
     @implements("WRITE_ARRAY")
     def _write_array(self):
         """Write a block of binary words data to memory.
         """
+        length = self.spec_strm[self.program_counter + 1] - 1
+        self.write_words(self.spec_strm[
+            self.program_counter+2:self.program_counter+length+2
+        ])
+
+    def write_words(self, words):
+        """Copy an array of words to the current memory region.
+
+        Used directly by a DataSpec to avoid encoding a WRITE_ARRAY command.
+        """
         if self.current_memory.wr_ptr_offset != 0:
             raise Exception("Not aligned to word boundary before WRITE_ARRAY.")
 
         # Get the length and aligned write pointer
         aligned = self.current_memory.wr_ptr_aligned
-        length = self.spec_strm[self.program_counter + 1] - 1
+        length = len(words)
 
         # Perform the copy
-        self.current_memory.memory[aligned:aligned + length] = self.spec_strm[
-            self.program_counter+2:self.program_counter+length+2
-        ]
+        self.current_memory.memory[aligned:aligned + length] = words
 
         # Write back the aligned pointer
         self.current_memory.wr_ptr_aligned += length
@@ -1 +1,2 @@
-from pacman103.core.mapper.key_allocator_algorithms.basic_key_allocator import BasicKeyAllocator
\ No newline at end of file
+from pacman103.core.mapper.key_allocator_algorithms.basic_key_allocator import BasicKeyAllocator
+from pacman103.core.mapper.key_allocator_algorithms.population_block_key_allocator import PopulationBlockKeyAllocator
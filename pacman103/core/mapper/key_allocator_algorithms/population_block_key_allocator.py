@@ -0,0 +1,137 @@
+import logging
+
+from pacman103.core import exceptions
+from pacman103.core.mapper.key_allocator_algorithms.basic_key_allocator \
+    import BasicKeyAllocator
+from pacman103.core.utilities import packet_conversions
+
+logger = logging.getLogger(__name__)
+
+
+class PopulationBlockKeyAllocator(BasicKeyAllocator):
+    """
+    Allocates the keys of the subvertices of each vertex from a block of keys
+    aligned to a power of two, so that the routing entries of sibling
+    subvertices with the same route can be merged into a single entry with
+    a wider mask by the routing table minimiser.
+
+    The keys are still of the form made from the coordinates of a core,
+    x << 24 | y << 16 | p << 11, but of a virtual core of a virtual 8 x 8
+    machine with 16 cores per chip, so that each key still indexes a
+    distinct entry of the master population table.  The virtual cores are
+    numbered by slot = x << 7 | y << 4 | p, so a block of slots aligned to a
+    power of two is matched by a single key and mask.
+
+    Only the subvertices whose vertices send packets with the key of their
+    core and the default mask are given a block; the keys of any other
+    subvertices, such as those of external devices, are kept and the slots
+    whose keys they match are left unused.
+    """
+
+    X_CHIPS = 8
+    Y_CHIPS = 8
+    CORES_PER_CHIP = 16
+    N_SLOTS = X_CHIPS * Y_CHIPS * CORES_PER_CHIP
+
+    def allocate_keys(self):
+        logger.info("* Running key allocator *")
+        subverts = self.dao.get_subvertices()
+        self.dao.inverseMap = dict()
+        self.allocate_blocks(subverts)
+        self.allocate_raw(subverts)
+
+    def allocate_raw(self, subverts):
+        BasicKeyAllocator.allocate_raw(self, subverts)
+        for subvert in subverts:
+            if subvert.key is None:
+                continue
+            for subedge in subvert.out_subedges:
+                if subedge.key != subvert.key:
+                    raise exceptions.KallocException(
+                        "Subvertex {} of {} does not send packets with the "
+                        "key allocated to it".format(subvert.lo_atom,
+                                                     subvert.vertex.label))
+
+    def allocate_blocks(self, subverts):
+        """
+        Allocates a block of keys to the subvertices of each vertex which
+        send packets with the default key of their core, setting the key of
+        each of these subvertices, and returns the list of (key, mask) of
+        the blocks allocated
+        """
+        default_mask = packet_conversions.get_default_mask()
+        used_slots = [False] * self.N_SLOTS
+        subverts_of_vertex = dict()
+        vertices = list()
+        for subvert in subverts:
+            subvert.key = None
+            if subvert.placement is None or len(subvert.out_subedges) == 0:
+                continue
+            x, y, p = subvert.placement.processor.get_coordinates()
+            core_key = packet_conversions.get_key_from_coords(x, y, p)
+            routing_info = set([subvert.vertex.generate_routing_info(subedge)
+                                for subedge in subvert.out_subedges])
+            if (subvert.vertex.virtual or
+                    routing_info != set([(core_key, default_mask)])):
+
+                # The subvertex keeps its keys, so no block may overlap them
+                for (key, mask) in routing_info:
+                    self.reserve_slots(used_slots, key, mask)
+                continue
+            if subvert.vertex not in subverts_of_vertex:
+                subverts_of_vertex[subvert.vertex] = list()
+                vertices.append(subvert.vertex)
+            subverts_of_vertex[subvert.vertex].append(subvert)
+
+        # Place the largest blocks first, so that the smaller ones fill the
+        # gaps left between them
+        vertices.sort(key=lambda vertex: -len(subverts_of_vertex[vertex]))
+        blocks = list()
+        for vertex in vertices:
+            vertex_subverts = sorted(subverts_of_vertex[vertex],
+                                     key=lambda subvert: subvert.lo_atom)
+            block_size = 1
+            while block_size < len(vertex_subverts):
+                block_size <<= 1
+            first_slot = self.find_free_block(used_slots, block_size)
+            if first_slot is None:
+                raise exceptions.KallocException(
+                    "No block of {} keys is free for the subvertices of "
+                    "{}".format(block_size, vertex.label))
+            for slot in range(first_slot, first_slot + block_size):
+                used_slots[slot] = True
+            for index, subvert in enumerate(vertex_subverts):
+                subvert.key = self.get_key_of_slot(first_slot + index)
+            block_mask = default_mask & ~self.get_key_of_slot(block_size - 1)
+            blocks.append((self.get_key_of_slot(first_slot), block_mask))
+            logger.debug("allocated keys {:08x}/{:08x} to {}".format(
+                blocks[-1][0], block_mask, vertex.label))
+        return blocks
+
+    def reserve_slots(self, used_slots, key, mask):
+        """
+        Marks the slots whose keys are matched by the key and mask as used
+        """
+        mask &= packet_conversions.get_default_mask()
+        for slot in range(self.N_SLOTS):
+            if (self.get_key_of_slot(slot) ^ key) & mask == 0:
+                used_slots[slot] = True
+
+    @staticmethod
+    def find_free_block(used_slots, block_size):
+        """
+        Returns the first slot of the first free block of slots of the given
+        size aligned to its size, or None if there is none
+        """
+        for first_slot in range(0, len(used_slots), block_size):
+            if not any(used_slots[first_slot:first_slot + block_size]):
+                return first_slot
+        return None
+
+    @staticmethod
+    def get_key_of_slot(slot):
+        """
+        Returns the key of the virtual core with the slot number
+        """
+        return packet_conversions.get_key_from_coords(
+            slot >> 7, (slot >> 4) & 0x7, slot & 0xF)
@@ -0,0 +1,497 @@
+"""
+A cache of the results of mapping a network to a machine, so that running a
+script again on the same board does not partition, place, allocate keys and
+route its network again.
+
+Each entry is stored in a file named by the fingerprint of the network,
+machine and configuration it was made from.  The fingerprint is a SHA-1 hash
+of a canonical description of:
+
+* the vertices and edges in the order they were added, with all of their
+  attributes, including the connectors, their seeds and the synapse lists
+  that they generated, and the constraints;
+* the [Machine], [Routing], [Placer], [Partitioner] and [Key_allocator]
+  sections of the config, and the run time and machine time step;
+* the chips, cores and working links of the machine;
+* the source of the mapper and of the classes of the vertices and edges.
+
+So the entry of a network is invalidated whenever any of these change,
+including when a connector without a seed draws different connections.  An
+entry which cannot be restored is deleted and the network mapped again.  The
+least recently used entries are deleted when there are more than the
+maximum number.
+"""
+
+import cPickle as pickle
+import glob
+import hashlib
+import inspect
+import logging
+import os
+
+import numpy
+
+from pacman103 import conf
+from pacman103.lib import graph, lib_map
+
+logger = logging.getLogger(__name__)
+
+CONFIG_SECTIONS = ("Machine", "Routing", "Placer", "Partitioner",
+                   "Key_allocator")
+
+#attributes of the graph objects which hold the results of mapping
+MAPPING_ATTRIBUTES = ("subvertices", "in_edges", "out_edges", "subedges")
+
+
+class MappingCache(object):
+    """
+    A directory of the results of mapping networks, holding at most
+    max_entries of them.
+
+    :param string directory: the directory of the entries.
+    :param int max_entries: the most entries to keep.
+    """
+
+    #the version of the format of the entries, which invalidates all the
+    # entries when changed
+    VERSION = 1
+    SUFFIX = ".mapping"
+
+    def __init__(self, directory, max_entries):
+        self.directory = directory
+        self.max_entries = max_entries
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def from_config():
+        """
+        Returns the mapping cache set up in the [Mapping_cache] section of
+        the config, or None if it is not enabled
+        """
+        if not conf.config.getboolean("Mapping_cache", "enable"):
+            return None
+        directory = conf.config.get("Mapping_cache", "directory")
+        if directory == "None":
+            components = os.path.abspath(lib_map.__file__).split(os.sep)
+            directory = os.path.join(
+                os.sep, *(components[1:components.index("pacman103")] +
+                          ["mapping_cache"]))
+        return MappingCache(directory,
+                            conf.config.getint("Mapping_cache", "max_entries"))
+
+    def get_path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + self.SUFFIX)
+
+    def load(self, dao):
+        """
+        Restores the results of mapping the network of the datastore if they
+        are in the cache, setting the done flags of the mapping stages, and
+        returns the fingerprint of the network and whether they were restored
+        """
+        fingerprint = get_fingerprint(dao)
+        path = self.get_path(fingerprint)
+        if not os.path.exists(path):
+            logger.info("Mapping cache miss for {}".format(fingerprint))
+            return fingerprint, False
+        try:
+            with open(path, "rb") as entry_file:
+                entry = pickle.load(entry_file)
+            if entry["version"] != self.VERSION:
+                raise ValueError("entry of version {}".format(
+                    entry["version"]))
+            restore_mapping(dao, entry)
+        except Exception as e:
+            logger.warning("Could not restore mapping {} from the cache, "
+                           "mapping again: {}".format(fingerprint, e))
+            os.remove(path)
+            return fingerprint, False
+
+        #mark the entry as most recently used
+        os.utime(path, None)
+        logger.info("Mapping cache hit for {}".format(fingerprint))
+        return fingerprint, True
+
+    def save(self, dao, fingerprint):
+        """
+        Stores the results of mapping the network of the datastore under its
+        fingerprint, and deletes the least recently used entries if there are
+        then too many
+        """
+        entry = describe_mapping(dao)
+        entry["version"] = self.VERSION
+        path = self.get_path(fingerprint)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as entry_file:
+            pickle.dump(entry, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(temporary_path, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used entries until there are at most
+        max_entries
+        """
+        paths = sorted(glob.glob(os.path.join(self.directory,
+                                              "*" + self.SUFFIX)),
+                       key=os.path.getmtime)
+        for path in paths[:max(len(paths) - self.max_entries, 0)]:
+            logger.debug("Evicting {} from the mapping cache".format(path))
+            os.remove(path)
+
+
+def get_fingerprint(dao):
+    """
+    Returns the hexadecimal SHA-1 hash of the network of the datastore, the
+    machine it is mapped to and the configuration of the mapper
+    """
+    fingerprint = hashlib.sha1()
+    vertices = get_vertices(dao)
+    vertex_indices = dict([(id(vertex), index)
+                           for index, vertex in enumerate(vertices)])
+    edge_indices = dict([(id(edge), index)
+                         for index, edge in enumerate(dao.edges)])
+    describer = Describer(fingerprint, vertex_indices, edge_indices)
+
+    fingerprint.update("version {}\n".format(MappingCache.VERSION))
+    for section in CONFIG_SECTIONS:
+        if conf.config.has_section(section):
+            describer.describe((section, sorted(conf.config.items(section))))
+    describer.describe((dao.run_time, dao.machineTimeStep))
+
+    machine = dao.machine
+    describer.describe((machine.hostname, machine.machine_type,
+                        machine.x_dim, machine.y_dim))
+    for chip in sorted(machine.get_chips_as_list(),
+                       key=lambda chip: (chip.x, chip.y)):
+        describer.describe((chip.x, chip.y, chip.is_virtual(),
+                            sorted([processor.idx
+                                    for processor in chip.get_processors()]),
+                            sorted(chip.router.linksuplist)))
+
+    #the source of the mapper and of the models, so that changes to the way
+    # networks are mapped or to the resources that models need invalidate
+    # the entries
+    mapper_directory = os.path.dirname(os.path.abspath(__file__))
+    source_files = set(glob.glob(os.path.join(mapper_directory, "*.py")) +
+                       glob.glob(os.path.join(mapper_directory, "*", "*.py")))
+    for item in vertices + dao.edges:
+        for cls in inspect.getmro(type(item)):
+            if cls is not object:
+                source_files.add(os.path.abspath(inspect.getsourcefile(cls)))
+    for source_file in sorted(source_files):
+        with open(source_file, "rb") as f:
+            fingerprint.update(hashlib.sha1(f.read()).digest())
+
+    for vertex in vertices:
+        describer.describe_object(vertex)
+    for edge in dao.edges:
+        describer.describe_object(edge)
+    return fingerprint.hexdigest()
+
+
+def get_vertices(dao):
+    """
+    Returns a list of the vertices of the network of the datastore: those
+    added to it, followed by those which are only reached through others,
+    such as the delay extensions, which are partitioned with the vertex they
+    depend on and connected by edges but not added to the datastore
+    """
+    vertices = list()
+    seen = set()
+
+    def add(vertex):
+        if id(vertex) not in seen:
+            seen.add(id(vertex))
+            vertices.append(vertex)
+
+    for vertex in dao.vertices:
+        add(vertex)
+    for vertex in list(vertices):
+        for dependent_vertex in \
+                vertex.get_partition_dependent_vertices() or ():
+            add(dependent_vertex)
+    for edge in dao.edges:
+        add(edge.prevertex)
+        add(edge.postvertex)
+    return vertices
+
+
+class Describer(object):
+    """
+    Feeds a canonical description of values to a hash, in which references
+    to the vertices and edges of the network are replaced by their indices
+    and the excluded attributes, by default the results of mapping, are left
+    out
+    """
+
+    def __init__(self, hash, vertex_indices, edge_indices,
+                 excluded_attributes=MAPPING_ATTRIBUTES):
+        self.hash = hash
+        self.vertex_indices = vertex_indices
+        self.edge_indices = edge_indices
+        self.excluded_attributes = excluded_attributes
+        self.seen = dict()
+
+    def describe_object(self, value):
+        """
+        Describes the attributes of a vertex or edge, rather than a reference
+        to it
+        """
+        self.hash.update("{}.{}{{".format(type(value).__module__,
+                                          type(value).__name__))
+        for name in sorted(value.__dict__):
+            if name not in self.excluded_attributes:
+                self.hash.update(name)
+                self.describe(value.__dict__[name])
+        self.hash.update("}")
+
+    def describe(self, value):
+        update = self.hash.update
+        if value is None or isinstance(value, (bool, int, long, float,
+                                               basestring)):
+            update(repr(value))
+        elif isinstance(value, numpy.ndarray):
+            update("array{}{}".format(value.dtype.str, value.shape))
+            update(numpy.ascontiguousarray(value).tostring())
+        elif isinstance(value, numpy.generic):
+            update(repr(value.item()))
+        elif isinstance(value, (list, tuple)):
+            update("[")
+            for item in value:
+                self.describe(item)
+                update(",")
+            update("]")
+        elif isinstance(value, (set, frozenset)):
+            update("set" + repr(sorted([repr(item) for item in value])))
+        elif isinstance(value, graph.Vertex):
+            update("vertex{}".format(self.vertex_indices.get(id(value))))
+        elif isinstance(value, graph.Edge):
+            update("edge{}".format(self.edge_indices.get(id(value))))
+        elif isinstance(value, (graph.Subvertex, graph.Subedge)):
+            update(type(value).__name__)
+        elif id(value) in self.seen:
+            update("seen{}".format(self.seen[id(value)]))
+        elif isinstance(value, dict):
+            self.seen[id(value)] = len(self.seen)
+            update("{")
+            for key in sorted(value, key=repr):
+                update(repr(key))
+                self.describe(value[key])
+            update("}")
+        elif isinstance(value, numpy.random.RandomState):
+            self.seen[id(value)] = len(self.seen)
+            self.describe(value.get_state())
+        elif inspect.ismodule(value) or inspect.isclass(value) or \
+                inspect.isroutine(value):
+            update("{}.{}".format(getattr(value, "__module__", None),
+                                  getattr(value, "__name__", None)))
+        elif hasattr(value, "__dict__"):
+            self.seen[id(value)] = len(self.seen)
+            self.describe_object(value)
+        else:
+            update(type(value).__name__)
+
+
+def describe_mapping(dao):
+    """
+    Returns a dictionary of the results of mapping the network of the
+    datastore, in which the vertices, edges, subvertices and subedges are
+    referred to by their indices
+    """
+    vertex_indices = dict([(id(vertex), index)
+                           for index, vertex in enumerate(get_vertices(dao))])
+    edge_indices = dict([(id(edge), index)
+                         for index, edge in enumerate(dao.edges)])
+    subvertex_indices = dict([(id(subvertex), index)
+                              for index, subvertex in
+                              enumerate(dao.subvertices)])
+
+    #the subedges are held in the order they were made, which is the order
+    # of their subvertices, including those pruned before routing
+    all_subedges = [subedge for subvertex in dao.subvertices
+                    for subedge in subvertex.out_subedges]
+    subedge_indices = dict([(id(subedge), index)
+                            for index, subedge in enumerate(all_subedges)])
+    pruned = set([id(subedge) for subedge in all_subedges
+                  if subedge.pruneable])
+
+    routers = list()
+    for chip in dao.machine.get_chips_as_list():
+        router = chip.router
+        if len(router.cam) == 0 and router.minimised_table is None:
+            continue
+        minimised_table = None
+        if router.minimised_table is not None:
+            minimised_table = [describe_entry(entry)
+                               for entry in router.minimised_table]
+        routers.append({
+            'coords': (chip.x, chip.y),
+            'cam': [(cam_key, [describe_entry(entry) for entry in entries])
+                    for cam_key, entries in router.cam.items()],
+            'minimised_table': minimised_table,
+            'occupancy': router.occupancy,
+            'masks_used': router.masks_used})
+
+    return {
+        'subvertices': [(vertex_indices[id(subvertex.vertex)],
+                         subvertex.lo_atom, subvertex.hi_atom,
+                         subvertex.resources, subvertex.key)
+                        for subvertex in dao.subvertices],
+        'subedges': [(edge_indices[id(subedge.edge)],
+                      subvertex_indices[id(subedge.presubvertex)],
+                      subvertex_indices[id(subedge.postsubvertex)],
+                      subedge.key, subedge.mask, subedge.key_mask_combo,
+                      id(subedge) in pruned)
+                     for subedge in all_subedges],
+        'placements': [(subvertex_indices[id(placement.subvertex)],
+                        placement.processor.get_coordinates())
+                       for placement in dao.placements],
+        'inverse_map': dict([(key_mask_combo,
+                              [subedge_indices[id(subedge)]
+                               for subedge in subedges])
+                             for key_mask_combo, subedges in
+                             dao.inverseMap.items()]),
+        'used_masks': dao.used_masks,
+        'routers': routers}
+
+
+def describe_entry(entry):
+    return (entry.key, entry.original_key, entry.mask, entry.route,
+            entry.defaultable)
+
+
+def restore_entry(router, description):
+    (key, original_key, mask, route, defaultable) = description
+    entry = lib_map.RoutingEntry(router, key, original_key, mask)
+    entry.route = route
+    entry.defaultable = defaultable
+    return entry
+
+
+def check_entry(dao, vertices, entry):
+    """
+    Checks that an entry of describe_mapping can be restored to the network
+    of the datastore, before anything is made from it
+
+    :raises ValueError: if it cannot
+    """
+    for item in vertices + dao.edges:
+        if len(item.subvertices if isinstance(item, graph.Vertex)
+               else item.subedges) != 0:
+            raise ValueError("the network has already been mapped")
+
+    def check_index(index, items, name):
+        if not 0 <= index < len(items):
+            raise ValueError("{} {} is not in the network".format(name,
+                                                                   index))
+
+    for description in entry['subvertices']:
+        check_index(description[0], vertices, "vertex")
+    for description in entry['subedges']:
+        check_index(description[0], dao.edges, "edge")
+        check_index(description[1], entry['subvertices'], "subvertex")
+        check_index(description[2], entry['subvertices'], "subvertex")
+    for (subvertex_index, (x, y, p)) in entry['placements']:
+        check_index(subvertex_index, entry['subvertices'], "subvertex")
+        if (not dao.machine.chip_exists_at(x, y) or
+                p not in [processor.idx for processor in
+                          dao.machine.get_chip(x, y).get_processors()]):
+            raise ValueError("processor {}, {}, {} is not in the "
+                             "machine".format(x, y, p))
+    for description in entry['routers']:
+        if not dao.machine.chip_exists_at(*description['coords']):
+            raise ValueError("chip {}, {} is not in the machine".format(
+                *description['coords']))
+    for indices in entry['inverse_map'].values():
+        for index in indices:
+            check_index(index, entry['subedges'], "subedge")
+
+
+def restore_mapping(dao, entry):
+    """
+    Recreates the subvertices, subedges, placements, keys and routing tables
+    described by describe_mapping in the datastore, and sets the done flags
+    of the mapping stages.  The entry is checked before anything is made
+    from it, and anything made is undone if it still cannot be restored, so
+    that the network can be mapped again.
+
+    The routes of the subedges, which are only used by the reports, are not
+    restored.
+    """
+    vertices = get_vertices(dao)
+    check_entry(dao, vertices, entry)
+
+    routers = [dao.machine.get_chip(*description['coords']).router
+               for description in entry['routers']]
+    router_states = [(router.cam, router.minimised_table, router.occupancy,
+                      router.masks_used) for router in routers]
+    try:
+        restore_graph(dao, vertices, entry, routers)
+    except Exception:
+        for vertex in vertices:
+            vertex.subvertices = list()
+        for edge in dao.edges:
+            edge.subedges = list()
+        for (router, (cam, minimised_table, occupancy, masks_used)) in \
+                zip(routers, router_states):
+            router.cam = cam
+            router.minimised_table = minimised_table
+            router.occupancy = occupancy
+            router.masks_used = masks_used
+        raise
+
+
+def restore_graph(dao, vertices, entry, routers):
+    subvertices = list()
+    for (vertex_index, lo_atom, hi_atom, resources, key) in \
+            entry['subvertices']:
+        subvertex = graph.Subvertex(vertices[vertex_index], lo_atom,
+                                    hi_atom, resources)
+        subvertex.key = key
+        subvertices.append(subvertex)
+
+    all_subedges = list()
+    subedges = list()
+    for (edge_index, pre_index, post_index, key, mask, key_mask_combo,
+         pruneable) in entry['subedges']:
+        subedge = dao.edges[edge_index].create_subedge(
+            subvertices[pre_index], subvertices[post_index])
+        subedge.key = key
+        subedge.mask = mask
+        subedge.key_mask_combo = key_mask_combo
+        subedge.pruneable = pruneable
+        all_subedges.append(subedge)
+        if not pruneable:
+            subedges.append(subedge)
+
+    placements = list()
+    for (subvertex_index, (x, y, p)) in entry['placements']:
+        placements.append(lib_map.Placement(
+            subvertices[subvertex_index], dao.machine.get_processor(x, y, p)))
+
+    for (router, description) in zip(routers, entry['routers']):
+        router.cam = dict()
+        for (cam_key, entries) in description['cam']:
+            router.cam[cam_key] = [restore_entry(router, entry_description)
+                                   for entry_description in entries]
+        router.minimised_table = None
+        if description['minimised_table'] is not None:
+            router.minimised_table = [
+                restore_entry(router, entry_description)
+                for entry_description in description['minimised_table']]
+        router.occupancy = description['occupancy']
+        router.masks_used = description['masks_used']
+
+    dao.subvertices = subvertices
+    dao.subedges = subedges
+    dao.placements = placements
+    dao.inverseMap = dict([(key_mask_combo,
+                            [all_subedges[index] for index in indices])
+                           for key_mask_combo, indices in
+                           entry['inverse_map'].items()])
+    dao.used_masks = entry['used_masks']
+    dao.done_partitioner = True
+    dao.done_placer = True
+    dao.done_key_allocation = True
+    dao.done_router = True
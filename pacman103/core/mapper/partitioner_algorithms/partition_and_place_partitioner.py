@@ -33,6 +33,8 @@ class PartitionAndPlacePartitioner(AbstractPartitioner):
                               " I don't know '%s'." % e)
             
         self.progress = None
+        self.resource_estimates_key = None
+        self.resource_estimates = dict()
 
     def partition(self):
         """
@@ -99,6 +101,7 @@ class PartitionAndPlacePartitioner(AbstractPartitioner):
             n_atoms += vertex.atoms
         self.progress = ProgressBar(n_atoms)
         self.partitioned = dict()
+        self.resource_estimates_key = None
 
         # Partition one vertex at a time
         for vertex in vertices:
@@ -221,8 +224,8 @@ class PartitionAndPlacePartitioner(AbstractPartitioner):
             partition_data_object = partition_data_objects[i]
             
             resources = placer.get_maximum_resources(vertex.constraints)
-            used_resources = vertex.get_resources_for_atoms(lo_atom, hi_atom,
-                no_machine_time_steps, machine_time_step_us, 
+            used_resources = self.get_resources_for_atoms(vertex, lo_atom,
+                hi_atom, no_machine_time_steps, machine_time_step_us, 
                 partition_data_object)
             ratio = self.find_max_ratio(used_resources, resources)
             
@@ -243,10 +246,10 @@ class PartitionAndPlacePartitioner(AbstractPartitioner):
                 # Find the new resource usage
                 hi_atom = lo_atom + new_n_atoms - 1
                 used_resources = \
-                    vertex.get_resources_for_atoms(lo_atom, hi_atom,
-                                                   no_machine_time_steps,
-                                                   machine_time_step_us,
-                                                   partition_data_object)
+                    self.get_resources_for_atoms(vertex, lo_atom, hi_atom,
+                                                 no_machine_time_steps,
+                                                 machine_time_step_us,
+                                                 partition_data_object)
                 ratio = self.find_max_ratio(used_resources, resources)
               
             # If we couldn't partition, raise and exception
@@ -293,29 +296,78 @@ class PartitionAndPlacePartitioner(AbstractPartitioner):
         '''
         tries to psuh the number of atoms into a subvertex as it can
          with the estimates
+
+        This finds the same hi_atom as adding one atom at a time until the
+        ratio reaches 1.0 or the limits on the atoms are reached, keeping the
+        hi_atom before the last one added, but as the resources used only
+        grow with the number of atoms, it searches for the first hi_atom at
+        which the ratio reaches 1.0 with an exponential search followed by a
+        binary search, estimating the resources O(log n) times instead of
+        O(n) times.
         '''
         
-        previous_used_resources = used_resources
-        previous_hi_atom = hi_atom
-        while ((ratio < 1.0) and ((hi_atom + 1) < vertex.atoms)
-                and ((hi_atom - lo_atom + 2) < max_atoms_per_core)):
+        # The atoms are only added while both the subvertex holds fewer than
+        # max_atoms_per_core - 1 atoms and atoms remain
+        last_hi_atom = max(hi_atom, min(vertex.atoms - 1,
+                                        lo_atom + max_atoms_per_core - 2))
+        if ratio >= 1.0 or last_hi_atom == hi_atom:
+            return used_resources, hi_atom
 
-            #logger.debug("Scaling up - Current subvertex from"
-            #    " %d to %d of %d, ratio = %f, resources = %s" % (lo_atom,
-            #             hi_atom, no_atoms, ratio, used_resources))
+        def get_ratio(hi_atom):
+            return self.find_max_ratio(self.get_resources_for_atoms(
+                    vertex, lo_atom, hi_atom, no_machine_time_steps,
+                    machine_time_step_us, partition_data_object), resources)
 
-            previous_hi_atom = hi_atom
-            hi_atom += 1
+        # Find a hi_atom at which the ratio reaches 1.0, if there is one, by
+        # doubling the number of atoms added, then find the first such
+        # hi_atom, the ratio being below 1.0 at fit_hi_atom
+        fit_hi_atom = hi_atom
+        step = 1
+        full_hi_atom = None
+        while full_hi_atom is None and fit_hi_atom < last_hi_atom:
+            next_hi_atom = min(fit_hi_atom + step, last_hi_atom)
+            if get_ratio(next_hi_atom) < 1.0:
+                fit_hi_atom = next_hi_atom
+                step *= 2
+            else:
+                full_hi_atom = next_hi_atom
+        if full_hi_atom is not None:
+            while full_hi_atom - fit_hi_atom > 1:
+                middle_hi_atom = (fit_hi_atom + full_hi_atom) // 2
+                if get_ratio(middle_hi_atom) < 1.0:
+                    fit_hi_atom = middle_hi_atom
+                else:
+                    full_hi_atom = middle_hi_atom
+            stop_hi_atom = full_hi_atom
+        else:
+            stop_hi_atom = last_hi_atom
 
-            # Find the new resource usage
-            previous_used_resources = used_resources
-            used_resources = \
-                vertex.get_resources_for_atoms(lo_atom, hi_atom,
-                                               no_machine_time_steps,
-                                               machine_time_step_us,
-                                               partition_data_object)
-            ratio = self.find_max_ratio(used_resources, resources)
-        return previous_used_resources, previous_hi_atom
+        # The hi_atom before the one at which atoms stopped being added
+        hi_atom = stop_hi_atom - 1
+        return (self.get_resources_for_atoms(vertex, lo_atom, hi_atom,
+                                             no_machine_time_steps,
+                                             machine_time_step_us,
+                                             partition_data_object),
+                hi_atom)
+
+    def get_resources_for_atoms(self, vertex, lo_atom, hi_atom,
+                                no_machine_time_steps, machine_time_step_us,
+                                partition_data_object):
+        '''
+        returns the resources of the vertex for a range of atoms, remembering
+        the resources of each range of the current lo_atom of the vertex, as
+        the searches for the number of atoms to place estimate some ranges
+        more than once
+        '''
+        key = (id(vertex), lo_atom)
+        if self.resource_estimates_key != key:
+            self.resource_estimates_key = key
+            self.resource_estimates = dict()
+        if hi_atom not in self.resource_estimates:
+            self.resource_estimates[hi_atom] = vertex.get_resources_for_atoms(
+                    lo_atom, hi_atom, no_machine_time_steps,
+                    machine_time_step_us, partition_data_object)
+        return self.resource_estimates[hi_atom]
 
 
     def partition_virtual_vertexes(self, vertex, placements, subvertices,
@@ -0,0 +1 @@
+from pacman103.core.mapper.placement_refinement_algorithms.annealing_refiner import AnnealingRefiner
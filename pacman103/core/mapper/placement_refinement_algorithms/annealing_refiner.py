@@ -0,0 +1,447 @@
+import logging
+import math
+import random
+import time
+
+from pacman103 import conf
+from pacman103.core.mapper.placer_algorithms.basic_placer import \
+    SDRAM_AVAILABLE
+from pacman103.lib import lib_map
+
+logger = logging.getLogger(__name__)
+
+#the occupant of a core used by a subvertex which is not moved
+FIXED = -1
+
+
+class PlacementStatistics(object):
+    """
+    Estimates of the traffic of a placement, routing the packets of each
+    subvertex along a shortest-path tree to the chips of its postsubvertices:
+
+    * total_hops: the number of hops of the subedges;
+    * weighted_hops: the hops of the subedges weighted by their synapses,
+      which the refiner minimises;
+    * peak_link_load: the most routes which cross any link;
+    * max_router_entries: the most routes which reach any router, each
+      needing an entry.
+    """
+
+    def __init__(self, total_hops, weighted_hops, peak_link_load,
+                 max_router_entries):
+        self.total_hops = total_hops
+        self.weighted_hops = weighted_hops
+        self.peak_link_load = peak_link_load
+        self.max_router_entries = max_router_entries
+
+
+class RefinementStatistics(object):
+    """
+    The placement statistics before and after refinement, and the moves
+    which were tried and accepted
+    """
+
+    def __init__(self, before, after, n_moves, n_accepted, elapsed,
+                 time_limited):
+        self.before = before
+        self.after = after
+        self.n_moves = n_moves
+        self.n_accepted = n_accepted
+        self.elapsed = elapsed
+        self.time_limited = time_limited
+
+
+class AnnealingRefiner(object):
+    """
+    Refines the placements made by the placer by simulated annealing, moving
+    subvertices to free cores and swapping them between cores to minimise the
+    hops of the subedges weighted by the number of synapses of each.
+
+    Only the subvertices without placement constraints are moved, and a move
+    is only made if it leaves the SDRAM of each chip within what the placer
+    allows, or does not add to it.  The cores of the other subvertices stay
+    as they are.
+
+    The annealing tries n_moves moves, cooling geometrically, unless the time
+    budget runs out first.  The moves are drawn from a generator seeded with
+    seed, so the refinement is the same for the same seed as long as it is
+    not stopped by the time budget.  The placements are left at the lowest
+    weighted hops reached, so they are never made worse.
+
+    :param dao: the datastore of the placements, subvertices and subedges.
+    :param int seed: the seed, read from the [Placer] section if None.
+    :param float time_budget:
+        the most seconds to anneal, read from the [Placer] section if None.
+    :param int n_moves:
+        the number of moves, read from the [Placer] section if None.
+    """
+
+    #the temperature at the end of the annealing, relative to the start
+    FINAL_TEMPERATURE = 0.001
+
+    #the number of moves tried to find the starting temperature
+    N_TEMPERATURE_SAMPLES = 100
+
+    #the probability of accepting the average rise in cost at the start
+    START_ACCEPTANCE = 0.1
+
+    #the number of moves between checks of the cost and the time taken
+    CHECK_INTERVAL = 256
+
+    def __init__(self, dao, seed=None, time_budget=None, n_moves=None):
+        self.dao = dao
+        if seed is None:
+            seed = conf.config.getint("Placer", "annealing_seed")
+        if time_budget is None:
+            time_budget = conf.config.getfloat("Placer",
+                                               "annealing_time_budget")
+        if n_moves is None:
+            n_moves = conf.config.getint("Placer", "annealing_moves")
+        self.seed = seed
+        self.time_budget = time_budget
+        self.n_moves = n_moves
+        self.distances = dict()
+        self.parents = dict()
+
+    def refine(self):
+        """
+        Refines the placements of the datastore, and returns the
+        :py:class:`RefinementStatistics` of the refinement
+        """
+        logger.info("* Running placement refinement *")
+        start_time = time.time()
+        self.read_machine()
+        self.read_placements()
+        self.read_subedges()
+        before = self.get_statistics()
+
+        self.initial_positions = (list(self.chip_of), list(self.core_of))
+        n_moves, n_accepted, time_limited = self.anneal(start_time)
+        self.write_placements()
+
+        after = self.get_statistics()
+        statistics = RefinementStatistics(before, after, n_moves, n_accepted,
+                                          time.time() - start_time,
+                                          time_limited)
+        logger.info("Placement refinement reduced the weighted hops from {} "
+                    "to {} with {} of {} moves".format(
+                        before.weighted_hops, after.weighted_hops, n_accepted,
+                        n_moves))
+        return statistics
+
+    def read_machine(self):
+        """
+        Numbers the chips of the machine, finds the links between them and
+        the cores of the chips on which subvertices can be placed
+        """
+        machine = self.dao.machine
+        coordinates = sorted([(coord['x'], coord['y'])
+                              for coord in machine.get_coords_of_all_chips()])
+        self.chips = [machine.get_chip(x, y) for (x, y) in coordinates]
+        self.chip_indices = dict([(coordinate, i) for (i, coordinate)
+                                  in enumerate(coordinates)])
+
+        # Links are used both ways, even if only listed by one chip
+        self.neighbours = [list() for _ in self.chips]
+        for (i, chip) in enumerate(self.chips):
+            for neighbour in chip.router.get_neighbours():
+                if neighbour is None:
+                    continue
+                j = self.chip_indices.get((neighbour['x'], neighbour['y']))
+                if j is None:
+                    continue
+                if j not in self.neighbours[i]:
+                    self.neighbours[i].append(j)
+                if i not in self.neighbours[j]:
+                    self.neighbours[j].append(i)
+
+        self.real_chips = [i for (i, chip) in enumerate(self.chips)
+                           if not chip.is_virtual()]
+        self.cores = [sorted([processor.idx
+                              for processor in chip.get_processors()])
+                      for chip in self.chips]
+
+    def read_placements(self):
+        """
+        Finds the core and SDRAM of each subvertex, and which subvertices can
+        be moved
+        """
+        self.subvertices = list()
+        self.chip_of = list()
+        self.core_of = list()
+        self.sdram = list()
+        self.subvertex_indices = dict()
+        self.occupants = dict()
+        self.sdram_used = [0] * len(self.chips)
+        for placement in self.dao.placements:
+            subvertex = placement.subvertex
+            x, y, p = placement.processor.get_coordinates()
+            chip = self.chip_indices[(x, y)]
+            index = len(self.subvertices)
+            self.subvertex_indices[id(subvertex)] = index
+            self.subvertices.append(subvertex)
+            self.chip_of.append(chip)
+            self.core_of.append(p)
+            sdram = 0
+            resources = subvertex.get_resources()
+            if isinstance(resources, lib_map.Resources):
+                sdram = resources.sdram
+            self.sdram.append(sdram)
+            self.sdram_used[chip] += sdram
+
+        self.movable = list()
+        for (index, subvertex) in enumerate(self.subvertices):
+            movable = (not subvertex.vertex.is_virtual()
+                       and subvertex.vertex.constraints.placement_cardinality
+                       == 0
+                       and not self.chips[self.chip_of[index]].is_virtual())
+            if movable:
+                self.movable.append(index)
+                self.occupants[(self.chip_of[index], self.core_of[index])] = \
+                    index
+            else:
+                self.occupants[(self.chip_of[index], self.core_of[index])] = \
+                    FIXED
+
+    def read_subedges(self):
+        """
+        Finds the weight of the subedges between each pair of placed
+        subvertices: the number of synapses of the subedges of projections,
+        or otherwise the number of atoms of the presubvertex
+        """
+        weights = dict()
+        subedges = sorted(
+            [subedge for subedge in self.dao.subedges
+             if id(subedge.presubvertex) in self.subvertex_indices
+             and id(subedge.postsubvertex) in self.subvertex_indices],
+            key=lambda subedge: (
+                self.subvertex_indices[id(subedge.postsubvertex)],
+                self.subvertex_indices[id(subedge.presubvertex)]))
+        for subedge in subedges:
+            if hasattr(subedge, "get_n_synapses"):
+                weight = subedge.get_n_synapses()
+            else:
+                weight = subedge.presubvertex.n_atoms
+            if weight > 0:
+                pair = (self.subvertex_indices[id(subedge.presubvertex)],
+                        self.subvertex_indices[id(subedge.postsubvertex)])
+                weights[pair] = weights.get(pair, 0) + weight
+        for subedge in subedges:
+            if hasattr(subedge.edge, "n_connections"):
+                subedge.edge.n_connections = None
+
+        self.weights = sorted(weights.items())
+        self.connections = [list() for _ in self.subvertices]
+        for ((pre, post), weight) in self.weights:
+            if pre != post:
+                self.connections[pre].append((post, weight))
+                self.connections[post].append((pre, weight))
+
+    def get_distances(self, chip):
+        """
+        Returns the number of hops from the chip to each chip, found by a
+        breadth-first search of the links, and remembers the parent of each
+        chip in the search
+        """
+        if chip not in self.distances:
+            unreachable = len(self.chips)
+            distances = [unreachable] * len(self.chips)
+            parents = [None] * len(self.chips)
+            distances[chip] = 0
+            current = [chip]
+            while len(current) > 0:
+                following = list()
+                for i in current:
+                    for j in self.neighbours[i]:
+                        if distances[j] == unreachable and j != chip:
+                            distances[j] = distances[i] + 1
+                            parents[j] = i
+                            following.append(j)
+                current = following
+            self.distances[chip] = distances
+            self.parents[chip] = parents
+        return self.distances[chip]
+
+    def get_cost(self):
+        """
+        Returns the hops of the subedges weighted by their synapses
+        """
+        return sum([weight * self.get_distances(
+            self.chip_of[pre])[self.chip_of[post]]
+            for ((pre, post), weight) in self.weights])
+
+    def get_move_cost(self, index, from_chip, to_chip, other=None):
+        """
+        Returns the change in the weighted hops of the connections of the
+        subvertex if it moved between the chips, ignoring those to other
+        """
+        from_distances = self.get_distances(from_chip)
+        to_distances = self.get_distances(to_chip)
+        cost = 0
+        for (connected, weight) in self.connections[index]:
+            if connected != other:
+                chip = self.chip_of[connected]
+                cost += weight * (to_distances[chip] - from_distances[chip])
+        return cost
+
+    def propose(self, generator):
+        """
+        Proposes to move a random subvertex to a random core of another chip,
+        swapping it with the subvertex on that core if there is one, and
+        returns the subvertex, the chip and core and the subvertex to swap
+        with, or None if the move is not allowed
+        """
+        index = self.movable[int(generator.random() * len(self.movable))]
+        chip = self.real_chips[int(generator.random() * len(self.real_chips))]
+        cores = self.cores[chip]
+        core = cores[int(generator.random() * len(cores))]
+        from_chip = self.chip_of[index]
+        if chip == from_chip:
+            return None
+        other = self.occupants.get((chip, core))
+        if other == FIXED:
+            return None
+        other_sdram = 0
+        if other is not None:
+            other_sdram = self.sdram[other]
+        for (each_chip, added) in ((chip, self.sdram[index] - other_sdram),
+                                   (from_chip, other_sdram -
+                                    self.sdram[index])):
+            if (added > 0 and
+                    self.sdram_used[each_chip] + added > SDRAM_AVAILABLE):
+                return None
+        return (index, chip, core, other)
+
+    def get_proposal_cost(self, proposal):
+        (index, chip, _, other) = proposal
+        from_chip = self.chip_of[index]
+        cost = self.get_move_cost(index, from_chip, chip, other)
+        if other is not None:
+            cost += self.get_move_cost(other, chip, from_chip, index)
+        return cost
+
+    def apply(self, proposal):
+        (index, chip, core, other) = proposal
+        from_chip, from_core = self.chip_of[index], self.core_of[index]
+        del self.occupants[(from_chip, from_core)]
+        if other is not None:
+            self.chip_of[other] = from_chip
+            self.core_of[other] = from_core
+            self.occupants[(from_chip, from_core)] = other
+            self.sdram_used[from_chip] += self.sdram[other]
+            self.sdram_used[chip] -= self.sdram[other]
+        self.chip_of[index] = chip
+        self.core_of[index] = core
+        self.occupants[(chip, core)] = index
+        self.sdram_used[from_chip] -= self.sdram[index]
+        self.sdram_used[chip] += self.sdram[index]
+
+    def anneal(self, start_time):
+        """
+        Anneals the placements, leaving them at the lowest cost reached, and
+        returns the number of moves tried and accepted, and whether the time
+        budget ran out
+        """
+        if (len(self.movable) == 0 or len(self.weights) == 0
+                or self.n_moves <= 0):
+            return 0, 0, False
+        generator = random.Random(self.seed)
+
+        # Start at a temperature at which the average rise in cost of the
+        # moves sampled is accepted with a probability of START_ACCEPTANCE
+        rises = list()
+        for _ in range(self.N_TEMPERATURE_SAMPLES):
+            proposal = self.propose(generator)
+            if proposal is not None:
+                cost = self.get_proposal_cost(proposal)
+                if cost > 0:
+                    rises.append(cost)
+        if len(rises) == 0:
+            return 0, 0, False
+        temperature = ((float(sum(rises)) / len(rises))
+                       / -math.log(self.START_ACCEPTANCE))
+        cooling = math.pow(self.FINAL_TEMPERATURE, 1.0 / self.n_moves)
+
+        # The placements at the lowest cost are kept, checking for them
+        # every CHECK_INTERVAL moves
+        cost = 0
+        best_cost = 0
+        best_positions = None
+        n_accepted = 0
+        n_moves = 0
+        time_limited = False
+        while n_moves < self.n_moves and not time_limited:
+            for _ in xrange(min(self.CHECK_INTERVAL, self.n_moves - n_moves)):
+                temperature *= cooling
+                proposal = self.propose(generator)
+                if proposal is None:
+                    continue
+                change = self.get_proposal_cost(proposal)
+                if (change <= 0 or
+                        generator.random() < math.exp(-change / temperature)):
+                    self.apply(proposal)
+                    cost += change
+                    n_accepted += 1
+            n_moves += self.CHECK_INTERVAL
+            if cost < best_cost:
+                best_cost = cost
+                best_positions = (list(self.chip_of), list(self.core_of))
+            time_limited = time.time() - start_time > self.time_budget
+        n_moves = min(n_moves, self.n_moves)
+
+        if best_positions is None:
+            best_positions = self.initial_positions
+        (self.chip_of, self.core_of) = best_positions
+        return n_moves, n_accepted, time_limited
+
+    def get_statistics(self):
+        """
+        Returns the :py:class:`PlacementStatistics` of the current placements
+        """
+        total_hops = 0
+        weighted_hops = 0
+        destinations = dict()
+        for ((pre, post), weight) in self.weights:
+            hops = self.get_distances(self.chip_of[pre])[self.chip_of[post]]
+            total_hops += hops
+            weighted_hops += weight * hops
+            destinations.setdefault(pre, set()).add(self.chip_of[post])
+
+        # Route each subvertex along the tree of its breadth-first search to
+        # the chips of its postsubvertices
+        link_loads = dict()
+        router_entries = [0] * len(self.chips)
+        for (pre, chips) in sorted(destinations.items()):
+            source = self.chip_of[pre]
+            self.get_distances(source)
+            parents = self.parents[source]
+            links = set()
+            routers = set([source])
+            for chip in chips:
+                while chip != source and chip not in routers:
+                    routers.add(chip)
+                    if parents[chip] is None:
+                        break
+                    links.add((parents[chip], chip))
+                    chip = parents[chip]
+            for link in links:
+                link_loads[link] = link_loads.get(link, 0) + 1
+            for chip in routers:
+                router_entries[chip] += 1
+        return PlacementStatistics(total_hops, weighted_hops,
+                                   max(link_loads.values() + [0]),
+                                   max(router_entries + [0]))
+
+    def write_placements(self):
+        """
+        Replaces the placements of the subvertices which were moved
+        """
+        machine = self.dao.machine
+        for (index, placement) in enumerate(self.dao.placements):
+            subvertex = self.subvertices[index]
+            chip = self.chips[self.chip_of[index]]
+            if (placement.processor.get_coordinates()
+                    != (chip.x, chip.y, self.core_of[index])):
+                self.dao.placements[index] = lib_map.Placement(
+                    subvertex, machine.get_processor(chip.x, chip.y,
+                                                     self.core_of[index]))
@@ -4,6 +4,8 @@ logger = logging.getLogger(__name__)
 
 from pacman103.lib import lib_map
 from pacman103.core.mapper.placer_algorithms.abstract_placer import AbstractPlacer
+from pacman103.core.mapper.placer_algorithms.free_chip_index import \
+    FreeChipIndex
 from pacman103.core import exceptions
 
 SDRAM_AVAILABLE = 119 * 1024 * 1024
@@ -59,7 +61,19 @@ class BasicPlacer(AbstractPlacer):
     
     def __init__(self, dao):
         self.dao = dao
-        self.chips = self.get_chips()
+        self.chips = list()
+        self.chips_by_coordinates = dict()
+        self.free_chip_index = FreeChipIndex([])
+        for chip in self.get_chips():
+            self.add_chip(chip)
+
+    def add_chip(self, chip):
+        """
+        Adds a chip after those which the placer already tries
+        """
+        self.chips.append(chip)
+        self.chips_by_coordinates.setdefault((chip.x, chip.y), chip)
+        self.free_chip_index.append(chip)
                 
     def get_chips(self):
         chips = list()
@@ -68,8 +82,8 @@ class BasicPlacer(AbstractPlacer):
                 chip = self.dao.machine.get_chip(x, y)
                 if not chip.is_virtual():
                     # TODO: The numbers should be from the machine!
-                    self.chips.append(PlacementChip(chip.board_id, chip.x, chip.y,
-                            chip.processors, SDRAM_AVAILABLE, CPU_AVAILABLE,
+                    chips.append(PlacementChip(chip.boardid, chip.x, chip.y,
+                            chip.get_processors(), SDRAM_AVAILABLE, CPU_AVAILABLE,
                             DTCM_AVAILABLE))
         return chips
               
@@ -135,22 +149,32 @@ class BasicPlacer(AbstractPlacer):
     
     def get_maximum_resources(self, constraints):
         """
+        Returns the most resources available to a subvertex on any chip which
+        meets the constraints.  Without constraints on the chip or core, they
+        are read from the free chip index instead of every chip.
+        """
+        x, y, p = get_constraint_coordinates(constraints)
+        if x is None and y is None and p is None:
+            if self.free_chip_index.n_chips_with_free_cores == 0:
+                raise_no_resources(constraints)
+            return lib_map.Resources(self.free_chip_index.maximum_cpu,
+                    self.free_chip_index.maximum_dtcm,
+                    self.free_chip_index.get_maximum_sdram())
+        return self.find_maximum_resources(self.get_candidate_chips(x, y),
+                constraints)
+
+    def find_maximum_resources(self, chips, constraints):
+        """
+        Returns the most resources available to a subvertex on any of the
+        chips which meets the constraints, by checking each chip
         """
         maximum_sdram = 0
         maximum_cpu = 0
         maximum_dtcm = 0
         found_available_chip = False
+        x, y, p = get_constraint_coordinates(constraints)
         
-        for chip in self.chips:
-            
-            x = None
-            y = None
-            p = None
-            
-            if constraints is not None:
-                x = constraints.x
-                y = constraints.y
-                p = constraints.p
+        for chip in chips:
                 
             if (((x is None) or (x == chip.x))
                     and ((y is None) or (y == chip.y))):
@@ -175,10 +199,7 @@ class BasicPlacer(AbstractPlacer):
                         maximum_dtcm = chip.dtcm_per_proc
                         
         if not found_available_chip:
-            if constraints is not None:
-                raise Exception("No available resource could be found that fit"
-                        + " the given constraints %s" % constraints)
-            raise Exception("No further resources are available")       
+            raise_no_resources(constraints)
         
         return lib_map.Resources(maximum_cpu, maximum_dtcm, maximum_sdram)
 
@@ -186,17 +207,42 @@ class BasicPlacer(AbstractPlacer):
         """
         method that places a subvert based on its memory requirements
         """
-        placement_chip = None
+        x, y, p = get_constraint_coordinates(constraints)
+        if x is None and y is None and p is None:
+            placement_chip = self.find_first_free_chip(resources)
+        else:
+            placement_chip = self.find_placement_chip(
+                    self.get_candidate_chips(x, y), resources, constraints)
+                    
+        if placement_chip == None:
+            raise Exception("Failed to place subvertex")
         
-        for chip in self.chips:
-            x = None
-            y = None
-            p = None
-            
-            if constraints is not None:
-                x = constraints.x
-                y = constraints.y
-                p = constraints.p
+        core = placement_chip.assign_core(resources.sdram, p)
+        self.free_chip_index.update(placement_chip)
+        return (placement_chip.x, placement_chip.y, core)
+
+    def find_first_free_chip(self, resources):
+        """
+        Returns the first chip with a free core and the resources, searching
+        the free chip index for chips with enough SDRAM
+        """
+        position = self.free_chip_index.find_first(resources.sdram)
+        while position is not None:
+            chip = self.free_chip_index.chips[position]
+            if ((chip.cpu_speed >= resources.clock_ticks)
+                    and (chip.dtcm_per_proc >= resources.dtcm)):
+                return chip
+            position = self.free_chip_index.find_first(resources.sdram,
+                    position + 1)
+        return None
+
+    def find_placement_chip(self, chips, resources, constraints):
+        """
+        Returns the first of the chips which meets the constraints and has
+        a free core and the resources, by checking each chip
+        """
+        x, y, p = get_constraint_coordinates(constraints)
+        for chip in chips:
                 
             if (((x is None) or (x == chip.x))
                     and ((y is None) or (y == chip.y))):
@@ -207,32 +253,52 @@ class BasicPlacer(AbstractPlacer):
                             and (chip.free_sdram >= resources.sdram)
                             and (chip.cpu_speed >= resources.clock_ticks)
                             and (chip.dtcm_per_proc >= resources.dtcm)):
-                        placement_chip = chip
-                        break
-                    
-        if placement_chip == None:
-            raise Exception("Failed to place subvertex")
-        
-        core = placement_chip.assign_core(resources.sdram, p)
-        return (placement_chip.x, placement_chip.y, core)
+                        return chip
+        return None
+
+    def get_candidate_chips(self, x, y):
+        """
+        Returns the chips which could meet constraints on the coordinates:
+        the chip at x, y if both are given, or otherwise every chip
+        """
+        if x is not None and y is not None:
+            chip = self.chips_by_coordinates.get((x, y))
+            if chip is None:
+                return list()
+            return [chip]
+        return self.chips
     
     def unplace_subvertex(self, x, y, p, resources):
-        for chip in self.chips:
-            if chip.x == x and chip.y == y:
-                if chip.core_available[p]:
-                    raise Exception("Attempt to unplace a processor that "
-                            + "has not been assigned!")
-                chip.unassign_core(resources.sdram, p)
+        chip = self.chips_by_coordinates.get((x, y))
+        if chip is not None:
+            if chip.core_available[p]:
+                raise Exception("Attempt to unplace a processor that "
+                        + "has not been assigned!")
+            chip.unassign_core(resources.sdram, p)
+            self.free_chip_index.update(chip)
 
     def place_virtual_subvertex(self, constraints, virtual_cores):
-        pchip = None
-        for chip in self.chips:
-            if chip.x == constraints.x and chip.y == constraints.y:
-                pchip = chip
-                break
+        pchip = self.chips_by_coordinates.get((constraints.x, constraints.y))
         if pchip is None:
             pchip = PlacementChip(-1, constraints.x, constraints.y, 
                     virtual_cores, 0, 0, 0)
-            self.chips.append(pchip)
+            self.add_chip(pchip)
         core = pchip.assign_core(0, constraints.p)
+        self.free_chip_index.update(pchip)
         return (constraints.x, constraints.y, core) 
+
+
+def get_constraint_coordinates(constraints):
+    """
+    Returns the x, y and p of the constraints, each None if not constrained
+    """
+    if constraints is None:
+        return None, None, None
+    return constraints.x, constraints.y, constraints.p
+
+
+def raise_no_resources(constraints):
+    if constraints is not None:
+        raise Exception("No available resource could be found that fit"
+                + " the given constraints %s" % constraints)
+    raise Exception("No further resources are available")
@@ -0,0 +1,128 @@
+import logging
+logger = logging.getLogger(__name__)
+
+#the free SDRAM of a chip without a free core, which no subvertex fits
+NO_FREE_CORES = float("-inf")
+
+
+class FreeChipIndex(object):
+    """
+    An index of the free cores and SDRAM of the chips of a placer, kept in
+    the order in which the placer tries the chips.  It holds two max
+    segment trees over the chips: one of the free SDRAM of the chips with a
+    free core, and one of the SDRAM which the placer would offer a
+    subvertex on each chip.  So the first chip that a subvertex fits on, and
+    the most SDRAM available to a subvertex, are found in O(log n) of the
+    chips, instead of by scanning them.
+
+    The index must be told of each change to the cores or SDRAM of a chip
+    by calling :py:meth:`update`.
+
+    :param list chips:
+        the :py:class:`PlacementChip` of the placer, in the order it tries
+        them.
+    """
+
+    def __init__(self, chips):
+        self.chips = list()
+        self.positions = dict()
+        self.has_free_cores = list()
+        self.n_chips_with_free_cores = 0
+        self.maximum_cpu = 0
+        self.maximum_dtcm = 0
+        self.capacity = 1
+        self.free_sdram = [NO_FREE_CORES] * 2
+        self.available_sdram = [0] * 2
+        for chip in chips:
+            self.append(chip)
+
+    def append(self, chip):
+        """
+        Adds a chip after those already in the index
+        """
+        position = len(self.chips)
+        self.chips.append(chip)
+        self.positions[id(chip)] = position
+        self.has_free_cores.append(False)
+        if chip.cpu_speed > self.maximum_cpu:
+            self.maximum_cpu = chip.cpu_speed
+        if chip.dtcm_per_proc > self.maximum_dtcm:
+            self.maximum_dtcm = chip.dtcm_per_proc
+
+        #double the capacity of the trees when they are full
+        if position == self.capacity:
+            self.capacity *= 2
+            self.free_sdram = [NO_FREE_CORES] * (2 * self.capacity)
+            self.available_sdram = [0] * (2 * self.capacity)
+            for other_position in range(position):
+                self.set_leaf(other_position)
+            for node in range(self.capacity - 1, 0, -1):
+                self.update_node(node)
+        self.update(chip)
+
+    def set_leaf(self, position):
+        """
+        Sets the leaves of the chip at the position from its free cores and
+        SDRAM, as the placer uses them
+        """
+        chip = self.chips[position]
+        leaf = self.capacity + position
+        if chip.free_cores > 0:
+            self.free_sdram[leaf] = chip.free_sdram
+        else:
+            self.free_sdram[leaf] = NO_FREE_CORES
+        if chip.free_cores > 1:
+            self.available_sdram[leaf] = chip.free_sdram / 2
+        elif chip.free_cores == 1:
+            self.available_sdram[leaf] = chip.free_sdram
+        else:
+            self.available_sdram[leaf] = 0
+
+        has_free_cores = chip.free_cores >= 1
+        if has_free_cores != self.has_free_cores[position]:
+            self.has_free_cores[position] = has_free_cores
+            self.n_chips_with_free_cores += 1 if has_free_cores else -1
+
+    def update_node(self, node):
+        self.free_sdram[node] = max(self.free_sdram[2 * node],
+                                    self.free_sdram[2 * node + 1])
+        self.available_sdram[node] = max(self.available_sdram[2 * node],
+                                         self.available_sdram[2 * node + 1])
+
+    def update(self, chip):
+        """
+        Updates the index after the free cores or SDRAM of the chip changed
+        """
+        position = self.positions[id(chip)]
+        self.set_leaf(position)
+        node = (self.capacity + position) // 2
+        while node > 0:
+            self.update_node(node)
+            node //= 2
+
+    def get_maximum_sdram(self):
+        """
+        Returns the most SDRAM which the placer would offer a subvertex on
+        any chip, or 0 if there is none
+        """
+        return max(self.available_sdram[1], 0)
+
+    def find_first(self, sdram, start=0):
+        """
+        Returns the position of the first chip from start on which has a free
+        core and at least sdram free, or None if there is none
+        """
+        return self._find_first(1, 0, self.capacity, sdram, start)
+
+    def _find_first(self, node, node_start, node_end, sdram, start):
+        if node_end <= start or self.free_sdram[node] < sdram:
+            return None
+        if node >= self.capacity:
+            return node_start
+        middle = (node_start + node_end) // 2
+        position = self._find_first(2 * node, node_start, middle, sdram,
+                                    start)
+        if position is None:
+            position = self._find_first(2 * node + 1, middle, node_end, sdram,
+                                        start)
+        return position
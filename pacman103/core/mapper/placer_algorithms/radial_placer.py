@@ -10,21 +10,22 @@ class RadialPlacer(BasicPlacer):
     def get_chips(self):
         
         processors_new_order = list()
-        chips_to_check = list()
+        chips_to_check = set()
 
         for coord in self.dao.get_machine().get_coords_of_all_chips():
             x, y = coord['x'], coord['y']
             chip = self.dao.machine.get_chip(x, y)
             if not chip.is_virtual():
-                chips_to_check.append(chip)
+                chips_to_check.add(chip)
 
         #start at 0,0 going out from its outbound edges till all chips checked
         current_chip_list_to_check = list()
         current_chip_list_to_check.append(self.dao.machine.get_chip(0,0))
         while len(chips_to_check) != 0:
             next_chip_list_to_check = list()
+            next_chips = set()
             for chip in current_chip_list_to_check:
-                if (chips_to_check.count(chip) != 0):
+                if chip in chips_to_check:
                     processors_new_order.append(
                             PlacementChip(chip.boardid, chip.x, chip.y, 
                                     chip.get_processors(), SDRAM_AVAILABLE,
@@ -35,9 +36,10 @@ class RadialPlacer(BasicPlacer):
                             neaubour_chip = \
                                 self.dao.machine.get_chip(neabour_data['x'],
                                                           neabour_data['y'])
-                            if(chips_to_check.count(neaubour_chip) == 1 and
-                               next_chip_list_to_check.count(neaubour_chip) == 0):
+                            if(neaubour_chip in chips_to_check and
+                               neaubour_chip not in next_chips):
                                 next_chip_list_to_check.append(neaubour_chip)
+                                next_chips.add(neaubour_chip)
             current_chip_list_to_check = next_chip_list_to_check
             
         return processors_new_order
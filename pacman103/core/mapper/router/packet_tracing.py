@@ -0,0 +1,87 @@
+"""
+Follows the packets of a routing key through the routing tables of a machine,
+as the routers of the machine would route them.
+"""
+
+
+def get_cam_table_entries(router):
+    """
+    Returns the entries written to the routing table of the router when it
+    has not been minimised: the first entry of each key in the CAM which
+    cannot be left to default routing
+    """
+    return [entries[0] for entries in router.cam.values()
+            if not entries[0].defaultable]
+
+
+def index_table(entries):
+    """
+    Indexes a list of routing entries by mask and then by key, keeping the
+    position and route of the first entry of each key and mask
+    """
+    table = dict()
+    for index, entry in enumerate(entries):
+        table.setdefault(entry.mask, dict()).setdefault(
+            entry.key, (index, entry.route))
+    return table
+
+
+def trace_packet(machine, x, y, key, get_table):
+    """
+    Returns the set of (x, y, link) links along which a packet with the key
+    sent from a core of chip (x, y) travels, the set of (x, y, p) cores it
+    reaches and the set of (x, y, link) arrivals of the packet at the
+    routers, where link is None for the chip which sent it.
+
+    get_table(x, y, router) must return the routing table of the router
+    indexed by :py:func:`index_table`.  The first entry of the table which
+    matches the key routes the packet; a packet which matches no entry
+    leaves along the link opposite the one it arrived on, or is dropped if
+    it came from a core.
+    """
+    links = set()
+    cores = set()
+    arrivals = set()
+    to_visit = [(x, y, None)]
+    while len(to_visit) > 0:
+        (x, y, in_link) = to_visit.pop()
+        if (x, y, in_link) in arrivals:
+            continue
+        arrivals.add((x, y, in_link))
+        router = machine.get_chip(x, y).router
+        table = get_table(x, y, router)
+
+        matches = [table[mask][key & mask] for mask in table
+                   if key & mask in table[mask]]
+        if len(matches) > 0:
+            route = min(matches)[1]
+        elif in_link is not None:
+            route = 1 << ((in_link + 3) % 6)
+        else:
+            continue
+
+        neighbours = router.get_neighbours()
+        for link in range(6):
+            if route & (1 << link):
+                links.add((x, y, link))
+                if link < len(neighbours) and neighbours[link] is not None:
+                    to_visit.append((neighbours[link]['x'],
+                                     neighbours[link]['y'], (link + 3) % 6))
+        for core in range(6, 32):
+            if route & (1 << core):
+                cores.add((x, y, core - 6))
+    return links, cores, arrivals
+
+
+def memoised_tables(get_entries):
+    """
+    Returns a get_table function for :py:func:`trace_packet` which indexes
+    the entries returned by get_entries(router) once for each chip
+    """
+    tables = dict()
+
+    def get_table(x, y, router):
+        if (x, y) not in tables:
+            tables[(x, y)] = index_table(get_entries(router))
+        return tables[(x, y)]
+    return get_table
@@ -2,14 +2,18 @@
 import logging
 logger = logging.getLogger( __name__ ) 
 
-from pacman103.core.mapper import routing_algorithms
-from pacman103.core.mapper.router import redundant_path_removal
+from pacman103.core.mapper import routing_algorithms, \
+    routing_table_minimisation_algorithms
+from pacman103.core.mapper.router import packet_tracing, \
+    redundant_path_removal, routing_checks
 from pacman103.core import exceptions, reports
 from pacman103 import conf
 
 import inspect
 
 algorithms = conf.get_valid_components( routing_algorithms, "Routing" )
+minimisers = conf.get_valid_components( routing_table_minimisation_algorithms,
+                                        "Minimiser" )
 
 class Router(object):
 
@@ -60,6 +64,9 @@ class Router(object):
         if len(redundant_paths) > 0:
             raise exceptions.RouteTableDSGException("redudant path removal didnt work")
 
+        #minimise the routing tables, checking that every key is still
+        # routed to the same links and cores
+        self.minimise_routing_tables(machine)
 
         #check that theres no router with over 1000 entires
         self.check_for_table_supassing_maxiumum_level(machine)
@@ -75,6 +82,36 @@ class Router(object):
         #update dao tracker variables for controller
         self.dao.done_router = True
 
+    def minimise_routing_tables(self, machine):
+        """
+        Runs the routing table minimiser selected in the [Routing] section of
+        the config, if any, reports the number of entries of each table
+        before and after minimisation, and checks that the packets of every
+        key in the inverse map still reach the same links and cores
+        """
+        minimiser_name = conf.config.get("Routing", "minimiser")
+        if minimiser_name == "None":
+            return
+        try:
+            minimiser = minimisers[minimiser_name]
+        except KeyError as e:
+            raise ValueError( "Invalid routing table minimiser specified.  "
+                              "I don't know '%s'." % e )
+
+        counts = minimiser(self.dao).minimise_all()
+        if conf.config.getboolean("Reports", "reportsEnabled"):
+            reports.generate_routing_table_minimisation_report(self.dao,
+                                                               counts)
+
+        failed_keys = Router.check_minimised_routing(machine,
+                                                     self.dao.inverseMap)
+        if len(failed_keys) > 0:
+            raise exceptions.RouteTableDSGException(
+                "minimised routing tables route some keys differently: "
+                + ", ".join(["[key {} from chip ({}, {})]".format(hex(key), x,
+                                                                  y)
+                             for (key, x, y) in failed_keys]))
+
     #takes a set of inconsistant routings and throws an exception
     @staticmethod
     def outputInconsistantRoutings(inconsistant_routings):
@@ -101,11 +138,13 @@ class Router(object):
         for x in range(machine.x_dim):
             for y in range(machine.y_dim):
                 if machine.chip_exists_at(x, y):
-                    router = machine.get_chip(x, y).router
                     inconsistant_routing_key_entries, redundant_paths = \
                         Router.check_routing_table(machine, x, y,
                                                    inconsistant_routing_key_entries,
                                                    redundant_paths, used_masks)
+        logger.debug("found {} inconsistant routings and {} redundant "
+                     "paths".format(len(inconsistant_routing_key_entries),
+                                    len(redundant_paths)))
         return inconsistant_routing_key_entries, redundant_paths
 
 
@@ -125,75 +164,45 @@ class Router(object):
     @staticmethod
     def check_entries(router, inconsistant_routing_key_entries, redundant_paths,
                       x, y):
-        #get key entry to check against
-        for to_check_key, entries in router.cam.items():
-            if len(entries) > 1:
-                initial_route = None
-                initial_entry = None
-                for routing_entry in entries:
-                    if initial_route is None:
-                        initial_entry = routing_entry
-                        initial_route = routing_entry.route
-                    else:
-                        inconsistant_routing_key_entries, redundant_paths = \
-                            Router.check_routes(initial_entry, routing_entry,
-                                                inconsistant_routing_key_entries,
-                                                redundant_paths, x, y)
-        return inconsistant_routing_key_entries, redundant_paths
+        """
+        checks each key of the cam of the router which triggers more than one
+        entry, adding the entries whose original keys differ from that of
+        the first entry of the key to the inconsistant entries and the others
+        to the redundant paths
+        """
+        return routing_checks.find_conflicts(x, y, router.cam,
+                                             inconsistant_routing_key_entries,
+                                             redundant_paths)
 
-    #checks what type of inconsistant key it is
-    @staticmethod
-    def check_routes(initial_entry, other_entry,
-                     inconsistant_routing_key_entries, redundant_paths, x, y):
-        #same key, different destinations
-        initial_key = initial_entry.original_key
-        initial_entry_destination_chip_x, initial_entry_destination_chip_y = \
-            initial_entry.routing.routing_entries[len(initial_entry.routing.routing_entries) -1].router.chip.get_coords()
-        initial_entry_processor = initial_entry.routing.routing_entries[len(initial_entry.routing.routing_entries) -1].route
-        other_entry_destination_chip_x, other_entry_destination_chip_y =\
-            other_entry.routing.routing_entries[len(other_entry.routing.routing_entries) -1].router.chip.get_coords()
-        other_entry_processor = other_entry.routing.routing_entries[len(other_entry.routing.routing_entries) -1].route
-
-        #not same key, therefore inconsistant route
-        if initial_key != other_entry.original_key:
-            if not Router.duplicate(x, y, initial_entry, other_entry,
-                                    inconsistant_routing_key_entries):
-                logger.debug("adding inconsistant route where two different "
-                             "keys make the same key combo")
-                inconsistant_routing_key_entries.append([x, y, initial_entry,
-                                                         other_entry])
-
-        elif (initial_entry_destination_chip_x == other_entry_destination_chip_x) and \
-             (initial_entry_destination_chip_y == other_entry_destination_chip_y) and \
-             (initial_entry_processor == other_entry_processor):
-            #same destination
-            if not Router.duplicate(x, y, initial_entry,
-                                    other_entry, redundant_paths):
-                logger.debug( "two edges from the same soruce heading "
-                              "to the same destination, therefore possible "
-                              "redundant path")
-                redundant_paths.append([x, y, initial_entry, other_entry])
-        else:
-        # different destinations
-            if not Router.duplicate(x, y, initial_entry,
-                                    other_entry, redundant_paths):
-                logger.debug("initial x = {}, y = {}, entry = {}, "
-                             "other = {}".format(x, y, initial_entry,
-                                                 other_entry))
-                redundant_paths.append([x, y, initial_entry, other_entry])
-        return inconsistant_routing_key_entries, redundant_paths
 
     @staticmethod
-    def duplicate(x, y, initial_entry, other_entry, entry_list):
+    def check_minimised_routing(machine, inverse_map):
         """
-        checks that the new inconsiatncy hasnt already been recorded by the flipping of the entries
+        Sends a packet with the lowest and the highest key of each key and
+        mask in inverse_map from the chip of each of its subedges through
+        both the routing tables made from the CAMs and the minimised routing
+        tables, and returns the (key, x, y) of those which do not reach the
+        same links and cores
         """
-        for entry in entry_list:
-            if ((entry[2] == initial_entry and entry[3] == other_entry) or
-               (entry[2] == other_entry and entry[3] == initial_entry)) and x == entry[0] and y == entry[1]:
-                return True
-        return False
-
+        failed_keys = list()
+        get_cam_table = packet_tracing.memoised_tables(
+            packet_tracing.get_cam_table_entries)
+        get_minimised_table = packet_tracing.memoised_tables(
+            lambda router: router.get_table_entries())
+        for key_mask_combo, subedges in inverse_map.items():
+            for subedge in subedges:
+                placement = subedge.presubvertex.placement
+                if placement is None:
+                    continue
+                x, y, _ = placement.processor.get_coordinates()
+                for key in (key_mask_combo,
+                            key_mask_combo | (~subedge.mask & 0xFFFFFFFF)):
+                    if (packet_tracing.trace_packet(
+                            machine, x, y, key, get_cam_table)[:2] !=
+                            packet_tracing.trace_packet(
+                                machine, x, y, key, get_minimised_table)[:2]):
+                        failed_keys.append((key, x, y))
+        return failed_keys
 
     @staticmethod
     def check_for_table_supassing_maxiumum_level(machine):
@@ -214,10 +223,14 @@ class Router(object):
                     for key in routing_table:
                         if (routing_table[key][0].defaultable):
                             defaultables = defaultables + 1
-                    if machine.get_chip(x, y).router.occupancy-defaultables >=\
-                            machine.get_chip(x, y).router.MAX_OCCUPANCY:
-                        failed_routing_tables.append([x, y,
-                                                      machine.get_chip(x, y).router.occupancy - defaultables])
+                    n_entries = machine.get_chip(x, y).router.occupancy - \
+                        defaultables
+                    #a minimised table is written in place of the cam
+                    if machine.get_chip(x, y).router.minimised_table is not None:
+                        n_entries = len(
+                            machine.get_chip(x, y).router.minimised_table)
+                    if n_entries >= machine.get_chip(x, y).router.MAX_OCCUPANCY:
+                        failed_routing_tables.append([x, y, n_entries])
 
                     logger.debug( "for chip ({}, {}) there are {} "
                                   "entries".format(x, y,
@@ -0,0 +1,119 @@
+"""
+Checks the routing tables of a machine for keys which trigger more than one
+routing entry.
+
+Each key of the CAM of a router whose first entry is shared by another entry
+is either inconsistant, if the other entry was allocated for a different
+original key, or a redundant path.  The checks can be run on the routers of a
+machine, or on a routing result saved by :py:func:`save_routing_result` and
+checked later by :py:func:`check_routing_result` without the rest of the
+mapping.
+"""
+
+import collections
+import logging
+import pickle
+
+logger = logging.getLogger(__name__)
+
+# The fields of a routing entry needed to check it, in a routing result
+RoutingRecord = collections.namedtuple(
+    "RoutingRecord", ["key", "original_key", "mask", "route"])
+
+
+def find_conflicts(x, y, cam, inconsistant_routing_key_entries,
+                   redundant_paths):
+    """
+    Appends [x, y, initial_entry, other_entry] to
+    inconsistant_routing_key_entries or redundant_paths for each entry of a
+    key in the cam of chip (x, y) which shares the key with the initial entry
+    of the key.  As in the pairwise checks of Router which this replaced, the
+    initial entry is the first entry with a route, and the entries before it,
+    which have no route, are not checked.
+
+    Each pair of entries is recorded once, whichever way round it is found,
+    using a hash set of the pairs recorded on the chip.
+    """
+    recorded = set()
+    for entries in cam.values():
+        if len(entries) > 1:
+            initial_route = None
+            initial_entry = None
+            for routing_entry in entries:
+                if initial_route is None:
+                    initial_entry = routing_entry
+                    initial_route = routing_entry.route
+                    continue
+                pair = (id(initial_entry), id(routing_entry))
+                if pair in recorded:
+                    continue
+                recorded.add(pair)
+                recorded.add((id(routing_entry), id(initial_entry)))
+
+                #not same key, therefore inconsistant route
+                if initial_entry.original_key != routing_entry.original_key:
+                    inconsistant_routing_key_entries.append(
+                        [x, y, initial_entry, routing_entry])
+                else:
+                    redundant_paths.append([x, y, initial_entry,
+                                            routing_entry])
+    return inconsistant_routing_key_entries, redundant_paths
+
+
+def check_routing_tables(tables):
+    """
+    Checks routing tables given as a dictionary of the CAM of each chip,
+    keyed by (x, y), in which each CAM maps each key to its list of entries,
+    and returns the inconsistant entries and redundant paths found in order
+    of x and then y
+    """
+    inconsistant_routing_key_entries = list()
+    redundant_paths = list()
+    for (x, y) in sorted(tables.keys()):
+        find_conflicts(x, y, tables[(x, y)], inconsistant_routing_key_entries,
+                       redundant_paths)
+    return inconsistant_routing_key_entries, redundant_paths
+
+
+def get_routing_tables(machine):
+    """
+    Returns the routing tables of the routers of a machine which have
+    entries, in the form taken by :py:func:`check_routing_tables`, with a
+    :py:class:`RoutingRecord` in place of each routing entry.  The order of
+    the keys of each CAM and of the entries of each key is kept.
+    """
+    tables = dict()
+    for x in range(machine.x_dim):
+        for y in range(machine.y_dim):
+            if machine.chip_exists_at(x, y):
+                cam = machine.get_chip(x, y).router.cam
+                if len(cam) == 0:
+                    continue
+                records = dict()
+                tables[(x, y)] = collections.OrderedDict(
+                    (key, [records.setdefault(id(entry), RoutingRecord(
+                        entry.key, entry.original_key, entry.mask,
+                        entry.route)) for entry in entries])
+                    for key, entries in cam.items())
+    return tables
+
+
+def save_routing_result(machine, filename):
+    """
+    Saves the routing tables of a machine to a file, to be checked by
+    :py:func:`check_routing_result`
+    """
+    with open(filename, "wb") as routing_file:
+        pickle.dump(get_routing_tables(machine), routing_file,
+                    pickle.HIGHEST_PROTOCOL)
+
+
+def check_routing_result(filename):
+    """
+    Checks the routing tables saved to a file by
+    :py:func:`save_routing_result`, and returns the inconsistant entries and
+    redundant paths found, as lists of [x, y, initial_record, other_record]
+    """
+    with open(filename, "rb") as routing_file:
+        tables = pickle.load(routing_file)
+    return check_routing_tables(tables)
@@ -4,15 +4,33 @@ __author__ = 'stokesa6'
 from pacman103.lib import lib_map as lib_map
 from pacman103.core.utilities import router_util as util
 from pacman103.lib.machine.router import Router
+import heapq
 import logging
+import multiprocessing
 import os
 from pacman103.core import reports
 
 from pacman103 import conf
 logger = logging.getLogger( __name__ )
 
+
+def _search(args):
+    """
+    Runs the path search of each of a list of (source, destinations) chip ids
+    in a worker process, returning the costs and activations of each
+    """
+    (nodes_info, searches) = args
+    return [DijkstraRouting.properate_costs_till_reached_destinations(
+                nodes_info, source, list(destinations))
+            for (source, destinations) in searches]
+
+
 class DijkstraRouting(object):
 
+    # The number of sources searched by each worker in a batch when routing
+    # in parallel
+    SOURCES_PER_WORKER = 16
+
     # There are more if statements than are necessary, but the code is more easily interpreted like this.
     # 'direction' is the direction in which you travelled to get from xold, yold to xnew, ynew
     # The direction is a 6 bit string with one '1' entry.
@@ -66,167 +84,276 @@ class DijkstraRouting(object):
 
         return weight
 
+    # sets up the node info data structure
     @staticmethod
-    def reset_tables(dijkstra_tables):
-
-        for key in dijkstra_tables.keys():
-            dijkstra_tables[key]["lowest cost"] = None
-            dijkstra_tables[key]["activated?"] = False
-
+    def initiate_node_info(machine, MAX_BW):
+        """
+        Returns a dictionary of tables about the chips of the machine, each of
+        which is indexed by chip id:
+
+        * "coords" holds the x and y coordinates of the chip
+        * "neighbours" holds the chip id of the neighbour along each link, or
+          None where there is no connection to that neighbour
+        * "bws" holds the remaining bandwidth along each link
+        * "weights" holds the weight of each link
+        * "incoming" holds the (chip id, link) pairs of the links into the
+          chip, whose weights depend on the occupancy of its router
+
+        The "ids" entry maps the coordinates of each chip to its chip id.
+        The chip ids are the positions of the chips in a dictionary keyed by
+        "x:y", so that ties between equal costs are broken in the same order
+        as when the tables were held in such a dictionary.
+        """
+        keyed_coords = dict()
+        for coord in machine.get_coords_of_all_chips():
+            x, y = coord['x'], coord['y']
+            keyed_coords["{}:{}".format(x, y)] = (x, y)
+        coords = [keyed_coords[key] for key in keyed_coords.keys()]
+        ids = dict((coord, chip_id) for chip_id, coord in enumerate(coords))
+
+        neighbours = list()
+        bws = list()
+        incoming = [list() for _ in coords]
+        for chip_id, (x, y) in enumerate(coords):
+            chip_neighbours = list()
+            for link, neighbour in enumerate(
+                    machine.get_chip(x, y).router.get_neighbours()):
+                if neighbour is None:
+                    chip_neighbours.append(None)
+                    continue
+                if (neighbour["x"], neighbour["y"]) not in ids:
+                    raise Exception("Tried to propagate to (%d, %d), which is "
+                                    "not in the graph: remove non-existent "
+                                    "neighbours"
+                                    % (neighbour["x"], neighbour["y"]))
+                neighbour_id = ids[(neighbour["x"], neighbour["y"])]
+                chip_neighbours.append(neighbour_id)
+                incoming[neighbour_id].append((chip_id, link))
+            neighbours.append(chip_neighbours)
+            bws.append([None if neighbour is None else MAX_BW
+                        for neighbour in chip_neighbours])
+
+        return {"coords": coords, "ids": ids, "neighbours": neighbours,
+                "bws": bws, "weights": [[None] * len(chip_neighbours)
+                                        for chip_neighbours in neighbours],
+                "incoming": incoming}
 
     @staticmethod
-    def update_weights(nodes_info, machine, l, m, k, MAX_BW):
-        for key in nodes_info.keys():
-            if nodes_info[key] is not None:
-                for n in range(len(nodes_info[key]["neighbours"])):
-                    if nodes_info[key]["neighbours"][n] is not None:
-                        neighbour = nodes_info[key]["neighbours"][n]
-                        xn, yn = neighbour["x"], neighbour["y"]
-                        nodes_info[key]["weights"][n] = \
-                            DijkstraRouting.get_weight(machine.get_chip(xn, yn).router,
-                                                       nodes_info[key]["bws"][n],
-                                                       l, m, k, MAX_BW)
-
+    def update_weights(nodes_info, machine, l, m, k, MAX_BW, chip_ids=None,
+                       links=None):
+        """
+        Recomputes the weights of all of the links, or if chip_ids or links
+        are given, only the weights of the links into the chips whose router
+        occupancy has changed and of the (chip id, link) pairs whose bandwidth
+        has changed
+        """
+        coords = nodes_info["coords"]
+        neighbours = nodes_info["neighbours"]
+        bws = nodes_info["bws"]
+        weights = nodes_info["weights"]
+        if chip_ids is None and links is None:
+            links = [(chip_id, link) for chip_id in range(len(coords))
+                     for link in range(len(neighbours[chip_id]))]
+        else:
+            links = set(links or ())
+            for chip_id in chip_ids or ():
+                links.update(nodes_info["incoming"][chip_id])
+        for (chip_id, link) in links:
+            neighbour = neighbours[chip_id][link]
+            if neighbour is not None:
+                xn, yn = coords[neighbour]
+                weights[chip_id][link] = DijkstraRouting.get_weight(
+                    machine.get_chip(xn, yn).router, bws[chip_id][link], l, m,
+                    k, MAX_BW)
 
     @staticmethod
-    def properate_costs_till_reached_destinations(dijkstra_tables, nodes_info,
-                                                 xa, ya, destination_processors,
-                                                 xs, ys):
-        destination_processors_left_to_find = destination_processors
+    def properate_costs_till_reached_destinations(nodes_info, source,
+                                                 destinations):
+        """
+        Runs Dijkstra's algorithm from the source chip id until all of the
+        destination chip ids have been activated, and returns
+        the list of the lowest cost of each chip (None if it was not reached)
+        and the list of whether each chip was activated.
+
+        The next chip to be activated is taken from a heap of (cost, chip id)
+        pairs, so the unactivated chip with the lowest cost and then the
+        lowest id is activated; stale entries are skipped as they are popped.
+        Note that destinations is emptied as the destinations are reached.
+        """
+        neighbours = nodes_info["neighbours"]
+        weights = nodes_info["weights"]
+        costs = [None] * len(neighbours)
+        activated = [False] * len(neighbours)
+        heap = list()
+
+        # The cost at the source node is zero for obvious reasons.
+        # Note that it is NOT 'None'
+        costs[source] = 0
+        activated[source] = True
+        active = source
+
+        destinations_left_to_find = destinations
         # Iterate only if the destination node hasn't been activated
-        while not (len(destination_processors_left_to_find) == 0):
+        while not (len(destinations_left_to_find) == 0):
 
             # PROPAGATE!
-            for i in range(len(nodes_info["{}:{}".format(xa, ya)]["neighbours"])):
-
-                neighbour = nodes_info["{}:{}".format(xa, ya)]["neighbours"][i]
-                link = nodes_info["{}:{}".format(xa, ya)]["bws"][i]
-                weight = nodes_info["{}:{}".format(xa, ya)]["weights"][i]
-
-                # "neighbours" is a list of 6 dictionaries or None objects.
-                # There is a None object where there is no connection to that neighbour.
-                if (neighbour is not None) and not (neighbour["x"] == xs and neighbour["y"] == ys):
-
-                    # These variables change with every look at a new neighbour
-                    xn, yn = neighbour["x"], neighbour["y"]
-
-                    # Only try to update if the neighbour is within the graph
-                    if "{}:{}".format(xn, yn) in dijkstra_tables.keys():
-                        # Only update the cost if the node hasn't already been activated
-                        if (dijkstra_tables["{}:{}".format(xn, yn)]["activated?"] == False):
-
-                            # Only update the lowest cost if the new cost is less, or if there is no current cost
-                            if ((dijkstra_tables["{}:{}".format(xa, ya)]["lowest cost"] + weight) < dijkstra_tables["{}:{}".format(xn, yn)]["lowest cost"]
-                            or (dijkstra_tables["{}:{}".format(xn, yn)]["lowest cost"] == None)):
-
-                                dijkstra_tables["{}:{}".format(xn, yn)]["lowest cost"] = float(dijkstra_tables["{}:{}".format(xa, ya)]["lowest cost"] + weight)
-
-                    else:
-                        raise Exception("Tried to propagate to (%d, %d), which is not in the graph: "
-                                        "remove non-existent neighbours") % (xn, yn)
-
-                    if (dijkstra_tables["{}:{}".format(xn, yn)]["lowest cost"] == 0) and (xn != xs or yn != ys):
-                        raise Exception("!!!Cost of non-source node (%s, %s) was set to zero!!!") % (xn, yn)
-
-            # This cannot be done in the above loop, since when a node becomes activated
-            # the rest of the costs cannot be retrieved, and a new graph lowest cost cannot be found
-            graph_lowest_cost = None  # This is the lowest cost across ALL unactivated nodes in the graph.
-
-            # Find the next node to be activated
-            for key in dijkstra_tables.keys():
-                # Don't continue if the node hasn't even been touched yet
-                if not (dijkstra_tables[key]["lowest cost"] is None):
-
-                    # An activated node can't be activated again
-                    if (dijkstra_tables[key]["activated?"] is False):
-
-                        if ((dijkstra_tables[key]["lowest cost"] < graph_lowest_cost and graph_lowest_cost != None)
-                        or (graph_lowest_cost == None)):
-
-                            graph_lowest_cost = dijkstra_tables[key]["lowest cost"]
-                            bits = key.split(":")
-                            xa, ya = int(bits[0]), int(bits[1])  # Set the next activated node as the unactivated node with the lowest current cost
-
-            dijkstra_tables["{}:{}".format(xa, ya)]["activated?"] = True
-
-            # If there were no unactivated nodes with costs, but the destination was not reached this iteration, raise an exception
-            if (graph_lowest_cost is None):
+            active_cost = costs[active]
+            active_weights = weights[active]
+            for link, neighbour in enumerate(neighbours[active]):
+
+                # Only update the cost if the node hasn't already been
+                # activated, and if the new cost is less or there is no
+                # current cost
+                if (neighbour is not None and neighbour != source
+                        and not activated[neighbour]):
+                    cost = active_cost + active_weights[link]
+                    if costs[neighbour] is None or cost < costs[neighbour]:
+                        if cost == 0:
+                            raise Exception(
+                                "!!!Cost of non-source node (%s, %s) was set "
+                                "to zero!!!" % nodes_info["coords"][neighbour])
+                        costs[neighbour] = float(cost)
+                        heapq.heappush(heap, (costs[neighbour], neighbour))
+
+            # Find the next node to be activated, skipping the entries of
+            # nodes which have since been activated or reached more cheaply
+            while len(heap) != 0 and (activated[heap[0][1]] or
+                                      heap[0][0] != costs[heap[0][1]]):
+                heapq.heappop(heap)
+
+            # If there were no unactivated nodes with costs, but the
+            # destination was not reached, stop
+            if len(heap) == 0:
                 break
-                raise Exception("Destination could not be activated, ending run")
+            active = heapq.heappop(heap)[1]
+            activated[active] = True
 
-            #check if each destination node left to find has been activated
-            for dest_processor in destination_processors:
-                xd, yd, pd = dest_processor.get_coordinates()
-                if dijkstra_tables["{}:{}".format(xd, yd)]["activated?"]:
-                    destination_processors_left_to_find.remove(dest_processor)
+            # check if each destination node left to find has been activated
+            for destination in destinations:
+                if activated[destination]:
+                    destinations_left_to_find.remove(destination)
 
+        return costs, activated
 
-    #sets up the node info data structure
     @staticmethod
-    def initiate_node_info(machine, MAX_BW):
-        nodes_info = dict()
-        for coord in machine.get_coords_of_all_chips():
-            x, y = coord['x'], coord['y']
-            # get_neighbours should return a list of
-            # dictionaries of 'x' and 'y' values
-            nodes_info["{}:{}".format(x, y)] = dict()
-            nodes_info["{}:{}".format(x, y)]["neighbours"] = \
-                machine.get_chip(x, y).router.get_neighbours()
+    def search_in_pool(pool, workers, nodes_info, searches):
+        """
+        Runs the path search of each of a list of (source, destinations) chip
+        ids in the worker processes of pool, splitting them into one chunk per
+        worker, and returns the costs and activations of each in order
+        """
+        search_info = {"coords": nodes_info["coords"],
+                       "neighbours": nodes_info["neighbours"],
+                       "weights": nodes_info["weights"]}
+        chunk_size = -(-len(searches) // workers)
+        chunks = [(search_info, searches[start:start + chunk_size])
+                  for start in range(0, len(searches), chunk_size)]
+        return [result for results in pool.map(_search, chunks)
+                for result in results]
+
+    # takes the costs and traces back from the destination though lower costs
+    # till it reaches the source
+    @staticmethod
+    def trace_path(destination, nodes_info, costs):
+        """
+        Returns the (chip id, neighbour position) pairs of the path from the
+        destination chip id back to the source, where each chip id is the
+        node preceding the tracking node and the neighbour position is the
+        position of that node in the neighbours of the tracking node
+        """
+        neighbours = nodes_info["neighbours"]
+        weights = nodes_info["weights"]
+        path = list()
+        tracking = destination
+        while costs[tracking] != 0:
 
-            nodes_info["{}:{}".format(x, y)]["bws"] = []
+            check = tracking
 
-            nodes_info["{}:{}".format(x, y)]["weights"] = []
+            for n, neighbour in enumerate(neighbours[tracking]):
 
-            for i in range(len(nodes_info["{}:{}".format(x, y)]["neighbours"])):
+                # "neighbours" holds None where there is no connection to
+                # that neighbour; only check if it can be a preceding node if
+                # it has been reached
+                if neighbour is None or costs[neighbour] is None:
+                    continue
 
-                nodes_info["{}:{}".format(x, y)]["weights"].append(None)
+                # The weight is that of the link from the preceding node to
+                # the current tracking node
+                decDirection = DijkstraRouting.get_direction(n)[1]
 
-                if nodes_info["{}:{}".format(x, y)]["neighbours"][i] is None:
+                sought_cost = costs[tracking] - weights[neighbour][decDirection]
 
-                    nodes_info["{}:{}".format(x, y)]["bws"].append(None)
+                if abs(costs[neighbour] - sought_cost) < 0.00000000001: # TODO this may be too precise! However, making it less precise could break the code.
+                    path.append((neighbour, n))
 
-                else:
+                    # Finally move the tracking node
+                    tracking = neighbour
 
-                    nodes_info["{}:{}".format(x, y)]["bws"].append(MAX_BW)
+                    # !!! IMPORTANT !!! loop must be broken, otherwise false routing entries can be made
+                    break
 
-            #logger.debug( "({}, {}) has neighbours:".format(x, y) )
+            if tracking == check:
 
-            #for neighbour in nodes_info["{}:{}".format(x, y)]["neighbours"]:
-            #    if neighbour is not None:
-            #        logger.debug("%d, %d" % (neighbour["x"], neighbour["y"]))
-            #    else:
-            #        logger.debug(neighbour)
-        return nodes_info
+                raise Exception("Iterated through all neighbours of tracking node but did not find a preceding node! "
+                                "Consider increasing acceptable discrepancy between sought traceback cost and "
+                                "actual cost at node. Terminating...")
+        return path
 
-    # sets up the initial dijkstra tables
     @staticmethod
-    def initiate_dijkstra_tables(machine):
-        dijkstra_tables = dict()  # Holds all the information about nodes within one full run of Dijkstra's algorithm
-
-        for coord in machine.get_coords_of_all_chips():
-            x, y = coord['x'], coord['y']
-            dijkstra_tables["{}:{}".format(x, y)] = dict()# Each node has a dictionary, or 'table'
-
-            dijkstra_tables["{}:{}".format(x, y)]["lowest cost"] = None
-            dijkstra_tables["{}:{}".format(x, y)]["activated?"] = False
-        return dijkstra_tables
+    def path_conflicts(paths, key_combos, nodes_info, machine,
+                       BW_PER_ROUTE_ENTRY):
+        """
+        Returns True if the paths from a source, given as lists of (chip id,
+        neighbour position) pairs, can no longer be committed: either a link
+        along them would run out of bandwidth, or a router along them which
+        has no entry for the key_combo of the path has a full routing table
+        """
+        coords = nodes_info["coords"]
+        bws = nodes_info["bws"]
+        used_bws = dict()
+        for (path, key_combo) in zip(paths, key_combos):
+            for (chip_id, n) in path:
+                link = (chip_id, DijkstraRouting.get_direction(n)[1])
+                used_bws[link] = used_bws.get(link, 0) + BW_PER_ROUTE_ENTRY
+                if bws[link[0]][link[1]] - used_bws[link] < 0:
+                    return True
+                x, y = coords[chip_id]
+                router = machine.get_chip(x, y).router
+                if (key_combo not in router.cam and
+                        router.occupancy >= Router.MAX_OCCUPANCY):
+                    return True
+        return False
 
-    # takes the dijkstra table and traces back from the destination though lower costs till it reaches the source
     @staticmethod
-    def retrace_back_to_source(xd, yd, machine, nodes_info, dijkstra_tables,
+    def retrace_back_to_source(destination, machine, nodes_info, costs,
                                key, mask, key_combo, routing, pd,
-                               BW_PER_ROUTE_ENTRY):
+                               BW_PER_ROUTE_ENTRY, changed_chip_ids,
+                               changed_links, path=None):
+        """
+        Adds the routing entries from the source to the destination chip id
+        to routing, following path if it has already been traced, recording
+        the chip ids whose router occupancy changed in changed_chip_ids and
+        the (chip id, link) pairs whose bandwidth changed in changed_links,
+        and returns the chip id of the source
+        """
+        coords = nodes_info["coords"]
+        bws = nodes_info["bws"]
+        if path is None:
+            path = DijkstraRouting.trace_path(destination, nodes_info, costs)
+
         # Set the tracking node to the destination to begin with
-        xt, yt = xd, yd
-        new_routing_entry = machine.get_chip(xd, yd).router.ralloc(key, mask)
+        tracking = destination
+        xd, yd = coords[destination]
+        router = machine.get_chip(xd, yd).router
+        new_routing_entry = router.ralloc(key, mask)
+        changed_chip_ids.add(destination)
         if new_routing_entry is None:
             raise Exception('Routing-table entry allocation failed.')
         new_routing_entry.route = 1 << (6 + pd)  # I really have no idea why pd is there
         new_routing_entry.routing = routing
         #check that the key hasnt already been used
-        length = len(machine.get_chip(xd, yd).router.cam[key_combo])
-        if len(machine.get_chip(xd, yd).router.cam[key_combo]) >= 2:
-            other_entry = machine.get_chip(xd, yd).router.cam[key_combo][0]
+        if len(router.cam[key_combo]) >= 2:
+            other_entry = router.cam[key_combo][0]
             if other_entry.original_key == key:
                 #merge routes
                 old_route = other_entry.route
@@ -239,116 +366,78 @@ class DijkstraRouting(object):
                 else:
                     other_entry.defaultable = False
 
-            machine.get_chip(xd, yd).router.cam[key_combo].remove(new_routing_entry)
-            machine.get_chip(xd, yd).router.occupancy -= 1
+            router.cam[key_combo].remove(new_routing_entry)
+            router.occupancy -= 1
 
         else:
             routing.routing_entries.append(new_routing_entry)
 
-        #print ("Destination occupancy is %d") % machine.chips[xd][yd].router.occupancy
-
-        while (dijkstra_tables["{}:{}".format(xt, yt)]["lowest cost"] != 0):
-
-            xcheck, ycheck = xt, yt
-
-            for n in range(len(nodes_info["{}:{}".format(xt, yt)]["neighbours"])):
-                neighbour = nodes_info["{}:{}".format(xt, yt)]["neighbours"][n]
-
-                # "neighbours" is a list of 6 dictionaries or None objects. There is a None object where there is no connection to that neighbour.
-                if  (neighbour != None):
-
-                    # xnr and ynr for 'x neighbour retrace', 'y neighbour retrace'.
-                    xnr, ynr = neighbour["x"], neighbour["y"]
-
-                    # Only check if it can be a preceding node if it actually exists
-                    if "{}:{}".format(xnr, ynr) in dijkstra_tables.keys():
-
-                        if (dijkstra_tables["{}:{}".format(xnr, ynr)]["lowest cost"] != None):
-
-                            # Set the direction of the routing entry as that which is from the preceding node to the current tracking node
-                            # xnr, ynr are the 'old' coordinates since they are from the preceding node.
-                            # xt and yt are the 'new' coordinates since they are where the router should send the packet to
-                            binDirection, decDirection = DijkstraRouting.get_direction(n)
-
-                            weight = nodes_info["{}:{}".format(xnr, ynr)]["weights"][decDirection]
-
-                            sought_cost = dijkstra_tables["{}:{}".format(xt, yt)]["lowest cost"] - weight
-                            #print ("Checking node (%d, %d) with sought cost %s and actual cost %s") % (xnr, ynr, sought_cost, dijkstra_tables[xnr][ynr]["lowest cost"])
-
-                            if abs(dijkstra_tables["{}:{}".format(xnr, ynr)]["lowest cost"] - sought_cost) < 0.00000000001: # TODO this may be too precise! However, making it less precise could break the code.
-                                if key_combo in machine.get_chip(xnr, ynr).router.cam:
-                                    #already has an entry, check if mergable, if not then throw error,
-                                    # therefore should only ever have 1 entry
-                                    other_entry = machine.get_chip(xnr, ynr).router.cam[key_combo][0]
-                                    if other_entry.original_key == key:
-                                        #merge routes
-                                        old_route = other_entry.route
-                                        other_entry.route |= binDirection
-                                        #add the other routing entry to the current list
-                                        routing.routing_entries.insert(0, other_entry)
-                                        if (other_entry.route == old_route and
-                                            other_entry.previous_router_entry is not None and
-                                            len(routing.routing_entries) > 0 and
-                                            other_entry.previous_router_entry == routing.routing_entries[0]):
-                                            other_entry.defaultable = True
-                                        else:
-                                            other_entry.defaultable = False
-                                else:
-                                    # Create a routing entry on the preceding node
-                                    new_routing_entry = machine.get_chip(xnr, ynr).router.ralloc(key, mask)
-
-                                    if new_routing_entry is None:
-                                        raise Exception('Routing-table entry allocation failed. Ran out of routing entry tables.')
-
-                                    new_routing_entry.route = binDirection
-
-                                    # Set the reference to the parent routing
-                                    new_routing_entry.routing = routing
-
-                                    # Prepend the routing entry to routing_entries
-                                    routing.routing_entries.insert(0, new_routing_entry)
-
-                                    # If this routing entry has the same direction as the one after it in the routing(remember we are tracing backwards),
-                                    # then make the routing entry after this one 'default eligible'.
-                                    if (len(routing.routing_entries) >= 0 and
-                                        routing.routing_entries[1].route == routing.routing_entries[0].route and
-                                        new_routing_entry.previous_router_entry is not None and
-                                        new_routing_entry.previous_router_entry == routing.routing_entries[0]):
-                                        routing.routing_entries[1].defaultable = True
+        for (neighbour, n) in path:
+
+            # Set the direction of the routing entry as that which is from
+            # the preceding node to the current tracking node
+            binDirection, decDirection = DijkstraRouting.get_direction(n)
+
+            xnr, ynr = coords[neighbour]
+            router = machine.get_chip(xnr, ynr).router
+            if key_combo in router.cam:
+                #already has an entry, check if mergable, if not then throw error,
+                # therefore should only ever have 1 entry
+                other_entry = router.cam[key_combo][0]
+                if other_entry.original_key == key:
+                    #merge routes
+                    old_route = other_entry.route
+                    other_entry.route |= binDirection
+                    #add the other routing entry to the current list
+                    routing.routing_entries.insert(0, other_entry)
+                    if (other_entry.route == old_route and
+                        other_entry.previous_router_entry is not None and
+                        len(routing.routing_entries) > 0 and
+                        other_entry.previous_router_entry == routing.routing_entries[0]):
+                        other_entry.defaultable = True
+                    else:
+                        other_entry.defaultable = False
+            else:
+                # Create a routing entry on the preceding node
+                new_routing_entry = router.ralloc(key, mask)
+                changed_chip_ids.add(neighbour)
 
-                                    routing.routing_entries[1].previous_router_entry = routing.routing_entries[0]
-                                    routing.routing_entries[1].previous_router_entry_direction = routing.routing_entries[0].route
-                                    routing.routing_entries[0].next_router_entries.append(routing.routing_entries[1])
+                if new_routing_entry is None:
+                    raise Exception('Routing-table entry allocation failed. Ran out of routing entry tables.')
 
+                new_routing_entry.route = binDirection
 
-                                # Finally move the tracking node
-                                xt, yt = xnr, ynr
+                # Set the reference to the parent routing
+                new_routing_entry.routing = routing
 
-                                #print ("Traced back to (%d, %d), forward direction was %s") % (xnr, ynr, bin(new_routing_entry.route))
+                # Prepend the routing entry to routing_entries
+                routing.routing_entries.insert(0, new_routing_entry)
 
-                                nodes_info["{}:{}".format(xnr, ynr)]["bws"][decDirection] -= BW_PER_ROUTE_ENTRY  # TODO arbitrary
+                # If this routing entry has the same direction as the one after it in the routing(remember we are tracing backwards),
+                # then make the routing entry after this one 'default eligible'.
+                if (len(routing.routing_entries) >= 0 and
+                    routing.routing_entries[1].route == routing.routing_entries[0].route and
+                    new_routing_entry.previous_router_entry is not None and
+                    new_routing_entry.previous_router_entry == routing.routing_entries[0]):
+                    routing.routing_entries[1].defaultable = True
 
-                                if (nodes_info["{}:{}".format(xnr, ynr)]["bws"][decDirection] < 0):
+                routing.routing_entries[1].previous_router_entry = routing.routing_entries[0]
+                routing.routing_entries[1].previous_router_entry_direction = routing.routing_entries[0].route
+                routing.routing_entries[0].next_router_entries.append(routing.routing_entries[1])
 
-                                    print ("Bandwidth overused from (%d, %d) in direction %s! to (%d, %d)") % (xnr, ynr, binDirection, xt, yt)
+            # Finally move the tracking node
+            tracking = neighbour
 
-                                    raise Exception("Bandwidth overused as described above! Terminating...")
+            bws[neighbour][decDirection] -= BW_PER_ROUTE_ENTRY  # TODO arbitrary
+            changed_links.add((neighbour, decDirection))
 
-                                # !!! IMPORTANT !!! loop must be broken, otherwise false routing entries can be made
-                                break
+            if bws[neighbour][decDirection] < 0:
 
-                    else:
+                print ("Bandwidth overused from (%d, %d) in direction %s! to (%d, %d)") % (xnr, ynr, binDirection, xnr, ynr)
 
-                        print xnr, ynr
+                raise Exception("Bandwidth overused as described above! Terminating...")
 
-                        raise Exception("Tried to trace back to node not in graph: remove non-existent neighbours")
-
-            if xt == xcheck and yt == ycheck:
-
-                raise Exception("Iterated through all neighbours of tracking node but did not find a preceding node! "
-                                "Consider increasing acceptable discrepancy between sought traceback cost and "
-                                "actual cost at node. Terminating...")
-        return xt, yt
+        return tracking
 
 
     #prints out helpful route info
@@ -397,7 +486,8 @@ class DijkstraRouting(object):
 
     #raw routing method. entrance to the routing code.
     @staticmethod
-    def route_raw(machine, sub_vertexes, k=1, l=0, m=0, BW_PER_ROUTE_ENTRY=0.01, MAX_BW = 250, dao=None):
+    def route_raw(machine, sub_vertexes, k=1, l=0, m=0, BW_PER_ROUTE_ENTRY=0.01, MAX_BW = 250, dao=None,
+                  workers=None):
 
         """
         Modified by peter.choy 06.08.13
@@ -425,6 +515,11 @@ class DijkstraRouting(object):
             constant controlling contribution of Q to total arc weights
         :param m:
             constant controlling contribution of T to total arc weights
+        :param workers:
+            number of processes which search for the paths of batches of
+            sources in parallel, read from the [Routing] section of the
+            config if None; with 1, each source is searched against the
+            routing tables left by the sources before it
         :returns:
             list of :py:class:`pacman103.lib.lib_map.Routing` instances.
         """
@@ -435,124 +530,146 @@ class DijkstraRouting(object):
 
         #print("")
         #print("Initialising routing data structures...")
+        if workers is None:
+            workers = conf.config.getint("Routing", "workers")
         routings = []
 
         nodes_info = DijkstraRouting.initiate_node_info(machine, MAX_BW)
-        dijkstra_tables = DijkstraRouting.initiate_dijkstra_tables(machine)
-        #print("")
-        #print("Starting routing...")
-        #print("")
-
+        ids = nodes_info["ids"]
         DijkstraRouting.update_weights(nodes_info, machine, l, m, k, MAX_BW)
 
+        # The chips whose router occupancy has changed, and the links whose
+        # bandwidth has changed, since the weights were last updated
+        changed_chip_ids = set()
+        changed_links = set()
+
         run_num = 0
         pruned_sub_edges = 0
         edge_considered = 0
+
+        #locate all destination and soruce coords
         #each subsertex represents a core in the board
-        progress = ProgressBar(len(sub_vertexes))
+        sources = list()
         for subVertex in sub_vertexes:
-            subedges = subVertex.out_subedges
-            
-            #locate all destination and soruce coords
-            dest_processors = []
             subedges_to_route = list()
-            xs, ys, ps = subVertex.placement.processor.get_coordinates()
-            for subedge in subedges:
+            for subedge in subVertex.out_subedges:
                 if not subedge.pruneable:
-                    dest_processors.append(
-                            subedge.postsubvertex.placement.processor)
                     subedges_to_route.append(subedge)
                 else:
                     pruned_sub_edges += 1
-            
-            if(len(dest_processors) != 0):
+            if len(subedges_to_route) != 0:
+                sources.append((subVertex, subedges_to_route))
+
+        batch_size = 1
+        pool = None
+        if workers > 1:
+            batch_size = workers * DijkstraRouting.SOURCES_PER_WORKER
+            pool = multiprocessing.Pool(workers)
+
+        progress = ProgressBar(len(sources))
+        try:
+            for start in range(0, len(sources), batch_size):
+                batch = sources[start:start + batch_size]
 
                 # Update the weights according to the changes in routing
                 # tables and available bandwidth
-                #logger.debug("updating weights")
-                DijkstraRouting.update_weights(nodes_info, machine,
-                                                   l, m, k, MAX_BW)
-
-                # Reset the temporary storage of lowest cost
-                DijkstraRouting.reset_tables(dijkstra_tables)
-                
-
-                # SD Commented this out 20/1/14, to avoid extraneous printing
-                # AS intergrated this into logger.debug
-                #logger.debug("***************************************************")
-                #logger.debug("Source node is ({}, {})".format(xs, ys))
-                #logger.debug("Destination nodes are(")
-                #for processor in dest_processors:
-                #    xd, yd, pd = processor.get_coordinates()
-                #    logger.debug("({}, {}, {})".format(xd, yd, pd))
-                #logger.debug("")
-
-                # Set the first activated node in this run as the source
-                xa, ya = xs, ys
-                dijkstra_tables["{}:{}".format(xa, ya)]["activated?"] = True
-                dijkstra_tables["{}:{}".format(xa, ya)]["lowest cost"] = 0
-                # The cost at the source node is zero for obvious reasons.
-                # Note that it is NOT 'None'
-
-                DijkstraRouting.\
-                    properate_costs_till_reached_destinations(dijkstra_tables,
-                                                              nodes_info,
-                                                              xa, ya,
-                                                              dest_processors,
-                                                              xs, ys)
-
-                #logger.debug("Reached destination from source, retracing.")
-                #helpful output data
-                if conf.config.getboolean( "Routing", "generate_graphs" ) and \
-                    dao is not None: # AM
-                    output_folder = dao.get_reports_directory("routing_graphs")
-                    router_utility= util.RouterUtil(new_output_folder=output_folder)
-                    router_utility.output_routing_weight(router_utility,
-                                                         dijkstra_tables, machine,
-                                                         graph_label="routing weights",
-                                                         routing_file_name="routingWeights" + str(edge_considered))
-                    edge_considered += 1
-
-                for subedge in subedges_to_route:
-                    key, mask, = subedge.key, subedge.mask
-                    key_mask_combo = subedge.key_mask_combo
-                    dest = subedge.postsubvertex
-                    xd, yd, pd = dest.placement.processor.get_coordinates()
-                    routing = lib_map.Routing(subedge)
-                    xt, yt = DijkstraRouting.retrace_back_to_source(xd, yd, machine,
-                                                                    nodes_info,
-                                                                    dijkstra_tables,
-                                                                    key, mask,
-                                                                    key_mask_combo,
-                                                                    routing,
-                                                                    pd,
-                                                                    BW_PER_ROUTE_ENTRY)
-                    # SD Commented out 20/1/14 to remove extraneous printing.
-                    # DijkstraRouting.printRoute(xt, yt, xs, ys, dijkstra_tables, routing)
-
-                    subedge.routing = routing
-
-                    routings.append(routing)
-
-                    run_num += 1
-                
-
-                # SD Commented this out 20/1/14, to avoid extraneous printing
-                # AS modified to debug format
-                #print ""
-                #logger.debug("Route number {} completed from ({}, {}) "
-                #             "to ({}, {})".format(run_num, xs, ys, xd, yd))
-                #logger.debug("route took {}".format(DijkstraRouting.printRoute(xd, yd, xs, ys, dijkstra_tables, routing)))
-                #logger.debug("*********************************"
-                #             "**********************************")
-
-
-
-                #if (run_num % 5000) == 0:
-                #    logger.debug("{} routes done, please wait"
-                #                 "...".format(run_num))
-            
-            progress.update()
+                DijkstraRouting.update_weights(nodes_info, machine, l, m, k,
+                                               MAX_BW, changed_chip_ids,
+                                               changed_links)
+                changed_chip_ids.clear()
+                changed_links.clear()
+
+                searches = list()
+                for (subVertex, subedges_to_route) in batch:
+                    xs, ys, ps = \
+                        subVertex.placement.processor.get_coordinates()
+                    destinations = list()
+                    for subedge in subedges_to_route:
+                        xd, yd, pd = subedge.postsubvertex.placement.\
+                            processor.get_coordinates()
+                        destinations.append(ids[(xd, yd)])
+                    searches.append((ids[(xs, ys)], destinations))
+
+                # The paths of a batch searched in parallel are traced with
+                # the weights the search used, which are then a snapshot
+                search_info = nodes_info
+                if pool is None:
+                    results = [DijkstraRouting.
+                               properate_costs_till_reached_destinations(
+                                   nodes_info, source, list(destinations))
+                               for (source, destinations) in searches]
+                else:
+                    search_info = dict(nodes_info, weights=[
+                        list(weights) for weights in nodes_info["weights"]])
+                    results = DijkstraRouting.search_in_pool(
+                        pool, workers, search_info, searches)
+
+                for ((subVertex, subedges_to_route),
+                     (source, destinations),
+                     (costs, activated)) in zip(batch, searches, results):
+                    info = search_info
+                    paths = [DijkstraRouting.trace_path(destination, info,
+                                                        costs)
+                             for destination in destinations]
+
+                    # Re-plan a source whose paths, found before the sources
+                    # before it in the batch were committed, no longer fit
+                    if pool is not None and DijkstraRouting.path_conflicts(
+                            paths, [subedge.key_mask_combo
+                                    for subedge in subedges_to_route],
+                            nodes_info, machine, BW_PER_ROUTE_ENTRY):
+                        DijkstraRouting.update_weights(
+                            nodes_info, machine, l, m, k, MAX_BW,
+                            changed_chip_ids, changed_links)
+                        changed_chip_ids.clear()
+                        changed_links.clear()
+                        info = nodes_info
+                        costs, activated = DijkstraRouting.\
+                            properate_costs_till_reached_destinations(
+                                info, source, list(destinations))
+                        paths = [DijkstraRouting.trace_path(destination, info,
+                                                            costs)
+                                 for destination in destinations]
+
+                    #helpful output data
+                    if conf.config.getboolean( "Routing", "generate_graphs" ) and \
+                        dao is not None: # AM
+                        dijkstra_tables = dict()
+                        for chip_id, (x, y) in enumerate(nodes_info["coords"]):
+                            dijkstra_tables["{}:{}".format(x, y)] = {
+                                "lowest cost": costs[chip_id],
+                                "activated?": activated[chip_id]}
+                        output_folder = dao.get_reports_directory("routing_graphs")
+                        router_utility= util.RouterUtil(new_output_folder=output_folder)
+                        router_utility.output_routing_weight(router_utility,
+                                                             dijkstra_tables, machine,
+                                                             graph_label="routing weights",
+                                                             routing_file_name="routingWeights" + str(edge_considered))
+                        edge_considered += 1
+
+                    for (subedge, destination, path) in zip(
+                            subedges_to_route, destinations, paths):
+                        key, mask, = subedge.key, subedge.mask
+                        key_mask_combo = subedge.key_mask_combo
+                        xd, yd, pd = subedge.postsubvertex.placement.\
+                            processor.get_coordinates()
+                        routing = lib_map.Routing(subedge)
+                        DijkstraRouting.retrace_back_to_source(
+                            destination, machine, info, costs, key, mask,
+                            key_mask_combo, routing, pd, BW_PER_ROUTE_ENTRY,
+                            changed_chip_ids, changed_links, path)
+
+                        subedge.routing = routing
+
+                        routings.append(routing)
+
+                        run_num += 1
+
+                    progress.update()
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
         #finish_time = clock()
 
@@ -0,0 +1 @@
+from pacman103.core.mapper.routing_table_minimisation_algorithms.key_mask_merge_minimiser import KeyMaskMergeMinimiser
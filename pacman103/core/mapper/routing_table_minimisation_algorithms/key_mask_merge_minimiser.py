@@ -0,0 +1,144 @@
+import logging
+
+import numpy
+
+from pacman103.core.mapper.router import packet_tracing
+from pacman103.lib import lib_map
+
+logger = logging.getLogger(__name__)
+
+
+class KeyMaskMergeMinimiser(object):
+    """
+    Minimises the routing table of each router by merging the entries which
+    have the same route into entries with wider masks.
+
+    Two entries are merged into an entry whose mask keeps only the bits which
+    are in both masks and equal in both keys.  A merge is only made if the
+    merged entry matches none of the keys which reach the router with a
+    different route: those of the entries in the CAM, including those which
+    are left to default routing, and those which reach it without an entry,
+    which pass straight through or are dropped if they were sent by a core of
+    the chip.  The packets which reach the router are then routed as before
+    whatever the order of the table.
+    """
+
+    def __init__(self, dao):
+        self.dao = dao
+
+    def minimise_all(self):
+        """
+        Minimises the routing table of every router which has entries, and
+        returns a list of the x and y coordinates of each chip with the number
+        of entries in its table before and after minimisation
+        """
+        logger.info("* Running routing table minimiser *")
+        machine = self.dao.machine
+
+        # Follow the packets of each key sent through the tables made from the
+        # CAMs, to find those which reach each router without an entry
+        get_cam_table = packet_tracing.memoised_tables(
+            packet_tracing.get_cam_table_entries)
+        passing_keys = dict()
+        for subvertex in self.dao.subvertices:
+            if subvertex.placement is None:
+                continue
+            xs, ys, _ = subvertex.placement.processor.get_coordinates()
+            for (key, mask) in set([(subedge.key_mask_combo, subedge.mask)
+                                    for subedge in subvertex.out_subedges]):
+                arrivals = packet_tracing.trace_packet(machine, xs, ys, key,
+                                                       get_cam_table)[2]
+                for (x, y, in_link) in arrivals:
+                    if key not in machine.get_chip(x, y).router.cam:
+                        route = -1
+                        if in_link is not None:
+                            route = 1 << ((in_link + 3) % 6)
+                        passing_keys.setdefault((x, y), set()).add(
+                            (key, mask, route))
+
+        counts = list()
+        for coord in machine.get_coords_of_all_chips():
+            x, y = coord['x'], coord['y']
+            chip = machine.get_chip(x, y)
+            if chip.is_virtual() or len(chip.router.cam) == 0:
+                continue
+            n_entries = len(chip.router.get_table_entries())
+            chip.router.minimised_table = KeyMaskMergeMinimiser.minimise(
+                chip.router, passing_keys.get((x, y), ()))
+            counts.append((x, y, n_entries,
+                           len(chip.router.minimised_table)))
+        return counts
+
+    @staticmethod
+    def minimise(router, passing_keys=()):
+        """
+        Returns the minimised list of routing entries for the router, in place
+        of the entries of its CAM which cannot be defaulted, given the (key,
+        mask, route) of the packets which reach the router without an entry,
+        with a route of -1 for those which are dropped
+        """
+        entries = [entries[0] for entries in router.cam.values()]
+
+        # Group the entries to be written by route, keeping the order in
+        # which the routes are first used
+        routes = list()
+        groups = dict()
+        for entry in entries:
+            if entry.defaultable:
+                continue
+            if entry.route not in groups:
+                routes.append(entry.route)
+                groups[entry.route] = list()
+            groups[entry.route].append((entry.key, entry.mask))
+
+        all_keys = numpy.array([entry.key for entry in entries]
+                               + [key for (key, _, _) in passing_keys],
+                               dtype="uint64")
+        all_masks = numpy.array([entry.mask for entry in entries]
+                                + [mask for (_, mask, _) in passing_keys],
+                                dtype="uint64")
+        all_routes = numpy.array([entry.route for entry in entries]
+                                 + [route for (_, _, route) in passing_keys],
+                                 dtype="int64")
+
+        minimised_table = list()
+        for route in routes:
+
+            # A packet which is left to default routing leaves the router
+            # along the link of its route, so may also be matched by an
+            # entry with that route
+            other_routes = all_routes != route
+            for (key, mask) in KeyMaskMergeMinimiser.merge(
+                    groups[route], all_keys[other_routes],
+                    all_masks[other_routes]):
+                entry = lib_map.RoutingEntry(router, key, key, mask)
+                entry.route = route
+                minimised_table.append(entry)
+        return minimised_table
+
+    @staticmethod
+    def merge(keys_and_masks, other_keys, other_masks):
+        """
+        Greedily merges the (key, mask) pairs into as few pairs as it can
+        without matching any key matched by the other keys and masks, and
+        returns the merged pairs
+        """
+        remaining = sorted(keys_and_masks)
+        merged = list()
+        while len(remaining) > 0:
+            (key, mask) = remaining[0]
+            unmerged = list()
+            for (other_key, other_mask) in remaining[1:]:
+                new_mask = mask & other_mask & ~(key ^ other_key) & 0xFFFFFFFF
+                new_key = key & new_mask
+
+                # Two key and mask pairs match a common key if their keys are
+                # equal in the bits which are in both masks
+                if not numpy.any(((other_keys ^ new_key) & other_masks
+                                  & new_mask) == 0):
+                    key, mask = new_key, new_mask
+                else:
+                    unmerged.append((other_key, other_mask))
+            merged.append((key, mask))
+            remaining = unmerged
+        return merged
@@ -4,12 +4,13 @@ import logging
 import numpy
 import os
 import os.path
-import pickle
 import shutil
+import time
 
 from pacman103 import conf
 from pacman103.lib import lib_map, data_spec_constants
-from pacman103.core import data_spec_executor, exceptions, reports
+from pacman103.core import app_data_cache, data_spec_executor, exceptions, \
+    reports, target_manifest
 from pacman103.core.dao import DAO
 from pacman103.core.process_bar import ProgressBar
 
@@ -35,48 +36,37 @@ def generate_output(dao):
     machine = dao.get_machine()
     #checks if the folders for the binery and reports exists already.
     check_directories_exist(dao)
-    generate_output_raw(dao)
+    cache_statistics = generate_output_raw(dao)
     if conf.config.getboolean("Reports", "reportsEnabled"):
         reports.generate_data_generator_reports(dao)
-    
-    # Pickle outputs for reload
-    directory = DAO.get_binaries_directory()
-    load_targets_path = os.path.join(directory, "pickled_load_targets")
-    executable_targets_path = os.path.join(directory, "pickled_executable_targets")
-    mem_write_targets_path = os.path.join(directory, "pickled_mem_write_targets")
-    
-    try:
-        load_targets_file = open(load_targets_path, "wb")
-        pickle.dump(dao.load_targets, load_targets_file, protocol=pickle.HIGHEST_PROTOCOL)
-        load_targets_file.close()
-        executable_targets_file = open(executable_targets_path, "wb")
-        pickle.dump(dao.executable_targets, executable_targets_file, protocol=pickle.HIGHEST_PROTOCOL)
-        executable_targets_file.close()
-        mem_write_targets_file = open(mem_write_targets_path, "wb")
-        pickle.dump(dao.mem_write_targets, mem_write_targets_file, protocol=pickle.HIGHEST_PROTOCOL)
-        mem_write_targets_file.close()
-    except Exception as e:
-        print e.message
-    
-        
+        if cache_statistics is not None:
+            reports.generate_app_data_cache_report(dao, cache_statistics)
+
+    # Store the targets for reload
+    target_manifest.write_manifest(
+        os.path.join(dao.get_binaries_directory(), target_manifest.FILENAME),
+        dao.executable_targets, dao.load_targets, dao.mem_write_targets)
+
+
 def reload_output(dao, reload_time):
+    """
+    Reads the targets of the output generated at reload_time from its target
+    manifest into the datastore.  The data of the load targets is read from
+    the manifest, so the other files of the output are not needed.
+
+    :raises PacmanException:
+        if the output has no manifest, or one which cannot be read.
+    """
     logger.info("Reloading targets from %s" % reload_time)
-    directory = DAO.get_binaries_directory(reload_time=reload_time)
-    load_targets_path = os.path.join(directory, "pickled_load_targets")
-    executable_targets_path = os.path.join(directory, "pickled_executable_targets")
-    mem_write_targets_path = os.path.join(directory, "pickled_mem_write_targets")
-    try:
-        load_targets_file = open(load_targets_path, "rb")
-        dao.load_targets = pickle.load(load_targets_file)
-        load_targets_file.close()
-        executable_targets_file = open(executable_targets_path, "rb")
-        dao.executable_targets = pickle.load(executable_targets_file)
-        executable_targets_file.close()
-        mem_write_targets_file = open(mem_write_targets_path, "rb")
-        dao.mem_write_targets = pickle.load(mem_write_targets_file)
-        mem_write_targets_file.close()
-    except Exception as e:
-        print e.message
+    path = os.path.join(DAO.get_binaries_directory(reload_time=reload_time),
+                        target_manifest.FILENAME)
+    if not os.path.exists(path):
+        raise exceptions.PacmanException(
+            "No targets were stored in {} to reload".format(path))
+    manifest = target_manifest.TargetManifest(path)
+    dao.executable_targets = manifest.get_executable_targets()
+    dao.load_targets = manifest.get_load_targets()
+    dao.mem_write_targets = manifest.get_mem_write_targets()
 
 def check_directories_exist(dao):
     binary_dir = dao.get_binaries_directory()
@@ -92,11 +82,15 @@ def generate_output_raw(dao):
     This is now largely finished. Data structures are generated for edges
     and the data structure generation for vertices is merely a prototype.
 
+    If the appData cache is enabled, the images of the cores whose inputs
+    are unchanged are copied from the cache instead of being generated.
+
     *Side effects*:
         writes data structures for the load targets to files in the binaries directories
 
     :returns:
-        Nothing       
+        :py:class:`pacman103.core.app_data_cache.AppDataCacheStatistics` of
+        the cores looked up in the appData cache, or None if it is not enabled
     """
 
     executable_targets, load_targets, mem_write_targets = list(), list(), list()
@@ -110,6 +104,12 @@ def generate_output_raw(dao):
     except (ConfigParser.NoSectionError, ConfigParser.NoOptionError):
         raise Exception( "SpecExecutor could not find config information"
                          " indicating where Spec Execution should occur." )
+    if conf.config.has_option("SpecExecution", "specExecDirect"):
+        dao.specExecDirect = \
+            conf.config.getboolean("SpecExecution", "specExecDirect")
+    if conf.config.has_option("SpecExecution", "writeExecutedSpecs"):
+        dao.writeExecutedSpecs = \
+            conf.config.getboolean("SpecExecution", "writeExecutedSpecs")
     
     chips = None
     if dao.useHostBasedSpecExecutor == True:
@@ -120,25 +120,57 @@ def generate_output_raw(dao):
             if not key in chips:
                 chips[key] = data_spec_executor.Chip(x, y)
 
+    cache, hasher, statistics = None, None, None
+    if dao.useHostBasedSpecExecutor == True:
+        cache = app_data_cache.AppDataCache.from_config()
+    if cache is not None:
+        hasher = app_data_cache.CoreHasher(dao)
+        statistics = app_data_cache.AppDataCacheStatistics()
+
     for placement in dao.placements:
         if not placement.subvertex.vertex.is_virtual():
             
             start_addr = None
+            entry = None
+            hostname = dao.machine.hostname
+            (x, y, p) = placement.processor.get_coordinates()
             if dao.useHostBasedSpecExecutor == True:
-                dao.spec_executor = data_spec_executor.SpecExecutor()
-                
-                (x, y, p) = placement.processor.get_coordinates()
                 key = "{}:{}".format(x, y)
                 chip = chips[key]
 
                 start_addr = chip.sdram_used + \
                     data_spec_constants.SDRAM_BASE_ADDR
-                dao.spec_executor.setup(chip)
-            
+                f_out = os.path.join(
+                    dao.get_binaries_directory(),
+                    "%s_appData_%d_%d_%d.dat" % (hostname, x, y, p)
+                )
+
+                # Reuse the image of the core if its inputs are unchanged
+                if cache is not None:
+                    start_time = time.time()
+                    core_hash = hasher.get_hash(placement, start_addr)
+                    entry = cache.load(core_hash, f_out)
+
             subvertex = placement.subvertex
 
-            myExecTargets, myLoadTargets, myMemWriteTargets = \
-                 subvertex.generateDataSpec(placement.processor, dao)
+            if entry is not None:
+                (myExecTargets, myLoadTargets, myMemWriteTargets) = \
+                    entry["targets"]
+                chip.memory_map.extend(entry["memory_map"])
+                chip.sdram_used = entry["sdram_used"]
+                for subedge in subvertex.in_subedges:
+                    if hasattr(subedge, "free_sublist"):
+                        subedge.free_sublist()
+            else:
+                if dao.useHostBasedSpecExecutor == True:
+                    dao.spec_executor = data_spec_executor.SpecExecutor()
+                    memory_map_length = len(chip.memory_map)
+                    dao.spec_executor.setup(chip)
+                if cache is not None:
+                    random_states = app_data_cache.get_random_states()
+
+                myExecTargets, myLoadTargets, myMemWriteTargets = \
+                     subvertex.generateDataSpec(placement.processor, dao)
 
             # Add this core to the list of targets
             if myExecTargets is not None:
@@ -152,35 +184,56 @@ def generate_output_raw(dao):
             if myMemWriteTargets is not None and len(myMemWriteTargets) > 0:
                 mem_write_targets.extend(myMemWriteTargets)
             
-            x, y, p = placement.processor.get_coordinates()
             chipsUsed.add((x, y))
             
-            hostname = dao.machine.hostname
-            
             if dao.useHostBasedSpecExecutor == True:
-                (x, y, p) = placement.processor.get_coordinates()
-                f_out = os.path.join(
-                    dao.get_binaries_directory(),
-                    "%s_appData_%d_%d_%d.dat" % (hostname, x, y, p)
-                )
-                dao.spec_executor.finish(f_out)
-
-                # TODO: Bring the following in line / neaten
-                # ----------------------------------------------
-                # Keep information on the memory region locations
-                # for later report generation:
                 index = "%d %d %d" % (x, y, p)
-                dao.memMaps[index] = [
-                    [i, s.wr_ptr_aligned, s.wr_ptr_offset, s.size, \
-                                               s.memory, s.unfilled] \
-                    if s is not None else [i, 0, 0, 0, [], False]
-                        for (i, s) in enumerate(dao.spec_executor.memory_slots)
-                ]
+                if entry is not None:
+                    dao.memMaps[index] = app_data_cache.restore_memory_map(
+                        entry["memory_slots"], f_out)
+                    statistics.add(placement, app_data_cache.HIT,
+                                   time.time() - start_time)
+                else:
+                    dao.spec_executor.finish(f_out)
+
+                    # TODO: Bring the following in line / neaten
+                    # ----------------------------------------------
+                    # Keep information on the memory region locations
+                    # for later report generation:
+                    dao.memMaps[index] = [
+                        [i, s.wr_ptr_aligned, s.wr_ptr_offset, s.size, \
+                                                   s.memory, s.unfilled] \
+                        if s is not None else [i, 0, 0, 0, [], False]
+                            for (i, s) in enumerate(dao.spec_executor.memory_slots)
+                    ]
+
+                # Cores which load files of their own or draw on the global
+                # random number generators cannot be reused
+                if cache is not None and entry is None:
+                    if ((myLoadTargets is None or len(myLoadTargets) == 0) and
+                            app_data_cache.random_states_equal(
+                                random_states,
+                                app_data_cache.get_random_states())):
+                        cache.save(core_hash, f_out, {
+                            "targets": (myExecTargets, myLoadTargets,
+                                        myMemWriteTargets),
+                            "memory_map": chip.memory_map[memory_map_length:],
+                            "sdram_used": chip.sdram_used,
+                            "memory_slots": app_data_cache.describe_memory_map(
+                                dao.spec_executor.memory_slots)})
+                        statistics.add(placement, app_data_cache.MISS,
+                                       time.time() - start_time)
+                    else:
+                        statistics.add(placement, app_data_cache.UNCACHED,
+                                       time.time() - start_time)
 
                 # Add the files produced by the Spec Executor to the
                 # list of files to load:
                 load_targets.append(lib_map.LoadTarget(
-                    f_out, x, y, p, start_addr))
+                    f_out, x, y, p, start_addr,
+                    written_ranges=get_written_ranges(
+                        dao.memMaps[index], start_addr,
+                        subvertex.vertex.get_written_regions())))
                 mem_write_targets.append(lib_map.MemWriteTarget(
                     x, y, p, 0xe5007000 + 128*p + 112, start_addr))
         progress_bar.update()
@@ -189,6 +242,8 @@ def generate_output_raw(dao):
     dao.set_executable_targets(executable_targets)
     dao.set_load_targets(load_targets)
     dao.set_mem_write_targets(mem_write_targets)
+    if cache is not None:
+        cache.evict()
 
     # Generate core map and routing table binaries for each chip
     for coord in dao.machine.get_coords_of_all_chips():
@@ -211,13 +266,26 @@ def generate_output_raw(dao):
                     )
                 )
     progress_bar.end()
+    return statistics
             
+def get_written_ranges(memory_map, start_addr, regions):
+    """
+    Returns a list of the (start, end) addresses of the regions of the
+    memory map of the image of a core at start_addr which its application
+    writes to while it runs: those reserved unfilled for its results, and
+    the given regions.  The regions are laid out in order as the application
+    pointer table gives them.
+    """
+    written_ranges = list()
+    offset = start_addr
+    for (i, _, _, size, _, unfilled) in memory_map:
+        if size > 0 and (unfilled or i in regions):
+            written_ranges.append((offset, offset + 4 * size))
+        offset += 4 * size
+    return written_ranges
+
 def get_route_count(chip):
-    defaulted = 0
-    for key in chip.router.cam:
-        if chip.router.cam[key][0].defaultable:
-            defaulted += 1
-    return len(chip.router.cam) - defaulted
+    return len(chip.router.get_table_entries())
 
 def generate_routing_table(chip, size, dao):
     """
@@ -238,9 +306,9 @@ def generate_routing_table(chip, size, dao):
     This is an implementation which positions the first route at position 0, and all
     further entries contiguously follow.
     
-    There is no attempt at optimisation, as all masks are fixed at 11 bits and are
-    not expected to overflow the 1k entries in the routing table.
-    ABS shouldnt need to optimise, as the router should be resposbile for optimisations
+    There is no attempt at optimisation here: the entries written are those of
+    the minimised table of the router if the routing table minimiser has run,
+    or else the entries of the CAM which cannot be defaulted.
     :returns:
         a file in the binaries directory (spinnaker_package_103/binaries/) or None if not required
         a counter of the number of routes that were inserted into the routing table
@@ -259,23 +327,13 @@ def generate_routing_table(chip, size, dao):
 
     vrid = 0
     
-    for maskedkey in chip.router.cam:
+    for entry in chip.router.get_table_entries():
         # as entries are contiguous can just consolidate and blat them out 
         compiled = vrid | (size<<16)
-        destination_route=0
-        defaultable=True
-        destination_route = chip.router.cam[maskedkey][0].route
-        mask = chip.router.cam[maskedkey][0].mask
-
-        if not chip.router.cam[maskedkey][0].defaultable:
-            defaultable = False
-
-
-        output_me = array('I', [compiled, destination_route, maskedkey, mask])
+        output_me = array('I', [compiled, entry.route, entry.key, entry.mask])
         # 'I' means unsigned Integers
-        if defaultable==False:
-            output_me.tofile(output_file)
-            vrid +=1
+        output_me.tofile(output_file)
+        vrid +=1
 
     # send delimiter (all 1s) before closing the file off
     compiled=mykey=mymask=myroute=0xFFFFFFFF
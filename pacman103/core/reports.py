@@ -539,6 +539,79 @@ def generate_routing_table_report(dao, filename=None):
             output.close()
 
 
+def generate_placement_refinement_report(dao, statistics):
+    """
+    Write the estimated hops, link loads and router entries of the placements
+    before and after refinement to the reports directory.
+
+    :param statistics: :py:class:`RefinementStatistics` returned by the
+        placement refiner
+    """
+    fileName = dao.get_reports_directory() + os.sep \
+        + "placement_refinement.rpt"
+    try:
+        fRefinement = open(fileName, "w")
+    except IOError:
+        logger.error("generate_placement_refinement_report: Can't open file "
+                     "{} for writing.".format(fileName))
+        return
+
+    fRefinement.write("        Placement refinement\n")
+    fRefinement.write("        ====================\n\n")
+    timeDateString = time.strftime("%c")
+    fRefinement.write("Generated: %s\n\n" % timeDateString)
+    fRefinement.write("                         Before       After\n")
+    fRefinement.write("----------------------------------------------\n")
+    for (name, attribute) in (("Total hops", "total_hops"),
+                              ("Weighted hops", "weighted_hops"),
+                              ("Peak link load", "peak_link_load"),
+                              ("Max router entries", "max_router_entries")):
+        fRefinement.write("  %-20s %10d  %10d\n"
+                          % (name, getattr(statistics.before, attribute),
+                             getattr(statistics.after, attribute)))
+    fRefinement.write("----------------------------------------------\n")
+    fRefinement.write("Moves tried:    %d\n" % statistics.n_moves)
+    fRefinement.write("Moves accepted: %d\n" % statistics.n_accepted)
+    fRefinement.write("Time taken:     %.3f s\n" % statistics.elapsed)
+    if statistics.time_limited:
+        fRefinement.write("Stopped by the time budget, so the placements "
+                          "may differ between runs\n")
+    fRefinement.close()
+
+
+def generate_routing_table_minimisation_report(dao, counts):
+    """
+    Write the number of entries in the routing table of each chip before and
+    after minimisation, given as a list of (x, y, before, after)
+    """
+    fileName = dao.get_reports_directory() + os.sep \
+        + "routing_table_minimisation.rpt"
+    try:
+        fMinimisation = open(fileName, "w")
+    except IOError:
+        logger.error("generate_routing_table_minimisation_report: Can't open "
+                     "file {} for writing.".format(fileName))
+        return
+
+    fMinimisation.write("        Routing table minimisation\n")
+    fMinimisation.write("        ==========================\n\n")
+    timeDateString = time.strftime("%c")
+    fMinimisation.write("Generated: %s\n\n" % timeDateString)
+    fMinimisation.write("   Chip      Before    After\n")
+    fMinimisation.write("---------------------------------\n")
+    for (x, y, before, after) in counts:
+        fMinimisation.write("  (%3d, %3d)  %6d  %6d\n" % (x, y, before, after))
+    fMinimisation.write("---------------------------------\n")
+    fMinimisation.write("  Total       %6d  %6d\n"
+                        % (sum([count[2] for count in counts]),
+                           sum([count[3] for count in counts])))
+    if len(counts) > 0:
+        fMinimisation.write("  Largest     %6d  %6d\n"
+                            % (max([count[2] for count in counts]),
+                               max([count[3] for count in counts])))
+    fMinimisation.close()
+
+
 def generate_router_report(binaryRouterFileNameFullPath, chip, dao):
     """
     Generate a text file with the contents of the router in the chip
@@ -653,6 +726,73 @@ def uint32ToHexString(number):
     hexString = "%4.0X%4.0X" %(top, bottom)
     return hexString
 
+def generate_load_report(dao, statistics):
+    """
+    Write a summary of the data loaded to the board to the reports directory.
+
+    :param statistics: :py:class:`LoadStatistics` returned by the transceiver
+    """
+    fileName = dao.get_reports_directory() + os.sep + "load.rpt"
+    try:
+        fLoad = open(fileName, "w")
+    except IOError:
+        logger.error("Generate_load_report: Can't open file %s for writing."\
+                      % fileName)
+        return
+
+    fLoad.write("          Load Report\n")
+    fLoad.write("          ===========\n\n")
+    timeDateString = time.strftime("%c")
+    fLoad.write("Generated: %s" % timeDateString)
+    fLoad.write(" for target machine '%s'" % dao.machine.hostname)
+    fLoad.write("\n\n")
+    fLoad.write("Files loaded:  %d\n" % statistics.n_targets)
+    fLoad.write("Chips loaded:  %d\n" % statistics.n_chips)
+    fLoad.write("Bytes loaded:  %d\n" % statistics.n_bytes)
+    fLoad.write("Time taken:    %.3f s\n" % statistics.elapsed)
+    fLoad.write("Throughput:    %.3f MB/s\n" % statistics.bandwidth)
+    fLoad.write("Bytes skipped: %d\n" % statistics.n_bytes_skipped)
+    fLoad.write("Bytes verified: %d\n" % statistics.n_bytes_verified)
+    fLoad.write("Time saved:    %.3f s (estimated)\n" % statistics.time_saved)
+    fLoad.close()
+
+def generate_app_data_cache_report(dao, statistics):
+    """
+    Write whether the appData of each core was reused from the appData cache
+    to the reports directory.
+
+    :param statistics: :py:class:`AppDataCacheStatistics` returned by
+        :py:func:`pacman103.core.output_generator.generate_output_raw`
+    """
+    fileName = dao.get_reports_directory() + os.sep + "app_data_cache.rpt"
+    try:
+        fCache = open(fileName, "w")
+    except IOError:
+        logger.error("generate_app_data_cache_report: Can't open file {} for "
+                     "writing.".format(fileName))
+        return
+
+    fCache.write("          AppData Cache\n")
+    fCache.write("          =============\n\n")
+    timeDateString = time.strftime("%c")
+    fCache.write("Generated: %s\n\n" % timeDateString)
+    n_cores = len(statistics.cores)
+    fCache.write("Cores:         %d\n" % n_cores)
+    fCache.write("Hits:          %d\n" % statistics.n_hits)
+    fCache.write("Misses:        %d\n" % statistics.n_misses)
+    fCache.write("Not cacheable: %d\n" % statistics.n_uncached)
+    if n_cores > 0:
+        fCache.write("Hit rate:      %.1f%%\n"
+                     % (100.0 * statistics.n_hits / n_cores))
+    fCache.write("Time reusing:     %.3f s\n" % statistics.hit_time)
+    fCache.write("Time generating:  %.3f s\n\n" % statistics.miss_time)
+    fCache.write("   Core           Result    Atoms      Vertex\n")
+    fCache.write("------------------------------------------------------\n")
+    for (x, y, p, label, lo_atom, hi_atom, result) in statistics.cores:
+        fCache.write("  (%3d, %3d, %2d)  %-8s  %4d-%-4d  %s\n"
+                     % (x, y, p, result, lo_atom, hi_atom, label))
+    fCache.close()
+
 def generate_coremap_report(dao):
     """
     Create a textual version of the core map in the reports directory.
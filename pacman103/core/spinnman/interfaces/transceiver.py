@@ -1,12 +1,17 @@
+import hashlib
 import numpy
 import struct
 import time
 
 from pacman103.core.spinnman.scp.scp_connection import SCPConnection
 from pacman103.core.spinnman.interfaces.transceiver_tools.app_calls import AppCalls
-from pacman103.core.spinnman.interfaces.transceiver_tools.memory_calls import MemoryCalls
+from pacman103.core.spinnman.interfaces.transceiver_tools.memory_calls import MemoryCalls, \
+    DEFAULT_WINDOW
 from pacman103.core.spinnman.interfaces.transceiver_tools.packet_calls import PacketCalls
+from pacman103.core.spinnman.interfaces.transceiver_tools.load_manifest import \
+    LoadManifest, get_ranges
 from pacman103.core.spinnman.interfaces.transceiver_tools.utility import Utility
+from pacman103.lib.machine.machine_description import MachineDescription
 from pacman103.core.spinnman.scp import scamp
 from pacman103.core.spinnman.spinnman_utilities import SpinnmanUtilities
 from pacman103.core.spinnman.scp import boot
@@ -23,6 +28,44 @@ import os
 import logging
 logger = logging.getLogger(__name__)
 
+class LoadStatistics(object):
+    """
+    Summary of a call to
+    :py:func:`pacman103.pacman.transceiver.Transceiver.load_targets_raw`.
+    """
+
+    def __init__(self):
+        self.n_targets = 0
+        self.n_chips = 0
+        self.n_bytes = 0
+        self.elapsed = 0.0
+
+        # Of a differential load, the bytes found to be unchanged on the
+        # board and not written, and those read back to verify them
+        self.n_bytes_skipped = 0
+        self.n_bytes_verified = 0
+        self.write_elapsed = 0.0
+
+    @property
+    def bandwidth(self):
+        """
+        Rate at which the data was loaded in megabytes per second.
+        """
+        if self.elapsed <= 0:
+            return 0.0
+        return self.n_bytes / (1024.0 * 1024.0) / self.elapsed
+
+    @property
+    def time_saved(self):
+        """
+        Estimate of the seconds saved by not writing the skipped bytes, at
+        the rate at which the other bytes were written.
+        """
+        if self.n_bytes <= 0 or self.write_elapsed <= 0:
+            return 0.0
+        return self.n_bytes_skipped * self.write_elapsed / self.n_bytes
+
+
 class Transceiver(object):
     """
     A Transceiver is instantiated by a
@@ -38,8 +81,11 @@ class Transceiver(object):
 
     def __init__(self, hostname, port=17893):
         self.conn = SCPConnection(hostname, port)
+        window = DEFAULT_WINDOW
+        if conf.config.has_option("Machine", "scp_window"):
+            window = conf.config.getint("Machine", "scp_window")
         self.app_calls = AppCalls(self)
-        self.memory_calls = MemoryCalls(self)
+        self.memory_calls = MemoryCalls(self, window)
         self.packet_calls = PacketCalls(self)
         self._x = 0
         self._y = 0
@@ -61,16 +107,18 @@ class Transceiver(object):
         :returns: numpy.ndarray containing the requested memory.
         """
         self.select(x, y, p)
-        memory = self.memory_calls.read_mem(a, scamp.TYPE_WORD, l)
-        memory = numpy.fromstring(memory, dtype=dtype)
+        memory = numpy.empty(l, dtype=numpy.uint8)
+        self.memory_calls.read_mem_into(a, scamp.TYPE_WORD, l, memory)
 
-        return memory
+        return memory.view(dtype)
 
 
     def load_targets(self, dao):
         """
         Loads LoadTargets from the datastore and calls
         :py:func:`pacman103.pacman.transceiver.Transceiver.load_targets_raw`.
+
+        :returns: :py:class:`LoadStatistics` describing the load
         """
         if conf.config.get("Reports", "write_reload_steps"):
             self.utility = SpinnmanUtilities(dao=dao)
@@ -81,25 +129,140 @@ class Transceiver(object):
 
         # now get the data to load and then do it
         targets = dao.get_load_targets()
-        self.load_targets_raw(targets)
+        if not conf.config.getboolean("Load", "differential"):
+            return self.load_targets_raw(targets)
+
+        # the manifest no longer describes the board while it is being
+        # loaded, so it is only kept once the load has finished
+        manifest_path = LoadManifest.get_path(dao.machine.hostname)
+        manifest = LoadManifest.read(
+            manifest_path, conf.config.getint("Load", "block_size"))
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+        statistics = self.load_targets_raw(
+            targets, manifest, conf.config.getboolean("Load", "verify"))
+        manifest.write(manifest_path)
+        return statistics
+
+
+    def plan_load_targets(self, targets):
+        """
+        Orders LoadTargets so that all of the targets of a chip are loaded
+        together, in chip, processor and then address order, minimising the
+        number of times the selected node changes.  Targets that compare
+        equal keep their original relative order.
+
+        :param list targets:
+            list of :py:class:`pacman103.lib.lib_map.LoadTarget` instances.
+        :returns: a new list containing the same targets
+        """
+        return sorted(targets, key=lambda target: (target.x, target.y,
+                                                   target.p, target.address))
 
 
-    def load_targets_raw(self, targets):
+    def load_targets_raw(self, targets, manifest=None, verify=False):
         """
-        Uses the SCP connection to load LoadTargets to the machine.
+        Uses the SCP connection to load LoadTargets to the machine.  The
+        targets are loaded in the order given by
+        :py:meth:`plan_load_targets`, with each file streamed through the
+        pipelined write path of
+        :py:meth:`MemoryCalls.write_mem_from_file`, or the data of targets
+        which already hold it, such as those of a target manifest, written
+        straight from memory.
+
+        If a manifest is given, only the blocks of each target which differ
+        from those it records are written, and the manifest is updated with
+        what was loaded.
 
         :param list targets:
             list of :py:class:`pacman103.lib.lib_map.LoadTarget` instances.
+        :param manifest:
+            :py:class:`LoadManifest` of the data last loaded to the board,
+            or None to load every target in full.
+        :param bool verify:
+            whether to read back the blocks which the manifest records as
+            unchanged, and write those which differ on the board.
+        :returns: :py:class:`LoadStatistics` describing the load
         """
-        for target in targets:
+        statistics = LoadStatistics()
+        statistics.n_chips = len(set((target.x, target.y)
+                                     for target in targets))
+        start_time = time.time()
+        for target in self.plan_load_targets(targets):
             if conf.config.get("Reports", "write_reload_steps"):
                 self.utility.write_selects(target.x, target.y, target.p)
                 self.utility.write_mem_from_file(target.address, scamp.TYPE_WORD,
                                                  target.filename)
             self.select(target.x, target.y, target.p)
 
-            self.memory_calls.write_mem_from_file(target.address, scamp.TYPE_WORD,
-                                                  target.filename)
+            if manifest is None:
+                write_start_time = time.time()
+                if target.data is not None:
+                    self.memory_calls.write_mem(target.address,
+                                                scamp.TYPE_WORD, target.data)
+                    statistics.n_bytes += len(target.data)
+                else:
+                    statistics.n_bytes += \
+                        self.memory_calls.write_mem_from_file(
+                            target.address, scamp.TYPE_WORD, target.filename)
+                statistics.write_elapsed += time.time() - write_start_time
+            else:
+                self.load_target_differential(target, manifest, verify,
+                                              statistics)
+            statistics.n_targets += 1
+        statistics.elapsed = time.time() - start_time
+        logger.info("Loaded {} bytes to {} chips in {:.3f}s ({:.3f} MB/s)"
+                    .format(statistics.n_bytes, statistics.n_chips,
+                            statistics.elapsed, statistics.bandwidth))
+        if manifest is not None:
+            logger.info("Skipped {} unchanged bytes, saving about {:.3f}s"
+                        .format(statistics.n_bytes_skipped,
+                                statistics.time_saved))
+        return statistics
+
+    def load_target_differential(self, target, manifest, verify, statistics):
+        """
+        Writes the blocks of a LoadTarget to the selected chip which differ
+        from those recorded in the manifest, or on the board if verifying,
+        and records them in the manifest.
+        """
+        data = target.data
+        if data is None:
+            with open(target.filename, "rb") as target_file:
+                data = target_file.read()
+        self.memory_calls._check_size_alignment(scamp.TYPE_WORD, len(data))
+        blocks = manifest.plan(target.x, target.y, target.address, data,
+                               target.written_ranges)
+
+        if verify:
+            reads = list()
+            for (start, end) in get_ranges(blocks, False):
+                reads.append((start, end, self.memory_calls.read_mem(
+                    start, scamp.TYPE_WORD, end - start)))
+                statistics.n_bytes_verified += end - start
+
+            # the blocks and the ranges read are both in address order
+            index = 0
+            for block in blocks:
+                if block[3]:
+                    continue
+                while reads[index][1] < block[1]:
+                    index += 1
+                (start, _, board_data) = reads[index]
+                block_data = board_data[block[0] - start:block[1] - start]
+                if hashlib.md5(block_data).digest() != block[2]:
+                    block[3] = True
+
+        write_start_time = time.time()
+        for (start, end) in get_ranges(blocks, True):
+            self.memory_calls.write_mem(
+                start, scamp.TYPE_WORD,
+                data[start - target.address:end - target.address])
+            statistics.n_bytes += end - start
+        statistics.write_elapsed += time.time() - write_start_time
+        statistics.n_bytes_skipped += sum([end - start for (start, end) in
+                                           get_ranges(blocks, False)])
+        manifest.record(target.x, target.y, blocks)
 
     def load_targets_load(self, file_name):
         self.utility = SpinnmanUtilities(input_file=file_name)
@@ -211,43 +374,38 @@ class Transceiver(object):
                     time.sleep(0.1)
         
         total_processors = 0
+        physical_chips = machine.get_physical_chips()
         targets = self.organise_targets(targets)
-        for key in targets.keys():
-            chips = targets[key]
-            core_mask = 0
-            for chip in chips:
-                processors = chips[chip]
-                core_part_of_region = ""
-                first = True
-                for processor in processors:
-                    core_mask += processor
-                    if first:
-                        core_part_of_region += "{}".format(processor)
-                        first = False
-                    else:
-                        core_part_of_region += ",{}".format(processor)
-
-                    total_processors += 1
-
+        for key in sorted(targets.keys()):
+            # each binary is flood filled once to every chip which uses the
+            # same cores
+            chip_cores = dict()
+            for (chip, processors) in targets[key].items():
                 (x, y) = chip.split(",")
-                region = Utility.calculate_region_id(int(x), int(y))
+                chip_cores[(int(x), int(y))] = processors
+                total_processors += len(processors)
 
-                if conf.config.get("Reports", "write_reload_steps"):
-                    self.utility.write_app_load_command(key, region,
-                                                        core_part_of_region,
-                                                        app_id)
+            loads = self.app_calls.app_load_targets(key, chip_cores, app_id,
+                                                    physical_chips)
 
-                self.app_calls.app_load(key, region, core_part_of_region, app_id)
+            if conf.config.get("Reports", "write_reload_steps"):
+                for (region, mask) in loads:
+                    core_part_of_region = ",".join(
+                        ["{}".format(core) for core in range(18)
+                         if (mask >> core) & 0x1])
+                    self.utility.write_app_load_command(
+                        key, "0x{:08x}".format(region), core_part_of_region,
+                        app_id)
 
-                processors_ready = 0
-                logger.debug("checking that the processors currently"
-                             " flood filled are ready for future flood fills")
-                while processors_ready < total_processors:
-                    processors_ready = self.app_calls.app_signal(app_id,
-                        scamp.SIGNAL_COUNT, scamp.PROCESSOR_SYNC0)
-                    logger.debug("{} processors out of {} "
-                         "processors are ready".format(processors_ready,
-                         total_processors))
+            processors_ready = 0
+            logger.debug("checking that the processors currently"
+                         " flood filled are ready for future flood fills")
+            while processors_ready < total_processors:
+                processors_ready = self.app_calls.app_signal(app_id,
+                    scamp.SIGNAL_COUNT, scamp.PROCESSOR_SYNC0)
+                logger.debug("{} processors out of {} "
+                     "processors are ready".format(processors_ready,
+                     total_processors))
 
         logger.info("Waiting for application to finish loading")
 
@@ -463,6 +621,13 @@ class Transceiver(object):
                 struct_file = self.checkfile("sark-130.struct")
                 config_file = self.checkfile("spin{}.conf".format(version_number))
                 boot.boot(hostname, boot_file, config_file, struct_file)
+
+                # the memory of the board no longer holds what was last
+                # loaded to it, and its chips may have come up differently
+                for path in (LoadManifest.get_path(hostname),
+                             MachineDescription.get_path(hostname)):
+                    if os.path.exists(path):
+                        os.remove(path)
                 #used to hold up and wait for spinn board to have completed its boot up (only on rowleys board)
                 time.sleep(1.0)
         else:
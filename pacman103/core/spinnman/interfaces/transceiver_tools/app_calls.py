@@ -66,6 +66,48 @@ class AppCalls(object):
         mask = self.spinnaker_utility.parse_cores(cores)
         data = self.spinnaker_utility.read_file(filename)
 
+        self.flood_fill(data, region, mask, app_id, app_flags)
+
+    def app_load_targets(self, filename, chip_cores, app_id, physical_chips,
+                         flags=None):
+        '''
+        loads a .aplx file onto the given cores of each of a collection of
+        chips, flood filling it once to each group of chips which use the
+        same cores, selected by the fewest regions which do not select any
+        other chip of the board
+
+        :param str filename: the .aplx file to load
+        :param dict chip_cores: the list of cores of each (x, y) to load
+        :param int app_id: the application id to load the cores with
+        :param physical_chips: collection of the (x, y) of the chips on the
+            board, which are not loaded unless they are given
+        :returns: list of the (region, core mask) flood filled
+        '''
+        app_flags = 0
+        if flags != None and flags == "wait":
+            app_flags |= 1
+
+        # the chips which use each set of cores
+        chips_of_mask = dict()
+        for ((x, y), cores) in chip_cores.items():
+            mask = 0
+            for core in cores:
+                mask |= 1 << core
+            chips_of_mask.setdefault(mask, list()).append((x, y))
+
+        data = self.spinnaker_utility.read_file(filename)
+        loads = list()
+        for mask in sorted(chips_of_mask.keys()):
+            chips = chips_of_mask[mask]
+            occupied_chips = set(physical_chips) - set(chips)
+            for region in Utility.calculate_regions(chips, occupied_chips):
+                logger.debug("Loading %s to region 0x%08x, core mask 0x%x, "
+                             "appid %s", filename, region, mask, app_id)
+                self.flood_fill(data, region, mask, app_id, app_flags)
+                loads.append((region, mask))
+        return loads
+
+    def flood_fill(self, data, region, mask, app_id, app_flags):
         try:
             self.transceiver.packet_calls.flood_fill(data, region,
                                                      mask, app_id,
@@ -0,0 +1,151 @@
+'''
+A record of the data last loaded to the memory of each chip of a board, so
+that loading it again only writes the blocks which have changed
+'''
+
+import cPickle as pickle
+import hashlib
+import logging
+import os
+
+from pacman103 import conf
+from pacman103.lib import lib_map
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 1024
+
+
+class LoadManifest(object):
+    """
+    The MD5 digest of each block of the data written to each chip, where the
+    blocks are aligned to multiples of ``block_size`` in the address space of
+    the chip.  The data of a target which only covers part of a block is
+    recorded by the range of addresses it covers, so the targets either side
+    of a block boundary are tracked separately.
+
+    A manifest only describes the board if nothing else has written to the
+    memory it covers since, so it is deleted while a load is in progress and
+    when the board is rebooted.  The blocks of the memory which the
+    applications write to as they run, such as their recordings and plastic
+    synapses, are always written again; data written to the board by other
+    means can be caught by verifying the blocks which are not written
+    against the board.
+
+    :param int block_size: the size in bytes of the blocks, a multiple of 4.
+    """
+
+    #the version of the format of the manifest, which invalidates all the
+    # manifests when changed
+    VERSION = 1
+    SUFFIX = ".manifest"
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE):
+        if block_size <= 0 or block_size % 4 != 0:
+            raise ValueError("block size {} is not a positive multiple of 4"
+                             .format(block_size))
+        self.block_size = block_size
+        #(x, y) -> block address -> (start, end) -> digest
+        self.chips = dict()
+
+    @staticmethod
+    def get_path(hostname):
+        """
+        Returns the path of the manifest of the board, in the directory set
+        in the [Load] section of the config
+        """
+        directory = conf.config.get("Load", "manifest_directory")
+        if directory == "None":
+            components = os.path.abspath(lib_map.__file__).split(os.sep)
+            directory = os.path.join(
+                os.sep, *(components[1:components.index("pacman103")] +
+                          ["load_manifests"]))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        return os.path.join(directory, hostname + LoadManifest.SUFFIX)
+
+    @staticmethod
+    def read(path, block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Returns the manifest stored at the path, or an empty manifest if
+        there is none or it cannot be read or is of another block size
+        """
+        manifest = LoadManifest(block_size)
+        if not os.path.exists(path):
+            return manifest
+        try:
+            with open(path, "rb") as manifest_file:
+                stored = pickle.load(manifest_file)
+            if stored["version"] != LoadManifest.VERSION:
+                raise ValueError("manifest of version {}".format(
+                    stored["version"]))
+            if stored["block_size"] != block_size:
+                raise ValueError("manifest of blocks of {} bytes".format(
+                    stored["block_size"]))
+            manifest.chips = stored["chips"]
+        except Exception as e:
+            logger.warning("Could not read the load manifest {}, loading "
+                           "everything: {}".format(path, e))
+        return manifest
+
+    def write(self, path):
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as manifest_file:
+            pickle.dump({"version": self.VERSION,
+                         "block_size": self.block_size,
+                         "chips": self.chips},
+                        manifest_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(temporary_path, path)
+
+    def plan(self, x, y, address, data, written_ranges=()):
+        """
+        Returns a list of the [start, end, digest, dirty] of the blocks of
+        data to be written to the address of chip (x, y), where start and
+        end are addresses, and dirty is whether the block differs from that
+        last written there, or overlaps one of the (start, end) written
+        ranges which the application may have changed since
+        """
+        chip = self.chips.get((x, y), dict())
+        blocks = list()
+        end_address = address + len(data)
+        block_address = address - address % self.block_size
+        while block_address < end_address:
+            start = max(block_address, address)
+            end = min(block_address + self.block_size, end_address)
+            digest = hashlib.md5(data[start - address:end - address]).digest()
+            dirty = chip.get(block_address, dict()).get((start, end)) != digest
+            for (written_start, written_end) in written_ranges:
+                if written_start < end and start < written_end:
+                    dirty = True
+            blocks.append([start, end, digest, dirty])
+            block_address += self.block_size
+        return blocks
+
+    def record(self, x, y, blocks):
+        """
+        Records that the blocks returned by :py:meth:`plan` were written to
+        chip (x, y), forgetting the data they overlap
+        """
+        chip = self.chips.setdefault((x, y), dict())
+        for (start, end, digest, _) in blocks:
+            block_address = start - start % self.block_size
+            ranges = chip.setdefault(block_address, dict())
+            for (other_start, other_end) in ranges.keys():
+                if other_start < end and start < other_end:
+                    del ranges[(other_start, other_end)]
+            ranges[(start, end)] = digest
+
+
+def get_ranges(blocks, dirty):
+    """
+    Returns a list of the (start, end) of the runs of consecutive blocks
+    returned by :py:meth:`LoadManifest.plan` which are dirty or not
+    """
+    ranges = list()
+    for (start, end, _, block_dirty) in blocks:
+        if block_dirty != dirty:
+            continue
+        if len(ranges) > 0 and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
@@ -1,12 +1,19 @@
 from pacman103.core.spinnman.interfaces.transceiver_tools.utility import Utility
 from pacman103.core.spinnman.scp.scp_message import SCPMessage
+from pacman103.core.spinnman.scp.scp_error import SCPError
 from pacman103.core.spinnman.scp import scamp
+import mmap
 import os
 
 
+# default number of SCP requests kept in flight by bulk memory operations
+DEFAULT_WINDOW = 8
+
+
 class MemoryCalls(object):
 
-    def __init__(self, transceiver):
+    def __init__(self, transceiver, window=DEFAULT_WINDOW):
+        self.window = window
         self._x = 0
         self._y = 0
         self._cpu = 0
@@ -20,39 +27,48 @@ class MemoryCalls(object):
         self._node = new_node
 
 
-    def write_mem (self, start_addr, type, data):
+    def write_mem (self, start_addr, type, data, window=None):
         """
         Uploads data to a target SpiNNaker node at a specific memory location.
+        Up to ``window`` ``CMD_WRITE`` requests are outstanding at any one
+        time.
 
         :param int start_addr: base address for the uploaded data
         :param int type:       one of ``TYPE_BYTE``, ``TYPE_HALF``, or
                                ``TYPE_WORD`` to indicate element type
-        :param str data:       string of data to upload
+        :param data:           data to upload, as a string or any sliceable
+                               byte buffer (``bytearray``, ``memoryview``,
+                               ``mmap``)
+        :param int window:     number of write requests to keep in flight, or
+                               ``None`` to use the default of this object
         :raises:               SCPError
 
         """
 
-        msg = SCPMessage (cmd_rc=scamp.CMD_WRITE, arg3=type)
-
         # confirm the data length is aligned to the appropriate boundary
-        self._check_size_alignment(type, len (data))
+        size = len (data)
+        self._check_size_alignment(type, size)
+
+        if window is None:
+            window = self.window
 
-        # upload the data in maximum-sized chunks
-        addr = start_addr
-        for chunk in self.gen_slice(data, scamp.SDP_DATA_SIZE):
-            # build up the packet as follows:
+        def requests ():
+            # build up each packet as follows:
             #   arg1 = start address
             #   arg2 = chunk length
             #   arg3 = element size
-            msg.arg1    = addr
-            msg.arg2    = len (chunk)
-            msg.payload = chunk
-            self.transceiver.conn.send_scp_msg(msg)
-
-            # increment the address pointer
-            addr += len (chunk)
-
-
+            # only the chunk itself is copied out of the source buffer
+            for chunk_start in xrange (0, size, scamp.SDP_DATA_SIZE):
+                chunk = data[chunk_start:chunk_start + scamp.SDP_DATA_SIZE]
+                if isinstance (chunk, memoryview):
+                    chunk = chunk.tobytes ()
+                elif not isinstance (chunk, str):
+                    chunk = str (chunk)
+                yield SCPMessage (cmd_rc=scamp.CMD_WRITE,
+                                  arg1=start_addr + chunk_start,
+                                  arg2=len (chunk), arg3=type, payload=chunk)
+
+        self.transceiver.conn.send_scp_msgs (requests (), window=window)
 
     def gen_slice (self, seq, length):
         """
@@ -115,53 +131,46 @@ class MemoryCalls(object):
             raise ValueError("unknown data type: %d" % type)
 
 
-    def write_mem_from_file(self, start_addr, type, filename,
-                            chunk_size=16384):
+    def write_mem_from_file(self, start_addr, type, filename, window=None):
         """
         Uploads the contents of a file to the target SpiNNaker node at a
-        specific memory location.
+        specific memory location.  The file is memory-mapped and streamed
+        through :py:meth:`write_mem`, so it is never read into memory as a
+        whole.
 
         :param int start_addr: base address for the uploaded data
         :param int type:       one of ``TYPE_BYTE``, ``TYPE_HALF``, or
                                ``TYPE_WORD`` to indicate element type
         :param str filename:   name of the source file to read from
-        :param int chunk_size: number of bytes to read from the file in one go
+        :param int window:     number of write requests to keep in flight, or
+                               ``None`` to use the default of this object
+        :returns:              number of bytes written
         :raises:               IOError, SCPError
 
         """
 
         # open the file and determine its length
         print "Loading:",filename,"to", hex(start_addr)
-        fd = file (filename, 'rb')
-        fd.seek (0, os.SEEK_END)
-        size = fd.tell ()
-        fd.seek (0, os.SEEK_SET)
+        fd = open (filename, 'rb')
+        size = os.fstat (fd.fileno ()).st_size
 
         # confirm the file is aligned correctly
         self._check_size_alignment (type, size)
 
-        # read in the file in suitably sized chunks
-        bytes_remaining = size
-        addr            = start_addr
-        while bytes_remaining > 0:
-            # read a chunk and update the tracker variables
-            chunk            = fd.read (chunk_size)
-            bytes_remaining -= len (chunk)
-
-            #print "Writing ",len(chunk)," bytes to ",hex(addr)," - ",bytes_remaining,"to go..."
-
-            # write it into memory
-            self.write_mem (addr, type, chunk)
-
-            # update the address pointer
-            addr += len (chunk)
+        # empty files cannot be mapped, but there is nothing to write anyway
+        if size > 0:
+            data = mmap.mmap (fd.fileno (), size, access=mmap.ACCESS_READ)
+            try:
+                self.write_mem (start_addr, type, data, window=window)
+            finally:
+                data.close ()
 
         # close the file again
         fd.close ()
 
         return size
 
-    def read_mem (self, start_addr, type, size):
+    def read_mem (self, start_addr, type, size, window=None):
         """
         Reads an amount of data from the target SpiNNaker node starting at
         address ``start_addr``.
@@ -170,39 +179,71 @@ class MemoryCalls(object):
         :param int type:       one of ``TYPE_BYTE``, ``TYPE_HALF``, or
                                ``TYPE_WORD`` to indicate element type
         :param int size:       number of bytes to read
+        :param int window:     number of read requests to keep in flight, or
+                               ``None`` to use the default of this object
         :returns:              string containing the data read
         :raises:               SCPError
 
         """
 
-        msg = SCPMessage (cmd_rc=scamp.CMD_READ)
+        buf = bytearray (size)
+        self.read_mem_into (start_addr, type, size, buf, window=window)
+
+        # return the (hopefully valid) data buffer
+        return str (buf)
+
+    def read_mem_into (self, start_addr, type, size, buf, offset=0,
+                       window=None):
+        """
+        Reads an amount of data from the target SpiNNaker node starting at
+        address ``start_addr`` into a preallocated buffer.  Up to ``window``
+        ``CMD_READ`` requests are outstanding at any one time and each
+        response is copied directly to its place in ``buf``.
+
+        :param int start_addr: address to start reading from
+        :param int type:       one of ``TYPE_BYTE``, ``TYPE_HALF``, or
+                               ``TYPE_WORD`` to indicate element type
+        :param int size:       number of bytes to read
+        :param buf:            writable byte buffer (``bytearray`` or numpy
+                               ``uint8`` array) of at least ``offset + size``
+                               bytes
+        :param int offset:     position in ``buf`` of the first byte read
+        :param int window:     number of read requests to keep in flight, or
+                               ``None`` to use the default of this object
+        :raises:               SCPError
+
+        """
 
         # confirm the data size is aligned to the appropriate boundary
         self._check_size_alignment (type, size)
 
-        # initialise tracker variables
-        addr      = start_addr
-        buf       = ''
-        read_size = size
+        if window is None:
+            window = self.window
+        view = memoryview (buf)
 
-        # read all the data
-        while (addr - start_addr) < size:
-            # build up the packet as follows:
+        def requests ():
+            # build up each packet as follows:
             #   arg1 = start address
             #   arg2 = chunk length
             #   arg3 = element size
-            msg.arg1 = addr
-            msg.arg2 = min (read_size, scamp.SDP_DATA_SIZE)
-            msg.arg3 = type
-            resp = self.transceiver.conn.send_scp_msg (msg)
-
-            # add the data to the buffer and update the tracker variables
-            buf       += resp.data
-            addr      += len (resp.data)
-            read_size -= len (resp.data)
-
-        # return the (hopefully valid) data buffer
-        return buf
+            for chunk_start in xrange (0, size, scamp.SDP_DATA_SIZE):
+                yield SCPMessage (cmd_rc=scamp.CMD_READ,
+                                  arg1=start_addr + chunk_start,
+                                  arg2=min (size - chunk_start,
+                                            scamp.SDP_DATA_SIZE),
+                                  arg3=type)
+
+        def store (index, resp):
+            chunk_start = offset + (index * scamp.SDP_DATA_SIZE)
+            chunk_size  = min (size - (index * scamp.SDP_DATA_SIZE),
+                               scamp.SDP_DATA_SIZE)
+            data = resp.data
+            if len (data) != chunk_size:
+                raise SCPError (scamp.RC_LEN, resp)
+            view[chunk_start:chunk_start + chunk_size] = data
+
+        self.transceiver.conn.send_scp_msgs (requests (), window=window,
+                                             callback=store)
 
     def read_mem_to_file (self, start_addr, type, size, filename,
                           chunk_size=16384):
@@ -35,6 +35,12 @@ class Utility(object):
         if region is None:
             raise exceptions.SpinnManException("no region was defined")
 
+        # if a region word, such as those of calculate_regions
+        if isinstance(region, (int, long)):
+            return region
+        if str(region).lower().startswith("0x"):
+            return int(region, 16)
+
         # if current region
         if region == "." or str(region).partition(",")[1] == ",":
             # if no x and y corrds defined, return 0
@@ -179,11 +185,53 @@ class Utility(object):
         return "{}.{}.{}.{}".format(int(level_0), int(level_1),
                                     int(level_2), int(level_3))
 
-
-
-
-
-
-
-
-
+    @staticmethod
+    def calculate_regions(chips, occupied_chips=()):
+        """
+        Returns a list of the fewest region words which between them select
+        each of the chips, and none of the occupied chips, for flood filling
+        them together.  A region word selects any of the 16 blocks of an
+        aligned block of the level above it: blocks of 64x64 chips at level
+        0, down to single chips of a block of 4x4 chips at level 3.  Chips
+        which are neither given nor occupied, such as those which are not on
+        the board, may be selected too, so that whole blocks can be.
+
+        :param chips: collection of the (x, y) of the chips to select
+        :param occupied_chips: collection of the (x, y) of the chips which
+            must not be selected
+        :returns: list of region words, ordered by level and position
+        """
+        # level -> (x, y) of the block at the level -> [chips, occupied]
+        chips = set(chips)
+        counts = [dict() for _ in range(4)]
+        for (chip_set, index) in ((chips, 0),
+                                  (set(occupied_chips) - chips, 1)):
+            for (x, y) in chip_set:
+                for level in range(4):
+                    shift = 2 * (3 - level)
+                    block = (x >> shift, y >> shift)
+                    counts[level].setdefault(block, [0, 0])[index] += 1
+
+        regions = list()
+
+        def select(level, parent_x, parent_y):
+            # select the blocks within the parent block which hold chips and
+            # no occupied chips, and look inside those which hold both
+            mask = 0
+            for m in range(16):
+                block = ((parent_x << 2) + (m & 3), (parent_y << 2) + (m >> 2))
+                (n_chips, n_occupied) = counts[level].get(block, (0, 0))
+                if n_chips == 0:
+                    continue
+                if n_occupied == 0:
+                    mask |= 1 << m
+                else:
+                    select(level + 1, block[0], block[1])
+            if mask != 0:
+                shift = 2 * (4 - level)
+                x, y = parent_x << shift, parent_y << shift
+                regions.append((level, x, y,
+                                (x << 24) + (y << 16) + (level << 16) + mask))
+
+        select(0, 0, 0)
+        return [region for (_, _, _, region) in sorted(regions)]
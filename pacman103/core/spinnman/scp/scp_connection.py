@@ -89,8 +89,9 @@ class SCPConnection (SDPConnection):
         self._cpu   = 0
         self._node  = (self._x << 8) | self._y
 
-        # initialise the sequence number counter
+        # initialise the sequence number counters
         self._seq = 0
+        self._pipeline_seq = 0
         
         self.no_len_retries = 0
         self.no_timeout_retries = 0
@@ -218,6 +219,10 @@ class SCPConnection (SDPConnection):
             try:
                 self.send(msg)
                 resp = self.receive()
+
+                # discard late responses to pipelined requests
+                while resp.seq != msg.seq:
+                    resp = self.receive()
                 if ((resp.cmd_rc != scamp.RC_TIMEOUT) 
                         and (resp.cmd_rc != scamp.RC_P2P_TIMEOUT)
                         and (resp.cmd_rc != scamp.RC_LEN)):
@@ -244,6 +249,128 @@ class SCPConnection (SDPConnection):
         else:
             return resp
 
+    def send_scp_msgs (self, msgs, window=8, retries=10, callback=None,
+                       addressed=False, error_callback=None):
+        """
+        Dispatches a sequence of packets to the currently selected CPU, keeping
+        up to ``window`` of them outstanding at once.  Each packet is given its
+        own sequence number so that responses can be matched to requests in
+        whatever order they arrive; only the packets that have not been
+        answered are sent again after a timeout.
+
+        :param msgs:         iterable of :py:class:`SCPMessage` to send
+        :param int window:   maximum number of packets awaiting a response
+        :param int retries:  number of times each packet may be resent
+        :param callback:     function called as ``callback(index, response)``
+                             for each successful response, where ``index`` is
+                             the position of the request in ``msgs``
+        :param bool addressed: if True, each packet is sent to the chip and
+                             CPU it is addressed to, instead of the selected
+                             CPU, so that many chips can be probed at once
+        :param error_callback: function called as ``error_callback(index,
+                             response)`` for each packet which is rejected,
+                             or with a ``response`` of ``None`` for each
+                             which is not answered after ``retries``; if
+                             ``None``, these raise an :py:class:`SCPError`
+        :returns: list of responses in the order of ``msgs``, or ``None`` if
+                  a callback is given
+        :raises: SCPError
+
+        """
+
+        responses = None if callback is not None else []
+        pending   = iter (enumerate (msgs))
+        exhausted = False
+
+        # sequence number -> [index, packed message, retries left]
+        outstanding = {}
+
+        def retry (seq, entry):
+            try:
+                self._retry_pipelined (entry)
+            except SCPError:
+                if error_callback is None:
+                    raise
+                del outstanding[seq]
+                error_callback (entry[0], None)
+
+        while not exhausted or outstanding:
+            # top up the window
+            while not exhausted and len (outstanding) < max (window, 1):
+                try:
+                    index, msg = next (pending)
+                except StopIteration:
+                    exhausted = True
+                    break
+                self._pipeline_seq = (self._pipeline_seq % 0xFFFF) + 1
+                msg.seq     = self._pipeline_seq
+                if not addressed:
+                    msg.dst_cpu = self._cpu
+                    msg.dst_x   = self._x
+                    msg.dst_y   = self._y
+                packed = str (msg)
+                outstanding[msg.seq] = [index, packed, retries]
+                if responses is not None:
+                    responses.append (None)
+                self._sock.send (packed)
+
+            if not outstanding:
+                break
+
+            # wait for a response; on a timeout resend everything unanswered
+            try:
+                resp = self.receive ()
+            except socket.timeout:
+                logger.debug("Warning - timeout waiting for {} responses"
+                        .format(len (outstanding)))
+                for (seq, entry) in outstanding.items ():
+                    retry (seq, entry)
+                continue
+
+            # ignore late duplicates of responses that have been handled
+            entry = outstanding.get (resp.seq)
+            if entry is None:
+                continue
+
+            if resp.cmd_rc in (scamp.RC_TIMEOUT, scamp.RC_P2P_TIMEOUT,
+                               scamp.RC_LEN):
+                logger.debug("Warning - response was {}, retrying".format(
+                        scamp.rc_to_string(resp.cmd_rc)))
+                if resp.cmd_rc == scamp.RC_TIMEOUT:
+                    self.no_timeout_retries += 1
+                elif resp.cmd_rc == scamp.RC_P2P_TIMEOUT:
+                    self.no_p2ptimeout_retries += 1
+                else:
+                    self.no_len_retries += 1
+                retry (resp.seq, entry)
+                continue
+
+            del outstanding[resp.seq]
+            if resp.cmd_rc != scamp.RC_OK:
+                if error_callback is None:
+                    raise SCPError(resp.cmd_rc, resp)
+                error_callback (entry[0], resp)
+            elif callback is not None:
+                callback (entry[0], resp)
+            else:
+                responses[entry[0]] = resp
+
+        return responses
+
+    def _retry_pipelined (self, entry):
+        """
+        Resends an outstanding packet of :py:meth:`send_scp_msgs`.
+
+        :param list entry: [index, packed message, retries left]
+        :raises: SCPError
+
+        """
+
+        entry[2] -= 1
+        if entry[2] <= 0:
+            raise SCPError(0, "Failed to receive response after sending message")
+        self._sock.send (entry[1])
+
     def version(self, retries=10):
         """
         Retreives the version information about the host operating system.
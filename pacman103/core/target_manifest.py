@@ -0,0 +1,248 @@
+"""
+A binary manifest of the executable, load and memory write targets of a
+simulation, written when the output is generated so that the simulation can
+be loaded again later without generating it.
+
+The manifest is a single file of fixed-width records which is memory-mapped
+when it is read, so that reading it does not depend on deserialising Python
+objects, and the data of every load target is packed into it, so that the
+targets read from it are streamed to the board straight from the mapping.
+Its layout, in little-endian order, is:
+
+* a header of :py:data:`HEADER_DTYPE`, giving the number of each kind of
+  record and the offset of the packed data;
+* the offsets of the end of each file name in the string table, then the
+  string table itself;
+* the :py:data:`EXECUTABLE_DTYPE` record of each core of each executable
+  target;
+* the :py:data:`LOAD_DTYPE` record of each load target, giving the offset
+  and size of its data in the packed data;
+* the :py:data:`MEM_WRITE_DTYPE` record of each memory write target;
+* the :py:data:`WRITTEN_RANGE_DTYPE` record of each range of the memory of
+  each load target which its application writes to as it runs;
+* the packed data of the load targets, each aligned to 8 bytes.
+"""
+
+import mmap
+import os
+
+import numpy
+
+from pacman103.core import exceptions
+from pacman103.lib import lib_map
+
+MAGIC = "PACMANIF"
+
+#the version of the format, which is checked when a manifest is read
+VERSION = 1
+
+FILENAME = "targets.manifest"
+
+HEADER_DTYPE = numpy.dtype([('magic', 'S8'), ('version', '<u4'),
+                            ('n_strings', '<u4'), ('n_executables', '<u4'),
+                            ('n_loads', '<u4'), ('n_mem_writes', '<u4'),
+                            ('n_written_ranges', '<u4'),
+                            ('strings_size', '<u4'), ('data_offset', '<u8')])
+
+#one record for each core of each executable target, in the order of the
+# targets, and of the cores within them
+EXECUTABLE_DTYPE = numpy.dtype([('target', '<u4'), ('filename', '<u4'),
+                                ('x', '<u2'), ('y', '<u2'), ('p', '<u2'),
+                                ('pad', '<u2')])
+
+LOAD_DTYPE = numpy.dtype([('filename', '<u4'), ('x', '<u2'), ('y', '<u2'),
+                          ('p', '<u2'), ('pad', '<u2'), ('address', '<u4'),
+                          ('offset', '<u8'), ('size', '<u8')])
+
+MEM_WRITE_DTYPE = numpy.dtype([('x', '<u2'), ('y', '<u2'), ('p', '<u2'),
+                               ('pad', '<u2'), ('address', '<u4'),
+                               ('data', '<u4')])
+
+#one record for each written range of each load target, in the order of the
+# targets
+WRITTEN_RANGE_DTYPE = numpy.dtype([('load', '<u4'), ('start', '<u4'),
+                                   ('end', '<u4')])
+
+DATA_ALIGNMENT = 8
+
+
+def align(offset, alignment=DATA_ALIGNMENT):
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def write_manifest(path, executable_targets, load_targets, mem_write_targets):
+    """
+    Writes the targets to a manifest at the path, packing in the contents of
+    the files of the load targets
+    """
+    strings = list()
+    string_indices = dict()
+
+    def get_string_index(string):
+        if string not in string_indices:
+            string_indices[string] = len(strings)
+            strings.append(string)
+        return string_indices[string]
+
+    executables = numpy.zeros(sum([len(target.targets)
+                                   for target in executable_targets]),
+                              dtype=EXECUTABLE_DTYPE)
+    index = 0
+    for (target_index, target) in enumerate(executable_targets):
+        for core in target.targets:
+            executables[index] = (target_index,
+                                  get_string_index(target.filename),
+                                  core['x'], core['y'], core['p'], 0)
+            index += 1
+
+    loads = numpy.zeros(len(load_targets), dtype=LOAD_DTYPE)
+    offset = 0
+    for (index, target) in enumerate(load_targets):
+        size = os.path.getsize(target.filename)
+        loads[index] = (get_string_index(target.filename), target.x, target.y,
+                        target.p, 0, target.address, offset, size)
+        offset = align(offset + size)
+
+    mem_writes = numpy.zeros(len(mem_write_targets), dtype=MEM_WRITE_DTYPE)
+    for (index, target) in enumerate(mem_write_targets):
+        mem_writes[index] = (target.x, target.y, target.p, 0, target.address,
+                             target.data)
+
+    written_ranges = numpy.array([
+        (index, start, end) for (index, target) in enumerate(load_targets)
+        for (start, end) in target.written_ranges],
+        dtype=WRITTEN_RANGE_DTYPE)
+
+    encoded_strings = [string.encode("utf-8") for string in strings]
+    string_ends = numpy.cumsum([0] + [len(string)
+                                      for string in encoded_strings])
+    string_ends = string_ends.astype('<u8')[1:]
+    strings_size = int(string_ends[-1]) if len(strings) > 0 else 0
+
+    data_offset = align(HEADER_DTYPE.itemsize + string_ends.nbytes +
+                        strings_size + executables.nbytes + loads.nbytes +
+                        mem_writes.nbytes + written_ranges.nbytes)
+    header = numpy.array([(MAGIC, VERSION, len(strings), len(executables),
+                           len(loads), len(mem_writes), len(written_ranges),
+                           strings_size, data_offset)], dtype=HEADER_DTYPE)
+
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as f:
+        for section in (header, string_ends):
+            f.write(section.tostring())
+        f.write("".join(encoded_strings))
+        for section in (executables, loads, mem_writes, written_ranges):
+            f.write(section.tostring())
+        for (target, load) in zip(load_targets, loads):
+            f.write("\0" * (data_offset + int(load['offset']) - f.tell()))
+            with open(target.filename, "rb") as target_file:
+                data = target_file.read()
+            if len(data) != load['size']:
+                raise exceptions.PacmanException(
+                    "{} changed while it was added to the manifest".format(
+                        target.filename))
+            f.write(data)
+    os.rename(temporary_path, path)
+
+
+class TargetManifest(object):
+    """
+    The targets of a manifest read from a file, whose load targets read
+    their data from the memory mapping of the file.
+
+    :param string path: the path of the manifest.
+    :raises PacmanException: if the file is not a manifest of this version.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.mapping) < HEADER_DTYPE.itemsize:
+            raise exceptions.PacmanException(
+                "{} is too short to be a manifest of targets".format(path))
+        header = numpy.frombuffer(self.mapping, HEADER_DTYPE, count=1)[0]
+        if header['magic'] != MAGIC:
+            raise exceptions.PacmanException(
+                "{} is not a manifest of targets".format(path))
+        if header['version'] != VERSION:
+            raise exceptions.PacmanException(
+                "{} is a manifest of version {}, not {}".format(
+                    path, header['version'], VERSION))
+
+        offset = HEADER_DTYPE.itemsize
+        string_ends = numpy.frombuffer(self.mapping, '<u8',
+                                       count=int(header['n_strings']),
+                                       offset=offset)
+        offset += string_ends.nbytes
+        strings = self.mapping[offset:offset + int(header['strings_size'])]
+        offset += int(header['strings_size'])
+        self.strings = list()
+        start = 0
+        for end in string_ends.tolist():
+            self.strings.append(strings[start:end].decode("utf-8"))
+            start = end
+
+        self.executables = numpy.frombuffer(
+            self.mapping, EXECUTABLE_DTYPE,
+            count=int(header['n_executables']), offset=offset)
+        offset += self.executables.nbytes
+        self.loads = numpy.frombuffer(self.mapping, LOAD_DTYPE,
+                                      count=int(header['n_loads']),
+                                      offset=offset)
+        offset += self.loads.nbytes
+        self.mem_writes = numpy.frombuffer(
+            self.mapping, MEM_WRITE_DTYPE, count=int(header['n_mem_writes']),
+            offset=offset)
+        offset += self.mem_writes.nbytes
+        self.written_ranges = numpy.frombuffer(
+            self.mapping, WRITTEN_RANGE_DTYPE,
+            count=int(header['n_written_ranges']), offset=offset)
+        self.data_offset = int(header['data_offset'])
+
+        end = 0
+        if len(self.loads) > 0:
+            end = self.data_offset + int(numpy.max(self.loads['offset'] +
+                                                   self.loads['size']))
+        if end > len(self.mapping):
+            raise exceptions.PacmanException(
+                "{} is truncated: its data ends at {} of {} bytes".format(
+                    path, end, len(self.mapping)))
+
+    def get_executable_targets(self):
+        """
+        Returns the list of :py:class:`lib_map.ExecutableTarget` of the
+        manifest
+        """
+        executable_targets = list()
+        for (target, filename, x, y, p, _) in self.executables.tolist():
+            if target == len(executable_targets):
+                executable_targets.append(lib_map.ExecutableTarget(
+                    self.strings[filename], x, y, p))
+            else:
+                executable_targets[target].targets.append(
+                    {'x': x, 'y': y, 'p': p})
+        return executable_targets
+
+    def get_load_targets(self):
+        """
+        Returns the list of :py:class:`lib_map.LoadTarget` of the manifest,
+        whose data is a buffer of the memory mapping of the manifest
+        """
+        load_targets = [
+            lib_map.LoadTarget(self.strings[filename], x, y, p, address,
+                               data=buffer(self.mapping,
+                                           self.data_offset + offset, size))
+            for (filename, x, y, p, _, address, offset, size) in
+            self.loads.tolist()]
+        for (load, start, end) in self.written_ranges.tolist():
+            load_targets[load].written_ranges.append((start, end))
+        return load_targets
+
+    def get_mem_write_targets(self):
+        """
+        Returns the list of :py:class:`lib_map.MemWriteTarget` of the
+        manifest
+        """
+        return [lib_map.MemWriteTarget(x, y, p, address, data)
+                for (x, y, p, _, address, data) in self.mem_writes.tolist()]
@@ -0,0 +1,42 @@
+'''
+Utilities for decoding recording regions read back from the board
+
+The spike history region holds one bit vector per timer tick; each vector is
+made of little-endian 32-bit words and bit i of word w is set when neuron
+(32 * w + i) of the core fired during that tick.
+'''
+import numpy
+
+
+def decode_spike_history(spike_data, bytes_per_tick, lo_atom=0,
+                         ms_per_tick=1.0, n_ticks=None):
+    """
+    Decode a raw spike history buffer in a single pass.
+
+    :param spike_data: the bytes read from the region (after the byte count)
+    :param bytes_per_tick: the size in bytes of the bit vector for one tick
+    :param lo_atom: the id of the first neuron held by the core
+    :param ms_per_tick: the duration of one tick in milliseconds
+    :param n_ticks: the number of ticks to decode; defaults to every whole\
+                    tick contained in spike_data
+    :returns: a tuple (times, neuron_ids) of numpy arrays, ordered by time\
+              and then by neuron id
+    """
+    if n_ticks is None:
+        n_ticks = len(spike_data) // bytes_per_tick
+    data = numpy.frombuffer(spike_data, dtype=numpy.uint8,
+                            count=n_ticks * bytes_per_tick)
+
+    # Only the bytes holding at least one spike need to be expanded to bits;
+    # the bits are reversed so that bit 0 of each byte comes first, which
+    # together with the little-endian word layout gives the neuron index
+    byte_indices = numpy.flatnonzero(data)
+    bits = numpy.unpackbits(data[byte_indices].reshape(-1, 1), axis=1)
+    rows, bit_indices = numpy.nonzero(bits[:, ::-1])
+    spike_bits = (byte_indices[rows].astype(numpy.int64) * 8) + bit_indices
+
+    bits_per_tick = bytes_per_tick * 8
+    ticks = spike_bits // bits_per_tick
+    neuron_ids = (spike_bits % bits_per_tick) + lo_atom
+    return ticks * ms_per_tick, neuron_ids
+
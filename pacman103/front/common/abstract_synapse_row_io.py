@@ -8,6 +8,14 @@ class AbstractSynapseRowIo(object):
         """
         raise NotImplementedError
 
+    def get_max_n_words(self, synapse_list, lo_atom=None, hi_atom=None):
+        """
+        Returns the maximum total size of the fixed and plastic regions of the
+        rows of the synapse list in words
+        """
+        return max([self.get_n_words(synapse_row, lo_atom, hi_atom)
+                    for synapse_row in synapse_list.get_rows()])
+
     def get_packed_fixed_fixed_region(self, synapse_row, weight_scale, 
             n_synapse_type_bits):
         """
@@ -0,0 +1,268 @@
+import numpy
+
+from pacman103.front.common.synaptic_list import SynapticList, \
+    get_max_n_connections_table
+
+
+class BlockSynapticList(object):
+    """
+    A list of synaptic rows, one per pre-synaptic atom, which is never held in
+    memory as a whole.
+
+    Blocks of the list are made when they are needed by calling
+    generate_block(pre_lo_atom, pre_hi_atom, post_lo_atom, post_hi_atom),
+    which must return a SynapticList of the rows of the pre-synaptic atoms
+    between pre_lo_atom and pre_hi_atom (inclusive), holding only the synapses
+    to the atoms between post_lo_atom and post_hi_atom (inclusive) with target
+    indices relative to post_lo_atom.  It must return the same synapses each
+    time that it is called, whatever the ranges.
+
+    Summaries of the whole list are made by generating it a block at a time,
+    so the memory used is bounded by the largest block rather than the size of
+    the list.
+    """
+
+    # The number of rows and target atoms in each block generated to
+    # summarise the list
+    BLOCK_ATOMS = 1024
+
+    def __init__(self, generate_block, n_rows, n_targets, min_delay=None,
+                 max_delay=None, flip=False):
+        """
+        Creates a list of n_rows rows of synapses to n_targets atoms, which
+        can be restricted to the synapses with delays between min_delay and
+        max_delay (inclusive), and have the sign of its weights flipped
+        """
+        self._generate_block = generate_block
+        self._n_rows = n_rows
+        self._n_targets = n_targets
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._flip = flip
+        self._summary = None
+        self._n_connections = dict()
+        self._max_n_connections_table = None
+
+    def _get_blocks(self, to_lo_atom=0, to_hi_atom=None):
+        """
+        Yield the pre-synaptic atom of the first row, the first target atom
+        and the sublist of each of the blocks which make up the list, holding
+        only the synapses to atoms between to_lo_atom and to_hi_atom
+        """
+        if to_hi_atom is None:
+            to_hi_atom = self._n_targets - 1
+        for from_lo_atom in range(0, self._n_rows, self.BLOCK_ATOMS):
+            from_hi_atom = min(from_lo_atom + self.BLOCK_ATOMS,
+                               self._n_rows) - 1
+            for block_lo_atom in range(to_lo_atom, to_hi_atom + 1,
+                                       self.BLOCK_ATOMS):
+                block_hi_atom = min(block_lo_atom + self.BLOCK_ATOMS,
+                                    to_hi_atom + 1) - 1
+                yield (from_lo_atom, block_lo_atom, self.create_atom_sublist(
+                    from_lo_atom, from_hi_atom, block_lo_atom, block_hi_atom))
+
+    def _get_summary(self):
+        """
+        Return the length of each row, and the minimum and maximum delay and
+        absolute weight of the synapses of the list
+        """
+        if self._summary is None:
+            row_lengths = numpy.zeros(self._n_rows, dtype="int64")
+            min_delay = None
+            max_delay = 0
+            min_weight = None
+            max_weight = 0
+            for (from_lo_atom, _, block) in self._get_blocks():
+                lengths = block.get_row_lengths()
+                row_lengths[from_lo_atom:from_lo_atom + len(lengths)] += \
+                    lengths
+                (_, _, weights, delays, _) = block.get_connections()
+                if len(delays) > 0:
+                    min_delay = min(min_delay, numpy.amin(delays)) \
+                        if min_delay is not None else numpy.amin(delays)
+                    max_delay = max(max_delay, numpy.amax(delays))
+                    weights = numpy.abs(weights)
+                    min_weight = min(min_weight, numpy.amin(weights)) \
+                        if min_weight is not None else numpy.amin(weights)
+                    max_weight = max(max_weight, numpy.amax(weights))
+
+            # An empty row has a minimum delay and weight of 0
+            if min_delay is None or numpy.any(row_lengths == 0):
+                min_delay = 0
+                min_weight = 0
+            self._summary = (row_lengths, min_delay, max_delay, min_weight,
+                             max_weight)
+        return self._summary
+
+    def get_row_lengths(self):
+        """
+        Return an array of the number of connections in each row
+        """
+        return self._get_summary()[0]
+
+    def get_n_connections(self, lo_atom=None, hi_atom=None):
+        """
+        Return an array of the number of connections in each row to atoms
+        between lo_atom and hi_atom (inclusive)
+        """
+        if lo_atom is None or hi_atom is None:
+            return self.get_row_lengths()
+        hi_atom = min(hi_atom, self._n_targets - 1)
+        if (lo_atom, hi_atom) not in self._n_connections:
+            n_connections = numpy.zeros(self._n_rows, dtype="int64")
+            for (from_lo_atom, _, block) in self._get_blocks(lo_atom,
+                                                             hi_atom):
+                lengths = block.get_row_lengths()
+                n_connections[from_lo_atom:from_lo_atom + len(lengths)] += \
+                    lengths
+            self._n_connections[(lo_atom, hi_atom)] = n_connections
+        return self._n_connections[(lo_atom, hi_atom)]
+
+    def get_max_n_connections(self, lo_atom=None, hi_atom=None):
+        """
+        Return the maximum number of connections in the rows to atoms between
+        lo_atom and hi_atom (inclusive).  The maximum for every atom up to
+        hi_atom is tabulated for the last lo_atom asked for, generating the
+        blocks of the range once.
+        """
+        if lo_atom is None or hi_atom is None or self._n_rows == 0:
+            return numpy.amax(self.get_n_connections(lo_atom, hi_atom))
+        hi_atom = min(hi_atom, self._n_targets - 1)
+        if hi_atom < lo_atom:
+            return numpy.int64(0)
+        table = self._max_n_connections_table
+        if table is None or table[0] != lo_atom or hi_atom > table[1]:
+            n_atoms = hi_atom - lo_atom + 1
+            max_n_connections = numpy.zeros(n_atoms, dtype="int64")
+            row_counts = numpy.zeros(self._n_rows, dtype="int64")
+            for (from_lo_atom, to_lo_atom, block) in self._get_blocks(
+                    lo_atom, hi_atom):
+                (rows, targets, _, _, _) = block.get_connections()
+                max_n_connections = numpy.maximum(
+                    max_n_connections, get_max_n_connections_table(
+                        rows + from_lo_atom,
+                        targets.astype("int64") + to_lo_atom, row_counts,
+                        lo_atom, n_atoms))
+            table = (lo_atom, hi_atom, max_n_connections)
+            self._max_n_connections_table = table
+        return table[2][hi_atom - lo_atom]
+
+    def get_min_max_delay(self):
+        """
+        Return the minimum and maximum delays in the rows
+        """
+        if self._n_rows == 0:
+            return (0, 0)
+        (_, min_delay, max_delay, _, _) = self._get_summary()
+        return (min_delay, max_delay)
+
+    def get_max_weight(self):
+        """
+        Return the maximum weight in the rows
+        """
+        return self._get_summary()[4]
+
+    def get_min_weight(self):
+        """
+        Return the minumum weight in the rows
+        """
+        return self._get_summary()[3]
+
+    def sum_weights(self, exc_sum_array, inh_sum_array):
+        """
+        Sums the positive weights of the rows into exc_sum_array, and the
+        negative weights of the rows into inh_sum_array, each of which is an
+        array of numbers indexed by the target indices
+        """
+        for (_, to_lo_atom, block) in self._get_blocks():
+            block.sum_weights(exc_sum_array[to_lo_atom:],
+                              inh_sum_array[to_lo_atom:])
+
+    def is_connected(self, from_lo_atom, from_hi_atom, to_lo_atom, to_hi_atom):
+        """
+        Return true if the rows are connected for the specified range of
+        incoming and outgoing atoms
+        """
+        sublist = self.create_atom_sublist(from_lo_atom, from_hi_atom,
+                                           to_lo_atom, to_hi_atom)
+        return bool(numpy.any(sublist.get_row_lengths() > 0))
+
+    def get_atom_sublist(self, from_lo_atom, from_hi_atom, to_lo_atom,
+            to_hi_atom):
+        """
+        Return a list of rows each of which represents only the information
+        for atoms between lo_atom and hi_atom (inclusive)
+        """
+        return self.create_atom_sublist(from_lo_atom, from_hi_atom,
+                to_lo_atom, to_hi_atom).get_rows()
+
+    def get_delay_sublist(self, min_delay, max_delay):
+        """
+        Return a list of rows each of which represents only the information
+        for atoms with delays between min_delay and max_delay (inclusive)
+        """
+        return self.create_delay_sublist(min_delay, max_delay).get_rows()
+
+    def create_atom_sublist(self, from_lo_atom, from_hi_atom, to_lo_atom,
+            to_hi_atom):
+        """
+        Generate the block of this list which contains only atoms
+        between lo_atom and hi_atom (inclusive)
+        """
+        from_hi_atom = min(from_hi_atom, self._n_rows - 1)
+        if from_lo_atom > from_hi_atom:
+            return SynapticList([])
+        to_hi_atom = min(to_hi_atom, self._n_targets - 1)
+        if to_lo_atom > to_hi_atom:
+            return SynapticList(row_pointers=numpy.zeros(
+                    from_hi_atom - from_lo_atom + 2), target_indices=[],
+                weights=[], delays=[], synapse_types=[])
+
+        sublist = self._generate_block(from_lo_atom, from_hi_atom, to_lo_atom,
+                                       to_hi_atom)
+        if self._min_delay is not None:
+            sublist = sublist.create_delay_sublist(self._min_delay,
+                                                   self._max_delay)
+        if self._flip:
+            sublist.flip_weights()
+        return sublist
+
+    def create_delay_sublist(self, min_delay, max_delay):
+        """
+        Create a sub list of this list which contains only atoms with delays
+        between min_delay and max_delay (inclusive); the blocks of the sub
+        list are generated from this list when they are needed
+        """
+        delay_offset = 0
+        if self._min_delay is not None:
+            delay_offset = self._min_delay
+        max_delay = delay_offset + max_delay
+        if self._max_delay is not None:
+            max_delay = min(max_delay, self._max_delay)
+        return BlockSynapticList(self._generate_block, self._n_rows,
+                                 self._n_targets, delay_offset + min_delay,
+                                 max_delay, self._flip)
+
+    def get_rows(self):
+        """
+        Return the rows of the whole list, which is generated as a single
+        block
+        """
+        return self.create_atom_sublist(0, self._n_rows - 1, 0,
+                                        self._n_targets - 1).get_rows()
+
+    @property
+    def synapticRows(self):
+        return self.get_rows()
+
+    def get_n_rows(self):
+        """
+        Return the number of rows
+        """
+        return self._n_rows
+
+    def flip_weights(self):
+        """
+        flips the weights of each row from postive to negative and visa versa
+        """
+        self._flip = not self._flip
@@ -3,7 +3,7 @@ import logging
 import numpy
 import struct
 from pacman103.core.spinnman.scp import scamp
-from pacman103.core.utilities import packet_conversions
+from pacman103.core.utilities import packet_conversions, recording_utils
 from pacman103.core import exceptions
 from pacman103 import conf
 from pacman103.core.utilities.memory_utils import getAppDataBaseAddressOffset,\
@@ -135,12 +135,21 @@ class ComponentVertex(graph.Vertex):
         :param subedge: The subedge for which to generate the key and mask.
         :returns: A tuple containing the key and mask.
         """
-        x, y, p = subedge.presubvertex.placement.processor.get_coordinates()
-
-        key = packet_conversions.get_key_from_coords(x, y, p)
+        key = self.get_subvertex_key(subedge.presubvertex)
         #bodge to deal with external perrifables
         return key, self._app_mask
 
+    def get_subvertex_key(self, subvertex):
+        """
+        Returns the base routing key of the packets sent by the subvertex:
+        the key allocated to it by the key allocator, if any, or else the key
+        made from the coordinates of the core on which it is placed.
+        """
+        if subvertex.key is not None:
+            return subvertex.key
+        x, y, p = subvertex.placement.processor.get_coordinates()
+        return packet_conversions.get_key_from_coords(x, y, p)
+
     '''
     method that allows models to add dependant vertexes and edges
     '''
@@ -165,7 +174,7 @@ class ComponentVertex(graph.Vertex):
         
         logger.info("Getting spikes for %s" % (self.label))
         
-        spikes = numpy.zeros((0, 2))
+        subvertexSpikes = [numpy.zeros((0, 2))]
         
         # Find all the sub-vertices that this population exists on
         for subvertex in self.subvertices:
@@ -221,38 +230,14 @@ class ComponentVertex(graph.Vertex):
             
             logger.debug("Processing %d timesteps" % numberOfTimeStepsWritten)
             
-            # Loop through ticks
-            for tick in range(0, numberOfTimeStepsWritten):
-                
-                # Convert tick to ms
-                time = tick * (controller.dao.machineTimeStep / 1000.0)
-                
-                # Get offset into file data that the bit vector representing 
-                # the state at this tick begins at
-                vectorOffset = (tick * outSpikeBytes)
-                
-                # Loop through the words that make up this vector
-                for neuronWordIndex in range(0, outSpikeBytes, 4):
-                    
-                    # Unpack the word containing the spikingness of 32 neurons
-                    spikeVectorWord = struct.unpack_from("<I", spikeData,
-                                             vectorOffset + neuronWordIndex)
-                    
-                    if spikeVectorWord != 0:
-                        # Loop through each bit in this word
-                        for neuronBitIndex in range(0, 32):
-                            
-                            # If the bit is set
-                            neuronBitMask = (1 << neuronBitIndex)
-                            if (spikeVectorWord[0] & neuronBitMask) != 0:
-                                
-                                # Calculate neuron ID
-                                neuronID = ((neuronWordIndex * 8) + neuronBitIndex
-                                        + subvertex.lo_atom)
-                                
-                                # Add spike time and neuron ID to returned lists
-                                spikes = numpy.append(spikes, [[time, neuronID]], 0)
+            # Decode the whole region at once
+            times, neuronIDs = recording_utils.decode_spike_history(
+                    spikeData, outSpikeBytes, subvertex.lo_atom,
+                    controller.dao.machineTimeStep / 1000.0,
+                    numberOfTimeStepsWritten)
+            subvertexSpikes.append(numpy.column_stack((times, neuronIDs)))
             
+        spikes = numpy.concatenate(subvertexSpikes)
         if len(spikes) > 0:
             
             logger.debug("Arranging spikes as per output spec")
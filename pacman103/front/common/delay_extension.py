@@ -275,9 +275,7 @@ class DelayExtension(ComponentVertex):
 
         # Write header info to the memory region:
         # Write Key info for this core:
-        chipX, chipY, chipP = processor.get_coordinates()
-        populationIdentity = packet_conversions.get_key_from_coords(
-                chipX, chipY, chipP)
+        populationIdentity = self.get_subvertex_key(subvertex)
         spec.write(data = populationIdentity)
 
         # Write the number of neurons in the block:
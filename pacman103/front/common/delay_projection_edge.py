@@ -35,8 +35,8 @@ class DelayProjectionEdge(ProjectionEdge):
         :param hi_atom: The end of the range of atoms in 
                                    the subvertex (default is last atom)
         """
-        return max([self.synapse_row_io.get_n_words(synapse_row, lo_atom, 
-                hi_atom) for synapse_row in self.synapse_list.get_rows()])
+        return self.synapse_row_io.get_max_n_words(self.synapse_list,
+                lo_atom, hi_atom)
         
     def get_n_rows(self):
         """
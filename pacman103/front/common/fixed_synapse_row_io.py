@@ -7,6 +7,9 @@ class FixedSynapseRowIO(AbstractSynapseRowIo):
     def get_n_words(self, synapse_row, lo_atom=None, hi_atom=None):
         return synapse_row.get_n_connections(lo_atom, hi_atom)
 
+    def get_max_n_words(self, synapse_list, lo_atom=None, hi_atom=None):
+        return synapse_list.get_max_n_connections(lo_atom, hi_atom)
+
     def get_packed_fixed_fixed_region(self, synapse_row, weight_scale, 
             n_synapse_type_bits):
         abs_weights = numpy.abs(synapse_row.weights)
@@ -168,6 +168,12 @@ class PopulationVertex( ComponentVertex , SynapticManager):
                 no_machine_time_steps)
         return lib_map.Resources(cpu_cycles, dtcm_requirement, sdram_requirment)
         
+    def get_written_regions(self):
+        # The plastic synapses are updated in the synaptic matrix as they learn
+        if self._stdp_mechanism is not None:
+            return [REGIONS.SYNAPTIC_MATRIX]
+        return list()
+
     def getSpikeBufferSize(self, lo_atom, hi_atom, no_machine_time_steps):
         """
         Gets the size of the spike buffer for a range of neurons and time steps
@@ -318,9 +324,7 @@ class PopulationVertex( ComponentVertex , SynapticManager):
 
         # Write header info to the memory region:
         # Write Key info for this core:
-        chipX, chipY, chipP = processor.get_coordinates()
-        populationIdentity = \
-            packet_conversions.get_key_from_coords(chipX, chipY, chipP)
+        populationIdentity = self.get_subvertex_key(subvertex)
         spec.write(data = populationIdentity)
 
         # Write the number of neurons in the block:
@@ -374,6 +378,7 @@ class PopulationVertex( ComponentVertex , SynapticManager):
         for subedge in subvertex.in_subedges:
             sublist = subedge.get_synapse_sublist()
             sublist.sum_weights(total_exc_weights, total_inh_weights)
+            subedge.free_sublist()
         #DONE: implement part of changeset 4150, to incorporate plastic weights in max determination
         max_weight = max((max(total_exc_weights), max(total_inh_weights)))
         # If we have an STDP mechanism, let it provide an extra max weight
@@ -422,6 +427,10 @@ class PopulationVertex( ComponentVertex , SynapticManager):
         # Split binary name into title and extension
         binaryTitle, binaryExtension = os.path.splitext(self._binary)
 
+        # The STDP mechanism is found when the resources are estimated, which
+        # is skipped when the mapping is restored from the cache
+        self._check_synapse_dynamics(self.in_edges)
+
         # If we have an STDP mechanism, add it's executable suffic to title
         if self._stdp_mechanism is not None:
             binaryTitle = binaryTitle + "_" + self._stdp_mechanism.get_vertex_executable_suffix()
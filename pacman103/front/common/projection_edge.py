@@ -24,6 +24,10 @@ class ProjectionEdge(Edge):
 
         self.synapse_list = synapse_list
         self.synapse_row_io = FixedSynapseRowIO()
+
+        # The number of connections in each row to the last range of atoms
+        # asked for by get_n_synapses
+        self.n_connections = None
         
         # If the synapse_list was not specified, create it using the connector
         if connector is not None and synapse_list is None:
@@ -64,9 +68,26 @@ class ProjectionEdge(Edge):
         :param hi_atom: The end of the range of atoms in 
                                    the subvertex (default is last atom)
         """
-        return max([self.synapse_row_io.get_n_words(synapse_row, lo_atom, 
-                hi_atom) for synapse_row in self.synapse_list.get_rows()])
+        return self.synapse_row_io.get_max_n_words(self.synapse_list,
+                lo_atom, hi_atom)
         
+    def get_n_synapses(self, pre_lo_atom, pre_hi_atom, post_lo_atom,
+            post_hi_atom):
+        """
+        Gets the number of synapses from the atoms between pre_lo_atom and
+        pre_hi_atom to those between post_lo_atom and post_hi_atom
+        (inclusive).  The connections in each row are remembered for the last
+        range of post atoms, so the subedges to each postsubvertex are best
+        asked for together.
+        """
+        if (self.n_connections is None
+                or self.n_connections[0] != (post_lo_atom, post_hi_atom)):
+            self.n_connections = ((post_lo_atom, post_hi_atom),
+                    self.synapse_list.get_n_connections(post_lo_atom,
+                                                        post_hi_atom))
+        return int(numpy.sum(
+                self.n_connections[1][pre_lo_atom:pre_hi_atom + 1]))
+
     def get_n_rows(self):
         """
         Gets the number of synaptic rows coming in to a subvertex at the end of
@@ -19,6 +19,15 @@ class ProjectionSubedge(Subedge):
                     self.postsubvertex.lo_atom, self.postsubvertex.hi_atom)
         return self.synapse_sublist
     
+    def get_n_synapses(self):
+        """
+        Gets the number of synapses from the atoms of the presubvertex to
+        those of the postsubvertex
+        """
+        return self.edge.get_n_synapses(
+                self.presubvertex.lo_atom, self.presubvertex.hi_atom,
+                self.postsubvertex.lo_atom, self.postsubvertex.hi_atom)
+    
     def get_synaptic_data(self, controller, min_delay):
         '''
         Get synaptic data for all connections in this Projection.
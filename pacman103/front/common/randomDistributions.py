@@ -38,3 +38,55 @@ def generateParameterArray(paramInfo, n_present, paramIndices=None):
         return numpy.extract(paramIndices, numpy.asarray(paramInfo))
     elif isinstance(paramInfo, RandomDistribution):
         return numpy.asarray(paramInfo.next(n=n_present))
+
+
+def generateParameterArrayAt(paramInfo, indices, rng=None):
+    """
+    Returns an array of parameter values for a given parameter info, one for
+    each of the given indices, where the indices are used to look up the
+    values of a list.  If rng is specified, the values of a distribution are
+    drawn from it rather than from the generator of the distribution.
+    """
+    indices = numpy.asarray(indices, dtype="int64")
+    if isinstance(paramInfo, (int, float)):
+        return numpy.repeat(paramInfo, len(indices))
+    elif isinstance(paramInfo, (list, numpy.ndarray)):
+        return numpy.asarray(paramInfo)[indices]
+    elif RandomDistribution is not None and isinstance(paramInfo,
+                                                       RandomDistribution):
+        if len(indices) == 0:
+            return numpy.zeros(0)
+        if rng is not None:
+            return _drawFromDistribution(paramInfo, len(indices), rng)
+        return numpy.atleast_1d(numpy.asarray(paramInfo.next(n=len(indices))))
+    else:
+        raise TypeError(
+            "ERROR: generateParameterArrayAt - The format of this parameter"
+            " info is not supported."
+        )
+
+
+def _drawFromDistribution(distribution, n, rng):
+    """
+    Draws n values of a RandomDistribution from a numpy RandomState,
+    applying the boundaries of the distribution as its next method does
+    """
+    values = numpy.atleast_1d(getattr(rng, distribution.name)(
+        size=n, *distribution.parameters)).astype("float")
+    if distribution.boundaries:
+        min_bound = distribution.min_bound
+        max_bound = distribution.max_bound
+        if distribution.constrain == "clip":
+            values = numpy.clip(values, min_bound, max_bound)
+        elif distribution.constrain == "redraw":
+            outside = numpy.where((values < min_bound)
+                                  | (values > max_bound))[0]
+            while len(outside) > 0:
+                values[outside] = getattr(rng, distribution.name)(
+                    size=len(outside), *distribution.parameters)
+                outside = outside[(values[outside] < min_bound)
+                                  | (values[outside] > max_bound)]
+        else:
+            raise Exception("This constrain method (%s) does not exist"
+                            % distribution.constrain)
+    return values
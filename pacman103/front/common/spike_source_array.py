@@ -323,9 +323,7 @@ class SpikeSourceArray(ComponentVertex):
         """
         spec.switchWriteFocus(region = BLOCK_INDEX_REGION)
         # Word 0 is the key (x, y, p) for this core:
-        chipX, chipY, chipP = subvertex.placement.processor.get_coordinates()
-        populationIdentity = \
-            packet_conversions.get_key_from_coords(chipX, chipY, chipP)
+        populationIdentity = self.get_subvertex_key(subvertex)
         spec.write(data = populationIdentity)
  
         # Word 1 is the total number of 'neurons' (i.e. spike sources) in
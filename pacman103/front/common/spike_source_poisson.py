@@ -168,7 +168,7 @@ class SpikeSourcePoisson(ComponentVertex):
         # Write region 1 (system information on buffer size, etc);
         self.writeSetupInfo(spec, subvertex, spikeHistBuffSz)
 
-        self.writePoissonParameters(spec, machineTimeStep, processor,
+        self.writePoissonParameters(spec, machineTimeStep, subvertex,
                                           subvertex.n_atoms)
 
         # End-of-Spec:
@@ -234,7 +234,7 @@ class SpikeSourcePoisson(ComponentVertex):
         spec.write(data = 0)
         spec.write(data = 0)
 
-    def writePoissonParameters(self, spec, machineTimeStep, processor, 
+    def writePoissonParameters(self, spec, machineTimeStep, subvertex, 
             numNeurons):
         """
         Generate Neuron Parameter data for Poisson spike sources (region 2):
@@ -248,9 +248,7 @@ class SpikeSourcePoisson(ComponentVertex):
         # Write header info to the memory region:
         
         # Write Key info for this core:
-        chipX, chipY, chipP = processor.get_coordinates()
-        populationIdentity = \
-            packet_conversions.get_key_from_coords(chipX, chipY, chipP)
+        populationIdentity = self.get_subvertex_key(subvertex)
         spec.write(data = populationIdentity)
         
         # Write the random seed (4 words), generated randomly!
@@ -192,7 +192,7 @@ class SpikeSourceRemote(ComponentVertex):
         # Write region 1 (system information on buffer size, etc);
         self.writeSetupInfo(spec, subvertex, spikeHistBuffSz)
 
-        self.writeRemoteParameters(spec, machineTimeStep, processor,
+        self.writeRemoteParameters(spec, machineTimeStep, subvertex,
                                           subvertex.n_atoms)
 
         # End-of-Spec:
@@ -258,7 +258,7 @@ class SpikeSourceRemote(ComponentVertex):
         spec.write(data = 0)
         spec.write(data = 0)
 
-    def writeRemoteParameters(self, spec, machineTimeStep, processor, 
+    def writeRemoteParameters(self, spec, machineTimeStep, subvertex, 
             numNeurons):
         """
         Generate Neuron Parameter data for Remote spike sources (region 2):
@@ -272,9 +272,7 @@ class SpikeSourceRemote(ComponentVertex):
         # Write header info to the memory region:
         
         # Write Key info for this core:
-        chipX, chipY, chipP = processor.get_coordinates()
-        populationIdentity = \
-            packet_conversions.get_key_from_coords(chipX, chipY, chipP)
+        populationIdentity = self.get_subvertex_key(subvertex)
         spec.write(data = populationIdentity)
         
         spec.write(data = self.listen_key)
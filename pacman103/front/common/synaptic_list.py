@@ -4,130 +4,377 @@ Created on 9 Apr 2014
 @author: zzalsar4
 '''
 
-import operator
+import numpy
+
+from pacman103.front.common.synapse_row_info import SynapseRowInfo
+
+
+def get_max_n_connections_table(row_indices, target_indices, row_counts,
+                                lo_atom, n_atoms):
+    """
+    Return an array of n_atoms entries, entry i of which is the maximum
+    number of connections in any row to atoms between lo_atom and lo_atom + i
+    (inclusive), given the row and target index of each connection to those
+    atoms.
+
+    row_counts holds the number of connections in each row to atoms before
+    those given, which are counted towards the rows, and is updated to count
+    those given, so that a list can be tabulated in blocks of increasing
+    target indices.
+    """
+    table = numpy.zeros(n_atoms, dtype="int64")
+    if len(target_indices) == 0:
+        return table
+
+    # The number of connections of the row of each connection up to and
+    # including it, in order of target index within each row, which is
+    # usually the order they are already in
+    targets = target_indices - lo_atom
+    keys = row_indices * n_atoms + targets
+    if numpy.any(keys[1:] < keys[:-1]):
+        order = numpy.argsort(keys)
+        row_indices = row_indices[order]
+        targets = targets[order]
+    counts = (numpy.arange(len(row_indices))
+              - numpy.searchsorted(row_indices, row_indices) + 1
+              + row_counts[row_indices])
+    row_counts += numpy.bincount(row_indices, minlength=len(row_counts))
+
+    # The maximum of the counts of the connections to each atom or before
+    order = numpy.argsort(targets, kind="mergesort")
+    max_counts = numpy.maximum.accumulate(counts[order])
+    ends = numpy.searchsorted(targets[order], numpy.arange(n_atoms),
+                              side="right")
+    table[ends > 0] = max_counts[ends[ends > 0] - 1]
+    return table
+
 
 class SynapticList(object):
-    
-    def __init__(self, synapticRows):
+    """
+    A list of synaptic rows, one per pre-synaptic atom.
+
+    The synapses are held in compressed sparse row form: the synapses of row
+    i are at positions row_pointers[i] to row_pointers[i + 1] of the flat
+    target index, weight, delay and synapse type arrays, which allows the
+    list to be sliced and summarised without a Python object per row.
+
+    Rows are only created as SynapseRowInfo objects when get_rows is called.
+    As the caller may then modify them, the rows then become the master copy
+    of the list, until the next operation which needs the flat arrays.
+    """
+
+    def __init__(self, synapticRows=None, row_pointers=None,
+                 target_indices=None, weights=None, delays=None,
+                 synapse_types=None):
+        """
+        Creates a list of synaptic rows, either from a list of SynapseRowInfo
+        objects or from the arrays of the compressed sparse row form
+        """
+        self._rows = None
+        self._row_pointers = None
+        self._max_n_connections_table = None
+        if synapticRows is not None:
+            self._rows = synapticRows
+        else:
+            self._row_pointers = numpy.asarray(row_pointers, dtype="int64")
+            self._target_indices = numpy.asarray(target_indices,
+                                                 dtype="uint32")
+            self._weights = numpy.asarray(weights, dtype="float")
+            self._delays = numpy.asarray(delays, dtype="uint32")
+            self._synapse_types = numpy.asarray(synapse_types, dtype="uint32")
+
+    @staticmethod
+    def from_connections(n_rows, pre_indices, target_indices, weights,
+                         delays, synapse_types):
         """
-        Creates a list of synaptic rows
+        Creates a list of n_rows rows from arrays of connections, with one
+        entry per connection.  The order of the connections within each row is
+        kept.
+        """
+        pre_indices = numpy.asarray(pre_indices, dtype="int64")
+        order = numpy.argsort(pre_indices, kind="mergesort")
+        row_lengths = numpy.bincount(pre_indices, minlength=n_rows)
+        row_pointers = numpy.zeros(n_rows + 1, dtype="int64")
+        numpy.cumsum(row_lengths, out=row_pointers[1:])
+        return SynapticList(
+            row_pointers=row_pointers,
+            target_indices=numpy.asarray(target_indices)[order],
+            weights=numpy.broadcast_to(weights, pre_indices.shape)[order],
+            delays=numpy.broadcast_to(delays, pre_indices.shape)[order],
+            synapse_types=numpy.broadcast_to(synapse_types,
+                                             pre_indices.shape)[order])
+
+    def _get_arrays(self):
+        """
+        Return the compressed sparse row arrays, building them from the rows
+        if the rows are the master copy
+        """
+        if self._row_pointers is None:
+            row_lengths = [len(row.target_indices) for row in self._rows]
+            self._row_pointers = numpy.zeros(len(self._rows) + 1,
+                                             dtype="int64")
+            numpy.cumsum(row_lengths, out=self._row_pointers[1:])
+            self._target_indices = self._concatenate_rows("target_indices",
+                                                          "uint32")
+            self._weights = self._concatenate_rows("weights", "float")
+            self._delays = self._concatenate_rows("delays", "uint32")
+            self._synapse_types = self._concatenate_rows("synapse_types",
+                                                         "uint32")
+            self._rows = None
+        return (self._row_pointers, self._target_indices, self._weights,
+                self._delays, self._synapse_types)
+
+    def _concatenate_rows(self, name, dtype):
+        if len(self._rows) == 0:
+            return numpy.zeros(0, dtype=dtype)
+        return numpy.concatenate(
+            [numpy.asarray(getattr(row, name), dtype=dtype).ravel()
+             for row in self._rows]).astype(dtype, copy=False)
+
+    def _get_row_indices(self):
+        """
+        Return the index of the row of each synapse
+        """
+        row_pointers = self._get_arrays()[0]
+        return numpy.repeat(numpy.arange(len(row_pointers) - 1),
+                            numpy.diff(row_pointers))
+
+    def _create_sublist(self, row_pointers, mask, target_offset=0,
+                        delay_offset=0):
+        """
+        Create a list from the synapses of the rows starting at the given row
+        pointers selected by mask
+        """
+        (all_row_pointers, target_indices, weights, delays, synapse_types) = \
+            self._get_arrays()
+        start = row_pointers[0]
+        end = row_pointers[-1]
+        n_kept = numpy.zeros(end - start + 1, dtype="int64")
+        numpy.cumsum(mask, out=n_kept[1:])
+        synapses = numpy.arange(start, end)[mask]
+        return SynapticList(
+            row_pointers=n_kept[row_pointers - start],
+            target_indices=target_indices[synapses] - target_offset,
+            weights=weights[synapses],
+            delays=delays[synapses] - delay_offset,
+            synapse_types=synapse_types[synapses])
+
+    def get_connections(self):
         """
-        self.synapticRows = synapticRows
-        
+        Return arrays of the pre-synaptic atom, target index, weight, delay
+        and synapse type of each connection, ordered by row
+        """
+        (_, target_indices, weights, delays, synapse_types) = \
+            self._get_arrays()
+        return (self._get_row_indices(), target_indices, weights, delays,
+                synapse_types)
+
+    def get_row_lengths(self):
+        """
+        Return an array of the number of connections in each row
+        """
+        if self._row_pointers is None:
+            return numpy.array([len(row.target_indices) for row in self._rows],
+                               dtype="int64")
+        return numpy.diff(self._row_pointers)
+
+    def get_n_connections(self, lo_atom=None, hi_atom=None):
+        """
+        Return an array of the number of connections in each row to atoms
+        between lo_atom and hi_atom (inclusive)
+        """
+        if lo_atom is None or hi_atom is None:
+            return self.get_row_lengths()
+        (row_pointers, target_indices, _, _, _) = self._get_arrays()
+        mask = (target_indices >= lo_atom) & (target_indices <= hi_atom)
+        return numpy.bincount(self._get_row_indices()[mask],
+                              minlength=len(row_pointers) - 1)
+
     def get_max_n_connections(self, lo_atom=None, hi_atom=None):
         """
-        Return the maximum number of connections in the rows
+        Return the maximum number of connections in the rows to atoms between
+        lo_atom and hi_atom (inclusive).  The maximum for every atom up to
+        hi_atom is tabulated for the last lo_atom asked for, as the
+        partitioner asks for many hi_atoms of each lo_atom, starting with the
+        highest.
         """
-        return max(map(operator.methodcaller('get_n_connections', 
-                lo_atom=lo_atom, hi_atom=hi_atom), 
-                self.synapticRows))
-    
+        if lo_atom is None or hi_atom is None or self.get_n_rows() == 0:
+            return numpy.amax(self.get_n_connections(lo_atom, hi_atom))
+        if hi_atom < lo_atom:
+            return numpy.int64(0)
+        table = self._max_n_connections_table
+        if (table is None or table[0] != lo_atom
+                or (hi_atom > table[1] and not table[2])):
+            (row_pointers, target_indices, _, _, _) = self._get_arrays()
+            last_atom = -1
+            if len(target_indices) > 0:
+                last_atom = numpy.amax(target_indices)
+            table_hi_atom = max(min(hi_atom, last_atom), lo_atom)
+            mask = ((target_indices >= lo_atom)
+                    & (target_indices <= table_hi_atom))
+            table = (lo_atom, table_hi_atom, hi_atom >= last_atom,
+                     get_max_n_connections_table(
+                         self._get_row_indices()[mask],
+                         target_indices[mask].astype("int64"),
+                         numpy.zeros(len(row_pointers) - 1, dtype="int64"),
+                         lo_atom, table_hi_atom - lo_atom + 1))
+            self._max_n_connections_table = table
+        return table[3][min(hi_atom, table[1]) - lo_atom]
+
     def get_min_max_delay(self):
         """
         Return the minimum and maximum delays in the rows
         """
-        if len(self.synapticRows) == 0:
+        (row_pointers, _, _, delays, _) = self._get_arrays()
+        if len(row_pointers) == 1:
             return (0, 0)
-        min_delay = min(map(operator.methodcaller('get_min_delay'), 
-                self.synapticRows))
-        max_delay = max(map(operator.methodcaller('get_max_delay'), 
-                self.synapticRows))
+
+        # An empty row has a minimum and maximum delay of 0
+        min_delay = 0
+        max_delay = 0
+        if len(delays) > 0:
+            max_delay = numpy.amax(delays)
+            if numpy.all(numpy.diff(row_pointers) > 0):
+                min_delay = numpy.amin(delays)
         return (min_delay, max_delay)
-    
+
     def get_max_weight(self):
         """
         Return the maximum weight in the rows
         """
-        return max(map(operator.methodcaller('get_max_weight'),
-                       self.synapticRows))
+        weights = self._get_arrays()[2]
+        if len(weights) == 0:
+            return 0
+        return numpy.amax(numpy.abs(weights))
 
     def get_min_weight(self):
         """
         Return the minumum weight in the rows
         """
-        return min(map(operator.methodcaller('get_min_weight'),
-                       self.synapticRows))
-        
+        (row_pointers, _, weights, _, _) = self._get_arrays()
+
+        # An empty row has a minimum weight of 0
+        if len(weights) == 0 or numpy.any(numpy.diff(row_pointers) == 0):
+            return 0
+        return numpy.amin(numpy.abs(weights))
+
     def sum_weights(self, exc_sum_array, inh_sum_array):
         """
         Sums the positive weights of the rows into exc_sum_array, and the
-        negative weights of the rows into inh_sum_array, each of which is an 
+        negative weights of the rows into inh_sum_array, each of which is an
         array of numbers indexed by the target indices
         """
-        for row in self.synapticRows:
-            for i in range(0, len(row.target_indices)):
-                index = row.target_indices[i]
-                weight = row.weights[i]
-                if weight > 0:
-                    exc_sum_array[index] += weight
-                else:
-                    inh_sum_array[index] += abs(weight)
-    
+        (_, target_indices, weights, _, _) = self._get_arrays()
+        excitatory = weights > 0
+        numpy.add.at(exc_sum_array, target_indices[excitatory],
+                     weights[excitatory])
+        numpy.add.at(inh_sum_array, target_indices[~excitatory],
+                     numpy.abs(weights[~excitatory]))
+
     def is_connected(self, from_lo_atom, from_hi_atom, to_lo_atom, to_hi_atom):
         """
         Return true if the rows are connected for the specified range of
         incoming and outgoing atoms
         """
-        for row in self.synapticRows[from_lo_atom:from_hi_atom + 1]:
-            if row.get_n_connections(to_lo_atom, to_hi_atom) > 0:
-                return True
-        return False
-    
-    def get_atom_sublist(self, from_lo_atom, from_hi_atom, to_lo_atom, 
+        (row_pointers, target_indices, _, _, _) = self._get_arrays()
+        n_rows = len(row_pointers) - 1
+        start = row_pointers[min(from_lo_atom, n_rows)]
+        end = row_pointers[min(from_hi_atom + 1, n_rows)]
+        targets = target_indices[start:end]
+        return bool(numpy.any((targets >= to_lo_atom)
+                              & (targets <= to_hi_atom)))
+
+    def get_atom_sublist(self, from_lo_atom, from_hi_atom, to_lo_atom,
             to_hi_atom):
         """
         Return a list of rows each of which represents only the information
         for atoms between lo_atom and hi_atom (inclusive)
         """
-        return map(operator.methodcaller('get_sub_row_by_atom', 
-                lo_atom=to_lo_atom, hi_atom=to_hi_atom), 
-                self.synapticRows[from_lo_atom:from_hi_atom + 1])
-    
+        return self.create_atom_sublist(from_lo_atom, from_hi_atom,
+                to_lo_atom, to_hi_atom).get_rows()
+
     def get_delay_sublist(self, min_delay, max_delay):
         """
         Return a list of rows each of which represents only the information
         for atoms with delays between min_delay and max_delay (inclusive)
         """
-        return map(operator.methodcaller('get_sub_row_by_delay', 
-                lo_delay=min_delay, hi_delay=max_delay), self.synapticRows)
-    
-    def create_atom_sublist(self, from_lo_atom, from_hi_atom, to_lo_atom, 
+        return self.create_delay_sublist(min_delay, max_delay).get_rows()
+
+    def create_atom_sublist(self, from_lo_atom, from_hi_atom, to_lo_atom,
             to_hi_atom):
         """
         Create a sub list of this list which contains only atoms
         between lo_atom and hi_atom (inclusive)
         """
-        return SynapticList(self.get_atom_sublist(from_lo_atom, from_hi_atom, 
-                to_lo_atom, to_hi_atom))
-    
+        (row_pointers, target_indices, _, _, _) = self._get_arrays()
+        n_rows = len(row_pointers) - 1
+        row_pointers = row_pointers[min(from_lo_atom, n_rows):
+                                    min(from_hi_atom + 1, n_rows) + 1]
+        targets = target_indices[row_pointers[0]:row_pointers[-1]]
+        mask = (targets >= to_lo_atom) & (targets <= to_hi_atom)
+        return self._create_sublist(row_pointers, mask,
+                                    target_offset=to_lo_atom)
+
     def create_delay_sublist(self, min_delay, max_delay):
         """
         Create a sub list of this list which contains only atoms with delays
         between min_delay and max_delay (inclusive)
         """
-        return SynapticList(self.get_delay_sublist(min_delay, max_delay))
-    
+        (row_pointers, _, _, delays, _) = self._get_arrays()
+        mask = (delays >= min_delay) & (delays <= max_delay)
+        return self._create_sublist(row_pointers, mask,
+                                    delay_offset=min_delay)
+
     def get_rows(self):
         """
         Return the rows to be written
         """
-        return self.synapticRows
-    
+        if self._rows is None:
+            (row_pointers, target_indices, weights, delays, synapse_types) = \
+                self._get_arrays()
+            self._rows = [
+                SynapseRowInfo(target_indices[start:end], weights[start:end],
+                               delays[start:end], synapse_types[start:end])
+                for start, end in zip(row_pointers[:-1], row_pointers[1:])]
+
+            # The rows may now be modified, so they become the master copy
+            self._row_pointers = None
+            self._max_n_connections_table = None
+        return self._rows
+
+    @property
+    def synapticRows(self):
+        return self.get_rows()
+
     def get_n_rows(self):
         """
         Return the number of rows
         """
-        return len(self.synapticRows)
+        if self._row_pointers is None:
+            return len(self._rows)
+        return len(self._row_pointers) - 1
 
     def flip_weights(self):
         """
         flips the weights of each row from postive to negative and visa versa
         """
-        for row in self.synapticRows:
-            map(operator.methodcaller('flip_weights'), self.synapticRows)
-            
+        weights = self._get_arrays()[2]
+        weights *= -1
+
     def append(self, synapse_list):
         """
         Appends a synapse list to the end of this one
         """
-        self.synapticRows.extend(synapse_list.synapticRows)
+        (row_pointers, target_indices, weights, delays, synapse_types) = \
+            self._get_arrays()
+        (other_row_pointers, other_target_indices, other_weights,
+         other_delays, other_synapse_types) = synapse_list._get_arrays()
+        self._row_pointers = numpy.concatenate(
+            (row_pointers, other_row_pointers[1:] + row_pointers[-1]))
+        self._target_indices = numpy.concatenate(
+            (target_indices, other_target_indices))
+        self._weights = numpy.concatenate((weights, other_weights))
+        self._delays = numpy.concatenate((delays, other_delays))
+        self._synapse_types = numpy.concatenate(
+            (synapse_types, other_synapse_types))
+        self._max_n_connections_table = None
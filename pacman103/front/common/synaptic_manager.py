@@ -14,6 +14,21 @@ from pacman103.core.utilities.memory_utils import getAppDataBaseAddressOffset,\
 
 logger = logging.getLogger(__name__)
 
+
+def _scatter_regions(block, starts, regions, lengths):
+    """
+    Copy each of the given regions into block at the corresponding start
+    index with a single fancy-indexed assignment
+    """
+    total = lengths.sum()
+    if total == 0:
+        return
+    region_starts = numpy.cumsum(lengths) - lengths
+    indices = (numpy.arange(total, dtype="int64")
+               + numpy.repeat(starts - region_starts, lengths))
+    block[indices] = numpy.concatenate(regions)
+
+
 class SynapticManager(object):
 
     SYNAPTIC_ROW_HEADER_WORDS = 2 + 1   # Words - 2 for row lenth and number of rows and
@@ -34,6 +49,10 @@ class SynapticManager(object):
         self._stdp_checked = False
         self._stdp_mechanism = None
 
+        # The (row index, row length) of the synaptic block of each subedge,
+        # found when the matrix is sized and used again when it is written
+        self._synaptic_row_lengths = dict()
+
     def writeSynapseRowInfo(self, sublist, rowIO, spec, currentWritePtr,
             fixedRowLength, region, weight_scale, n_synapse_type_bits):
         """
@@ -44,84 +63,104 @@ class SynapticManager(object):
         # Switch focus to the synaptic matrix memory region:
         spec.switchWriteFocus(region)
 
+        # Blocks are whole words, so the padding is too:
+        if (currentWritePtr & 0x3) != 0:
+            raise Exception("Synaptic block write pointer {} is not word"
+                    " aligned".format(currentWritePtr))
+
         # Align the write pointer to the next 1Kbyte boundary using padding:
         writePtr = currentWritePtr
+        numPaddingBytes = 0
         if (writePtr & 0x3FF) != 0:
 
             # Ptr not aligned. Align it:
             writePtr = (writePtr & 0xFFFFFC00) + 0x400
-
-            # Pad out data file with the added alignment bytes:
             numPaddingBytes = writePtr - currentWritePtr
-            spec.moveToReg(destReg = 15, data = numPaddingBytes)
-            spec.write(data = 0xDD, repeatReg = 15, sizeof='uint8')
 
         # Remember this aligned address, it's where this block will start:
         blockStartAddr = writePtr
-        # Write the synaptic block, tracking the word count:
-        synapticRows = sublist.get_rows()
-
-        rowNo = 0
-        for row in synapticRows:
-            wordsWritten = 0
-            plastic_region = rowIO.get_packed_plastic_region(row, weight_scale,
-                    n_synapse_type_bits)
 
-            # Write the size of the plastic region
-            spec.comment("\nWriting plastic region for row {}".format(rowNo))
-            spec.write(data = len(plastic_region), sizeof = "uint32")
-            wordsWritten += 1
+        # Pack the whole block, preceded by the alignment words, and write it
+        # in one go:
+        block = self._pack_synaptic_block(sublist, rowIO, fixedRowLength,
+                weight_scale, n_synapse_type_bits)
+        padding = numpy.empty(numPaddingBytes / 4, dtype="uint32")
+        padding.fill(0xDDDDDDDD)
+        spec.comment("\nWriting synaptic block of {} rows".format(
+                sublist.get_n_rows()))
+        spec.write_array(data = numpy.concatenate((padding, block)))
 
-            # Write the plastic region
-            spec.write_array(data = plastic_region)
-            wordsWritten += len(plastic_region)
+        # The current write pointer is where the next block could start:
+        nextBlockStartAddr = writePtr + (4 * len(block))
+        return blockStartAddr, nextBlockStartAddr
 
-            fixed_fixed_region = numpy.asarray(
+    def _pack_synaptic_block(self, sublist, rowIO, fixedRowLength,
+            weight_scale, n_synapse_type_bits):
+        """
+        Pack the rows of a synaptic sublist into one array of words.  Each
+        row holds the size of its plastic region, the plastic region, the
+        sizes of its fixed-fixed and fixed-plastic regions, the two fixed
+        regions and padding up to the fixed row length.
+        """
+        plastic_regions = list()
+        fixed_fixed_regions = list()
+        fixed_plastic_regions = list()
+        n_fixed_plastic = list()
+        for row in sublist.get_rows():
+            plastic_regions.append(numpy.asarray(
+                    rowIO.get_packed_plastic_region(row, weight_scale,
+                                                    n_synapse_type_bits),
+                                                    dtype="uint32"))
+            fixed_fixed_regions.append(numpy.asarray(
                     rowIO.get_packed_fixed_fixed_region(row, weight_scale,
                                                         n_synapse_type_bits),
-                                                        dtype="uint32")
+                                                        dtype="uint32"))
             fixed_plastic_region = numpy.asarray(
                     rowIO.get_packed_fixed_plastic_region(row, weight_scale,
                                                           n_synapse_type_bits),
                                                           dtype="uint16")
+            n_fixed_plastic.append(len(fixed_plastic_region))
 
-            # Write the size of the fixed parts
-            spec.comment("\nWriting fixed region for row {}".format(rowNo))
-            spec.write(data = len(fixed_fixed_region), sizeof = "uint32")
-            spec.write(data = len(fixed_plastic_region), sizeof = "uint32")
-            wordsWritten += 2
-
-            # Write the fixed fixed region
-            spec.write_array(data = fixed_fixed_region)
-            wordsWritten += len(fixed_fixed_region)
-
-            # As everything needs to be word aligned, add extra zero to fixed_plastic
-            # Region if it has an odd number of entries and build uint32 view of it
+            # The fixed plastic region is padded to a whole number of words
             if (len(fixed_plastic_region) % 2) != 0:
-                fixed_plastic_region = numpy.asarray(numpy.append(
-                        fixed_plastic_region, 0), dtype='uint16')
-            # does indeed return something (due to c fancy stuff in numpi) ABS
-            fixed_plastic_region_words = fixed_plastic_region.view(dtype="uint32")
-
-            spec.write_array(data = fixed_plastic_region_words)
-            wordsWritten += len(fixed_plastic_region_words)
-
-            writePtr += (4 * wordsWritten)
-
-            # Write padding (if required):
-            padding = ((fixedRowLength + self.SYNAPTIC_ROW_HEADER_WORDS) - wordsWritten)
-            if padding != 0:
-                spec.write(data=0xBBCCDDEE, repeats=padding, sizeof='uint32')
-                writePtr += 4 * padding
-
-            rowNo += 1
+                fixed_plastic_region = numpy.append(
+                        fixed_plastic_region, 0).astype("uint16")
+            fixed_plastic_regions.append(
+                    fixed_plastic_region.view(dtype="uint32"))
+
+        n_rows = len(plastic_regions)
+        row_words = self.SYNAPTIC_ROW_HEADER_WORDS + fixedRowLength
+        n_plastic = numpy.array(map(len, plastic_regions), dtype="int64")
+        n_fixed_fixed = numpy.array(map(len, fixed_fixed_regions),
+                dtype="int64")
+        n_fixed_plastic_words = numpy.array(map(len, fixed_plastic_regions),
+                dtype="int64")
+        n_words = (self.SYNAPTIC_ROW_HEADER_WORDS + n_plastic + n_fixed_fixed
+                + n_fixed_plastic_words)
+        if n_rows > 0 and numpy.amax(n_words) > row_words:
+            raise Exception("Synaptic row of {} words is longer than the row"
+                    " length of {} words".format(numpy.amax(n_words),
+                                                 row_words))
+
+        # Rows are a fixed size, so the start of each part of each row can be
+        # found from the sizes of the parts before it
+        block = numpy.empty(n_rows * row_words, dtype="uint32")
+        block.fill(0xBBCCDDEE)
+        row_starts = numpy.arange(n_rows, dtype="int64") * row_words
+        block[row_starts] = n_plastic
+        _scatter_regions(block, row_starts + 1, plastic_regions, n_plastic)
+        fixed_starts = row_starts + 1 + n_plastic
+        block[fixed_starts] = n_fixed_fixed
+        block[fixed_starts + 1] = n_fixed_plastic
+        _scatter_regions(block, fixed_starts + 2, fixed_fixed_regions,
+                n_fixed_fixed)
+        _scatter_regions(block, fixed_starts + 2 + n_fixed_fixed,
+                fixed_plastic_regions, n_fixed_plastic_words)
+        return block
 
-        # The current write pointer is where the next block could start:
-        nextBlockStartAddr = writePtr
-        return blockStartAddr, nextBlockStartAddr
-    
     def getExactSynapticBlockMemorySize(self, subvertex):
         memorySize = 0
+        self._synaptic_row_lengths = dict()
         
         # Go through the subedges and add up the memory
         for subedge in subvertex.in_subedges:
@@ -129,14 +168,17 @@ class SynapticManager(object):
                 memorySize = (memorySize & 0xFFFFFC00) + 0x400
             
             sublist = subedge.get_synapse_sublist()
-            max_n_words = max([subedge.edge.synapse_row_io.get_n_words(
-                        synapse_row) 
-                    for synapse_row in sublist.get_rows()])
-            rowLength = self.selectMinimumRowLength(max_n_words)[1]
+            max_n_words = subedge.edge.synapse_row_io.get_max_n_words(sublist)
+            rowIndex, rowLength = self.selectMinimumRowLength(max_n_words)
+            self._synaptic_row_lengths[subedge] = (rowIndex, rowLength)
             numRows = sublist.get_n_rows()
             synBlockSz = 4 * (self.SYNAPTIC_ROW_HEADER_WORDS + rowLength)
             allSynBlockSz = synBlockSz * numRows
             memorySize += allSynBlockSz
+            
+            # Only one sublist is held at a time, so that they can be
+            # generated when they are needed
+            subedge.free_sublist()
         return memorySize    
     
     def getSynapticBlocksMemorySize(self, lo_atom, hi_atom, in_edges):
@@ -356,14 +398,19 @@ class SynapticManager(object):
                 #    for i in range(len(rows)):
                 #        logger.debug("{}: {}".format(i, rows[i]))
 
-                # Get the maximum row length in words, excluding headers
-                max_row_length = max([rowIO.get_n_words(row)
-                        for row in sublist.get_rows()])
-                # Get an entry in the row length table for this length
-                row_index, row_length = \
-                    self.selectMinimumRowLength(max_row_length)
-                if max_row_length == 0 or row_length == 0:
-                    print ""
+                # Use the row length found when sizing the matrix, if it was,
+                # rather than scanning the rows again
+                if subedge in self._synaptic_row_lengths:
+                    row_index, row_length = \
+                        self._synaptic_row_lengths.pop(subedge)
+                else:
+                    # Get the maximum row length in words, excluding headers
+                    max_row_length = rowIO.get_max_n_words(sublist)
+                    # Get an entry in the row length table for this length
+                    row_index, row_length = \
+                        self.selectMinimumRowLength(max_row_length)
+                    if max_row_length == 0 or row_length == 0:
+                        print ""
 
                 # Write the synaptic block for the sublist
                 (block_start_addr, next_block_start_addr) = \
@@ -378,6 +425,7 @@ class SynapticManager(object):
                 self.updateMasterPopulationTable(spec, block_start_addr,
                                                  row_index, subedge.key,
                                                  MASTER_POP_TABLE)
+                subedge.free_sublist()
 
 
     def updateMasterPopulationTable(self, spec, blockStartAddr, rowIndex, key,
@@ -387,7 +387,7 @@ class Projection(object):
             
             # Otherwise, the weights are all negative, so invert them(!)
             else:
-                synapse_list.flip()
+                synapse_list.flip_weights()
             
         # check if all delays requested can fit into the natively supported
         # delays in the models
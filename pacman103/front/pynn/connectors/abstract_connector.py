@@ -1,3 +1,23 @@
+from pacman103.front.common.block_synaptic_list import BlockSynapticList
+from pacman103.front.common.synaptic_list import SynapticList
+
+import numpy
+
+# The number of pre- and post-synaptic atoms in each tile of the possible
+# connections that is drawn from its own generator
+SEED_TILE_ATOMS = 256
+
+
+def get_random_state(seed=None):
+    """
+    Returns the generator that a connector draws its connections from: a new
+    generator with the given seed, so that the same connections are made
+    each time, or numpy's global generator if the seed is None
+    """
+    if seed is None:
+        return numpy.random
+    return numpy.random.RandomState(seed)
+
 
 class AbstractConnector( object ):
     """
@@ -12,4 +32,85 @@ class AbstractConnector( object ):
         explicit information, as long as it produces the correct information!
         """
         raise NotImplementedError
-
+    
+    def generate_block_synapse_list(self, prevertex, postvertex, delay_scale,
+            synapse_type, seed=None):
+        """
+        Generate a list of synapses whose blocks are made with 
+        generate_synapse_block when they are needed, rather than being held in
+        memory.  If the seed is None, one is drawn from numpy's global
+        generator, so that the blocks stay the same each time they are made.
+        """
+        if seed is None:
+            seed = numpy.random.randint(0x7FFFFFFF)
+        
+        def generate_block(pre_lo_atom, pre_hi_atom, post_lo_atom, 
+                post_hi_atom):
+            return self.generate_synapse_block(prevertex, postvertex, 
+                    delay_scale, synapse_type, seed, pre_lo_atom, pre_hi_atom,
+                    post_lo_atom, post_hi_atom)
+        return BlockSynapticList(generate_block, prevertex.atoms, 
+                postvertex.atoms)
+    
+    def generate_synapse_block(self, prevertex, postvertex, delay_scale,
+            synapse_type, seed, pre_lo_atom, pre_hi_atom, post_lo_atom, 
+            post_hi_atom):
+        """
+        Generate the list of synapses from the atoms between pre_lo_atom and
+        pre_hi_atom to the atoms between post_lo_atom and post_hi_atom
+        (inclusive), with target indices relative to post_lo_atom.  The same
+        seed must give the same synapses whichever block they are made in.
+        
+        By default, the possible connections are split into tiles of 
+        SEED_TILE_ATOMS atoms, each generated by generate_tile with a 
+        generator seeded by the seed and the position of the tile.
+        """
+        pre_atom_chunks = list()
+        post_atom_chunks = list()
+        weight_chunks = list()
+        delay_chunks = list()
+        first_pre_tile = pre_lo_atom - (pre_lo_atom % SEED_TILE_ATOMS)
+        first_post_tile = post_lo_atom - (post_lo_atom % SEED_TILE_ATOMS)
+        for tile_pre_lo_atom in range(first_pre_tile, pre_hi_atom + 1,
+                SEED_TILE_ATOMS):
+            tile_pre_hi_atom = min(tile_pre_lo_atom + SEED_TILE_ATOMS,
+                    prevertex.atoms) - 1
+            for tile_post_lo_atom in range(first_post_tile, post_hi_atom + 1,
+                    SEED_TILE_ATOMS):
+                tile_post_hi_atom = min(tile_post_lo_atom + SEED_TILE_ATOMS,
+                        postvertex.atoms) - 1
+                rng = numpy.random.RandomState([seed, 
+                        tile_pre_lo_atom // SEED_TILE_ATOMS, 
+                        tile_post_lo_atom // SEED_TILE_ATOMS])
+                (pre_atoms, post_atoms, weights, delays) = self.generate_tile(
+                        rng, tile_pre_lo_atom, tile_pre_hi_atom, 
+                        tile_post_lo_atom, tile_post_hi_atom)
+                
+                # Keep the part of the tile that is in the block
+                in_block = ((pre_atoms >= pre_lo_atom) 
+                        & (pre_atoms <= pre_hi_atom)
+                        & (post_atoms >= post_lo_atom) 
+                        & (post_atoms <= post_hi_atom))
+                pre_atom_chunks.append(pre_atoms[in_block])
+                post_atom_chunks.append(post_atoms[in_block])
+                weight_chunks.append(weights[in_block])
+                delay_chunks.append(delays[in_block] * delay_scale)
+        
+        if len(pre_atom_chunks) == 0:
+            pre_atom_chunks = post_atom_chunks = [numpy.zeros(0, "int64")]
+            weight_chunks = delay_chunks = [numpy.zeros(0)]
+        return SynapticList.from_connections(pre_hi_atom - pre_lo_atom + 1,
+                numpy.concatenate(pre_atom_chunks) - pre_lo_atom,
+                numpy.concatenate(post_atom_chunks) - post_lo_atom,
+                numpy.concatenate(weight_chunks),
+                numpy.concatenate(delay_chunks), synapse_type)
+    
+    def generate_tile(self, rng, pre_lo_atom, pre_hi_atom, post_lo_atom, 
+            post_hi_atom):
+        """
+        Generate arrays of the pre-synaptic atom, post-synaptic atom, weight
+        and unscaled delay of the connections from the atoms between 
+        pre_lo_atom and pre_hi_atom to the atoms between post_lo_atom and 
+        post_hi_atom (inclusive), drawing any random numbers from rng
+        """
+        raise NotImplementedError
@@ -1,6 +1,4 @@
-from pacman103.front.common.randomDistributions import generateParameter, generateParameterArray
-from pacman103.front.common.synapse_row_info import SynapseRowInfo
-from pacman103.front.common.synaptic_list import SynapticList
+from pacman103.front.common.randomDistributions import generateParameterArrayAt
 from pacman103.front.pynn.connectors.abstract_connector import AbstractConnector
 
 import numpy
@@ -37,21 +35,16 @@ class AllToAllConnector( AbstractConnector ):
         
     def generate_synapse_list(self, prevertex, postvertex, delay_scale, 
             synapse_type):
+        return self.generate_block_synapse_list(prevertex, postvertex, 
+                delay_scale, synapse_type)
+    
+    def generate_tile(self, rng, pre_lo_atom, pre_hi_atom, post_lo_atom,
+            post_hi_atom):
+        post_range = numpy.arange(post_lo_atom, post_hi_atom + 1)
+        pre_atoms = numpy.repeat(numpy.arange(pre_lo_atom, pre_hi_atom + 1), 
+                len(post_range))
+        post_atoms = numpy.tile(post_range, pre_hi_atom - pre_lo_atom + 1)
         
-        connection_list = list()
-        for _ in range(0, prevertex.atoms):
-            present = numpy.ones(postvertex.atoms, 
-                    dtype=numpy.uint32)
-            n_present = postvertex.atoms
-            
-            ids = numpy.where(present)[0]
-            delays = (generateParameterArray(self.delays, n_present, present)
-                    * delay_scale)
-            weights = generateParameterArray(self.weights, n_present, present)
-            synapse_types = (numpy.ones(len(ids), dtype='uint32') 
-                    * synapse_type)
-            
-            connection_list.append(SynapseRowInfo(ids, weights, delays,
-                    synapse_types))
-                    
-        return SynapticList(connection_list)
+        weights = generateParameterArrayAt(self.weights, post_atoms, rng)
+        delays = generateParameterArrayAt(self.delays, post_atoms, rng)
+        return pre_atoms, post_atoms, weights, delays
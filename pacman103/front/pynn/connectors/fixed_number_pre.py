@@ -1,10 +1,9 @@
-from pacman103.front.common.randomDistributions import generateParameterArray
+from pacman103.front.common.randomDistributions import generateParameterArrayAt
 from pacman103.front.pynn.connectors.abstract_connector import AbstractConnector
-from pacman103.front.common.synapse_row_info import SynapseRowInfo
+from pacman103.front.pynn.connectors.abstract_connector import get_random_state
 from pacman103.front.common.synaptic_list import SynapticList
 
 import numpy
-import random
 
 class FixedNumberPreConnector( AbstractConnector ):
     """
@@ -28,9 +27,12 @@ class FixedNumberPreConnector( AbstractConnector ):
     :param `pyNN.Space` space: 
         a Space object, needed if you wish to specify distance-
         dependent weights or delays - not implemented
+    :param `int` seed:
+        if not `None`, the pre-synaptic neurons are selected by a generator
+        with this seed, so that the same connections are made each time
     """
     def __init__(self, n_pre, weights = 0.0, delays = 1,
-                  allow_self_connections = True):
+                  allow_self_connections = True, seed = None):
         """
         Creates a new FixedNumberPreConnector
         """
@@ -38,35 +40,29 @@ class FixedNumberPreConnector( AbstractConnector ):
         self.weights = float(weights)
         self.delays = int(delays)
         self.allow_self_connections = allow_self_connections
+        self.seed = seed
         
     def generate_synapse_list(self, prevertex, postvertex, delay_scale, 
             synapse_type):
-        id_lists = list()
-        weight_lists = list()
-        delay_lists = list()
-        type_lists = list()
-        for _ in range(0, prevertex.atoms):
-            id_lists.append(list())
-            weight_lists.append(list())
-            delay_lists.append(list())
-            type_lists.append(list())
+        return self.generate_block_synapse_list(prevertex, postvertex, 
+                delay_scale, synapse_type, self.seed)
+    
+    def generate_synapse_block(self, prevertex, postvertex, delay_scale,
+            synapse_type, seed, pre_lo_atom, pre_hi_atom, post_lo_atom, 
+            post_hi_atom):
         
-        pre_synaptic_neurons = random.sample(range(0, prevertex.atoms), 
-                self.n_pre)
- 
-        for pre_atom in pre_synaptic_neurons:
-            present = numpy.ones(postvertex.atoms, dtype=numpy.uint32)
-            n_present = postvertex.atoms
-            
-            id_lists[pre_atom] = numpy.where(present)[0]
-            weight_lists[pre_atom] = generateParameterArray(self.weights,
-                    n_present, present)
-            delay_lists[pre_atom] = (generateParameterArray(self.delays,
-                    n_present, present) * delay_scale)
-            type_lists[pre_atom] = synapse_type
+        # The same pre-synaptic neurons are selected for every block
+        pre_synaptic_neurons = get_random_state(seed).choice(prevertex.atoms, 
+                self.n_pre, replace=False)
+        pre_synaptic_neurons = numpy.sort(pre_synaptic_neurons[
+                (pre_synaptic_neurons >= pre_lo_atom) 
+                & (pre_synaptic_neurons <= pre_hi_atom)])
+        post_range = numpy.arange(post_lo_atom, post_hi_atom + 1)
+        pre_atoms = numpy.repeat(pre_synaptic_neurons, len(post_range))
+        post_atoms = numpy.tile(post_range, len(pre_synaptic_neurons))
         
-        connection_list = [SynapseRowInfo(id_lists[i], weight_lists[i], 
-                delay_lists[i], type_lists[i])
-                for i in range(0, prevertex.atoms)]
-        
-        return SynapticList(connection_list)
+        weights = generateParameterArrayAt(self.weights, post_atoms)
+        delays = generateParameterArrayAt(self.delays, post_atoms) * delay_scale
+        return SynapticList.from_connections(pre_hi_atom - pre_lo_atom + 1, 
+                pre_atoms - pre_lo_atom, post_atoms - post_lo_atom, weights,
+                delays, synapse_type)
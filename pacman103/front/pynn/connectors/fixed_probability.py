@@ -1,7 +1,5 @@
-from pacman103.front.common.randomDistributions import generateParameterArray
+from pacman103.front.common.randomDistributions import generateParameterArrayAt
 from pacman103.front.pynn.connectors.abstract_connector import AbstractConnector
-from pacman103.front.common.synapse_row_info import SynapseRowInfo
-from pacman103.front.common.synaptic_list import SynapticList
 
 import numpy
 
@@ -27,9 +25,12 @@ class FixedProbabilityConnector( AbstractConnector ):
     :param `pyNN.Space` space: 
         a Space object, needed if you wish to specify distance-
         dependent weights or delays - not implemented
+    :param `int` seed:
+        if not `None`, the connections are drawn from generators seeded with
+        this seed, so that the same connections are made each time
     """
     def __init__(self, p_connect, weights = 0.0, delays = 1,
-                  allow_self_connections = True):
+                  allow_self_connections = True, seed = None):
         """
         Creates a new FixedProbabilityConnector.
         """
@@ -37,21 +38,50 @@ class FixedProbabilityConnector( AbstractConnector ):
         self.weights = weights
         self.delays = delays
         self.allow_self_connections = allow_self_connections
+        self.seed = seed
         
     def generate_synapse_list(self, prevertex, postvertex, delay_scale,
             synapse_type):
-        rows = list()
-        for _ in range(0, prevertex.atoms):
-            
-            present = numpy.random.rand(postvertex.atoms) <= self.p_connect
-            n_present = numpy.sum(present)
-            
-            ids = numpy.where(present)[0]
-            delays = (generateParameterArray(self.delays, n_present, present)
-                    * delay_scale)
-            weights = generateParameterArray(self.weights, n_present, present)
-            synapse_types = (numpy.ones(len(ids), dtype='uint32') 
-                    * synapse_type)
-            
-            rows.append(SynapseRowInfo(ids, weights, delays, synapse_types))
-        return SynapticList(rows)
+        return self.generate_block_synapse_list(prevertex, postvertex, 
+                delay_scale, synapse_type, self.seed)
+    
+    def generate_tile(self, rng, pre_lo_atom, pre_hi_atom, post_lo_atom,
+            post_hi_atom):
+        n_post_atoms = post_hi_atom - post_lo_atom + 1
+        positions = draw_connections(rng, 
+                (pre_hi_atom - pre_lo_atom + 1) * n_post_atoms, 
+                self.p_connect)
+        pre_atoms = pre_lo_atom + (positions // n_post_atoms)
+        post_atoms = post_lo_atom + (positions % n_post_atoms)
+        
+        weights = generateParameterArrayAt(self.weights, post_atoms, rng)
+        delays = generateParameterArrayAt(self.delays, post_atoms, rng)
+        return pre_atoms, post_atoms, weights, delays
+
+
+def draw_connections(rng, n_possible, p_connect):
+    """
+    Returns the sorted positions of the connections made when each of
+    n_possible connections is made with probability p_connect.  Only the
+    connections made are drawn, as the gaps between one connection and the
+    next, so the time and memory taken depends on the number of connections
+    rather than on n_possible.
+    """
+    if n_possible == 0 or p_connect <= 0:
+        return numpy.zeros(0, dtype="int64")
+    if p_connect >= 1:
+        return numpy.arange(n_possible, dtype="int64")
+    
+    # Draw a few more gaps than the expected number of connections, repeating
+    # in the unlikely case that they don't reach the end
+    chunks = list()
+    last = -1
+    while last < n_possible - 1:
+        expected = (n_possible - last) * p_connect
+        gaps = rng.geometric(p_connect, 
+                int(expected + 4 * numpy.sqrt(expected) + 16))
+        positions = last + numpy.cumsum(gaps, dtype="int64")
+        chunks.append(positions)
+        last = positions[-1]
+    positions = numpy.concatenate(chunks)
+    return positions[:numpy.searchsorted(positions, n_possible)]
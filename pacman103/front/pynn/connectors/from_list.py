@@ -2,7 +2,8 @@ from pacman103.front.common.randomDistributions import generateParameter
 from pacman103.front.pynn.connectors.abstract_connector import AbstractConnector
 from pacman103.front.pynn.connectors.seed_info import SeedInfo
 from pacman103.front.common.synaptic_list import SynapticList
-from pacman103.front.common.synapse_row_info import SynapseRowInfo
+
+import numpy
 
 class FromListConnector( AbstractConnector ):
     """
@@ -30,31 +31,29 @@ class FromListConnector( AbstractConnector ):
         
     def generate_synapse_list(self, prevertex, postvertex, delay_scale,
             synapse_type):
-        id_lists = list()
-        weight_lists = list()
-        delay_lists = list()
-        type_lists = list()
-        
-        for _ in range(0, prevertex.atoms):
-            id_lists.append(list())
-            weight_lists.append(list())
-            delay_lists.append(list())
-            type_lists.append(list())
+        connections = self._get_connection_array()
+        pre_atoms = connections[:, 0].astype("int64")
+        post_atoms = connections[:, 1].astype("int64")
         
-        for i in range(0, len(self.conn_list)):
-            conn = self.conn_list[i]
-            pre_atom = generateParameter(conn[0], i)
-            post_atom = generateParameter(conn[1], i)
-            weight = generateParameter(conn[2], i)
-            delay = generateParameter(conn[3], i) * delay_scale
-            id_lists[pre_atom].append(post_atom)
-            weight_lists[pre_atom].append(weight)
-            delay_lists[pre_atom].append(delay)
-            type_lists[pre_atom].append(synapse_type)
+        # The connections are grouped by pre_atom with a stable sort, so the
+        # connections of each row stay in the order of the list
+        return SynapticList.from_connections(prevertex.atoms, pre_atoms,
+                post_atoms, connections[:, 2], connections[:, 3] * delay_scale,
+                synapse_type)
+    
+    def _get_connection_array(self):
+        """
+        Returns the list of connections as an array with one row per
+        connection and columns of pre_idx, post_idx, weight and delay
+        """
+        try:
+            connections = numpy.asarray(self.conn_list, dtype="float")
+        except (TypeError, ValueError):
             
-        connection_list = [SynapseRowInfo(id_lists[i], weight_lists[i], 
-                    delay_lists[i], type_lists[i]) 
-                for i in range(0, prevertex.atoms)]
-        
-        return SynapticList(connection_list)
-
+            # Some of the values need to be generated
+            connections = numpy.array([[generateParameter(value, i) 
+                    for value in conn[:4]] 
+                for i, conn in enumerate(self.conn_list)], dtype="float")
+        if len(connections) == 0:
+            return numpy.zeros((0, 4))
+        return connections[:, :4]
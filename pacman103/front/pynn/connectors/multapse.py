@@ -1,8 +1,7 @@
-from pacman103.front.common.randomDistributions import generateParameter
+from pacman103.front.common.randomDistributions import generateParameterArrayAt
 from pacman103.front.pynn.connectors.abstract_connector import AbstractConnector
+from pacman103.front.pynn.connectors.abstract_connector import get_random_state
 from pacman103.front.common.synaptic_list import SynapticList
-from pacman103.front.common.synapse_row_info import SynapseRowInfo
-import random
 
 class MultapseConnector( AbstractConnector ):
     """
@@ -21,10 +20,13 @@ class MultapseConnector( AbstractConnector ):
     :param delays:
         as `weights`. If `None`, all synaptic delays will be set
         to the global minimum delay.
+    :param `int` seed:
+        if not `None`, the synapses are selected by a generator with this
+        seed, so that the same connections are made each time
          
     """
     def __init__( self, numSynapses = 0, weights = 0.0, delays = 1,
-            connectionArray = None ):
+            connectionArray = None, seed = None ):
         """
         Creates a new connector.
         """
@@ -32,34 +34,15 @@ class MultapseConnector( AbstractConnector ):
         self.weights = weights
         self.delays = delays
         self.connectionArray = connectionArray
+        self.seed = seed
         
     def generate_synapse_list(self, prevertex, postvertex, delay_scale,
             synapse_type):
-        id_lists = list()
-        weight_lists = list()
-        delay_lists = list()
-        type_lists = list()
-        for _ in range(0, prevertex.atoms):
-            id_lists.append(list())
-            weight_lists.append(list())
-            delay_lists.append(list())
-            type_lists.append(list())
-            
-        numIncomingAxons = prevertex.atoms
-        numTargetNeurons = postvertex.atoms
+        rng = get_random_state(self.seed)
+        sources = rng.randint(0, prevertex.atoms, self.numSynapses)
+        targets = rng.randint(0, postvertex.atoms, self.numSynapses)
         
-        for _ in range(0, self.numSynapses):
-            source = int(random() * numIncomingAxons)
-            target = int(random() * numTargetNeurons)
-            weight = generateParameter(self.weights, target)
-            delay = generateParameter(self.weights, target) * delay_scale
-            id_lists[source].append(target)
-            weight_lists[source].append(weight)
-            delay_lists[source].append(delay)
-            type_lists[source].append(synapse_type)
-            
-        connection_list = [SynapseRowInfo(id_lists[i], weight_lists[i], 
-                    delay_lists[i], type_lists[i]) 
-                for i in range(0, prevertex.atoms)]
-        
-        return SynapticList(connection_list)
+        weights = generateParameterArrayAt(self.weights, targets)
+        delays = generateParameterArrayAt(self.delays, targets) * delay_scale
+        return SynapticList.from_connections(prevertex.atoms, sources, 
+                targets, weights, delays, synapse_type)
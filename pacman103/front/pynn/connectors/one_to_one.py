@@ -1,7 +1,8 @@
-from pacman103.front.common.randomDistributions import generateParameter
+from pacman103.front.common.randomDistributions import generateParameterArrayAt
 from pacman103.front.pynn.connectors.abstract_connector import AbstractConnector
 from pacman103.front.common.synaptic_list import SynapticList
-from pacman103.front.common.synapse_row_info import SynapseRowInfo
+
+import numpy
 
 class OneToOneConnector( AbstractConnector ):
     """
@@ -27,11 +28,8 @@ class OneToOneConnector( AbstractConnector ):
         
     def generate_synapse_list(self, prevertex, postvertex, delay_scale,
             synapse_type):
-        connection_list = list()
-        for pre_atom in range(0, prevertex.atoms):
-            delay   = generateParameter(self.delays, pre_atom) * delay_scale
-            weight  = generateParameter(self.weights, pre_atom)
-            connection_list.append(SynapseRowInfo([pre_atom], [weight],
-                     [delay], [synapse_type]))
-                    
-        return SynapticList(connection_list)
+        atoms = numpy.arange(prevertex.atoms)
+        weights = generateParameterArrayAt(self.weights, atoms)
+        delays = generateParameterArrayAt(self.delays, atoms) * delay_scale
+        return SynapticList.from_connections(prevertex.atoms, atoms, atoms,
+                weights, delays, synapse_type)
@@ -26,6 +26,19 @@ class WeightBasedPlasticSynapseRowIo(AbstractSynapseRowIo):
         num_words = num_half_words + self.num_header_words
         
         return num_words
+
+    def get_max_n_words(self, synapse_list, lo_atom=None, hi_atom=None):
+        """
+        Returns the maximum size of the fixed and plastic regions of the rows
+        of the synapse list in words, as get_n_words for each row
+        """
+        num_half_words = synapse_list.get_row_lengths()
+        if lo_atom is not None and hi_atom is not None:
+            num_half_words = numpy.maximum(
+                    numpy.minimum(num_half_words, hi_atom + 1)
+                    - numpy.minimum(num_half_words, lo_atom), 0)
+        num_half_words = num_half_words + (num_half_words % 2)
+        return numpy.amax(num_half_words) + self.num_header_words
         
     def get_packed_fixed_fixed_region(self, synapse_row, weight_scale,
             n_synapse_type_bits):
@@ -71,6 +71,12 @@ class DataSpec:
         self.cmdIdx           = 1
         self.txt_indent        = 0
         self.data_spec_exec = dao.spec_executor
+        # With a host-based executor, writes can be applied directly to its
+        # memory image; the binary spec is then only written if requested
+        self.direct_exec = (self.write_binary_specs and
+                            self.data_spec_exec is not None and
+                            dao.specExecDirect)
+        self.write_executed_specs = dao.writeExecutedSpecs
         for i in range(data_spec_constants.MAX_MEM_REGIONS): self.mem_slot.append(0)
         for i in range(data_spec_constants.MAX_STRUCT_SLOTS): self.struct_list.append(False)
         for i in range(data_spec_constants.MAX_RNGS): self.rng_list.append(False)
@@ -143,7 +149,8 @@ class DataSpec:
         fNameTxt = self.dao.get_reports_directory("dataSpec") + os.sep \
                     + "%s_dataSpec_%d_%d_%d.txt" % (hostname, x, y, p)
         self.file_name = fNameBin
-        if self.write_binary_specs and self.data_spec_exec is None:
+        if self.write_binary_specs and (self.data_spec_exec is None or
+                                        self.write_executed_specs):
             logger.debug("Writing spec to %s", fNameBin)
             self.file_handle_bin = open(fNameBin, "wb", 8192)
         if self.write_text_specs:
@@ -175,7 +182,7 @@ class DataSpec:
         if self.write_binary_specs:
             if self.data_spec_exec is not None:
                 self.data_spec_exec.write_header(headerData)
-            else:
+            if self.file_handle_bin is not None:
                 headerData.tofile(self.file_handle_bin)
 
         # Write text version of header to text file, if required:
@@ -199,7 +206,7 @@ class DataSpec:
         Close the Spec File, as well as the textual version of the Spec, if
         this was also opened.
         """
-        if self.write_binary_specs and self.data_spec_exec is None:
+        if self.file_handle_bin is not None:
             self.file_handle_bin.close()
             self.file_handle_bin = None
         if self.write_text_specs:
@@ -643,6 +650,15 @@ class DataSpec:
         if repeats < 1:
           self.raiseDsgSpecCmdException("Negative repeats")
 
+        executed = False
+        if self.direct_exec and dataReg is None and repeatReg is None:
+            # Values as they would be encoded in the command:
+            self.data_spec_exec.write_value(int(data) & 0xFFFFFFFF,
+                                            elementSz, repeats & 0xFF)
+            if self.file_handle_bin is None and not self.write_text_specs:
+                return
+            executed = True
+
         cmdLen, parameters, regUsage = [0, 0, 0]
         cmdWordList = []
         cmdString = "WRITE"
@@ -666,17 +682,24 @@ class DataSpec:
         cmdWord = cmdWord       | (dataLen<<12)   | (parameters)
         cmdWordList.insert(0, cmdWord)
         cmdString = "%s, dataType = %s" % (cmdString, sizeof)
-        self.writeCommandToFiles(cmdWordList, cmdString)
+        self.writeCommandToFiles(cmdWordList, cmdString, executed=executed)
 
     def write_array(self, data=None, repeats=1):
         """CMD_CODE: 0x42, WRITE_ARRAY
         Write an array of words.  The array to copy is appended after the
         instruction.
         """
-        data = numpy.array(data, dtype='uint32')
+        data = numpy.asarray(data, dtype='uint32')
         size = data.size
         fdata = numpy.reshape(data, size)
 
+        executed = False
+        if self.direct_exec:
+            self.data_spec_exec.write_words(fdata)
+            if self.file_handle_bin is None and not self.write_text_specs:
+                return
+            executed = True
+
         cmd_len = 0xF
         cmd = (cmd_len << 28) | (data_spec_constants.DSG_WRITE_ARRAY << 20)
 
@@ -685,7 +708,7 @@ class DataSpec:
         cmd_word_list[1] = size + 1
         cmd_word_list[2:] = fdata
         cmd_string = "WRITE_ARRAY, %d elements = {" % (size)
-        self.writeCommandToFiles(cmd_word_list, cmd_string)
+        self.writeCommandToFiles(cmd_word_list, cmd_string, executed=executed)
 
     def writeStruct(self, structId = 0, copiesReg = None, copies = 1):
         """
@@ -748,11 +771,19 @@ class DataSpec:
         if self.mem_slot[region] == 0:
             errorString = "Region requested (%d) for SWITCH_FOCUS command has not been previously reserved." %region
             self.raiseDsgSpecCmdException(errorString)
+
+        executed = False
+        if self.direct_exec and src1Reg is None:
+            self.data_spec_exec.switch_focus(region)
+            if self.file_handle_bin is None and not self.write_text_specs:
+                return
+            executed = True
+
         # Write command to switch focus:
         cmdWord = (data_spec_constants.LEN1<< 28) | \
                   (data_spec_constants.DSG_SWITCH_FOCUS<<20) | (regUsage<<16)
         cmdWord = cmdWord     | (parameters<<8)
-        self.writeCommandToFiles([cmdWord], cmdString)
+        self.writeCommandToFiles([cmdWord], cmdString, executed=executed)
 
 
     """
@@ -1522,8 +1553,9 @@ class DataSpec:
         cmdString = "END_SPEC"
         self.writeCommandToFiles(cmdWordList, cmdString)
         
-        if self.write_binary_specs and self.data_spec_exec is None:
+        if self.file_handle_bin is not None:
             self.file_handle_bin.close()
+            self.file_handle_bin = None
         if self.write_text_specs:
             self.file_handle_txt.close()
 
@@ -1532,7 +1564,8 @@ class DataSpec:
     """
 
     def writeCommandToFiles(self, cmdWordList, cmdString, indent = False, \
-                            outdent = False, noInstructionNumber = False):
+                            outdent = False, noInstructionNumber = False, \
+                            executed = False):
         """
         Writes the binary command to the binary output file and, if the
         user has requested a text output for debug purposes, also write the
@@ -1540,12 +1573,15 @@ class DataSpec:
         Setting the optional parameter 'indent' to True causes subsequent
         commands to be indented by two spaces relative to this one.
         Similarly, setting 'outdent' to True, reverses this spacing.
+        Setting 'executed' to True indicates that the command has already
+        been applied directly to the memory of the Spec Executor.
         """
         if self.write_binary_specs:
             words = numpy.array(cmdWordList, dtype="uint32")
-            if self.data_spec_exec is None:
+            if self.file_handle_bin is not None:
                 words.tofile(self.file_handle_bin)
-            elif len(words) > 0:
+            if (self.data_spec_exec is not None and not executed and
+                    len(words) > 0):
                 self.data_spec_exec.call(words)
         
         if self.write_text_specs:
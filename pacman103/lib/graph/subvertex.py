@@ -26,6 +26,10 @@ class Subvertex( object ):
         self.out_subedges = list()
         self.placement = None
 
+        # Base routing key of the packets sent by the subvertex, if one has
+        # been allocated in place of the key made from its placement
+        self.key = None
+
         # Record self in parent
         self.vertex.subvertices.append(self)
 
@@ -101,6 +101,14 @@ class Vertex( object ):
         """
         return None
 
+    def get_written_regions(self):
+        """
+        Gets a list of the regions of the data of the subvertices which the
+        application writes to while it runs, besides those reserved unfilled
+        for its results
+        """
+        return list()
+
     def append_a_new_subvertex(self, subvert):
         """
         Appends a new subvertex to this vertex
@@ -53,14 +53,22 @@ class LoadTarget:
     :param int y: y-chip-coordinate.
     :param int p: processor ID.
     :param int a: target load address.
+    :param data:
+        the contents of the file, as a string or buffer, if they are already
+        in memory, or None to read them from the file.
+    :param list written_ranges:
+        the (start, end) addresses of the memory of the target which the
+        application writes to while it runs, such as its recordings.
     """
 
-    def __init__(self, fname, x, y, p, a):
+    def __init__(self, fname, x, y, p, a, data=None, written_ranges=None):
         self.filename = fname
         self.x = x
         self.y = y
         self.p = p
         self.address = a
+        self.data = data
+        self.written_ranges = written_ranges or list()
 
     def __str__(self):
         return "Load target: (%d, %d, %d), '%s' @ 0x%X" % \
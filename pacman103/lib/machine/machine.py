@@ -1,10 +1,10 @@
 import logging
-import numpy
 from pacman103.core.spinnman.scp.scp_message import SCPMessage
 from pacman103.core.spinnman.scp import scamp
 from pacman103.core import exceptions
 from pacman103.core.spinnman.scp.scp_error import SCPError
 from pacman103.lib.machine import processor, chip as board_chip, board
+from pacman103.lib.machine.machine_description import MachineDescription
 from pacman103.core.spinnman.interfaces.transceiver import Transceiver
 from pacman103 import conf
 
@@ -43,6 +43,8 @@ class Machine(object):
         self._chips = dict()
         self.x_dim = None
         self.y_dim = None
+        self.description = None
+        self.downed_chips = list()
         self.initialise_board(x, y, self.machine_type)
 
     def initialise_board(self, x, y, machine_type):
@@ -224,6 +226,7 @@ class Machine(object):
 
         # ok, we have an active, booted and numbered board,
         # let's explore the chips (mmmmmmm, chips)
+        self.description = self.get_description(hostname, xdims, ydims, conn)
 
         # TODO - in future we will have board IDs (see ST), so will require modifying for chip positions on boards
         #         in the meantime everything will be on notional
@@ -232,57 +235,60 @@ class Machine(object):
         self.boards.append(boardid)
 
         for xx in range(xdims):
-            # as a list has a single dimension this for each x, creates a
-            # list of ys to sit as a second dimension
             for yy in range(ydims):
-                conn.select(xx, yy, 0)
-                # check here for non-responsive/non-existent chips
-                try:
-                    ycoord = int(numpy.fromstring(
-                        conn.memory_calls.read_mem(0xf5007f00,
-                                                   scamp.TYPE_BYTE, 1),
-                        dtype=numpy.uint8))
-                    xcoord = int(numpy.fromstring(
-                        conn.memory_calls.read_mem(0xf5007f01,
-                                                   scamp.TYPE_BYTE, 1),
-                        dtype=numpy.uint8))
-                    if xcoord != xx or ycoord != yy:
-                        raise Exception("EXPLORE: Incorrect chip coordinates, "
-                                        "whacky wiring or provided dimensions?")
-
-                    # first let's create the chip objects within the machine
-                    # (no live cores yet) and add to the machine and board
-                    chipid = board_chip.Chip(self, xx, yy, boardid, 0)
-                    self._chips[chipid.toString()] = chipid
-                    boardid.chips.append(chipid)
-
-                    # then check the virtual core to physical core registers
-                    # for mappings and up/down any wear-out/failures after mfg
-                    #  mapped out by ST in SC&MP/SARK, but reflected here.
-                    #thresholding to limit max id
-                    if conf.config.has_option("Machine", "core_limit"):
-                        core_limit = conf.config.getint("Machine", "core_limit")
-                    else:
-                        core_limit = 16
-
-                    for i in range(1, core_limit + 1):
-                        phycpu = int(numpy.fromstring(
-                            conn.memory_calls.read_mem(0xf5007fa8 + i,
-                                                       scamp.TYPE_BYTE, 1),
-                            dtype=numpy.int8))
-                        if phycpu != -1:
-                            newProc = processor.Processor(chipid, i, phycpu)
-                            chipid.add_processor(newProc, i)
-                            chipid.appcores += 1
-                            #print "i: ",i, "with cumulative ",chipid.appcores
-                            # add the checked list of application
-                            # processors to the machine's pool of cores
-
-                except SCPError:
-                    #print "(%d,%d): Chip down / Not in Grid" % (int(xx),int(yy))
-                    pass
-                    # catch this as don't want an exception here as
-                    #  topology might not be exactly x*y with functional chips
+                # chips which did not respond are down or not in the grid
+                chip_description = self.description.chips.get((xx, yy))
+                if chip_description is None:
+                    continue
+
+                # first let's create the chip objects within the machine
+                # (no live cores yet) and add to the machine and board
+                chipid = board_chip.Chip(self, xx, yy, boardid, 0)
+                self._chips[chipid.toString()] = chipid
+                boardid.chips.append(chipid)
+
+                # then add the cores which the virtual core to physical core
+                # registers map, as up/down any wear-out/failures after mfg
+                #  mapped out by ST in SC&MP/SARK, but reflected here.
+                for i in sorted(chip_description.cores.keys()):
+                    newProc = processor.Processor(chipid, i,
+                                                  chip_description.cores[i])
+                    chipid.add_processor(newProc, i)
+                    chipid.appcores += 1
+
+    def get_description(self, hostname, xdims, ydims, conn):
+        """
+        Returns the description of the chips, cores and links of the board,
+        from the cache of the board if it is of the same dimensions and
+        passes the spot checks, or else by exploring the board and caching
+        what is found
+        """
+        #thresholding to limit max id
+        if conf.config.has_option("Machine", "core_limit"):
+            core_limit = conf.config.getint("Machine", "core_limit")
+        else:
+            core_limit = 16
+
+        use_cache = conf.config.getboolean("Machine",
+                                           "machine_description_cache")
+        if use_cache:
+            path = MachineDescription.get_path(hostname)
+            description = MachineDescription.read(path)
+            if (description is not None and
+                    description.x_dim == xdims and
+                    description.y_dim == ydims and
+                    description.core_limit == core_limit and
+                    description.spot_check(conn, conf.config.getint(
+                        "Machine", "machine_description_spot_checks"))):
+                logger.info("Using the cached description of {}".format(
+                    hostname))
+                return description
+
+        description = MachineDescription.discover(conn, xdims, ydims,
+                                                  core_limit)
+        if use_cache:
+            description.write(path)
+        return description
 
 
     '''
@@ -358,20 +364,12 @@ class Machine(object):
             for yy in range(self.y_dim):
                 if self.chip_exists_at(xx, yy):
                     chipid = self.get_chip(xx, yy)
-                    # Read the link status registers.
-                    conn.select(xx, yy, 0)
-                    linkraw = int(numpy.fromstring(
-                        conn.memory_calls.read_mem(0xf5007f0c,
-                                                   scamp.TYPE_BYTE, 1),
-                        dtype=numpy.uint8))
+                    # the chip at the other end of each link which is up, as
+                    # read over the link when the board was explored
+                    links = self.description.chips[(xx, yy)].links
                     for i in range(6):
-                        if (linkraw >> i) & 0x1:
-                            attachedcoord = \
-                                int(numpy.fromstring(
-                                    Machine.read_link_word(0xf5007f00, i, conn),
-                                    dtype=numpy.uint32) & 0x0000FFFF)
-                            attached_x = attachedcoord / 256
-                            attached_y = attachedcoord % 256
+                        if links[i] is not None:
+                            attached_x, attached_y = links[i]
                             if ((attached_x < self.x_dim) and
                                     (attached_y < self.y_dim) and
                                     self.chip_exists_at(attached_x, attached_y)):
@@ -379,7 +377,7 @@ class Machine(object):
                                 # coordinates, exclude whackiness
                                 chipid.router.neighbourlist.append({'x': attached_x,
                                                                     'y': attached_y,
-                                                                    '16bit': attachedcoord,
+                                                                    '16bit': (attached_x * 256) + attached_y,
                                                                     'object': None})
                                 chipid.router.linksuplist.append(i)
                             else:
@@ -541,8 +539,25 @@ class Machine(object):
         '''
         downed_chips = str(conf.config.get("Machine", "down_chips"))
         logger.debug("Down chips = {}".format(downed_chips))
+        self.downed_chips = list()
         if downed_chips != "None":
             downed_chips_split = downed_chips.split(":")
             for downed_chip in downed_chips_split:
                 coords = downed_chip.split(",")
                 del self._chips["{}:{}".format(coords[0], coords[1])]
+                self.downed_chips.append((int(coords[0]), int(coords[1])))
+
+    def get_physical_chips(self):
+        '''
+        returns a set of the (x, y) of the chips which are on the board,
+        whether they are used or not: those which answered when the board
+        was explored, or else the chips of the machine and those removed as
+        downed
+        '''
+        if self.description is not None:
+            return set(self.description.chips.keys())
+        chips = set(self.downed_chips)
+        for chip in self._chips.values():
+            if not chip.is_virtual():
+                chips.add((chip.x, chip.y))
+        return chips
@@ -0,0 +1,258 @@
+'''
+A description of the chips, working cores and links of a board, as found by
+exploring it, which is cached so that the board need not be explored again
+before each run
+'''
+
+import cPickle as pickle
+import logging
+import os
+import random
+
+import numpy
+
+from pacman103 import conf
+from pacman103.lib import lib_map
+from pacman103.core import exceptions
+from pacman103.core.spinnman.scp import scamp
+from pacman103.core.spinnman.scp.scp_message import SCPMessage
+logger = logging.getLogger(__name__)
+
+#the block of the system RAM of each chip holding its coordinates, link
+# status and virtual to physical core map, read in one request
+CHIP_STATUS_ADDRESS = 0xf5007f00
+CHIP_STATUS_SIZE = 0xbc
+
+#the offsets of the fields in the block
+Y_OFFSET = 0x00
+X_OFFSET = 0x01
+LINKS_OFFSET = 0x0c
+CORE_MAP_OFFSET = 0xa8
+
+#the number of bytes of the block read from each neighbour over a link
+LINK_WORD_SIZE = 4
+
+
+class ChipDescription(object):
+    """
+    The working cores and links of a chip.
+
+    :param int x: the x-coordinate of the chip.
+    :param int y: the y-coordinate of the chip.
+    :param dict cores: the physical core of each working virtual core.
+    :param int link_status: the byte of the chip of which links are up.
+    """
+
+    def __init__(self, x, y, cores, link_status):
+        self.x = x
+        self.y = y
+        self.cores = cores
+        self.link_status = link_status
+        #the (x, y) of the chip at the other end of each link, or None if
+        # the link is down or the chip did not answer over it
+        self.links = [None] * 6
+
+    @staticmethod
+    def from_status(x, y, status, core_limit):
+        """
+        Returns the description of chip (x, y) from its status block, without
+        its links
+        """
+        status = numpy.fromstring(status, dtype=numpy.uint8)
+        if status[X_OFFSET] != x or status[Y_OFFSET] != y:
+            raise exceptions.ExploreException(
+                "EXPLORE: Incorrect chip coordinates, whacky wiring or "
+                "provided dimensions?")
+        core_map = status[CORE_MAP_OFFSET:CORE_MAP_OFFSET + core_limit + 1]
+        cores = dict()
+        for i in range(1, core_limit + 1):
+            phycpu = int(core_map[i:i + 1].view(numpy.int8)[0])
+            if phycpu != -1:
+                cores[i] = phycpu
+        return ChipDescription(x, y, cores, int(status[LINKS_OFFSET]))
+
+    def same_status(self, other):
+        return (self.x == other.x and self.y == other.y and
+                self.cores == other.cores and
+                self.link_status == other.link_status)
+
+
+class MachineDescription(object):
+    """
+    The chips of a board which answer, with their working cores and the
+    chips at the other end of their links.
+
+    The status block of every chip, and the word at the other end of every
+    link which is up, are each read in one request, and the requests to all
+    the chips are kept in flight together, so that a board is explored in a
+    few round trips rather than a round trip for every byte of every chip.
+
+    :param int x_dim: the x-dimension of the board.
+    :param int y_dim: the y-dimension of the board.
+    :param int core_limit: the highest virtual core described.
+    """
+
+    #the version of the format of the description, which invalidates all the
+    # descriptions when changed
+    VERSION = 1
+    SUFFIX = ".machine"
+
+    def __init__(self, x_dim, y_dim, core_limit):
+        self.x_dim = x_dim
+        self.y_dim = y_dim
+        self.core_limit = core_limit
+        #(x, y) -> ChipDescription
+        self.chips = dict()
+
+    @staticmethod
+    def get_path(hostname):
+        """
+        Returns the path of the description of the board, in the directory
+        set in the [Machine] section of the config
+        """
+        directory = conf.config.get("Machine", "machine_description_directory")
+        if directory == "None":
+            components = os.path.abspath(lib_map.__file__).split(os.sep)
+            directory = os.path.join(
+                os.sep, *(components[1:components.index("pacman103")] +
+                          ["machine_descriptions"]))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        return os.path.join(directory, hostname + MachineDescription.SUFFIX)
+
+    @staticmethod
+    def read(path):
+        """
+        Returns the description stored at the path, or None if there is none
+        or it cannot be read
+        """
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as description_file:
+                stored = pickle.load(description_file)
+            if stored["version"] != MachineDescription.VERSION:
+                raise ValueError("description of version {}".format(
+                    stored["version"]))
+            description = MachineDescription(
+                stored["x_dim"], stored["y_dim"], stored["core_limit"])
+            for (x, y, cores, link_status, links) in stored["chips"]:
+                chip = ChipDescription(x, y, cores, link_status)
+                chip.links = links
+                description.chips[(x, y)] = chip
+            return description
+        except Exception as e:
+            logger.warning("Could not read the machine description {}, "
+                           "exploring the machine: {}".format(path, e))
+            return None
+
+    def write(self, path):
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as description_file:
+            pickle.dump({"version": self.VERSION,
+                         "x_dim": self.x_dim,
+                         "y_dim": self.y_dim,
+                         "core_limit": self.core_limit,
+                         "chips": [(chip.x, chip.y, chip.cores,
+                                    chip.link_status, chip.links)
+                                   for chip in self.chips.values()]},
+                        description_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.rename(temporary_path, path)
+
+    @staticmethod
+    def read_status_blocks(conn, coordinates, core_limit):
+        """
+        Returns the description of each of the chips at the coordinates
+        which answers, without their links, keyed by their coordinates
+
+        :raises: ExploreException if a chip answers with other coordinates
+        """
+        coordinates = list(coordinates)
+        statuses = dict()
+
+        def store(index, resp):
+            statuses[coordinates[index]] = resp.data
+
+        def requests():
+            for (x, y) in coordinates:
+                yield SCPMessage(cmd_rc=scamp.CMD_READ, dst_x=x, dst_y=y,
+                                 dst_cpu=0, arg1=CHIP_STATUS_ADDRESS,
+                                 arg2=CHIP_STATUS_SIZE, arg3=scamp.TYPE_WORD)
+
+        # a chip which is down or not in the grid does not answer, as the
+        # topology might not be exactly x*y with functional chips
+        conn.conn.send_scp_msgs(requests(), window=conn.memory_calls.window,
+                                callback=store, addressed=True,
+                                error_callback=lambda index, resp: None)
+        chips = dict()
+        for ((x, y), status) in statuses.items():
+            if len(status) == CHIP_STATUS_SIZE:
+                chips[(x, y)] = ChipDescription.from_status(x, y, status,
+                                                            core_limit)
+        return chips
+
+    def read_links(self, conn):
+        """
+        Reads the coordinates of the chip at the other end of each link of
+        each chip which is up
+        """
+        links = [(chip, i) for chip in self.chips.values()
+                 for i in range(6) if (chip.link_status >> i) & 0x1]
+
+        def store(index, resp):
+            if len(resp.data) == LINK_WORD_SIZE:
+                (chip, i) = links[index]
+                coord = int(numpy.fromstring(resp.data, dtype=numpy.uint32)
+                            & 0x0000FFFF)
+                chip.links[i] = (coord / 256, coord % 256)
+
+        def requests():
+            for (chip, i) in links:
+                yield SCPMessage(cmd_rc=scamp.CMD_LINK_READ, dst_x=chip.x,
+                                 dst_y=chip.y, dst_cpu=0,
+                                 arg1=CHIP_STATUS_ADDRESS,
+                                 arg2=LINK_WORD_SIZE, arg3=i)
+
+        # a link which does not answer is treated as down
+        conn.conn.send_scp_msgs(requests(), window=conn.memory_calls.window,
+                                callback=store, addressed=True,
+                                error_callback=lambda index, resp: None)
+
+    @staticmethod
+    def discover(conn, x_dim, y_dim, core_limit):
+        """
+        Explores the chips of the board of the transceiver, of the given
+        dimensions, and returns its description
+        """
+        description = MachineDescription(x_dim, y_dim, core_limit)
+        description.chips = MachineDescription.read_status_blocks(
+            conn, [(x, y) for x in range(x_dim) for y in range(y_dim)],
+            core_limit)
+        description.read_links(conn)
+        return description
+
+    def spot_check(self, conn, n_checks, generator=None):
+        """
+        Returns whether the status blocks of up to n_checks chips, chosen at
+        random by generator, or by a new random.Random if it is None, still
+        match the description
+        """
+        if len(self.chips) == 0:
+            return False
+        if generator is None:
+            generator = random.Random()
+        sample = generator.sample(sorted(self.chips.keys()),
+                                  min(n_checks, len(self.chips)))
+        try:
+            found = MachineDescription.read_status_blocks(conn, sample,
+                                                          self.core_limit)
+        except exceptions.ExploreException:
+            return False
+        for coordinates in sample:
+            if (coordinates not in found or
+                    not found[coordinates].same_status(
+                        self.chips[coordinates])):
+                logger.info("Chip {} no longer matches the machine "
+                            "description".format(coordinates))
+                return False
+        return True
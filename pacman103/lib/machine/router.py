@@ -28,6 +28,8 @@ class Router:
         self.linksdownlist = []
         self.neighbourlist = []
         self.masks_used = dict()
+        # The entries to be written in place of the CAM once minimised
+        self.minimised_table = None
 
 
     def get_working_links(self):
@@ -45,6 +47,20 @@ class Router:
         return self.neighbourlist
 
 
+    def get_table_entries(self):
+        """
+        Returns the list of the
+        :py:object:`pacman103.lib.lib_map.RoutingEntry` objects to be written
+        to the routing table of the router, in order: the minimised table if
+        there is one, or else the first entry of each key in the CAM which
+        cannot be left to default routing
+        """
+        if self.minimised_table is not None:
+            return self.minimised_table
+        return [entries[0] for entries in self.cam.values()
+                if not entries[0].defaultable]
+
+
     def ralloc(self, key, mask):
         """
         Allocates a :py:object:`pacman103.lib.lib_map.RoutingEntry` in the
@@ -0,0 +1,11 @@
+"""
+Helpers shared by the benchmarks of the pacman103 tests.
+"""
+
+import os
+import unittest
+
+#: Class decorator which skips a benchmark unless the PACMAN_BENCHMARKS
+#: environment variable is set, keeping the timing runs out of the unit tests.
+benchmark = unittest.skipUnless(os.environ.get("PACMAN_BENCHMARKS"),
+                                "set PACMAN_BENCHMARKS to run the benchmarks")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.mapper.placement_refinement_algorithms
+.annealing_refiner, refining the placements of a network in the shape of
+the cerebellum example after partitioning and placing it.
+"""
+
+import logging
+import unittest
+
+import numpy
+
+from pacman103.front import pynn
+from pacman103.core.mapper.partitioner_algorithms.\
+    partition_and_place_partitioner import PartitionAndPlacePartitioner
+from pacman103.core.mapper.placement_refinement_algorithms.annealing_refiner\
+    import AnnealingRefiner
+from pacman103.core.mapper.placer_algorithms.basic_placer import \
+    SDRAM_AVAILABLE
+from pacman103.lib import lib_map
+from pacman103.lib.machine import machine as lib_machine
+
+logger = logging.getLogger(__name__)
+
+
+def create_network():
+    """
+    Partitions and places a network of granule, Golgi and Purkinje cells
+    with mossy fibre inputs, the granule cells being placed between the
+    mossy fibres and the Purkinje cells, and returns its datastore
+    """
+    pynn.setup(timestep=1.0, max_delay=16.0, machine="test")
+    pynn.set_number_of_neurons_per_core("IF_curr_exp", 50)
+    mossy = pynn.Population(300, pynn.SpikeSourcePoisson, {'rate': 10.0},
+                            label="mossy")
+    granule = pynn.Population(2000, pynn.IF_curr_exp, {}, label="granule")
+    golgi = pynn.Population(100, pynn.IF_curr_exp, {}, label="golgi")
+    purkinje = pynn.Population(100, pynn.IF_curr_exp, {}, label="purkinje")
+    for (pre, post, probability, target) in (
+            (mossy, granule, 0.02, "excitatory"),
+            (mossy, golgi, 0.1, "excitatory"),
+            (granule, purkinje, 0.2, "excitatory"),
+            (golgi, granule, 0.02, "inhibitory")):
+        pynn.Projection(pre, post, pynn.FixedProbabilityConnector(
+            probability, weights=0.1, delays=1.0, seed=1), target=target)
+    dao = pynn.controller.dao
+    dao.machine = lib_machine.Machine("test", 8, 8, "unwrapped")
+    dao.run_time = 100
+    PartitionAndPlacePartitioner(dao).partition()
+
+    # The maximum is kept by the model, so it is reset for other networks
+    pynn.set_number_of_neurons_per_core("IF_curr_exp", None)
+    return dao
+
+
+def get_placements(dao):
+    return [(placement.subvertex.vertex.label, placement.subvertex.lo_atom,
+             placement.processor.get_coordinates())
+            for placement in dao.placements]
+
+
+class AnnealingRefinerTestCase(unittest.TestCase):
+
+    def test_n_synapses(self):
+        dao = create_network()
+        for subedge in dao.subedges[::7]:
+            self.assertEqual(subedge.get_n_synapses(), numpy.sum(
+                subedge.get_synapse_sublist().get_row_lengths()))
+
+    def test_refine(self):
+        dao = create_network()
+        before = get_placements(dao)
+        statistics = AnnealingRefiner(dao, seed=3, time_budget=600,
+                                      n_moves=20000).refine()
+        after = get_placements(dao)
+        self.assertFalse(statistics.time_limited)
+        self.assertEqual(statistics.n_moves, 20000)
+        self.assertTrue(statistics.after.weighted_hops <
+                        statistics.before.weighted_hops)
+        self.assertNotEqual(before, after)
+        logger.info("Refined weighted hops {} to {}, total hops {} to {}, "
+                    "peak link load {} to {}, max router entries {} to {}"
+                    .format(statistics.before.weighted_hops,
+                            statistics.after.weighted_hops,
+                            statistics.before.total_hops,
+                            statistics.after.total_hops,
+                            statistics.before.peak_link_load,
+                            statistics.after.peak_link_load,
+                            statistics.before.max_router_entries,
+                            statistics.after.max_router_entries))
+
+        # The statistics are those of the placements made
+        refiner = AnnealingRefiner(dao, n_moves=0)
+        self.assertEqual(vars(refiner.refine().before),
+                         vars(statistics.after))
+
+        # Each core is used once, each chip has enough SDRAM, and the
+        # placements refer to their subvertices
+        cores = [coordinates for (_, _, coordinates) in after]
+        self.assertEqual(len(set(cores)), len(cores))
+        sdram = dict()
+        for placement in dao.placements:
+            self.assertTrue(placement.subvertex.placement is placement)
+            x, y, _ = placement.processor.get_coordinates()
+            sdram[(x, y)] = (sdram.get((x, y), 0) +
+                             placement.subvertex.get_resources().sdram)
+        self.assertTrue(max(sdram.values()) <= SDRAM_AVAILABLE)
+
+    def test_deterministic(self):
+        placements = list()
+        for seed in (5, 5, 6):
+            dao = create_network()
+            AnnealingRefiner(dao, seed=seed, time_budget=600,
+                             n_moves=5000).refine()
+            placements.append(get_placements(dao))
+        self.assertEqual(placements[0], placements[1])
+        self.assertNotEqual(placements[0], placements[2])
+
+    def test_time_budget(self):
+        dao = create_network()
+        before = get_placements(dao)
+        statistics = AnnealingRefiner(dao, seed=1, time_budget=0,
+                                      n_moves=20000).refine()
+        self.assertTrue(statistics.time_limited)
+        self.assertEqual(get_placements(dao), before)
+
+    def test_constrained_subvertices(self):
+        dao = create_network()
+        vertex = dao.subvertices[0].vertex
+        vertex.constraints = lib_map.VertexConstraints(0, 0)
+        fixed = [(placement.subvertex, placement.processor)
+                 for placement in dao.placements
+                 if placement.subvertex.vertex is vertex]
+        AnnealingRefiner(dao, seed=2, time_budget=600, n_moves=5000).refine()
+        for (subvertex, processor) in fixed:
+            self.assertTrue(subvertex.placement.processor is processor)
+
+
+if __name__ == "__main__":
+    unittest.main()
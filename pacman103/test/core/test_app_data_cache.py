@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.app_data_cache, generating the appData of a network
+like that of the bundled Brunel example without a board, and timing its
+generation from scratch against its reuse from the cache.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103.front import pynn
+from pacman103 import conf
+from pacman103.core import app_data_cache, output_generator, reports
+from pacman103.core.app_data_cache import AppDataCache
+from pacman103.core.mapper.routing_algorithms.dijkstra_routing import \
+    DijkstraRouting
+from pacman103.lib.machine import machine as lib_machine
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def create_network(n_neurons, inhibitory_params=None, run_time=100):
+    """
+    Creates and maps a network of excitatory and inhibitory populations
+    driven by Poisson sources without a seed, and returns its controller
+    """
+    # setup() cannot be called with a min_delay more than once
+    pynn.setup(timestep=1.0, max_delay=16.0, machine="test")
+    n_excitatory = int(round(n_neurons * 0.8))
+    n_inhibitory = int(round(n_neurons * 0.2))
+    excitatory = pynn.Population(n_excitatory, pynn.IF_curr_exp, {},
+                                 label="E_pop")
+    inhibitory = pynn.Population(n_inhibitory, pynn.IF_curr_exp,
+                                 inhibitory_params or {}, label="I_pop")
+    sources = pynn.Population(n_excitatory, pynn.SpikeSourcePoisson,
+                              {'rate': 10.0}, label="Poisson_pop")
+    connector = pynn.FixedProbabilityConnector(0.1, weights=0.1, delays=1.0,
+                                               seed=1)
+    pynn.Projection(excitatory, excitatory, connector, target="excitatory")
+    pynn.Projection(inhibitory, excitatory, connector, target="inhibitory")
+    pynn.Projection(excitatory, inhibitory, connector, target="excitatory")
+    pynn.Projection(sources, excitatory,
+                    pynn.OneToOneConnector(weights=0.1, delays=1.0),
+                    target="excitatory")
+    controller = pynn.controller
+    dao = controller.dao
+    dao.machine = lib_machine.Machine("test", type="spinn4")
+    dao.run_time = run_time
+    dao.writeTextSpecs = False
+    controller.execute_partitioning()
+    if not dao.done_placer:
+        controller.execute_placer()
+    controller.execute_key_alloc()
+    controller.filterSubEdges(dao)
+    DijkstraRouting.route_raw(dao.machine, dao.subvertices)
+    dao.done_router = True
+    return controller
+
+
+def create_delayed_network(seed=1):
+    """
+    Creates and maps a network of two populations connected with delays
+    longer than the neurons support, through a delay extension, and returns
+    its controller
+    """
+    pynn.setup(timestep=1.0, max_delay=32.0, machine="test")
+    pre = pynn.Population(100, pynn.IF_curr_exp, {}, label="pre")
+    post = pynn.Population(100, pynn.IF_curr_exp, {}, label="post")
+    pynn.Projection(pre, post, pynn.FixedProbabilityConnector(
+        0.1, weights=0.1, delays=20.0, seed=seed), target="excitatory")
+    controller = pynn.controller
+    dao = controller.dao
+    dao.machine = lib_machine.Machine("test", type="spinn4")
+    dao.run_time = 100
+    dao.writeTextSpecs = False
+    controller.execute_partitioning()
+    if not dao.done_placer:
+        controller.execute_placer()
+    controller.execute_key_alloc()
+    controller.filterSubEdges(dao)
+    DijkstraRouting.route_raw(dao.machine, dao.subvertices)
+    dao.done_router = True
+    return controller
+
+
+def generate_output(controller, directory):
+    """
+    Generates the appData of the network of the controller in the directory,
+    and returns the statistics of the cache
+    """
+    dao = controller.dao
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    dao.get_binaries_directory = lambda: directory
+    dao.get_reports_directory = lambda subdirectory=None: directory
+    return output_generator.generate_output_raw(dao)
+
+
+def describe_output(dao):
+    """
+    Returns the targets, images and memory maps made for the cores, in terms
+    which do not depend on the directory they were made in
+    """
+    images = dict()
+    for target in dao.load_targets:
+        if "_appData_" in target.filename:
+            with open(target.filename, "rb") as image_file:
+                images[os.path.basename(target.filename)] = image_file.read()
+    memory_maps = dict()
+    for (index, memory_map) in dao.memMaps.items():
+        memory_maps[index] = [
+            [i, wr_ptr_aligned, wr_ptr_offset, size, list(memory), unfilled]
+            for (i, wr_ptr_aligned, wr_ptr_offset, size, memory, unfilled)
+            in memory_map]
+    return {
+        'executable_targets': [(target.filename, target.targets)
+                               for target in dao.executable_targets],
+        'load_targets': [(os.path.basename(target.filename), target.x,
+                          target.y, target.p, target.address)
+                         for target in dao.load_targets],
+        'mem_write_targets': [(target.x, target.y, target.p, target.address,
+                               target.data)
+                              for target in dao.mem_write_targets],
+        'images': images,
+        'memory_maps': memory_maps}
+
+
+def results_by_label(statistics):
+    results = dict()
+    for (x, y, p, label, lo_atom, hi_atom, result) in statistics.cores:
+        results.setdefault(label, set()).add(result)
+    return results
+
+
+class AppDataCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.old_options = dict(conf.config.items("App_data_cache"))
+        conf.config.set("App_data_cache", "enable", "True")
+        conf.config.set("App_data_cache", "directory",
+                        os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        for (option, value) in self.old_options.items():
+            conf.config.set("App_data_cache", option, value)
+        shutil.rmtree(self.directory)
+
+    def test_reuse(self):
+        controller = create_network(300)
+        numpy.random.seed(1)
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "cold"))
+        self.assertEqual(results_by_label(statistics),
+                         {"E_pop": set([app_data_cache.MISS]),
+                          "I_pop": set([app_data_cache.MISS]),
+                          "Poisson_pop": set([app_data_cache.UNCACHED])})
+        expected = describe_output(controller.dao)
+
+        # The images of the populations are reused, and those of the Poisson
+        # sources, whose seeds are drawn at random, are generated again
+        controller = create_network(300)
+        numpy.random.seed(1)
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "warm"))
+        self.assertEqual(results_by_label(statistics),
+                         {"E_pop": set([app_data_cache.HIT]),
+                          "I_pop": set([app_data_cache.HIT]),
+                          "Poisson_pop": set([app_data_cache.UNCACHED])})
+        self.assertEqual(statistics.n_hits + statistics.n_uncached,
+                         len(controller.dao.placements))
+        self.assertEqual(describe_output(controller.dao), expected)
+
+        reports.generate_app_data_cache_report(controller.dao, statistics)
+        with open(os.path.join(self.directory, "warm",
+                               "app_data_cache.rpt")) as report_file:
+            self.assertIn("Hits:          {}\n".format(statistics.n_hits),
+                          report_file.read())
+
+    def test_changed_inputs(self):
+        generate_output(create_network(300),
+                        os.path.join(self.directory, "cold"))
+
+        # Only the cores of the population whose parameters changed are
+        # generated again
+        controller = create_network(300, inhibitory_params={'tau_m': 10.0})
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "changed"))
+        self.assertEqual(results_by_label(statistics)["E_pop"],
+                         set([app_data_cache.HIT]))
+        self.assertEqual(results_by_label(statistics)["I_pop"],
+                         set([app_data_cache.MISS]))
+
+        # A change to the run time changes the size of the recording
+        # regions, and so all the images
+        controller = create_network(300, run_time=200)
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "longer"))
+        self.assertEqual(statistics.n_hits, 0)
+
+    def test_invalid_entry(self):
+        controller = create_network(100)
+        generate_output(controller, os.path.join(self.directory, "cold"))
+        cache = AppDataCache.from_config()
+        for path in os.listdir(cache.directory):
+            if path.endswith(AppDataCache.IMAGE_SUFFIX):
+                with open(os.path.join(cache.directory, path), "ab") as f:
+                    f.write("\0\0\0\0")
+        controller = create_network(100)
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "warm"))
+        self.assertEqual(statistics.n_hits, 0)
+        self.assertTrue(statistics.n_misses > 0)
+
+    def test_evict_least_recently_used(self):
+        conf.config.set("App_data_cache", "max_entries", "1")
+        controller = create_network(100)
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "cold"))
+        self.assertTrue(statistics.n_misses > 1)
+        cache = AppDataCache.from_config()
+        self.assertEqual(len([path for path in os.listdir(cache.directory)
+                              if path.endswith(AppDataCache.ENTRY_SUFFIX)]),
+                         1)
+
+
+    def test_delayed_projection(self):
+        controller = create_delayed_network()
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "cold"))
+        self.assertEqual(results_by_label(statistics),
+                         {"pre": set([app_data_cache.MISS]),
+                          "post": set([app_data_cache.MISS]),
+                          "pre_delayed": set([app_data_cache.MISS])})
+        expected = describe_output(controller.dao)
+
+        controller = create_delayed_network()
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "warm"))
+        self.assertEqual(statistics.n_hits, 3)
+        self.assertEqual(describe_output(controller.dao), expected)
+
+    def test_changed_delayed_synapses(self):
+        generate_output(create_delayed_network(seed=1),
+                        os.path.join(self.directory, "cold"))
+
+        # The delay extension writes the delays of the synapses out of it, so
+        # its image is generated again when they change
+        controller = create_delayed_network(seed=2)
+        statistics = generate_output(controller,
+                                     os.path.join(self.directory, "changed"))
+        self.assertEqual(results_by_label(statistics)["pre_delayed"],
+                         set([app_data_cache.MISS]))
+        self.assertEqual(results_by_label(statistics)["post"],
+                         set([app_data_cache.MISS]))
+        images = describe_output(controller.dao)['images']
+
+        conf.config.set("App_data_cache", "enable", "False")
+        controller = create_delayed_network(seed=2)
+        generate_output(controller, os.path.join(self.directory, "uncached"))
+        self.assertEqual(describe_output(controller.dao)['images'], images)
+
+
+@benchmark
+class AppDataCacheBenchmark(unittest.TestCase):
+    """
+    Times generating the appData of the Brunel network from scratch against
+    reusing it from the cache.
+    """
+
+    def test_warm_generation(self):
+        directory = tempfile.mkdtemp()
+        old_options = dict(conf.config.items("App_data_cache"))
+        conf.config.set("App_data_cache", "enable", "True")
+        conf.config.set("App_data_cache", "directory",
+                        os.path.join(directory, "cache"))
+        try:
+            controller = create_network(2000)
+            start = time.time()
+            generate_output(controller, os.path.join(directory, "cold"))
+            cold_time = time.time() - start
+
+            controller = create_network(2000)
+            start = time.time()
+            statistics = generate_output(controller,
+                                         os.path.join(directory, "warm"))
+            warm_time = time.time() - start
+            logger.info("Generated the appData of {} cores in {:.2f}s cold "
+                        "and {:.2f}s warm, {} reused".format(
+                            len(statistics.cores), cold_time, warm_time,
+                            statistics.n_hits))
+            self.assertTrue(warm_time < cold_time)
+        finally:
+            for (option, value) in old_options.items():
+                conf.config.set("App_data_cache", option, value)
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""
+Tests for the free chip index of
+pacman103.core.mapper.placer_algorithms.basic_placer and radial_placer,
+against scanning every chip as they did before, and a benchmark of the time
+taken to fill machines of increasing size.
+"""
+
+import logging
+import time
+import unittest
+
+import numpy
+
+from pacman103.core.mapper.placer_algorithms.basic_placer import \
+    BasicPlacer, PlacementChip, SDRAM_AVAILABLE, CPU_AVAILABLE, DTCM_AVAILABLE
+from pacman103.core.mapper.placer_algorithms.radial_placer import \
+    RadialPlacer
+from pacman103.lib import lib_map
+from pacman103.lib.machine import machine as lib_machine
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+class MachineDao(object):
+    """
+    The part of the datastore used by the placers
+    """
+
+    def __init__(self, machine):
+        self.machine = machine
+
+    def get_machine(self):
+        return self.machine
+
+
+class LinearRadialPlacer(RadialPlacer):
+    """
+    The radial placer as it was, ordering the chips with lists and scanning
+    every chip for each query
+    """
+
+    def get_chips(self):
+        processors_new_order = list()
+        chips_to_check = list()
+        for coord in self.dao.get_machine().get_coords_of_all_chips():
+            chip = self.dao.machine.get_chip(coord['x'], coord['y'])
+            if not chip.is_virtual():
+                chips_to_check.append(chip)
+        current_chip_list_to_check = [self.dao.machine.get_chip(0, 0)]
+        while len(chips_to_check) != 0:
+            next_chip_list_to_check = list()
+            for chip in current_chip_list_to_check:
+                if chips_to_check.count(chip) != 0:
+                    processors_new_order.append(PlacementChip(
+                        chip.boardid, chip.x, chip.y, chip.get_processors(),
+                        SDRAM_AVAILABLE, CPU_AVAILABLE, DTCM_AVAILABLE))
+                    chips_to_check.remove(chip)
+                    for data in chip.router.get_neighbours():
+                        if data is not None:
+                            neighbour = self.dao.machine.get_chip(data['x'],
+                                                                  data['y'])
+                            if (chips_to_check.count(neighbour) == 1 and
+                                    next_chip_list_to_check.count(
+                                        neighbour) == 0):
+                                next_chip_list_to_check.append(neighbour)
+            current_chip_list_to_check = next_chip_list_to_check
+        return processors_new_order
+
+    def get_maximum_resources(self, constraints):
+        return self.find_maximum_resources(self.chips, constraints)
+
+    def place_subvertex(self, resources, constraints):
+        placement_chip = self.find_placement_chip(self.chips, resources,
+                                                  constraints)
+        if placement_chip is None:
+            raise Exception("Failed to place subvertex")
+        core = placement_chip.assign_core(resources.sdram, constraints.p)
+        return (placement_chip.x, placement_chip.y, core)
+
+
+class LinearBasicPlacer(BasicPlacer):
+
+    get_maximum_resources = LinearRadialPlacer.__dict__[
+        "get_maximum_resources"]
+    place_subvertex = LinearRadialPlacer.__dict__["place_subvertex"]
+
+
+def call(method, *args):
+    """
+    Returns the result of calling the method, or the message of the
+    exception it raised
+    """
+    try:
+        return method(*args)
+    except Exception as e:
+        return str(e)
+
+
+def describe_resources(resources):
+    if isinstance(resources, lib_map.Resources):
+        return (resources.clock_ticks, resources.dtcm, resources.sdram)
+    return resources
+
+
+def fill(placer, seed=0):
+    """
+    Places subvertices of random sizes until the placer runs out of
+    resources, as the partitioner does, and returns the placements
+    """
+    random = numpy.random.RandomState(seed)
+    constraints = lib_map.VertexConstraints()
+    placements = list()
+    while True:
+        try:
+            maximum = placer.get_maximum_resources(constraints)
+        except Exception:
+            return placements
+        sdram = min(int(random.randint(1, 24)) * 1024 * 1024, maximum.sdram)
+        resources = lib_map.Resources(1000, 1000, sdram)
+        placements.append(placer.place_subvertex(resources, constraints))
+
+
+class BasicPlacerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dao = MachineDao(lib_machine.Machine("test", 8, 8, "unwrapped"))
+
+    def assertSameOperations(self, placer, linear_placer, seed):
+        random = numpy.random.RandomState(seed)
+        placed = list()
+        for _ in range(3000):
+            operation = random.randint(0, 10)
+            x, y, p = None, None, None
+            if operation == 0 and len(placed) > 0:
+                (x, y, p, resources) = placed.pop(random.randint(len(placed)))
+                for each_placer in (placer, linear_placer):
+                    each_placer.unplace_subvertex(x, y, p, resources)
+                continue
+            if operation == 1:
+                x, y = random.randint(0, 8), random.randint(0, 9)
+            elif operation == 2:
+                x = random.randint(0, 8)
+            elif operation == 3:
+                p = random.randint(1, 17)
+            constraints = lib_map.VertexConstraints(x, y, p)
+            maximum = call(placer.get_maximum_resources, constraints)
+            self.assertEqual(describe_resources(maximum), describe_resources(
+                call(linear_placer.get_maximum_resources, constraints)))
+            resources = lib_map.Resources(
+                int(random.randint(0, 2)) * CPU_AVAILABLE,
+                int(random.randint(0, 2)) * DTCM_AVAILABLE,
+                int(random.randint(0, 30)) * 1024 * 1024)
+            placement = call(placer.place_subvertex, resources, constraints)
+            self.assertEqual(placement, call(linear_placer.place_subvertex,
+                                             resources, constraints))
+            if isinstance(placement, tuple):
+                placed.append(placement + (resources,))
+
+    def test_radial_order(self):
+        placer = RadialPlacer(self.dao)
+        linear_placer = LinearRadialPlacer(self.dao)
+        self.assertEqual([(chip.x, chip.y) for chip in placer.chips],
+                         [(chip.x, chip.y) for chip in linear_placer.chips])
+        self.assertEqual(len(placer.chips), 64)
+
+    def test_radial_placements(self):
+        for seed in range(3):
+            self.assertSameOperations(RadialPlacer(self.dao),
+                                      LinearRadialPlacer(self.dao), seed)
+
+    def test_basic_placements(self):
+        self.assertSameOperations(BasicPlacer(self.dao),
+                                  LinearBasicPlacer(self.dao), 3)
+
+    def test_fill(self):
+        placer = RadialPlacer(self.dao)
+        placements = fill(placer)
+        self.assertEqual(placements, fill(LinearRadialPlacer(self.dao)))
+        self.assertEqual(len(set(placements)), len(placements))
+        self.assertEqual(placer.free_chip_index.n_chips_with_free_cores, 0)
+
+    def test_virtual_chips(self):
+        placer = RadialPlacer(self.dao)
+        placement = placer.place_virtual_subvertex(
+            lib_map.VertexConstraints(9, 9, 1),
+            self.dao.machine.get_chip(0, 0).get_processors())
+        self.assertEqual(placement, (9, 9, 1))
+        self.assertEqual(len(placer.chips), 65)
+
+        # The virtual chip has free cores but no SDRAM, so it is only found
+        # for subvertices which need none
+        self.assertEqual(placer.free_chip_index.find_first(0, 64), 64)
+        self.assertEqual(placer.free_chip_index.find_first(1, 64), None)
+        self.assertEqual(placer.place_subvertex(
+            lib_map.Resources(0, 0, 0), lib_map.VertexConstraints(9, 9)),
+            (9, 9, 2))
+
+
+@benchmark
+class BasicPlacerBenchmark(unittest.TestCase):
+    """
+    Times filling machines of 10^3, 10^4 and 10^5 cores with the free chip
+    index, against scanning every chip for each placement on the smaller
+    machines.
+    """
+
+    def test_fill_time(self):
+        for (size, compare) in ((8, True), (24, True), (80, False)):
+            dao = MachineDao(lib_machine.Machine("test", size, size,
+                                                 "unwrapped"))
+            start = time.time()
+            placements = fill(RadialPlacer(dao))
+            elapsed = time.time() - start
+            message = "Placed {} subvertices on {} cores in {:.3f}s".format(
+                len(placements), size * size * 16, elapsed)
+            if compare:
+                start = time.time()
+                expected = fill(LinearRadialPlacer(dao))
+                linear_elapsed = time.time() - start
+                self.assertEqual(placements, expected)
+                self.assertTrue(elapsed < linear_elapsed)
+                message += ", against {:.3f}s scanning every chip".format(
+                    linear_elapsed)
+            logger.info(message)
+
+
+if __name__ == "__main__":
+    unittest.main()
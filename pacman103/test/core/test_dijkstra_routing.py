@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.mapper.routing_algorithms.dijkstra_routing, checking
+that the routing tables made for random networks are the same as those made
+before the router used a priority queue, and that routing in parallel makes
+valid routes.
+"""
+
+import hashlib
+import logging
+import random
+import time
+import unittest
+
+from pacman103.core.mapper.routing_algorithms.dijkstra_routing import \
+    DijkstraRouting
+from pacman103.lib import graph
+from pacman103.lib import lib_map
+from pacman103.lib.machine import machine
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def create_network(the_machine, n_subvertices, max_fan_out, seed):
+    """
+    Places n_subvertices subvertices on random cores of the machine, each with
+    up to max_fan_out subedges to random subvertices, some of which are
+    pruneable, and returns the subvertices.
+    """
+    rng = random.Random(seed)
+    processors = [(chip, processor)
+                  for chip in sorted(the_machine.get_chips_as_list(),
+                                     key=lambda chip: (chip.x, chip.y))
+                  for processor in sorted(chip.get_processors(),
+                                          key=lambda processor: processor.idx)
+                  if processor.idx != 0]
+    rng.shuffle(processors)
+    subvertices = list()
+    for (chip, processor) in processors[:n_subvertices]:
+        vertex = graph.Vertex(1)
+        subvertex = graph.Subvertex(vertex, 0, 0, None)
+        subvertex.placement = lib_map.Placement(subvertex, processor)
+        subvertices.append(subvertex)
+    for subvertex in subvertices:
+        x, y, p = subvertex.placement.processor.get_coordinates()
+        n_subedges = rng.randint(0, max_fan_out)
+        for postsubvertex in [rng.choice(subvertices)
+                              for _ in range(n_subedges)]:
+            edge = graph.Edge(subvertex.vertex, postsubvertex.vertex)
+            subedge = graph.Subedge(edge, subvertex, postsubvertex)
+            subedge.pruneable = rng.random() < 0.1
+            subedge.key = (x << 24) | (y << 16) | ((p - 1) << 11)
+            subedge.mask = 0xFFFFF800
+            subedge.key_mask_combo = subedge.key & subedge.mask
+    return subvertices
+
+
+def describe_routing(the_machine, subvertices):
+    """
+    Returns a string describing the routing tables of every chip and the
+    routing of every subedge.
+    """
+    description = list()
+    for chip in sorted(the_machine.get_chips_as_list(),
+                       key=lambda chip: (chip.x, chip.y)):
+        router = chip.router
+        description.append((chip.x, chip.y, router.occupancy, [
+            (key, [(entry.key, entry.mask, entry.route, entry.defaultable)
+                   for entry in router.cam[key]])
+            for key in sorted(router.cam.keys())]))
+    for subvertex in subvertices:
+        for subedge in subvertex.out_subedges:
+            if subedge.routing is not None:
+                description.append([
+                    (entry.router.chip.x, entry.router.chip.y, entry.route)
+                    for entry in subedge.routing.routing_entries])
+    return repr(description)
+
+
+def check_routings(test, subvertices):
+    """
+    Checks that the routing of every subedge which is not pruneable starts at
+    the chip of its source, follows links between neighbouring chips and ends
+    at the core of its destination
+    """
+    for subvertex in subvertices:
+        for subedge in subvertex.out_subedges:
+            if subedge.pruneable:
+                continue
+            entries = subedge.routing.routing_entries
+            xs, ys, _ = subvertex.placement.processor.get_coordinates()
+            xd, yd, pd = subedge.postsubvertex.placement.processor\
+                .get_coordinates()
+            test.assertEqual((entries[0].router.chip.x,
+                              entries[0].router.chip.y), (xs, ys))
+            for (entry, next_entry) in zip(entries[:-1], entries[1:]):
+                test.assertTrue(any(
+                    entry.route & (1 << link) and
+                    neighbour["object"] is next_entry.router
+                    for link, neighbour in enumerate(
+                        entry.router.get_neighbours())
+                    if neighbour is not None))
+            test.assertEqual((entries[-1].router.chip.x,
+                              entries[-1].router.chip.y), (xd, yd))
+            test.assertTrue(entries[-1].route & (1 << (6 + pd)))
+
+
+def route(machine_type, x, y, n_subvertices, max_fan_out, seed, **weights):
+    the_machine = machine.Machine("test", x, y, machine_type)
+    subvertices = create_network(the_machine, n_subvertices, max_fan_out,
+                                 seed)
+    start = time.time()
+    DijkstraRouting.route_raw(the_machine, subvertices, **weights)
+    logger.info("Routed %d subvertices on %d chips with %d workers in %.3f s"
+                % (n_subvertices, len(the_machine.get_chips_as_list()),
+                   weights.get("workers", 1), time.time() - start))
+    return hashlib.md5(describe_routing(the_machine, subvertices))\
+        .hexdigest(), subvertices
+
+
+class DijkstraRoutingTestCase(unittest.TestCase):
+
+    def test_four_chip_board(self):
+        self.assertEqual(route("spinn3", 2, 2, 40, 6, 1)[0],
+                         "35379d48c575b75df70e6f4650101765")
+
+    def test_forty_eight_chip_board(self):
+        self.assertEqual(route("spinn4", 8, 8, 300, 8, 2)[0],
+                         "0875d248eb1b636d7474da2ad45de0f3")
+
+    def test_forty_eight_chip_board_weighted(self):
+        self.assertEqual(route("spinn4", 8, 8, 300, 8, 3, l=200, m=20,
+                               BW_PER_ROUTE_ENTRY=0.5)[0],
+                         "e015a250702ed7f5bab6843b35f0f34c")
+
+    def test_wrapped_torus(self):
+        self.assertEqual(route("wrapped", 4, 4, 150, 10, 4, l=5, m=5)[0],
+                         "236da6101ca3b3aabc88c5d8850bcbf1")
+
+    def test_parallel_matches_serial_with_fixed_weights(self):
+
+        # Without the occupancy and bandwidth terms the weights never change,
+        # so routing in batches makes the same routes
+        self.assertEqual(route("spinn4", 8, 8, 300, 8, 2, workers=2)[0],
+                         "0875d248eb1b636d7474da2ad45de0f3")
+
+    def test_parallel_weighted(self):
+        digest, subvertices = route("spinn4", 8, 8, 300, 8, 3, l=200, m=20,
+                                    BW_PER_ROUTE_ENTRY=0.5, workers=3)
+        check_routings(self, subvertices)
+
+    def test_path_conflicts(self):
+        the_machine = machine.Machine("test", 2, 2, "spinn3")
+        nodes_info = DijkstraRouting.initiate_node_info(the_machine, 1.0)
+        source = nodes_info["ids"][(0, 0)]
+        east = nodes_info["ids"][(1, 0)]
+
+        # The path from (0, 0) to (1, 0), whose tracking node has (0, 0) to
+        # the west
+        path = [(source, 3)]
+        self.assertFalse(DijkstraRouting.path_conflicts(
+            [path, path], [0, 0], nodes_info, the_machine, 0.5))
+        self.assertTrue(DijkstraRouting.path_conflicts(
+            [path, path, path], [0, 0, 0], nodes_info, the_machine, 0.5))
+        nodes_info["bws"][source][0] = 0.25
+        self.assertTrue(DijkstraRouting.path_conflicts(
+            [path], [0], nodes_info, the_machine, 0.5))
+
+        nodes_info["bws"][source][0] = 1.0
+        router = the_machine.get_chip(0, 0).router
+        router.occupancy = router.MAX_OCCUPANCY
+        self.assertTrue(DijkstraRouting.path_conflicts(
+            [path], [0], nodes_info, the_machine, 0.5))
+        router.ralloc(0, 0xFFFFFFFF)
+        self.assertFalse(DijkstraRouting.path_conflicts(
+            [path], [0], nodes_info, the_machine, 0.5))
+
+
+@benchmark
+class DijkstraRoutingBenchmark(unittest.TestCase):
+    """
+    Times the routing of a network of a thousand subvertices on a 48-chip
+    board, and of two thousand subvertices on a 144-chip torus with
+    different numbers of workers.
+    """
+
+    def test_forty_eight_chip_board(self):
+        self.assertEqual(route("spinn4", 8, 8, 1000, 10, 5)[0],
+                         "57d49a0c01c20bfb457ef34b06ea2ea8")
+
+    def test_workers(self):
+        for workers in (1, 2, 4):
+            digest, subvertices = route("wrapped", 12, 12, 2000, 10, 6,
+                                        l=5, m=5, workers=workers)
+            check_routings(self, subvertices)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.mapper.routing_table_minimisation_algorithms, checking
+that the minimised routing tables route every key as the tables they replace.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pacman103.core.mapper.router.router import Router
+from pacman103.core.mapper.routing_algorithms.dijkstra_routing import \
+    DijkstraRouting
+from pacman103.core.mapper.routing_table_minimisation_algorithms import \
+    KeyMaskMergeMinimiser
+from pacman103.core import reports
+from pacman103.lib.machine import machine
+from pacman103.test.core.test_dijkstra_routing import create_network
+
+MASK = 0xFFFFF800
+EAST = 1 << 0
+NORTH = 1 << 2
+
+
+class DAO(object):
+
+    def __init__(self, the_machine, subvertices, inverse_map,
+                 reports_directory=None):
+        self.machine = the_machine
+        self.subvertices = subvertices
+        self.inverseMap = inverse_map
+        self.reports_directory = reports_directory
+
+    def get_reports_directory(self, sub_directory=None):
+        return self.reports_directory
+
+
+def add_entries(router, entries):
+    for (key, route, defaultable) in entries:
+        entry = router.ralloc(key, MASK)
+        entry.route = route
+        entry.defaultable = defaultable
+
+
+def minimised_entries(entries, passing_keys=()):
+    router = machine.Machine("test", 2, 2, "spinn3").get_chip(0, 0).router
+    add_entries(router, entries)
+    return sorted([(entry.key, entry.mask, entry.route)
+                   for entry in KeyMaskMergeMinimiser.minimise(
+                       router, passing_keys)])
+
+
+class KeyMaskMergeMinimiserTestCase(unittest.TestCase):
+
+    def test_merges_entries_with_the_same_route(self):
+        self.assertEqual(
+            minimised_entries([(0x0000, EAST, False), (0x0800, EAST, False),
+                               (0x1000, EAST, False), (0x1800, EAST, False),
+                               (0x2000, NORTH, False)]),
+            [(0x0000, 0xFFFFE000, EAST), (0x2000, MASK, NORTH)])
+
+    def test_does_not_match_keys_of_other_routes(self):
+        self.assertEqual(
+            minimised_entries([(0x0000, EAST, False), (0x1800, EAST, False),
+                               (0x0800, NORTH, False)]),
+            [(0x0000, MASK, EAST), (0x0800, MASK, NORTH),
+             (0x1800, MASK, EAST)])
+
+    def test_defaultable_entries(self):
+
+        # A packet left to default routing must not be caught by an entry
+        # with another route, but is routed the same by one with its route
+        self.assertEqual(
+            minimised_entries([(0x0000, EAST, False), (0x1800, EAST, False),
+                               (0x0800, NORTH, True)]),
+            [(0x0000, MASK, EAST), (0x1800, MASK, EAST)])
+        self.assertEqual(
+            minimised_entries([(0x0000, EAST, False), (0x1800, EAST, False),
+                               (0x0800, EAST, True)]),
+            [(0x0000, 0xFFFFE000, EAST)])
+
+    def test_keys_without_entries(self):
+
+        # A key which reaches the router without an entry passes straight
+        # through, or is dropped if it was sent by a core of the chip, so
+        # must not be caught by a merged entry with another route
+        for route in (-1, NORTH):
+            self.assertEqual(
+                minimised_entries([(0x0000, EAST, False),
+                                   (0x1800, EAST, False)],
+                                  [(0x0800, MASK, route)]),
+                [(0x0000, MASK, EAST), (0x1800, MASK, EAST)])
+        self.assertEqual(
+            minimised_entries([(0x0000, EAST, False), (0x1800, EAST, False)],
+                              [(0x0800, MASK, EAST)]),
+            [(0x0000, 0xFFFFE000, EAST)])
+
+    def test_routed_network(self):
+        the_machine = machine.Machine("test", 8, 8, "spinn4")
+        subvertices = create_network(the_machine, 600, 12, 7)
+        DijkstraRouting.route_raw(the_machine, subvertices)
+        inverse_map = dict()
+        for subvertex in subvertices:
+            for subedge in subvertex.out_subedges:
+                inverse_map.setdefault(subedge.key_mask_combo, list())\
+                    .append(subedge)
+
+        reports_directory = tempfile.mkdtemp()
+        try:
+            dao = DAO(the_machine, subvertices, inverse_map,
+                      reports_directory)
+            counts = KeyMaskMergeMinimiser(dao).minimise_all()
+            reports.generate_routing_table_minimisation_report(dao, counts)
+            self.assertTrue(os.path.exists(os.path.join(
+                reports_directory, "routing_table_minimisation.rpt")))
+        finally:
+            shutil.rmtree(reports_directory)
+
+        self.assertTrue(sum([after for (_, _, _, after) in counts]) <
+                        sum([before for (_, _, before, _) in counts]) * 0.8)
+        for (x, y, before, after) in counts:
+            router = the_machine.get_chip(x, y).router
+            self.assertEqual(len(router.get_table_entries()), after)
+        self.assertEqual(Router.check_minimised_routing(the_machine,
+                                                        inverse_map), [])
+
+        # A changed route is found by the checker
+        (x, y, _, _) = max(counts, key=lambda count: count[3])
+        entry = the_machine.get_chip(x, y).router.minimised_table[0]
+        entry.route ^= 1 << 7
+        self.assertNotEqual(Router.check_minimised_routing(the_machine,
+                                                           inverse_map), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.mapper.mapping_cache, mapping a network like that of
+the bundled Brunel example without a board, and timing its mapping from
+scratch against its restoration from the cache.
+"""
+
+import cPickle as pickle
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pacman103.front import pynn
+from pacman103 import conf
+from pacman103.core.mapper import mapping_cache
+from pacman103.core.mapper.mapping_cache import MappingCache
+from pacman103.core.mapper.routing_algorithms.dijkstra_routing import \
+    DijkstraRouting
+from pacman103.lib.machine import machine as lib_machine
+from pacman103.store import machines
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def create_network(n_neurons, seed=1, x=None, y=None, machine_type="spinn4"):
+    """
+    Creates a network of excitatory and inhibitory populations driven by
+    Poisson sources, like that of examples/pynnBrunnelBrianNestSpinnaker.py,
+    on a board, and returns its controller
+    """
+    # setup() cannot be called with a min_delay more than once
+    pynn.setup(timestep=1.0, max_delay=16.0, machine="test")
+    n_excitatory = int(round(n_neurons * 0.8))
+    n_inhibitory = int(round(n_neurons * 0.2))
+    excitatory = pynn.Population(n_excitatory, pynn.IF_curr_exp, {},
+                                 label="E_pop")
+    inhibitory = pynn.Population(n_inhibitory, pynn.IF_curr_exp, {},
+                                 label="I_pop")
+    sources = pynn.Population(n_excitatory, pynn.SpikeSourcePoisson,
+                              {'rate': 10.0}, label="Poisson_pop")
+    connector = pynn.FixedProbabilityConnector(0.1, weights=0.1, delays=1.0,
+                                               seed=seed)
+    pynn.Projection(excitatory, excitatory, connector, target="excitatory")
+    pynn.Projection(inhibitory, excitatory, connector, target="inhibitory")
+    pynn.Projection(excitatory, inhibitory, connector, target="excitatory")
+    pynn.Projection(sources, excitatory,
+                    pynn.OneToOneConnector(weights=0.1, delays=1.0),
+                    target="excitatory")
+    controller = pynn.controller
+    controller.dao.machine = lib_machine.Machine("test", x, y,
+                                                 type=machine_type)
+    controller.dao.run_time = 100
+    return controller
+
+
+def create_delayed_network(seed=1):
+    """
+    Creates a network of two populations connected with delays longer than
+    the neurons support, through a delay extension, on a board of 2x2 chips
+    known by a local hostname, and returns its controller
+    """
+    pynn.setup(timestep=1.0, max_delay=32.0, machine="test")
+    pre = pynn.Population(100, pynn.IF_curr_exp, {}, label="pre")
+    post = pynn.Population(100, pynn.IF_curr_exp, {}, label="post")
+    pynn.Projection(pre, post, pynn.FixedProbabilityConnector(
+        0.1, weights=0.1, delays=20.0, seed=seed), target="excitatory")
+    controller = pynn.controller
+    controller.hostname = "127.0.0.1"
+    controller.dao.run_time = 100
+    # the reports of networks mapped within the same second share a folder
+    controller.dao.moved_already = True
+    return controller
+
+
+def map_network(controller, cache):
+    """
+    Maps the network of the controller as Controller.map_model does, without
+    the reports and the checks of the router, restoring it from and storing
+    it in the cache, and returns whether it was restored
+    """
+    dao = controller.dao
+    fingerprint, restored = cache.load(dao)
+    if not dao.done_partitioner:
+        controller.execute_partitioning()
+    if not dao.done_placer:
+        controller.execute_placer()
+    if not dao.done_key_allocation:
+        controller.execute_key_alloc()
+    if not dao.done_router:
+        controller.filterSubEdges(dao)
+        DijkstraRouting.route_raw(dao.machine, dao.subvertices)
+        dao.done_router = True
+    if not restored:
+        cache.save(dao, fingerprint)
+    return restored
+
+
+def describe_result(dao):
+    """
+    Returns the results of mapping in terms which do not depend on the
+    identity of the objects made by mapping
+    """
+    def describe_subvertex(subvertex):
+        return (subvertex.vertex.label, subvertex.lo_atom, subvertex.hi_atom)
+
+    tables = dict()
+    for chip in dao.machine.get_chips_as_list():
+        tables[(chip.x, chip.y)] = sorted([
+            (entry.key, entry.mask, entry.route)
+            for entry in chip.router.get_table_entries()])
+    return {
+        'subvertices': [(describe_subvertex(subvertex), subvertex.key,
+                         subvertex.resources.sdram)
+                        for subvertex in dao.subvertices],
+        'placements': [(describe_subvertex(placement.subvertex),
+                        placement.processor.get_coordinates())
+                       for placement in dao.placements],
+        'subedges': [(describe_subvertex(subedge.presubvertex),
+                      describe_subvertex(subedge.postsubvertex), subedge.key,
+                      subedge.mask, subedge.key_mask_combo)
+                     for subedge in dao.subedges],
+        'inverse_map': sorted([
+            (key_mask_combo, [describe_subvertex(subedge.presubvertex)
+                              for subedge in subedges])
+            for key_mask_combo, subedges in dao.inverseMap.items()]),
+        'used_masks': dao.used_masks,
+        'tables': tables}
+
+
+class MappingCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MappingCache(self.directory, 4)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_fingerprint(self):
+        fingerprint = mapping_cache.get_fingerprint(
+            create_network(500).dao)
+        self.assertEqual(
+            mapping_cache.get_fingerprint(create_network(500).dao),
+            fingerprint)
+
+        # Any change to the network, its machine or the configuration of the
+        # mapper changes the fingerprint
+        self.assertNotEqual(
+            mapping_cache.get_fingerprint(create_network(500, seed=2).dao),
+            fingerprint)
+        self.assertNotEqual(
+            mapping_cache.get_fingerprint(create_network(501).dao),
+            fingerprint)
+        self.assertNotEqual(
+            mapping_cache.get_fingerprint(create_network(
+                500, x=2, y=2, machine_type="unwrapped").dao),
+            fingerprint)
+        dao = create_network(500).dao
+        dao.run_time = 200
+        self.assertNotEqual(mapping_cache.get_fingerprint(dao), fingerprint)
+        old_placer = conf.config.get("Placer", "algorithm")
+        conf.config.set("Placer", "algorithm", "Basic")
+        try:
+            self.assertNotEqual(
+                mapping_cache.get_fingerprint(create_network(500).dao),
+                fingerprint)
+        finally:
+            conf.config.set("Placer", "algorithm", old_placer)
+
+    def test_restore(self):
+        controller = create_network(1000)
+        self.assertFalse(map_network(controller, self.cache))
+        expected = describe_result(controller.dao)
+        pruned = len([subedge for subvertex in controller.dao.subvertices
+                      for subedge in subvertex.out_subedges
+                      if subedge.pruneable])
+
+        controller = create_network(1000)
+        self.assertTrue(map_network(controller, self.cache))
+        self.assertEqual(describe_result(controller.dao), expected)
+        self.assertEqual(
+            len([subedge for subvertex in controller.dao.subvertices
+                 for subedge in subvertex.out_subedges
+                 if subedge.pruneable]), pruned)
+        for subvertex in controller.dao.subvertices:
+            self.assertIn(subvertex, subvertex.vertex.subvertices)
+            self.assertIs(subvertex.placement.subvertex, subvertex)
+
+    def test_invalid_entry(self):
+        controller = create_network(500)
+        fingerprint = mapping_cache.get_fingerprint(controller.dao)
+        with open(self.cache.get_path(fingerprint), "wb") as entry_file:
+            entry_file.write("not a mapping")
+        self.assertEqual(self.cache.load(controller.dao),
+                         (fingerprint, False))
+        self.assertFalse(os.path.exists(self.cache.get_path(fingerprint)))
+        self.assertFalse(controller.dao.done_partitioner)
+
+    def test_evict_least_recently_used(self):
+        self.cache.max_entries = 2
+        fingerprints = list()
+        for (index, n_neurons) in enumerate((100, 200, 300)):
+            controller = create_network(n_neurons)
+            fingerprints.append(mapping_cache.get_fingerprint(controller.dao))
+            map_network(controller, self.cache)
+            os.utime(self.cache.get_path(fingerprints[-1]),
+                     (1000 + index, 1000 + index))
+            if index == 1:
+                # Use the first entry, so that the second is evicted
+                self.assertTrue(map_network(create_network(100), self.cache))
+                os.utime(self.cache.get_path(fingerprints[0]), (2000, 2000))
+        self.assertEqual(
+            [os.path.exists(self.cache.get_path(fingerprint))
+             for fingerprint in fingerprints], [True, False, True])
+
+
+class ControllerMappingCacheTestCase(unittest.TestCase):
+    """
+    Tests the mapping cache as Controller.map_model uses it
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.options = [(section, option, conf.config.get(section, option))
+                        for (section, option) in (
+                            ("Mapping_cache", "enable"),
+                            ("Mapping_cache", "directory"),
+                            ("Reports", "reportsEnabled"))]
+        conf.config.set("Mapping_cache", "enable", "True")
+        conf.config.set("Mapping_cache", "directory", self.directory)
+        conf.config.set("Reports", "reportsEnabled", "False")
+        machines.machines["127.0.0.1"] = {
+            'hostname': "127.0.0.1", 'x': 2, 'y': 2, 'type': "unwrapped"}
+
+    def tearDown(self):
+        del machines.machines["127.0.0.1"]
+        for (section, option, value) in self.options:
+            conf.config.set(section, option, value)
+        shutil.rmtree(self.directory)
+
+    def test_delayed_projection(self):
+        controller = create_delayed_network()
+        controller.map_model()
+        expected = describe_result(controller.dao)
+        self.assertIn(("pre_delayed", 0, 99),
+                      [subvertex for (subvertex, _, _)
+                       in expected['subvertices']])
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        controller = create_delayed_network()
+        controller.setup_spinnman_interfaces()
+        fingerprint = mapping_cache.get_fingerprint(controller.dao)
+        controller.map_model()
+        self.assertEqual(describe_result(controller.dao), expected)
+        self.assertEqual(os.listdir(self.directory),
+                         [fingerprint + MappingCache.SUFFIX])
+
+        # The delay extension is part of the fingerprint
+        controller = create_delayed_network()
+        controller.setup_spinnman_interfaces()
+        controller.dao.vertices[0].delay_vertex.label = "other"
+        self.assertNotEqual(mapping_cache.get_fingerprint(controller.dao),
+                            fingerprint)
+
+    def test_unrestorable_entry(self):
+        controller = create_delayed_network()
+        controller.map_model()
+        expected = describe_result(controller.dao)
+
+        # An entry which places a subvertex on a processor which is no
+        # longer in the machine is not restored, and leaves nothing behind
+        controller = create_delayed_network()
+        controller.setup_spinnman_interfaces()
+        dao = controller.dao
+        path = MappingCache.from_config().get_path(
+            mapping_cache.get_fingerprint(dao))
+        with open(path, "rb") as entry_file:
+            entry = pickle.load(entry_file)
+        entry['placements'][-1] = (entry['placements'][-1][0], (1, 1, 17))
+        with open(path, "wb") as entry_file:
+            pickle.dump(entry, entry_file)
+        self.assertFalse(MappingCache.from_config().load(dao)[1])
+        self.assertFalse(dao.done_partitioner)
+        for vertex in mapping_cache.get_vertices(dao):
+            self.assertEqual(vertex.subvertices, [])
+        for edge in dao.edges:
+            self.assertEqual(edge.subedges, [])
+        for chip in dao.machine.get_chips_as_list():
+            self.assertEqual(chip.router.cam, dict())
+
+        # So the network is mapped again as if there were no entry
+        controller.map_model()
+        self.assertEqual(describe_result(controller.dao), expected)
+        self.assertEqual(len(dao.subvertices), len(expected['subvertices']))
+
+    def test_failed_restore_rolled_back(self):
+        controller = create_delayed_network()
+        controller.map_model()
+
+        # Anything made before the restoration fails is undone
+        controller = create_delayed_network()
+        controller.setup_spinnman_interfaces()
+        dao = controller.dao
+        path = MappingCache.from_config().get_path(
+            mapping_cache.get_fingerprint(dao))
+        with open(path, "rb") as entry_file:
+            entry = pickle.load(entry_file)
+        entry['routers'][-1]['cam'] = None
+        routers_before = [chip.router.cam
+                          for chip in dao.machine.get_chips_as_list()]
+        self.assertRaises(Exception, mapping_cache.restore_mapping, dao,
+                          entry)
+        for vertex in mapping_cache.get_vertices(dao):
+            self.assertEqual(vertex.subvertices, [])
+        for edge in dao.edges:
+            self.assertEqual(edge.subedges, [])
+        self.assertEqual([chip.router.cam
+                          for chip in dao.machine.get_chips_as_list()],
+                         routers_before)
+        self.assertFalse(dao.done_partitioner)
+
+
+@benchmark
+class MappingCacheBenchmark(unittest.TestCase):
+    """
+    Times mapping the Brunel network from scratch against restoring it from
+    the cache.
+    """
+
+    def test_warm_mapping(self):
+        directory = tempfile.mkdtemp()
+        try:
+            cache = MappingCache(directory, 4)
+            controller = create_network(10000)
+            start = time.time()
+            self.assertFalse(map_network(controller, cache))
+            cold_time = time.time() - start
+            expected = describe_result(controller.dao)
+
+            controller = create_network(10000)
+            start = time.time()
+            self.assertTrue(map_network(controller, cache))
+            warm_time = time.time() - start
+            self.assertEqual(describe_result(controller.dao), expected)
+            logger.info("Mapped {} subvertices in {:.2f}s cold and {:.2f}s "
+                        "warm".format(len(controller.dao.subvertices),
+                                      cold_time, warm_time))
+            self.assertTrue(warm_time < cold_time)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+"""
+Tests for the search for the number of atoms of each subvertex of
+pacman103.core.mapper.partitioner_algorithms.partition_and_place_partitioner,
+against adding one atom at a time as it did before, and a benchmark of the
+time taken to partition populations of increasing size.
+"""
+
+import logging
+import time
+import unittest
+
+import numpy
+
+from pacman103.front import pynn
+from pacman103.front.common.block_synaptic_list import BlockSynapticList
+from pacman103.front.common.synaptic_list import SynapticList
+from pacman103.core.mapper.partitioner_algorithms.\
+    partition_and_place_partitioner import PartitionAndPlacePartitioner
+from pacman103.lib.machine import machine as lib_machine
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+class LinearPartitioner(PartitionAndPlacePartitioner):
+    """
+    The partitioner as it was, scaling up one atom at a time and estimating
+    the resources of every range anew
+    """
+
+    def get_resources_for_atoms(self, vertex, lo_atom, hi_atom,
+                                no_machine_time_steps, machine_time_step_us,
+                                partition_data_object):
+        self.n_estimates += 1
+        return vertex.get_resources_for_atoms(
+            lo_atom, hi_atom, no_machine_time_steps, machine_time_step_us,
+            partition_data_object)
+
+    def scale_up_resource_usage(self, used_resources, hi_atom, lo_atom,
+                                max_atoms_per_core, vertex,
+                                no_machine_time_steps, machine_time_step_us,
+                                partition_data_object, resources, ratio):
+        previous_used_resources = used_resources
+        previous_hi_atom = hi_atom
+        while ((ratio < 1.0) and ((hi_atom + 1) < vertex.atoms)
+                and ((hi_atom - lo_atom + 2) < max_atoms_per_core)):
+            previous_hi_atom = hi_atom
+            hi_atom += 1
+            previous_used_resources = used_resources
+            used_resources = self.get_resources_for_atoms(
+                vertex, lo_atom, hi_atom, no_machine_time_steps,
+                machine_time_step_us, partition_data_object)
+            ratio = self.find_max_ratio(used_resources, resources)
+        return previous_used_resources, previous_hi_atom
+
+
+class CountingPartitioner(PartitionAndPlacePartitioner):
+
+    def get_resources_for_atoms(self, vertex, lo_atom, hi_atom,
+                                no_machine_time_steps, machine_time_step_us,
+                                partition_data_object):
+        if (self.resource_estimates_key != (id(vertex), lo_atom)
+                or hi_atom not in self.resource_estimates):
+            self.n_estimates += 1
+        return PartitionAndPlacePartitioner.get_resources_for_atoms(
+            self, vertex, lo_atom, hi_atom, no_machine_time_steps,
+            machine_time_step_us, partition_data_object)
+
+
+def create_network(n_neurons, probability=0.1, run_time=100, timestep=1.0,
+                   max_atoms_per_core=None, record_v=False, stdp=False):
+    """
+    Creates a network of an excitatory and an inhibitory population and
+    returns its datastore
+    """
+    pynn.setup(timestep=timestep, max_delay=16.0, machine="test")
+
+    # The maximum is kept by the model, so it is set for every network
+    pynn.set_number_of_neurons_per_core("IF_curr_exp", max_atoms_per_core)
+    n_excitatory = int(n_neurons * 0.8)
+    excitatory = pynn.Population(n_excitatory, pynn.IF_curr_exp, {},
+                                 label="E_pop")
+    inhibitory = pynn.Population(n_neurons - n_excitatory, pynn.IF_curr_exp,
+                                 {}, label="I_pop")
+    if record_v:
+        excitatory.record_v()
+    synapse_dynamics = None
+    if stdp:
+        synapse_dynamics = pynn.SynapseDynamics(slow=pynn.STDPMechanism(
+            timing_dependence=pynn.SpikePairRule(tau_plus=16.7,
+                                                 tau_minus=33.7),
+            weight_dependence=pynn.AdditiveWeightDependence(
+                w_min=0.0, w_max=1.0, A_plus=0.005, A_minus=0.005)))
+    connector = pynn.FixedProbabilityConnector(probability, weights=0.1,
+                                               delays=1.0, seed=1)
+    pynn.Projection(excitatory, excitatory, connector, target="excitatory",
+                    synapse_dynamics=synapse_dynamics)
+    pynn.Projection(inhibitory, excitatory, connector, target="inhibitory")
+    pynn.Projection(excitatory, inhibitory, connector, target="excitatory")
+    dao = pynn.controller.dao
+    dao.machine = lib_machine.Machine("test", 16, 16, "unwrapped")
+    dao.run_time = run_time
+    return dao
+
+
+def partition(dao, partitioner_class):
+    """
+    Partitions the network of the datastore, and returns the ranges of atoms
+    of the subvertices, the time taken and the number of estimates made
+    """
+    partitioner = partitioner_class(dao)
+    partitioner.n_estimates = 0
+    start = time.time()
+    partitioner.partition()
+    elapsed = time.time() - start
+    splits = [(subvertex.vertex.label, subvertex.lo_atom, subvertex.hi_atom)
+              for subvertex in dao.subvertices]
+    return splits, elapsed, partitioner.n_estimates
+
+
+class PartitionAndPlacePartitionerTestCase(unittest.TestCase):
+
+    def assertSameSplits(self, **kwargs):
+        (splits, _, n_estimates) = partition(create_network(**kwargs),
+                                             CountingPartitioner)
+        (expected, _, expected_n_estimates) = partition(
+            create_network(**kwargs), LinearPartitioner)
+        self.assertEqual(splits, expected)
+        self.assertTrue(n_estimates <= expected_n_estimates)
+        return splits
+
+    def test_maximum_atoms(self):
+        splits = self.assertSameSplits(n_neurons=1000, probability=0.01)
+        self.assertTrue(len(splits) > 2)
+
+    def test_custom_maximum_atoms(self):
+        self.assertSameSplits(n_neurons=500, max_atoms_per_core=37)
+
+    def test_limited_by_resources(self):
+        # The recording of the potentials of the excitatory population uses
+        # more memory than a chip has before the maximum number of atoms
+        splits = self.assertSameSplits(n_neurons=2000, probability=0.2,
+                                       run_time=200000, record_v=True)
+        self.assertTrue(len(set([hi_atom - lo_atom for (_, lo_atom, hi_atom)
+                                 in splits])) > 2)
+
+    def test_plastic_synapses(self):
+        self.assertSameSplits(n_neurons=1000, probability=0.1, stdp=True,
+                              run_time=150000, record_v=True)
+
+
+def get_max_n_connections(self, lo_atom=None, hi_atom=None):
+    """
+    The maximum number of connections in the rows of a synaptic list, found
+    from the connections in each row as it was before it was tabulated
+    """
+    return numpy.amax(self.get_n_connections(lo_atom, hi_atom))
+
+
+@benchmark
+class PartitionAndPlacePartitionerBenchmark(unittest.TestCase):
+    """
+    Times partitioning networks of increasing size whose subvertices are
+    limited by their memory, searching for the number of atoms of each
+    against adding one atom at a time and finding the longest row of each
+    estimate anew.
+    """
+
+    def test_partition_time(self):
+        for n_neurons in (1000, 2000, 4000):
+            kwargs = dict(n_neurons=n_neurons, probability=0.05,
+                          run_time=200000, record_v=True)
+            (splits, elapsed, n_estimates) = partition(
+                create_network(**kwargs), CountingPartitioner)
+            tabulated = (SynapticList.get_max_n_connections,
+                         BlockSynapticList.get_max_n_connections)
+            try:
+                SynapticList.get_max_n_connections = get_max_n_connections
+                BlockSynapticList.get_max_n_connections = \
+                    get_max_n_connections
+                (expected, linear_elapsed, linear_n_estimates) = partition(
+                    create_network(**kwargs), LinearPartitioner)
+            finally:
+                (SynapticList.get_max_n_connections,
+                 BlockSynapticList.get_max_n_connections) = tabulated
+            self.assertEqual(splits, expected)
+            logger.info("Partitioned {} neurons into {} subvertices in "
+                        "{:.3f}s with {} estimates, against {:.3f}s with {} "
+                        "estimates one atom at a time".format(
+                            n_neurons, len(splits), elapsed, n_estimates,
+                            linear_elapsed, linear_n_estimates))
+            self.assertTrue(elapsed < linear_elapsed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.mapper.key_allocator_algorithms.\
+population_block_key_allocator, mapping a network like that of the bundled
+Brunel example without a board.
+"""
+
+import logging
+import unittest
+
+from pacman103.front import pynn
+from pacman103 import conf
+from pacman103.core.mapper.key_allocator_algorithms import \
+    PopulationBlockKeyAllocator
+from pacman103.core.mapper.router.router import Router
+from pacman103.core.mapper.routing_algorithms.dijkstra_routing import \
+    DijkstraRouting
+from pacman103.core.mapper.routing_table_minimisation_algorithms import \
+    KeyMaskMergeMinimiser
+from pacman103.core.utilities import packet_conversions
+from pacman103.front.common.synaptic_manager import SynapticManager
+from pacman103.lib.machine import machine as lib_machine
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def map_brunel_network(key_allocator, n_neurons):
+    """
+    Partitions, places, allocates the keys of and routes a network of
+    excitatory and inhibitory populations driven by Poisson sources, like
+    that of examples/pynnBrunnelBrianNestSpinnaker.py, on a 48-chip board
+    with the named key allocator, and returns the DAO
+    """
+    old_key_allocator = conf.config.get("Key_allocator", "algorithm")
+    conf.config.set("Key_allocator", "algorithm", key_allocator)
+    try:
+        # setup() cannot be called with a min_delay more than once
+        pynn.setup(timestep=1.0, max_delay=16.0, machine="test")
+        n_excitatory = int(round(n_neurons * 0.8))
+        n_inhibitory = int(round(n_neurons * 0.2))
+        excitatory = pynn.Population(n_excitatory, pynn.IF_curr_exp, {},
+                                     label="E_pop")
+        inhibitory = pynn.Population(n_inhibitory, pynn.IF_curr_exp, {},
+                                     label="I_pop")
+        excitatory_sources = pynn.Population(
+            n_excitatory, pynn.SpikeSourcePoisson, {'rate': 10.0},
+            label="Poisson_pop_E")
+        inhibitory_sources = pynn.Population(
+            n_inhibitory, pynn.SpikeSourcePoisson, {'rate': 10.0},
+            label="Poisson_pop_I")
+        connector = pynn.FixedProbabilityConnector(0.1, weights=0.1,
+                                                   delays=1.0)
+        pynn.Projection(excitatory, excitatory, connector,
+                        target="excitatory")
+        pynn.Projection(inhibitory, excitatory, connector,
+                        target="inhibitory")
+        pynn.Projection(excitatory, inhibitory, connector,
+                        target="excitatory")
+        pynn.Projection(inhibitory, inhibitory, connector,
+                        target="inhibitory")
+        for (sources, targets) in ((excitatory_sources, excitatory),
+                                   (inhibitory_sources, inhibitory)):
+            pynn.Projection(sources, targets,
+                            pynn.OneToOneConnector(weights=0.1, delays=1.0),
+                            target="excitatory")
+
+        controller = pynn.controller
+        controller.dao.machine = lib_machine.Machine("test", type="spinn4")
+        controller.dao.run_time = 100
+        controller.execute_partitioning()
+        if not controller.dao.done_placer:
+            controller.execute_placer()
+        controller.execute_key_alloc()
+        controller.filterSubEdges(controller.dao)
+        DijkstraRouting.route_raw(controller.dao.machine,
+                                  controller.dao.subvertices)
+        return controller.dao
+    finally:
+        conf.config.set("Key_allocator", "algorithm", old_key_allocator)
+
+
+class PopulationBlockKeyAllocatorTestCase(unittest.TestCase):
+
+    def test_find_free_block(self):
+        used_slots = [False] * 16
+        used_slots[1] = True
+        self.assertEqual(
+            PopulationBlockKeyAllocator.find_free_block(used_slots, 1), 0)
+        self.assertEqual(
+            PopulationBlockKeyAllocator.find_free_block(used_slots, 2), 2)
+        self.assertEqual(
+            PopulationBlockKeyAllocator.find_free_block(used_slots, 8), 8)
+        self.assertEqual(
+            PopulationBlockKeyAllocator.find_free_block(used_slots, 16), None)
+
+    def test_slot_keys(self):
+        self.assertEqual(PopulationBlockKeyAllocator.get_key_of_slot(0), 0)
+        self.assertEqual(PopulationBlockKeyAllocator.get_key_of_slot(17),
+                         packet_conversions.get_key_from_coords(0, 1, 1))
+        self.assertEqual(PopulationBlockKeyAllocator.get_key_of_slot(1023),
+                         packet_conversions.get_key_from_coords(7, 7, 15))
+
+    def test_reserve_slots(self):
+        allocator = PopulationBlockKeyAllocator(None)
+        used_slots = [False] * allocator.N_SLOTS
+        allocator.reserve_slots(
+            used_slots, packet_conversions.get_key_from_coords(0, 6, 3),
+            0xfffff800)
+        allocator.reserve_slots(
+            used_slots, packet_conversions.get_key_from_coords(1, 0, 0),
+            0xffff0000)
+        self.assertEqual([slot for slot in range(allocator.N_SLOTS)
+                          if used_slots[slot]],
+                         [6 * 16 + 3] + range(128, 144))
+
+    def test_mapped_network(self):
+        dao = map_brunel_network("PopulationBlock", 2000)
+        subvertices_of_vertex = dict()
+        for subvertex in dao.subvertices:
+            if subvertex.key is not None:
+                subvertices_of_vertex.setdefault(subvertex.vertex, list())\
+                    .append(subvertex)
+        self.assertEqual(len(subvertices_of_vertex), 4)
+
+        # The keys of the subvertices of each vertex are those of a block
+        # aligned to a power of two, and so are matched by a single mask
+        for subvertices in subvertices_of_vertex.values():
+            block_size = 1
+            while block_size < len(subvertices):
+                block_size <<= 1
+            block_mask = (0xfffff800 & ~PopulationBlockKeyAllocator
+                          .get_key_of_slot(block_size - 1))
+            self.assertEqual(len(set([subvertex.key & block_mask
+                                      for subvertex in subvertices])), 1)
+
+        # Each subvertex sends its allocated key, which indexes its own entry
+        # of the master population table, and the subedges can be found from
+        # their keys
+        table_addresses = set()
+        for subvertex in dao.subvertices:
+            if subvertex.key is None:
+                continue
+            self.assertEqual(subvertex.vertex.get_subvertex_key(subvertex),
+                             subvertex.key)
+            table_addresses.add(
+                packet_conversions.get_mpt_sb_mem_addrs_from_coords(
+                    packet_conversions.get_x_from_key(subvertex.key),
+                    packet_conversions.get_y_from_key(subvertex.key),
+                    packet_conversions.get_p_from_key(subvertex.key)))
+            for subedge in subvertex.out_subedges:
+                self.assertEqual(subedge.key, subvertex.key)
+                self.assertIn(subedge.key, dao.used_masks[subedge.mask])
+                self.assertIn(subedge.key_mask_combo, dao.inverseMap)
+        self.assertEqual(
+            len(table_addresses),
+            len([subvertex for subvertex in dao.subvertices
+                 if subvertex.key is not None]))
+        self.assertTrue(max(table_addresses) <
+                        SynapticManager.MASTER_POPULATION_TABLE_SIZE)
+
+
+@benchmark
+class PopulationBlockKeyAllocatorBenchmark(unittest.TestCase):
+    """
+    Compares the number of routing entries left after minimisation of the
+    Brunel network with keys from the basic and the population block key
+    allocators.
+    """
+
+    def test_brunel_network(self):
+        n_entries = dict()
+        for key_allocator in ("Basic", "PopulationBlock"):
+            dao = map_brunel_network(key_allocator, 10000)
+            counts = KeyMaskMergeMinimiser(dao).minimise_all()
+            inverse_map = dict()
+            for subvertex in dao.subvertices:
+                for subedge in subvertex.out_subedges:
+                    inverse_map.setdefault(subedge.key_mask_combo, list())\
+                        .append(subedge)
+            self.assertEqual(Router.check_minimised_routing(dao.machine,
+                                                            inverse_map), [])
+            n_entries[key_allocator] = (
+                sum([before for (_, _, before, _) in counts]),
+                sum([after for (_, _, _, after) in counts]))
+            logger.info("{} key allocator: {} routing entries, {} after "
+                        "minimisation".format(key_allocator,
+                                              *n_entries[key_allocator]))
+        self.assertTrue(n_entries["PopulationBlock"][1] <
+                        n_entries["Basic"][1])
+
+
+if __name__ == "__main__":
+    unittest.main()
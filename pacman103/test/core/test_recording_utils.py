@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Tests for the decoding of recording regions in
+pacman103.core.utilities.recording_utils
+"""
+
+import logging
+import struct
+import time
+import unittest
+
+import numpy
+
+from pacman103.core.utilities import recording_utils
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def reference_decode(spike_data, bytes_per_tick, lo_atom, ms_per_tick):
+    """
+    The word-by-word, bit-by-bit decoder previously used by\
+    ComponentVertex._getSpikes.
+    """
+    spikes = list()
+    for tick in range(len(spike_data) / bytes_per_tick):
+        for word_index in range(0, bytes_per_tick, 4):
+            word = struct.unpack_from("<I", spike_data,
+                                      (tick * bytes_per_tick) + word_index)[0]
+            for bit in range(32):
+                if word & (1 << bit):
+                    spikes.append((tick * ms_per_tick,
+                                   (word_index * 8) + bit + lo_atom))
+    return spikes
+
+
+def encode_spike_history(ticks, neuron_ids, bytes_per_tick, n_ticks):
+    """
+    Builds a spike history buffer in the on-chip format, the inverse of\
+    recording_utils.decode_spike_history (with lo_atom of 0).
+
+    :param ticks: the tick of each spike
+    :param neuron_ids: the core-relative neuron id of each spike
+    :param bytes_per_tick: the size in bytes of the bit vector for one tick
+    :param n_ticks: the number of ticks held by the buffer
+    :returns: the buffer as a string of bytes
+    """
+    ticks = numpy.asarray(ticks, dtype=numpy.int64)
+    neuron_ids = numpy.asarray(neuron_ids, dtype=numpy.int64)
+    data = numpy.zeros(n_ticks * bytes_per_tick, dtype=numpy.uint8)
+    byte_indices = (ticks * bytes_per_tick) + (neuron_ids // 8)
+    masks = numpy.left_shift(1, neuron_ids % 8).astype(numpy.uint8)
+    numpy.bitwise_or.at(data, byte_indices, masks)
+    return data.tostring()
+
+
+class SpikeHistoryDecodeTestCase(unittest.TestCase):
+    """
+    Tests decode_spike_history against the original decoding loop.
+    """
+
+    def test_single_word(self):
+        spike_data = struct.pack("<II", 0x80000001, 0x00000100)
+        times, ids = recording_utils.decode_spike_history(spike_data, 4)
+        self.assertEqual(list(times), [0.0, 0.0, 1.0])
+        self.assertEqual(list(ids), [0, 31, 8])
+
+    def test_matches_reference(self):
+        rng = numpy.random.RandomState(1)
+        bytes_per_tick = 12
+        raw = rng.randint(0, 256, 200 * bytes_per_tick).astype(numpy.uint8)
+        raw[rng.rand(len(raw)) < 0.5] = 0
+        spike_data = raw.tostring()
+
+        times, ids = recording_utils.decode_spike_history(
+            spike_data, bytes_per_tick, lo_atom=64, ms_per_tick=0.1)
+        expected = reference_decode(spike_data, bytes_per_tick, 64, 0.1)
+        self.assertEqual(zip(times, ids), expected)
+
+    def test_n_ticks_ignores_trailing_data(self):
+        spike_data = struct.pack("<III", 1, 2, 4)
+        times, ids = recording_utils.decode_spike_history(
+            spike_data, 4, n_ticks=2)
+        self.assertEqual(list(ids), [0, 1])
+
+    def test_empty(self):
+        times, ids = recording_utils.decode_spike_history("", 8)
+        self.assertEqual(len(times), 0)
+        self.assertEqual(len(ids), 0)
+
+    def test_encode_round_trip(self):
+        ticks = [0, 0, 3, 7]
+        ids = [5, 33, 0, 63]
+        spike_data = encode_spike_history(ticks, ids, 8, 8)
+        self.assertEqual(len(spike_data), 64)
+        times, decoded = recording_utils.decode_spike_history(spike_data, 8)
+        self.assertEqual(list(times), ticks)
+        self.assertEqual(list(decoded), ids)
+
+
+@benchmark
+class SpikeHistoryDecodeBenchmark(unittest.TestCase):
+    """
+    Decodes a synthetic buffer holding over a million spikes.
+    """
+
+    def test_decode_million_spikes(self):
+        n_neurons = 256
+        n_ticks = 40000
+        n_spikes = 1200000
+        bytes_per_tick = n_neurons / 8
+        rng = numpy.random.RandomState(2)
+        cells = rng.choice(n_ticks * n_neurons, n_spikes, replace=False)
+        spike_data = encode_spike_history(
+            cells // n_neurons, cells % n_neurons, bytes_per_tick, n_ticks)
+
+        start = time.time()
+        times, ids = recording_utils.decode_spike_history(
+            spike_data, bytes_per_tick)
+        elapsed = time.time() - start
+        logger.info("Decoded %d spikes in %.3f s" % (len(ids), elapsed))
+
+        self.assertEqual(len(ids), n_spikes)
+        cells.sort()
+        self.assertTrue(numpy.array_equal(
+            (times.astype(numpy.int64) * n_neurons) + ids, cells))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.mapper.router.routing_checks, checking that the
+inconsistant routings and redundant paths found are those found by the
+pairwise checks which it replaced.
+"""
+
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+from pacman103.core.mapper.router import routing_checks
+from pacman103.core.mapper.router.router import Router
+from pacman103.lib import lib_map
+from pacman103.lib.machine import machine
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+MASK = 0x0000000f
+
+
+def reference_check(the_machine):
+    """
+    The pairwise checks of Router before they were indexed, which compare
+    the destinations of the entries and scan the findings for duplicates
+    """
+    def destination(entry):
+        last = entry.routing.routing_entries[-1]
+        return last.router.chip.get_coords(), last.route
+
+    def duplicate(x, y, initial_entry, other_entry, entry_list):
+        for entry in entry_list:
+            if ((entry[2] == initial_entry and entry[3] == other_entry) or
+               (entry[2] == other_entry and entry[3] == initial_entry)) \
+                    and x == entry[0] and y == entry[1]:
+                return True
+        return False
+
+    inconsistant = list()
+    redundant = list()
+    for x in range(the_machine.x_dim):
+        for y in range(the_machine.y_dim):
+            if not the_machine.chip_exists_at(x, y):
+                continue
+            for entries in the_machine.get_chip(x, y).router.cam.values():
+                if len(entries) <= 1:
+                    continue
+                initial_route = None
+                initial_entry = None
+                for other_entry in entries:
+                    if initial_route is None:
+                        initial_entry = other_entry
+                        initial_route = other_entry.route
+                        continue
+                    destination(initial_entry)
+                    destination(other_entry)
+                    if initial_entry.original_key != other_entry.original_key:
+                        findings = inconsistant
+                    else:
+                        findings = redundant
+                    if not duplicate(x, y, initial_entry, other_entry,
+                                     findings):
+                        findings.append([x, y, initial_entry, other_entry])
+    return inconsistant, redundant
+
+
+def add_entry(router, key, route, original_key=None):
+    """
+    Allocates an entry in the router with a routing which ends at it
+    """
+    entry = router.ralloc(key, MASK)
+    if original_key is not None:
+        entry.original_key = original_key
+    entry.route = route
+    entry.routing = lib_map.Routing(None)
+    entry.routing.routing_entries.append(entry)
+    return entry
+
+
+def create_tables(the_machine, copies, seed):
+    """
+    Fills the routers of the machine with copies of the tables of
+    test_routing_consistancy_checks, each shifted to a random chip
+    """
+    rng = random.Random(seed)
+    chips = [(coord['x'], coord['y'])
+             for coord in the_machine.get_coords_of_all_chips()]
+    for _ in range(copies):
+        x, y = rng.choice(chips)
+        router = the_machine.get_chip(x, y).router
+        add_entry(router, 18, 5)
+        for index in range(10):
+            add_entry(router, index, rng.choice((5, 6)))
+        add_entry(router, 17, 5)
+
+        # Another path of the same key, which may or may not start with an
+        # entry with no route yet, and an entry shared by two keys
+        entry = add_entry(router, rng.randint(0, 15), 6,
+                          original_key=rng.randint(0, 15))
+        entry.route = rng.choice((None, 6))
+        router.cam[rng.choice(list(router.cam.keys()))].append(entry)
+
+
+def describe(findings):
+    return [(x, y, id(initial), id(other))
+            for (x, y, initial, other) in findings]
+
+
+class RoutingChecksTestCase(unittest.TestCase):
+
+    def check_machine(self, the_machine):
+        expected = reference_check(the_machine)
+        found = Router.check_for_inconsistant_routings(the_machine, dict())
+        self.assertEqual(describe(found[0]), describe(expected[0]))
+        self.assertEqual(describe(found[1]), describe(expected[1]))
+        return expected
+
+    def test_no_conflicts(self):
+        the_machine = machine.Machine("test", 2, 2, "spinn2")
+        router = the_machine.get_chip(0, 0).router
+        for index in range(10):
+            add_entry(router, index, 6)
+        self.assertEqual(self.check_machine(the_machine), ([], []))
+
+    def test_inconsistant_and_redundant(self):
+        the_machine = machine.Machine("test", 2, 2, "spinn2")
+        router = the_machine.get_chip(0, 1).router
+        first = add_entry(router, 1, 6)
+        inconsistant = add_entry(router, 17, 5)
+        redundant = add_entry(router, 1, 5)
+        self.assertEqual(self.check_machine(the_machine),
+                         ([[0, 1, first, inconsistant]],
+                          [[0, 1, first, redundant]]))
+
+    def test_entry_without_route(self):
+
+        # The first entry with a route is checked against the others
+        the_machine = machine.Machine("test", 2, 2, "spinn2")
+        router = the_machine.get_chip(0, 0).router
+        add_entry(router, 1, None)
+        first = add_entry(router, 1, 6)
+        other = add_entry(router, 17, 6)
+        self.assertEqual(self.check_machine(the_machine),
+                         ([[0, 0, first, other]], []))
+
+    def test_leading_entries_without_route(self):
+
+        # The entries before the first with a route are not checked
+        the_machine = machine.Machine("test", 2, 2, "spinn2")
+        router = the_machine.get_chip(0, 0).router
+        add_entry(router, 1, None)
+        add_entry(router, 17, None)
+        first = add_entry(router, 1, 6)
+        redundant = add_entry(router, 1, 5)
+        self.assertEqual(self.check_machine(the_machine),
+                         ([], [[0, 0, first, redundant]]))
+
+    def test_pair_recorded_once(self):
+        the_machine = machine.Machine("test", 2, 2, "spinn2")
+        router = the_machine.get_chip(0, 0).router
+        first = add_entry(router, 1, 6)
+        other = add_entry(router, 17, 6)
+        router.cam[1].append(other)
+        router.cam[17] = [other, first]
+        self.assertEqual(self.check_machine(the_machine),
+                         ([[0, 0, first, other]], []))
+
+    def test_random_tables(self):
+        for seed in range(5):
+            the_machine = machine.Machine("test", 4, 4, "wrapped")
+            create_tables(the_machine, 20, seed)
+            self.check_machine(the_machine)
+
+    def test_saved_routing_result(self):
+        the_machine = machine.Machine("test", 4, 4, "wrapped")
+        create_tables(the_machine, 20, 0)
+        expected = reference_check(the_machine)
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "routing.pickle")
+            routing_checks.save_routing_result(the_machine, filename)
+            found = routing_checks.check_routing_result(filename)
+        finally:
+            shutil.rmtree(directory)
+
+        def describe_records(findings):
+            return [(x, y, initial.original_key, initial.route,
+                     other.original_key, other.route)
+                    for (x, y, initial, other) in findings]
+        self.assertEqual(describe_records(found[0]),
+                         describe_records(expected[0]))
+        self.assertEqual(describe_records(found[1]),
+                         describe_records(expected[1]))
+
+
+@benchmark
+class RoutingChecksBenchmark(unittest.TestCase):
+    """
+    Times the checks of a saved routing result with the tables of
+    test_routing_consistancy_checks scaled up a hundred times, against the
+    pairwise checks which they replaced.
+    """
+
+    def test_scaled_tables(self):
+        the_machine = machine.Machine("test", 10, 10, "wrapped")
+        create_tables(the_machine, 1000, 0)
+
+        start = time.time()
+        expected = reference_check(the_machine)
+        reference_time = time.time() - start
+
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "routing.pickle")
+            routing_checks.save_routing_result(the_machine, filename)
+            start = time.time()
+            found = routing_checks.check_routing_result(filename)
+            check_time = time.time() - start
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(len(found[0]), len(expected[0]))
+        self.assertEqual(len(found[1]), len(expected[1]))
+        logger.info("pairwise checks took {:.3f}s, indexed checks of the "
+                    "saved result {:.3f}s".format(reference_time, check_time))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.core.target_manifest, and a benchmark of reading the
+targets of a large machine from a manifest against unpickling them.
+"""
+
+import cPickle as pickle
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103.core import exceptions, output_generator, target_manifest
+from pacman103.core.spinnman.interfaces.transceiver import Transceiver
+from pacman103.lib import lib_map
+from pacman103.test.scp.scamp_emulator import SCAMPEmulator
+from pacman103.test.scp.test_memory_calls import ReloadStepsRecorder
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+BASE_ADDRESS = 0x70000000
+
+
+def create_targets(directory, n_chips, n_cores, size):
+    """
+    Returns the executable, load and memory write targets of n_cores cores
+    on each of n_chips chips, each loading a file of size bytes
+    """
+    executable_targets = [lib_map.ExecutableTarget("a.aplx", 0, 0, 1),
+                          lib_map.ExecutableTarget("b.aplx", 0, 0, 2)]
+    load_targets = list()
+    mem_write_targets = list()
+    random = numpy.random.RandomState(0)
+    for chip in range(n_chips):
+        x, y = chip % 8, chip // 8
+        for p in range(1, n_cores + 1):
+            target = executable_targets[p % 2]
+            if (x, y, p) not in [(0, 0, 1), (0, 0, 2)]:
+                target.targets.append({'x': x, 'y': y, 'p': p})
+            filename = os.path.join(directory, "%d_%d_%d.dat" % (x, y, p))
+            with open(filename, "wb") as f:
+                f.write(random.randint(0, 256, size).astype(
+                    numpy.uint8).tostring())
+            load_targets.append(lib_map.LoadTarget(
+                filename, x, y, p, BASE_ADDRESS + 0x10000 * p,
+                written_ranges=[(BASE_ADDRESS + 0x10000 * p + start,
+                                 BASE_ADDRESS + 0x10000 * p + start + 256)
+                                for start in range(0, size - 256, 512)[:p]]))
+            mem_write_targets.append(lib_map.MemWriteTarget(
+                x, y, p, 0xE5007000 + 128 * p, BASE_ADDRESS + 0x10000 * p))
+    return executable_targets, load_targets, mem_write_targets
+
+
+def describe_targets(executable_targets, load_targets, mem_write_targets):
+    return ([(target.filename, target.targets)
+             for target in executable_targets],
+            [(target.filename, target.x, target.y, target.p, target.address,
+              target.written_ranges)
+             for target in load_targets],
+            [(target.x, target.y, target.p, target.address, target.data)
+             for target in mem_write_targets])
+
+
+class TargetManifestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, target_manifest.FILENAME)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        targets = create_targets(self.directory, 3, 5, 1000)
+        target_manifest.write_manifest(self.path, *targets)
+        manifest = target_manifest.TargetManifest(self.path)
+        read = (manifest.get_executable_targets(),
+                manifest.get_load_targets(),
+                manifest.get_mem_write_targets())
+        self.assertEqual(describe_targets(*read), describe_targets(*targets))
+
+        # The data of each load target is that of its file, aligned within
+        # the manifest
+        for target in read[1]:
+            with open(target.filename, "rb") as f:
+                self.assertEqual(target.data[:], f.read())
+        self.assertTrue(all(manifest.loads['offset'] %
+                            target_manifest.DATA_ALIGNMENT == 0))
+
+    def test_empty(self):
+        target_manifest.write_manifest(self.path, [], [], [])
+        manifest = target_manifest.TargetManifest(self.path)
+        self.assertEqual(manifest.get_executable_targets(), [])
+        self.assertEqual(manifest.get_load_targets(), [])
+        self.assertEqual(manifest.get_mem_write_targets(), [])
+
+    def test_invalid(self):
+        target_manifest.write_manifest(
+            self.path, *create_targets(self.directory, 1, 2, 100))
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        # Another version, another kind of file or a truncated manifest are
+        # not read
+        header = numpy.frombuffer(data, target_manifest.HEADER_DTYPE,
+                                  count=1).copy()
+        header['version'] = target_manifest.VERSION + 1
+        for invalid in (header.tostring() + data[header.nbytes:],
+                        "PICKLE" + data[6:], data[:-8], data[:10]):
+            with open(self.path, "wb") as f:
+                f.write(invalid)
+            self.assertRaises(exceptions.PacmanException,
+                              target_manifest.TargetManifest, self.path)
+
+    def test_reload_output_without_manifest(self):
+        self.assertRaises(exceptions.PacmanException,
+                          output_generator.reload_output, None,
+                          "no such reload")
+
+
+class TargetManifestLoadTestCase(unittest.TestCase):
+
+    def test_load_from_manifest(self):
+        directory = tempfile.mkdtemp()
+        try:
+            (executable_targets, load_targets, mem_write_targets) = \
+                create_targets(directory, 2, 3, 2048)
+            path = os.path.join(directory, target_manifest.FILENAME)
+            target_manifest.write_manifest(path, executable_targets,
+                                           load_targets, mem_write_targets)
+            expected = dict()
+            for target in load_targets:
+                with open(target.filename, "rb") as f:
+                    expected[(target.x, target.y, target.address)] = f.read()
+                os.remove(target.filename)
+
+            # The targets are loaded from the manifest without their files
+            with SCAMPEmulator() as board:
+                txrx = Transceiver("127.0.0.1", board.port)
+                txrx.utility = ReloadStepsRecorder()
+                statistics = txrx.load_targets_raw(
+                    target_manifest.TargetManifest(path).get_load_targets())
+                txrx.conn.close()
+                for ((x, y, address), data) in expected.items():
+                    self.assertEqual(board.read(x, y, address, len(data)),
+                                     data)
+            self.assertEqual(statistics.n_bytes, 2048 * 6)
+        finally:
+            shutil.rmtree(directory)
+
+
+@benchmark
+class TargetManifestBenchmark(unittest.TestCase):
+    """
+    Times reading the targets of 16 cores on each of 240 chips from a
+    manifest against unpickling them.
+    """
+
+    def test_read_time(self):
+        directory = tempfile.mkdtemp()
+        try:
+            targets = create_targets(directory, 240, 16, 64)
+            pickle_paths = list()
+            for (name, target_list) in zip(("executable", "load", "mem_write"),
+                                           targets):
+                pickle_paths.append(os.path.join(directory, name))
+                with open(pickle_paths[-1], "wb") as f:
+                    pickle.dump(target_list, f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+            path = os.path.join(directory, target_manifest.FILENAME)
+            target_manifest.write_manifest(path, *targets)
+
+            start = time.time()
+            unpickled = list()
+            for pickle_path in pickle_paths:
+                with open(pickle_path, "rb") as f:
+                    unpickled.append(pickle.load(f))
+            pickle_time = time.time() - start
+
+            start = time.time()
+            manifest = target_manifest.TargetManifest(path)
+            read = (manifest.get_executable_targets(),
+                    manifest.get_load_targets(),
+                    manifest.get_mem_write_targets())
+            manifest_time = time.time() - start
+
+            self.assertEqual(describe_targets(*read),
+                             describe_targets(*unpickled))
+            logger.info("Read {} load targets in {:.3f}s unpickled and "
+                        "{:.3f}s from a manifest".format(
+                            len(read[1]), pickle_time, manifest_time))
+            self.assertTrue(manifest_time < pickle_time)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
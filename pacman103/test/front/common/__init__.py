@@ -0,0 +1,3 @@
+"""
+Tests for modules in the `pacman103.front.common` package.
+"""
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+"""
+Tests for pacman103.front.common.block_synaptic_list.BlockSynapticList, the
+synaptic list made by the connectors which generates its blocks when they are
+needed, against the same list held in memory as a whole.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import unittest
+
+import numpy
+from pyNN.random import RandomDistribution
+
+from pacman103.front.pynn.connectors import AllToAllConnector
+from pacman103.front.pynn.connectors import FixedNumberPreConnector
+from pacman103.front.pynn.connectors import FixedProbabilityConnector
+from pacman103.front.common.block_synaptic_list import BlockSynapticList
+from pacman103.front.common.synaptic_list import SynapticList
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))))))
+
+
+class Vertex(object):
+
+    def __init__(self, atoms):
+        self.atoms = atoms
+
+
+def row_tuples(synapse_list):
+    return [(list(row.target_indices), list(row.weights), list(row.delays),
+             list(row.synapse_types)) for row in synapse_list.get_rows()]
+
+
+class BlockSynapticListTestCase(unittest.TestCase):
+
+    def setUp(self):
+        connector = FixedProbabilityConnector(
+            0.3, weights=RandomDistribution("uniform", [-1.0, 0.0]),
+            delays=RandomDistribution("randint", [1, 40]), seed=5)
+        self.block_list = connector.generate_synapse_list(
+            Vertex(700), Vertex(600), 1.0, 1)
+        self.synapse_list = SynapticList(self.block_list.get_rows())
+
+    def assertSameRows(self, first, second):
+        self.assertEqual(row_tuples(first), row_tuples(second))
+
+    def test_atom_sublists(self):
+        for (from_lo, from_hi, to_lo, to_hi) in [(0, 699, 0, 599),
+                                                (0, 255, 0, 255),
+                                                (100, 400, 250, 520),
+                                                (650, 900, 590, 800),
+                                                (10, 10, 300, 300)]:
+            self.assertSameRows(
+                self.block_list.create_atom_sublist(from_lo, from_hi,
+                                                    to_lo, to_hi),
+                self.synapse_list.create_atom_sublist(from_lo, from_hi,
+                                                      to_lo, to_hi))
+
+    def test_delay_sublists(self):
+        for block_list, synapse_list in [(self.block_list, self.synapse_list),
+                                         (self.block_list.create_delay_sublist(
+                                             5, 30),
+                                          self.synapse_list
+                                          .create_delay_sublist(5, 30))]:
+            self.assertSameRows(
+                block_list.create_delay_sublist(3, 12).create_atom_sublist(
+                    200, 500, 40, 440),
+                synapse_list.create_delay_sublist(3, 12).create_atom_sublist(
+                    200, 500, 40, 440))
+            self.assertEqual(block_list.create_delay_sublist(10, 100)
+                             .get_min_max_delay(),
+                             synapse_list.create_delay_sublist(10, 100)
+                             .get_min_max_delay())
+
+    def test_summaries(self):
+        block_list = self.block_list
+        synapse_list = self.synapse_list
+        self.assertEqual(block_list.get_n_rows(), 700)
+        self.assertEqual(list(block_list.get_row_lengths()),
+                         list(synapse_list.get_row_lengths()))
+        self.assertEqual(list(block_list.get_n_connections(100, 355)),
+                         list(synapse_list.get_n_connections(100, 355)))
+        self.assertEqual(block_list.get_max_n_connections(0, 99),
+                         synapse_list.get_max_n_connections(0, 99))
+        self.assertEqual(block_list.get_min_max_delay(),
+                         synapse_list.get_min_max_delay())
+        self.assertEqual(block_list.get_max_weight(),
+                         synapse_list.get_max_weight())
+        self.assertEqual(block_list.get_min_weight(),
+                         synapse_list.get_min_weight())
+        self.assertFalse(block_list.is_connected(0, 699, 600, 700))
+        self.assertEqual(block_list.is_connected(5, 5, 30, 32),
+                         synapse_list.is_connected(5, 5, 30, 32))
+
+        sums = [(numpy.zeros(600), numpy.zeros(600)) for _ in range(2)]
+        block_list.sum_weights(*sums[0])
+        synapse_list.sum_weights(*sums[1])
+        self.assertTrue(numpy.allclose(sums[0][0], sums[1][0]))
+        self.assertTrue(numpy.allclose(sums[0][1], sums[1][1]))
+
+    def test_max_n_connections_table(self):
+        block_list = FixedProbabilityConnector(
+            0.3, weights=RandomDistribution("uniform", [-1.0, 0.0]),
+            delays=RandomDistribution("randint", [1, 40]), seed=5)\
+            .generate_synapse_list(Vertex(700), Vertex(600), 1.0, 1)
+        block_list.BLOCK_ATOMS = 100
+        for (lo_atom, hi_atoms) in [(0, (0, 99, 100, 599, 700)),
+                                    (250, (249, 250, 349, 360)),
+                                    (590, (595, 599, 650)), (600, (600,))]:
+            for hi_atom in hi_atoms:
+                self.assertEqual(
+                    block_list.get_max_n_connections(lo_atom, hi_atom),
+                    self.synapse_list.get_max_n_connections(lo_atom,
+                                                            hi_atom))
+                self.assertEqual(
+                    block_list.get_max_n_connections(lo_atom, hi_atom),
+                    numpy.amax(block_list.get_n_connections(lo_atom,
+                                                            hi_atom)))
+
+    def test_summaries_do_not_depend_on_the_blocks(self):
+        summary = (list(self.block_list.get_row_lengths()),
+                   self.block_list.get_min_max_delay(),
+                   self.block_list.get_min_weight())
+        block_list = FixedProbabilityConnector(
+            0.3, weights=RandomDistribution("uniform", [-1.0, 0.0]),
+            delays=RandomDistribution("randint", [1, 40]), seed=5)\
+            .generate_synapse_list(Vertex(700), Vertex(600), 1.0, 1)
+        block_list.BLOCK_ATOMS = 100
+        self.assertEqual((list(block_list.get_row_lengths()),
+                          block_list.get_min_max_delay(),
+                          block_list.get_min_weight()), summary)
+
+    def test_flip_weights(self):
+        self.block_list.flip_weights()
+        self.synapse_list.flip_weights()
+        self.assertSameRows(
+            self.block_list.create_delay_sublist(0, 20).create_atom_sublist(
+                0, 699, 0, 599),
+            self.synapse_list.create_delay_sublist(0, 20).create_atom_sublist(
+                0, 699, 0, 599))
+
+    def test_other_connectors(self):
+        for connector in (AllToAllConnector(
+                              weights=RandomDistribution("normal", [1, 0.1])),
+                          FixedNumberPreConnector(20, weights=2.0)):
+            block_list = connector.generate_synapse_list(
+                Vertex(300), Vertex(400), 1.0, 0)
+            self.assertEqual(block_list.__class__, BlockSynapticList)
+            synapse_list = SynapticList(block_list.get_rows())
+            self.assertSameRows(
+                block_list.create_atom_sublist(100, 299, 128, 333),
+                synapse_list.create_atom_sublist(100, 299, 128, 333))
+
+
+MEMORY_SCRIPT = """
+import resource
+import sys
+
+from pacman103.front.pynn.connectors import FixedProbabilityConnector
+
+class Vertex(object):
+    def __init__(self, atoms):
+        self.atoms = atoms
+
+n_atoms, block_atoms = int(sys.argv[1]), int(sys.argv[2])
+vertex = Vertex(n_atoms)
+synapse_list = FixedProbabilityConnector(0.2, weights=1.0, seed=1)\\
+    .generate_synapse_list(vertex, vertex, 1.0, 0)
+start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+min_delay, max_delay = synapse_list.get_min_max_delay()
+n_connections = 0
+for pre_lo_atom in range(0, n_atoms, block_atoms):
+    for post_lo_atom in range(0, n_atoms, block_atoms):
+        block = synapse_list.create_atom_sublist(
+            pre_lo_atom, pre_lo_atom + block_atoms - 1,
+            post_lo_atom, post_lo_atom + block_atoms - 1)
+        n_connections += int(block.get_row_lengths().sum())
+        block = None
+end = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print n_connections, (end - start) * 1024
+"""
+
+
+class BlockSynapticListMemoryTestCase(unittest.TestCase):
+    """
+    Measures the peak memory used to generate all of the blocks of networks
+    of increasing size, which should track the size of the largest block
+    rather than the size of the network.
+    """
+
+    def measure(self, n_atoms, block_atoms):
+        output = subprocess.check_output(
+            [sys.executable, "-c", MEMORY_SCRIPT, str(n_atoms),
+             str(block_atoms)], cwd=ROOT)
+        n_connections, peak_bytes = [int(value)
+                                     for value in output.split()[-2:]]
+        logger.info("Generated %d connections in blocks of %d atoms with a "
+                    "peak of %.1f MB" % (n_connections, block_atoms,
+                                         peak_bytes / 1048576.0))
+        return n_connections, peak_bytes
+
+    def test_peak_memory(self):
+        small_connections, small_peak = self.measure(2000, 256)
+        large_connections, large_peak = self.measure(8000, 256)
+
+        # The large network has 16 times as many connections, each of which
+        # would take at least 20 bytes if held as a whole
+        self.assertTrue(large_connections > 15 * small_connections)
+        self.assertTrue(large_peak < (large_connections * 20) / 10)
+        self.assertTrue(large_peak < small_peak + (16 * 1048576))
+
+
+if __name__ == "__main__":
+    unittest.main()
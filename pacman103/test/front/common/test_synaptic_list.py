@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Tests for the compressed sparse row form of
+pacman103.front.common.synaptic_list.SynapticList, against the behaviour of
+a list of SynapseRowInfo objects.
+"""
+
+import logging
+import time
+import unittest
+
+import numpy
+
+from pacman103.front.pynn.synapse_dynamics.\
+    weight_based_plastic_synapse_row_io import WeightBasedPlasticSynapseRowIo
+from pacman103.front.common.fixed_synapse_row_io import FixedSynapseRowIO
+from pacman103.front.common.synapse_row_info import SynapseRowInfo
+from pacman103.front.common.synaptic_list import SynapticList
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def random_rows(rng, n_rows, n_targets, max_connections):
+    rows = list()
+    for _ in range(n_rows):
+        n_connections = rng.randint(0, max_connections + 1)
+        rows.append(SynapseRowInfo(
+            rng.randint(0, n_targets, n_connections),
+            rng.uniform(-2.0, 2.0, n_connections),
+            rng.randint(1, 40, n_connections),
+            rng.randint(0, 2, n_connections)))
+    return rows
+
+
+def row_tuples(rows):
+    return [(list(row.target_indices), list(row.weights), list(row.delays),
+             list(row.synapse_types)) for row in rows]
+
+
+class SynapticListTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = random_rows(numpy.random.RandomState(4), 60, 300, 30)
+        self.synapse_list = SynapticList(row_tuples_to_rows(self.rows))
+        self.synapse_list.get_n_connections(0, 1)  # use the flat arrays
+
+    def test_get_rows(self):
+        self.assertEqual(row_tuples(self.synapse_list.get_rows()),
+                         row_tuples(self.rows))
+        self.assertEqual(self.synapse_list.get_n_rows(), 60)
+
+    def test_atom_sublist(self):
+        for (from_lo, from_hi, to_lo, to_hi) in [(0, 59, 0, 299),
+                                                (10, 30, 100, 199),
+                                                (50, 99, 250, 400),
+                                                (70, 80, 0, 10)]:
+            expected = [row.get_sub_row_by_atom(to_lo, to_hi)
+                        for row in self.rows[from_lo:from_hi + 1]]
+            sublist = self.synapse_list.create_atom_sublist(
+                from_lo, from_hi, to_lo, to_hi)
+            self.assertEqual(row_tuples(sublist.get_rows()),
+                             row_tuples(expected))
+            self.assertEqual(row_tuples(self.synapse_list.get_atom_sublist(
+                from_lo, from_hi, to_lo, to_hi)), row_tuples(expected))
+            self.assertEqual(
+                self.synapse_list.is_connected(from_lo, from_hi, to_lo,
+                                               to_hi),
+                any(len(row.target_indices) > 0 for row in expected))
+
+    def test_delay_sublist(self):
+        expected = [row.get_sub_row_by_delay(5, 20) for row in self.rows]
+        self.assertEqual(row_tuples(self.synapse_list.get_delay_sublist(5, 20)),
+                         row_tuples(expected))
+
+    def test_summaries(self):
+        self.assertEqual(self.synapse_list.get_max_n_connections(),
+                         max(len(row.target_indices) for row in self.rows))
+        self.assertEqual(self.synapse_list.get_max_n_connections(100, 199),
+                         max(row.get_n_connections(100, 199)
+                             for row in self.rows))
+        self.assertEqual(self.synapse_list.get_min_max_delay(),
+                         (min(row.get_min_delay() for row in self.rows),
+                          max(row.get_max_delay() for row in self.rows)))
+        self.assertEqual(self.synapse_list.get_max_weight(),
+                         max(row.get_max_weight() for row in self.rows))
+        self.assertEqual(self.synapse_list.get_min_weight(),
+                         min(row.get_min_weight() for row in self.rows))
+
+        full_rows = [row for row in self.rows if len(row.target_indices) > 0]
+        full_list = SynapticList(row_tuples_to_rows(full_rows))
+        self.assertEqual(full_list.get_min_max_delay()[0],
+                         min(row.get_min_delay() for row in full_rows))
+        self.assertEqual(full_list.get_min_weight(),
+                         min(row.get_min_weight() for row in full_rows))
+
+    def test_sum_weights(self):
+        exc = numpy.zeros(300)
+        inh = numpy.zeros(300)
+        self.synapse_list.sum_weights(exc, inh)
+        expected_exc = numpy.zeros(300)
+        expected_inh = numpy.zeros(300)
+        for row in self.rows:
+            for index, weight in zip(row.target_indices, row.weights):
+                if weight > 0:
+                    expected_exc[index] += weight
+                else:
+                    expected_inh[index] += abs(weight)
+        self.assertTrue(numpy.allclose(exc, expected_exc))
+        self.assertTrue(numpy.allclose(inh, expected_inh))
+
+    def test_max_n_words(self):
+        for row_io in (FixedSynapseRowIO(), WeightBasedPlasticSynapseRowIo(3)):
+            for lo_atom, hi_atom in [(None, None), (5, 17), (100, 199)]:
+                self.assertEqual(
+                    row_io.get_max_n_words(self.synapse_list, lo_atom,
+                                           hi_atom),
+                    max(row_io.get_n_words(row, lo_atom, hi_atom)
+                        for row in self.rows))
+
+    def test_max_n_connections_table(self):
+        # The maxima of one lo_atom are tabulated, including ranges beyond
+        # the last target and empty ranges
+        for lo_atom in (0, 37, 150, 299, 320):
+            for hi_atom in (lo_atom - 1, lo_atom, lo_atom + 1, lo_atom + 62,
+                            lo_atom + 100, 299, 500):
+                self.assertEqual(
+                    self.synapse_list.get_max_n_connections(lo_atom, hi_atom),
+                    numpy.amax(self.synapse_list.get_n_connections(
+                        lo_atom, hi_atom)))
+
+        # Repeated targets in a row are counted each time
+        synapse_list = SynapticList(row_tuples_to_rows([
+            SynapseRowInfo([4, 2, 4, 4], [1.0] * 4, [1] * 4, [0] * 4),
+            SynapseRowInfo([1, 2, 3], [1.0] * 3, [1] * 3, [0] * 3)]))
+        self.assertEqual([synapse_list.get_max_n_connections(1, hi_atom)
+                          for hi_atom in range(1, 6)], [1, 2, 3, 4, 4])
+
+    def test_rows_are_the_master_copy(self):
+        self.synapse_list.get_max_n_connections(7, 7)
+        rows = self.synapse_list.get_rows()
+        rows[3] = SynapseRowInfo([7], [0.5], [2], [1])
+        self.assertEqual(self.synapse_list.get_max_n_connections(7, 7),
+                         max(1, max(row.get_n_connections(7, 7)
+                                    for row in self.rows)))
+        self.assertEqual(row_tuples(self.synapse_list.get_rows())[3],
+                         ([7], [0.5], [2], [1]))
+
+    def test_flip_weights_and_append(self):
+        other = SynapticList(row_tuples_to_rows(self.rows[:5]))
+        other.flip_weights()
+        self.synapse_list.append(other)
+        rows = self.synapse_list.get_rows()
+        self.assertEqual(len(rows), 65)
+        self.assertEqual(list(rows[60].weights), list(-self.rows[0].weights))
+
+    def test_from_connections(self):
+        synapse_list = SynapticList.from_connections(
+            4, [2, 0, 2, 1, 0], [5, 6, 7, 8, 9], 1.5, [1, 2, 3, 4, 5], 0)
+        self.assertEqual(row_tuples(synapse_list.get_rows()),
+                         [([6, 9], [1.5, 1.5], [2, 5], [0, 0]),
+                          ([8], [1.5], [4], [0]),
+                          ([5, 7], [1.5, 1.5], [1, 3], [0, 0]),
+                          ([], [], [], [])])
+
+
+def row_tuples_to_rows(rows):
+    return [SynapseRowInfo(row.target_indices.copy(), row.weights.copy(),
+                           row.delays.copy(), row.synapse_types.copy())
+            for row in rows]
+
+
+@benchmark
+class SynapticListBenchmark(unittest.TestCase):
+    """
+    Splits a projection from 16k atoms into sublists for cores of 256 atoms,\
+    comparing against the previous list of rows.
+    """
+
+    def create_atom_sublists(self, synapse_list, n_atoms):
+        start = time.time()
+        n_synapses = 0
+        for pre_lo_atom in range(0, n_atoms, 256 * 8):
+            for post_lo_atom in range(0, n_atoms, 256):
+                rows = synapse_list.get_atom_sublist(
+                    pre_lo_atom, pre_lo_atom + 256 - 1, post_lo_atom,
+                    post_lo_atom + 256 - 1)
+                n_synapses += sum([len(row.target_indices) for row in rows])
+        return n_synapses, time.time() - start
+
+    def test_create_atom_sublists(self):
+        n_atoms = 16 * 1024
+        rng = numpy.random.RandomState(5)
+        n_connections = n_atoms * 100
+        synapse_list = SynapticList.from_connections(
+            n_atoms, rng.randint(0, n_atoms, n_connections),
+            rng.randint(0, n_atoms, n_connections), 1.0,
+            rng.randint(1, 16, n_connections), 0)
+        row_lengths = synapse_list.get_row_lengths()
+        rows = row_tuples_to_rows(synapse_list.get_rows())
+        row_list = SynapticList(rows)
+        row_list.get_atom_sublist = lambda *atoms: map(
+            lambda row: row.get_sub_row_by_atom(atoms[2], atoms[3]),
+            rows[atoms[0]:atoms[1] + 1])
+
+        n_synapses, elapsed = self.create_atom_sublists(synapse_list, n_atoms)
+        row_n_synapses, row_elapsed = self.create_atom_sublists(row_list,
+                                                                n_atoms)
+        logger.info("Created sublists in %.3f s from rows and in %.3f s from "
+                    "flat arrays" % (row_elapsed, elapsed))
+        self.assertEqual(n_synapses, row_n_synapses)
+        self.assertEqual(n_synapses, sum(
+            [numpy.sum(row_lengths[lo_atom:lo_atom + 256])
+             for lo_atom in range(0, n_atoms, 256 * 8)]))
+        self.assertTrue(elapsed < row_elapsed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+"""
+Tests for the writing of synaptic blocks by
+pacman103.front.common.synaptic_manager.SynapticManager
+"""
+
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from pacman103.front.pynn.synapse_dynamics.\
+    weight_based_plastic_synapse_row_io import WeightBasedPlasticSynapseRowIo
+from pacman103.core.utilities import packet_conversions
+from pacman103.front.common.fixed_synapse_row_io import FixedSynapseRowIO
+from pacman103.front.common.projection_subedge import ProjectionSubedge
+from pacman103.front.common.synapse_row_info import SynapseRowInfo
+from pacman103.front.common.synaptic_list import SynapticList
+from pacman103.front.common.synaptic_manager import SynapticManager
+from pacman103.test.lib.test_data_spec_gen import SpecDAO, execute
+
+MASTER_POP_TABLE = 2
+SYNAPTIC_MATRIX = 1
+
+
+class BlockSynapticManager(SynapticManager):
+
+    def get_n_synapse_type_bits(self):
+        return 1
+
+
+class RowSynapticManager(BlockSynapticManager):
+    """
+    Writes synaptic blocks row by row, as SynapticManager previously did.
+    """
+
+    def writeSynapseRowInfo(self, sublist, rowIO, spec, currentWritePtr,
+            fixedRowLength, region, weight_scale, n_synapse_type_bits):
+        spec.switchWriteFocus(region)
+        writePtr = currentWritePtr
+        if (writePtr & 0x3FF) != 0:
+            writePtr = (writePtr & 0xFFFFFC00) + 0x400
+            numPaddingBytes = writePtr - currentWritePtr
+            spec.moveToReg(destReg = 15, data = numPaddingBytes)
+            spec.write(data = 0xDD, repeatReg = 15, sizeof='uint8')
+        blockStartAddr = writePtr
+
+        for row in sublist.get_rows():
+            wordsWritten = 0
+            plastic_region = rowIO.get_packed_plastic_region(row, weight_scale,
+                    n_synapse_type_bits)
+            spec.write(data = len(plastic_region), sizeof = "uint32")
+            wordsWritten += 1
+            spec.write_array(data = plastic_region)
+            wordsWritten += len(plastic_region)
+
+            fixed_fixed_region = numpy.asarray(
+                    rowIO.get_packed_fixed_fixed_region(row, weight_scale,
+                                                        n_synapse_type_bits),
+                                                        dtype="uint32")
+            fixed_plastic_region = numpy.asarray(
+                    rowIO.get_packed_fixed_plastic_region(row, weight_scale,
+                                                          n_synapse_type_bits),
+                                                          dtype="uint16")
+            spec.write(data = len(fixed_fixed_region), sizeof = "uint32")
+            spec.write(data = len(fixed_plastic_region), sizeof = "uint32")
+            wordsWritten += 2
+            spec.write_array(data = fixed_fixed_region)
+            wordsWritten += len(fixed_fixed_region)
+
+            if (len(fixed_plastic_region) % 2) != 0:
+                fixed_plastic_region = numpy.asarray(numpy.append(
+                        fixed_plastic_region, 0), dtype='uint16')
+            fixed_plastic_region_words = fixed_plastic_region.view(
+                    dtype="uint32")
+            spec.write_array(data = fixed_plastic_region_words)
+            wordsWritten += len(fixed_plastic_region_words)
+
+            writePtr += (4 * wordsWritten)
+            padding = ((fixedRowLength + self.SYNAPTIC_ROW_HEADER_WORDS)
+                       - wordsWritten)
+            if padding != 0:
+                spec.write(data=0xBBCCDDEE, repeats=padding, sizeof='uint32')
+                writePtr += 4 * padding
+
+        return blockStartAddr, writePtr
+
+
+class CountingRowIO(FixedSynapseRowIO):
+    """
+    Counts the scans for the longest row of a synapse list.
+    """
+
+    def __init__(self):
+        self.n_scans = 0
+
+    def get_max_n_words(self, synapse_list, lo_atom=None, hi_atom=None):
+        self.n_scans += 1
+        return super(CountingRowIO, self).get_max_n_words(synapse_list,
+                                                          lo_atom, hi_atom)
+
+
+class Edge(object):
+
+    def __init__(self, synapse_list, synapse_row_io):
+        self.subedges = list()
+        self.synapse_list = synapse_list
+        self.synapse_row_io = synapse_row_io
+
+    def get_synapse_row_io(self):
+        return self.synapse_row_io
+
+
+class Subvertex(object):
+
+    def __init__(self, lo_atom, hi_atom):
+        self.lo_atom = lo_atom
+        self.hi_atom = hi_atom
+        self.in_subedges = list()
+        self.out_subedges = list()
+
+
+def random_sublist(rng, n_rows, max_connections):
+    rows = list()
+    for _ in range(n_rows):
+        n_connections = rng.randint(0, max_connections + 1)
+        rows.append(SynapseRowInfo(
+            rng.randint(0, 256, n_connections),
+            rng.uniform(-2.0, 2.0, n_connections),
+            rng.randint(1, 16, n_connections),
+            rng.randint(0, 2, n_connections)))
+    return SynapticList(rows)
+
+
+class SynapticBlockTestCase(unittest.TestCase):
+    """
+    Compares the executed synaptic matrix written block by block against the\
+    matrix written row by row.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        rng = numpy.random.RandomState(3)
+        self.sublists = [random_sublist(rng, n_rows, max_connections)
+                         for n_rows, max_connections
+                         in [(7, 5), (100, 40), (1, 0), (33, 120)]]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_matrix(self, manager, rowIO, addresses):
+        def write(spec):
+            spec.reserveMemRegion(SYNAPTIC_MATRIX, 256 * 1024)
+            next_block_start_addr = 0
+            for sublist in self.sublists:
+                max_row_length = max([rowIO.get_n_words(row)
+                                      for row in sublist.get_rows()])
+                row_length = manager.selectMinimumRowLength(max_row_length)[1]
+                (block_start_addr, next_block_start_addr) = \
+                    manager.writeSynapseRowInfo(sublist, rowIO, spec,
+                            next_block_start_addr, row_length,
+                            SYNAPTIC_MATRIX, 100.0,
+                            manager.get_n_synapse_type_bits())
+                addresses.append((block_start_addr, next_block_start_addr))
+        return write
+
+    def check_row_io(self, rowIO):
+        row_addresses = list()
+        by_row = execute(
+            self.write_matrix(RowSynapticManager(), rowIO, row_addresses),
+            SpecDAO(self.directory, False))
+        block_addresses = list()
+        by_block = execute(
+            self.write_matrix(BlockSynapticManager(), rowIO, block_addresses),
+            SpecDAO(self.directory, True))
+        self.assertEqual(block_addresses, row_addresses)
+        self.assertEqual(by_block, by_row)
+        self.assertEqual(by_block[SYNAPTIC_MATRIX][0] * 4,
+                         block_addresses[-1][1])
+
+    def test_fixed_synapses(self):
+        self.check_row_io(FixedSynapseRowIO())
+
+    def test_plastic_synapses(self):
+        self.check_row_io(WeightBasedPlasticSynapseRowIo(2))
+
+    def test_unaligned_write_pointer(self):
+        def write(spec):
+            spec.reserveMemRegion(SYNAPTIC_MATRIX, 4096)
+            BlockSynapticManager().writeSynapseRowInfo(self.sublists[0],
+                    FixedSynapseRowIO(), spec, 2, 8, SYNAPTIC_MATRIX, 1.0, 1)
+        self.assertRaises(Exception, execute, write,
+                          SpecDAO(self.directory, True))
+
+    def test_rows_scanned_once(self):
+
+        # The row lengths found when the matrix is sized are used to write it
+        post = Subvertex(0, 255)
+        for p, sublist in enumerate(self.sublists):
+            subedge = ProjectionSubedge(Edge(sublist, CountingRowIO()),
+                                        Subvertex(0, 255), post)
+            subedge.key = packet_conversions.get_key_from_coords(0, 1, p + 1)
+
+        def write(manager, sized):
+            def write_spec(spec):
+                spec.reserveMemRegion(MASTER_POP_TABLE,
+                        SynapticManager.MASTER_POPULATION_TABLE_SIZE)
+                spec.reserveMemRegion(SYNAPTIC_MATRIX, 256 * 1024)
+                manager.writeSynapticMatrixAndMasterPopulationTable(spec,
+                        post, sized, 100.0, MASTER_POP_TABLE,
+                        SYNAPTIC_MATRIX)
+            return write_spec
+
+        unsized = execute(write(BlockSynapticManager(), 256 * 1024),
+                          SpecDAO(self.directory, True))
+        for subedge in post.in_subedges:
+            subedge.edge.synapse_row_io.n_scans = 0
+        manager = BlockSynapticManager()
+        sized = execute(
+            write(manager, manager.getExactSynapticBlockMemorySize(post)),
+            SpecDAO(self.directory, True))
+        self.assertEqual(sized, unsized)
+        for subedge in post.in_subedges:
+            self.assertEqual(subedge.edge.synapse_row_io.n_scans, 1)
+
+    def test_row_too_long(self):
+        manager = BlockSynapticManager()
+        self.assertRaises(Exception, manager._pack_synaptic_block,
+                          self.sublists[1], FixedSynapseRowIO(), 8, 1.0, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
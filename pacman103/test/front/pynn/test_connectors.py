@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+"""
+Tests for the bulk generation of synaptic lists by the connectors of
+pacman103.front.pynn.connectors, against the row by row generation they
+replace.
+"""
+
+import logging
+import time
+import unittest
+
+import numpy
+
+from pacman103.front.pynn.connectors import AllToAllConnector
+from pacman103.front.pynn.connectors import FixedNumberPreConnector
+from pacman103.front.pynn.connectors import FixedProbabilityConnector
+from pacman103.front.pynn.connectors import FromListConnector
+from pacman103.front.pynn.connectors import MultapseConnector
+from pacman103.front.pynn.connectors import OneToOneConnector
+from pacman103.front.common.randomDistributions import generateParameter
+from pacman103.front.common.randomDistributions import generateParameterArray
+from pacman103.front.common.synapse_row_info import SynapseRowInfo
+from pacman103.front.common.synaptic_list import SynapticList
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+class Vertex(object):
+
+    def __init__(self, atoms):
+        self.atoms = atoms
+
+
+def row_tuples(synapse_list):
+    return [(list(row.target_indices), list(row.weights), list(row.delays),
+             list(row.synapse_types)) for row in synapse_list.get_rows()]
+
+
+def rows_from_list(conn_list, n_pre, delay_scale, synapse_type):
+    """
+    The row by row generation of FromListConnector
+    """
+    rows = [([], [], [], []) for _ in range(n_pre)]
+    for i, conn in enumerate(conn_list):
+        row = rows[generateParameter(conn[0], i)]
+        row[0].append(generateParameter(conn[1], i))
+        row[1].append(generateParameter(conn[2], i))
+        row[2].append(generateParameter(conn[3], i) * delay_scale)
+        row[3].append(synapse_type)
+    return SynapticList([SynapseRowInfo(*row) for row in rows])
+
+
+def rows_with_probability(p_connect, weights, delays, n_pre, n_post,
+                          delay_scale, synapse_type):
+    """
+    The row by row generation of FixedProbabilityConnector
+    """
+    rows = list()
+    for _ in range(n_pre):
+        present = numpy.random.rand(n_post) <= p_connect
+        n_present = numpy.sum(present)
+        ids = numpy.where(present)[0]
+        rows.append(SynapseRowInfo(
+            ids, generateParameterArray(weights, n_present, present),
+            generateParameterArray(delays, n_present, present) * delay_scale,
+            numpy.ones(len(ids), dtype="uint32") * synapse_type))
+    return SynapticList(rows)
+
+
+class ConnectorTestCase(unittest.TestCase):
+
+    def test_all_to_all(self):
+        weights = list(numpy.linspace(0.5, 1.5, 7))
+        synapse_list = AllToAllConnector(weights=weights, delays=2)\
+            .generate_synapse_list(Vertex(5), Vertex(7), 10.0, 1)
+        self.assertEqual(row_tuples(synapse_list),
+                         [(range(7), weights, [20] * 7, [1] * 7)] * 5)
+
+    def test_one_to_one(self):
+        synapse_list = OneToOneConnector(weights=[1.0, 2.0, 3.0], delays=1)\
+            .generate_synapse_list(Vertex(3), Vertex(3), 1.0, 0)
+        self.assertEqual(row_tuples(synapse_list),
+                         [([0], [1.0], [1], [0]), ([1], [2.0], [1], [0]),
+                          ([2], [3.0], [1], [0])])
+
+    def test_from_list(self):
+        rng = numpy.random.RandomState(2)
+        conn_list = [(int(rng.randint(0, 20)), int(rng.randint(0, 30)),
+                      float(rng.uniform(0, 2)), int(rng.randint(1, 16)))
+                     for _ in range(500)]
+        synapse_list = FromListConnector(conn_list).generate_synapse_list(
+            Vertex(25), Vertex(30), 1.0, 1)
+        self.assertEqual(row_tuples(synapse_list),
+                         row_tuples(rows_from_list(conn_list, 25, 1.0, 1)))
+
+    def test_from_list_generated_values(self):
+        conn_list = [(1, 0, [0.5, 0.25], 1), (0, 1, [0.5, 0.25], 2)]
+        synapse_list = FromListConnector(conn_list).generate_synapse_list(
+            Vertex(2), Vertex(2), 1.0, 0)
+        self.assertEqual(row_tuples(synapse_list),
+                         [([1], [0.25], [2], [0]), ([0], [0.5], [1], [0])])
+
+    def test_from_empty_list(self):
+        synapse_list = FromListConnector([]).generate_synapse_list(
+            Vertex(4), Vertex(4), 1.0, 0)
+        self.assertEqual(synapse_list.get_n_rows(), 4)
+        self.assertEqual(list(synapse_list.get_row_lengths()), [0] * 4)
+
+    def test_fixed_probability(self):
+        synapse_list = FixedProbabilityConnector(
+            0.1, weights=0.5, delays=3, seed=1).generate_synapse_list(
+                Vertex(300), Vertex(400), 1.0, 1)
+        n_connections = numpy.sum(synapse_list.get_row_lengths())
+        self.assertTrue(abs(n_connections - 12000) < 4 * numpy.sqrt(10800))
+        for row in synapse_list.get_rows():
+            self.assertEqual(list(row.target_indices),
+                             sorted(set(row.target_indices)))
+            self.assertTrue(numpy.all(row.target_indices < 400))
+        self.assertEqual(synapse_list.get_min_max_delay(), (3, 3))
+
+    def test_fixed_probability_limits(self):
+        for p_connect, n_connections in ((0.0, 0), (1.0, 12)):
+            synapse_list = FixedProbabilityConnector(p_connect)\
+                .generate_synapse_list(Vertex(3), Vertex(4), 1.0, 0)
+            self.assertEqual(numpy.sum(synapse_list.get_row_lengths()),
+                             n_connections)
+
+    def test_fixed_number_pre(self):
+        synapse_list = FixedNumberPreConnector(3, weights=1.0, seed=4)\
+            .generate_synapse_list(Vertex(10), Vertex(6), 1.0, 0)
+        row_lengths = synapse_list.get_row_lengths()
+        self.assertEqual(sorted(row_lengths), [0] * 7 + [6] * 3)
+
+    def test_multapse(self):
+        synapse_list = MultapseConnector(500, weights=1.0, delays=2, seed=3)\
+            .generate_synapse_list(Vertex(10), Vertex(20), 1.0, 0)
+        self.assertEqual(numpy.sum(synapse_list.get_row_lengths()), 500)
+        self.assertEqual(synapse_list.get_min_max_delay(), (2, 2))
+
+    def test_seed_is_reproducible(self):
+        for connector, parameter in ((FixedProbabilityConnector, 0.2),
+                                     (FixedNumberPreConnector, 50),
+                                     (MultapseConnector, 500)):
+            lists = [connector(parameter, seed=seed).generate_synapse_list(
+                Vertex(100), Vertex(100), 1.0, 0) for seed in (7, 7, 8)]
+            self.assertEqual(row_tuples(lists[0]), row_tuples(lists[1]))
+            self.assertNotEqual(row_tuples(lists[0]), row_tuples(lists[2]))
+
+
+@benchmark
+class ConnectorBenchmark(unittest.TestCase):
+    """
+    Compares the time taken to generate synaptic lists of 10^3 to 10^6
+    connections in bulk and row by row.
+    """
+
+    def time(self, generate):
+        start = time.time()
+        synapse_list = generate()
+        synapse_list.get_max_n_connections()
+        return time.time() - start
+
+    def test_fixed_probability(self):
+        for n_atoms in (100, 320, 1000, 3200):
+            vertex = Vertex(n_atoms)
+            connector = FixedProbabilityConnector(0.1, weights=1.0)
+            bulk = self.time(lambda: connector.generate_synapse_list(
+                vertex, vertex, 1.0, 0))
+            rows = self.time(lambda: rows_with_probability(
+                0.1, 1.0, 1, n_atoms, n_atoms, 1.0, 0))
+            logger.info("FixedProbabilityConnector with %d connections: "
+                        "%.3f s in bulk, %.3f s by row"
+                        % (n_atoms * n_atoms / 10, bulk, rows))
+        self.assertTrue(bulk < rows)
+
+    def test_from_list(self):
+        rng = numpy.random.RandomState(1)
+        for n_connections in (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6):
+            conn_list = zip(rng.randint(0, 1000, n_connections).tolist(),
+                            rng.randint(0, 1000, n_connections).tolist(),
+                            rng.uniform(0, 1, n_connections).tolist(),
+                            rng.randint(1, 16, n_connections).tolist())
+            vertex = Vertex(1000)
+            bulk = self.time(lambda: FromListConnector(conn_list)
+                             .generate_synapse_list(vertex, vertex, 1.0, 0))
+            rows = self.time(lambda: rows_from_list(conn_list, 1000, 1.0, 0))
+            logger.info("FromListConnector with %d connections: "
+                        "%.3f s in bulk, %.3f s by row"
+                        % (n_connections, bulk, rows))
+        self.assertTrue(bulk < rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
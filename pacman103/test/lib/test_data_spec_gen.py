@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+"""
+Tests for the direct execution of Data Specs by
+pacman103.lib.data_spec_gen.DataSpec on the host-based Spec Executor.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103.core import data_spec_executor
+from pacman103.lib import data_spec_gen
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+class SpecDAO(object):
+    """
+    Stands in for the DAO, holding only what a DataSpec needs.
+    """
+
+    def __init__(self, directory, direct, write_executed_specs=False):
+        self.directory = directory
+        self.writeBinarySpecs = True
+        self.writeTextSpecs = False
+        self.specExecDirect = direct
+        self.writeExecutedSpecs = write_executed_specs
+        self.spec_executor = data_spec_executor.SpecExecutor()
+        self.time_scale_factor = 1
+        self.machineTimeStep = 1000
+
+    def get_binaries_directory(self):
+        return self.directory
+
+    def get_reports_directory(self, subdirectory=None):
+        return self.directory
+
+
+class SpecMachine(object):
+    hostname = "test"
+
+
+class SpecChip(object):
+    machine = SpecMachine()
+    sdramUsed = 0
+
+
+class SpecProcessor(object):
+    """
+    Stands in for processor 1 of chip (0, 0) of a machine called "test".
+    """
+
+    def __init__(self):
+        self.chip = SpecChip()
+
+    def get_coordinates(self):
+        return 0, 0, 1
+
+
+def execute(spec_writer, dao):
+    """
+    Executes the commands made by spec_writer against a new SpecExecutor,\
+    writing the memory image to the directory of the DAO, and returns the\
+    resulting memory regions.
+    """
+    dao.spec_executor.setup(data_spec_executor.Chip(0, 0))
+    spec = data_spec_gen.DataSpec(SpecProcessor(), dao)
+    spec.initialise(0xABCD, dao)
+    spec_writer(spec)
+    spec.endSpec()
+    spec.closeSpecFile()
+    dao.spec_executor.finish(
+        os.path.join(dao.directory, "test_appData_0_0_1.dat"))
+    return memory_regions(dao.spec_executor)
+
+
+def memory_regions(spec_executor):
+    return [(s.wr_ptr_aligned, s.wr_ptr_offset, list(s.memory))
+            if s is not None else None
+            for s in spec_executor.memory_slots]
+
+
+def write_mixed(spec):
+    spec.reserveMemRegion(1, 64)
+    spec.reserveMemRegion(2, 400)
+    spec.switchWriteFocus(1)
+    spec.write(data=0xBE, sizeof="uint8")
+    spec.write(data=0xBEEF, repeats=3, sizeof="uint16")
+    spec.write(data=-5, repeats=2)
+    spec.write(data=0x12345678, sizeof="uint32")
+    spec.write(data=0x7F, repeats=3, sizeof="int8")
+    spec.switchWriteFocus(2)
+    spec.write(data=7, repeats=20)
+    spec.write_array(numpy.arange(50, dtype=numpy.int32) - 25)
+    spec.write_array([])
+    spec.write_array([[1, 2], [3, 4]])
+    spec.switchWriteFocus(1)
+    spec.write(data=0xFFFFFFFF)
+
+
+class DirectExecutionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_matches_encoded_execution(self):
+        encoded = execute(write_mixed, SpecDAO(self.directory, False))
+        direct = execute(write_mixed, SpecDAO(self.directory, True))
+        self.assertEqual(direct, encoded)
+        self.assertEqual(direct[2][0], 20 + 50 + 4)
+
+    def test_repeated_words_out_of_range(self):
+        def write_too_many(spec):
+            spec.reserveMemRegion(1, 12)
+            spec.switchWriteFocus(1)
+            spec.write(data=1)
+            spec.write(data=1, repeats=3)
+        for direct in (False, True):
+            self.assertRaisesRegexp(
+                Exception, "Cannot write 3 words from word 1 of memory slot "
+                "of size 3",
+                execute, write_too_many, SpecDAO(self.directory, direct))
+
+    def test_write_executed_specs(self):
+        dao = SpecDAO(self.directory, True, write_executed_specs=True)
+        direct = execute(write_mixed, dao)
+
+        # Executing the binary spec written alongside gives the same memory
+        spec_file = os.path.join(self.directory, "test_dataSpec_0_0_1.dat")
+        spec_executor = data_spec_executor.SpecExecutor()
+        spec_executor(spec_file, os.path.join(self.directory, "appData.dat"),
+                      data_spec_executor.Chip(0, 0))
+        self.assertEqual(memory_regions(spec_executor), direct)
+
+    def test_no_spec_file_by_default(self):
+        execute(write_mixed, SpecDAO(self.directory, True))
+        self.assertEqual(os.listdir(self.directory),
+                         ["test_appData_0_0_1.dat"])
+
+
+@benchmark
+class DirectExecutionBenchmark(unittest.TestCase):
+    """
+    Compares the time taken to generate the Data Specs of a large population\
+    with and without direct execution.
+    """
+
+    def test_population_data_spec(self):
+        import pacman103.front.pynn as pynn
+        from pacman103.store import machines
+
+        directory = tempfile.mkdtemp()
+        machines.machines["benchmark"] = {"hostname": "benchmark",
+                                          "x": 2, "y": 2, "type": "spinn3"}
+        try:
+            pynn.setup(timestep=1.0, machine="benchmark")
+            pre = pynn.Population(1000, pynn.IF_curr_exp, {})
+            post = pynn.Population(1000, pynn.IF_curr_exp, {})
+            pynn.Projection(pre, post, pynn.FixedProbabilityConnector(
+                0.5, weights=1.0, delays=1.0))
+
+            controller = pynn.controller
+            dao = controller.dao
+            dao.run_time = 100
+            dao.get_binaries_directory = lambda: directory
+            dao.get_reports_directory = lambda subdirectory=None: directory
+            dao.set_hostname("benchmark")
+            controller.execute_partitioning()
+            if not dao.done_placer:
+                controller.execute_placer()
+            controller.execute_key_alloc()
+            controller.filterSubEdges(dao)
+
+            times = dict()
+            images = dict()
+            for direct in (False, True):
+                dao.specExecDirect = direct
+                chips = dict()
+                images[direct] = list()
+                start = time.time()
+                for placement in dao.placements:
+                    x, y, p = placement.processor.get_coordinates()
+                    chip = chips.setdefault(
+                        (x, y), data_spec_executor.Chip(x, y))
+                    dao.spec_executor = data_spec_executor.SpecExecutor()
+                    dao.spec_executor.setup(chip)
+                    placement.subvertex.generateDataSpec(
+                        placement.processor, dao)
+                    images[direct].append(
+                        memory_regions(dao.spec_executor))
+                times[direct] = time.time() - start
+                logger.info("Generated %d data specs in %.3f s with direct "
+                            "execution %s" % (len(dao.placements),
+                                              times[direct], direct))
+        finally:
+            pynn.end()
+            del machines.machines["benchmark"]
+            shutil.rmtree(directory)
+
+        self.assertEqual(images[True], images[False])
+        self.assertTrue(times[True] < times[False])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+A local UDP stand-in for SC&MP, so that the spinnman layer can be tested and
+benchmarked without a board.
+
+Usage::
+
+    with SCAMPEmulator(latency=0.001, drop_rate=0.05, seed=1) as board:
+        txrx = Transceiver("127.0.0.1", board.port)
+        txrx.select(0, 0)
+        txrx.memory_calls.write_mem(0x70000000, scamp.TYPE_WORD, data)
+
+Memory is sparse and zero-initialised per chip.  If ``chips`` is given, only
+those chips exist: requests to any other are answered with
+``RC_P2P_NOREPLY``, and ``CMD_LINK_READ`` reads the memory of the
+neighbouring chip over the link, if there is one.  Responses are delayed by
+``latency`` seconds without blocking the processing of further requests, which
+models the network round trip, and requests can be dropped at random to
+exercise the retransmission logic.
+"""
+
+import heapq
+import random
+import select
+import socket
+import struct
+import threading
+import time
+
+from pacman103.core.spinnman.scp import scamp
+from pacman103.core.spinnman.scp.scp_message import SCPMessage
+
+PAGE_SIZE = 4096
+
+# the offset of the chip at the other end of each link
+LINK_OFFSETS = ((1, 0), (1, 1), (0, 1), (-1, 0), (-1, -1), (0, -1))
+
+
+class SCAMPEmulator(threading.Thread):
+    """
+    Answers SCP requests sent to ``port`` on the local host from a background
+    thread.  ``CMD_READ``, ``CMD_WRITE``, ``CMD_LINK_READ`` and ``CMD_VER``
+    act on the emulated memory; every other command is recorded in :py:attr:`commands` and
+    acknowledged with ``RC_OK``.
+    """
+
+    def __init__(self, latency=0.0, drop_rate=0.0, seed=None,
+                 host="127.0.0.1", chips=None):
+        super(SCAMPEmulator, self).__init__()
+        self.daemon = True
+        self.latency = latency
+        self.drop_rate = drop_rate
+        self._random = random.Random(seed)
+        self.chips = chips
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.bind((host, 0))
+        self.port = self._sock.getsockname()[1]
+
+        self._memory = dict()
+        self._lock = threading.Lock()
+        self._running = True
+
+        # (x, y, cpu, cmd_rc, arg1, arg2, arg3, payload) of other commands
+        self.commands = list()
+        self.n_received = 0
+        self.n_dropped = 0
+        self.n_reads = 0
+        self.n_writes = 0
+        self.n_link_reads = 0
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
+        return False
+
+    def stop(self):
+        self._running = False
+        self.join()
+        self._sock.close()
+
+    def read(self, x, y, address, size):
+        """
+        Returns ``size`` bytes of the emulated memory of chip (x, y).
+        """
+        with self._lock:
+            pages = self._memory.get((x, y), dict())
+            data = bytearray(size)
+            done = 0
+            while done < size:
+                page, start = divmod(address + done, PAGE_SIZE)
+                length = min(PAGE_SIZE - start, size - done)
+                if page in pages:
+                    data[done:done + length] = \
+                        pages[page][start:start + length]
+                done += length
+            return str(data)
+
+    def write(self, x, y, address, data):
+        """
+        Stores ``data`` in the emulated memory of chip (x, y).
+        """
+        with self._lock:
+            pages = self._memory.setdefault((x, y), dict())
+            done = 0
+            while done < len(data):
+                page, start = divmod(address + done, PAGE_SIZE)
+                length = min(PAGE_SIZE - start, len(data) - done)
+                if page not in pages:
+                    pages[page] = bytearray(PAGE_SIZE)
+                pages[page][start:start + length] = data[done:done + length]
+                done += length
+
+    def run(self):
+        due = list()
+        counter = 0
+        while self._running:
+            timeout = 0.01
+            if due:
+                timeout = max(0.0, min(timeout, due[0][0] - time.time()))
+            readable, _, _ = select.select([self._sock], [], [], timeout)
+            if readable:
+                raw, address = self._sock.recvfrom(512)
+                self.n_received += 1
+                if self._random.random() < self.drop_rate:
+                    self.n_dropped += 1
+                else:
+                    response = self._handle(SCPMessage(raw))
+                    counter += 1
+                    heapq.heappush(due, (time.time() + self.latency, counter,
+                                         str(response), address))
+            now = time.time()
+            while due and due[0][0] <= now:
+                _, _, packet, address = heapq.heappop(due)
+                self._sock.sendto(packet, address)
+
+    def chip_exists(self, x, y):
+        if self.chips is None:
+            return x >= 0 and y >= 0
+        return (x, y) in self.chips
+
+    def _handle(self, msg):
+        x, y, cpu = msg.dst_x, msg.dst_y, msg.dst_cpu
+        data = ""
+        rc = scamp.RC_OK
+        if not self.chip_exists(x, y):
+            rc = scamp.RC_P2P_NOREPLY
+        elif msg.cmd_rc == scamp.CMD_READ:
+            self.n_reads += 1
+            data = self.read(x, y, msg.arg1, msg.arg2)
+        elif msg.cmd_rc == scamp.CMD_WRITE:
+            self.n_writes += 1
+            self.write(x, y, msg.arg1, msg.payload[:msg.arg2])
+        elif msg.cmd_rc == scamp.CMD_LINK_READ:
+            self.n_link_reads += 1
+            (dx, dy) = LINK_OFFSETS[msg.arg3]
+            if self.chip_exists(x + dx, y + dy):
+                data = self.read(x + dx, y + dy, msg.arg1, msg.arg2)
+            else:
+                rc = scamp.RC_TIMEOUT
+        elif msg.cmd_rc == scamp.CMD_VER:
+            data = struct.pack("<4B2HI", cpu, cpu, y, x, scamp.SDP_DATA_SIZE,
+                               103, 0) + "SC&MP/Emulator\0"
+        else:
+            self.commands.append((x, y, cpu, msg.cmd_rc, msg.arg1, msg.arg2,
+                                  msg.arg3, msg.payload))
+
+        response = SCPMessage()
+        response.flags = 0x07
+        response.tag = msg.tag
+        response.dst_cpu, response.dst_port = msg.src_cpu, msg.src_port
+        response.dst_x, response.dst_y = msg.src_x, msg.src_y
+        response.src_cpu, response.src_port = cpu, msg.dst_port
+        response.src_x, response.src_y = x, y
+        response.cmd_rc = rc
+        response.seq = msg.seq
+        response.data = data
+        return response
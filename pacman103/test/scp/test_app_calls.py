@@ -0,0 +1,206 @@
+"""
+Tests for flood filling each binary once to all the chips which use it with
+pacman103.core.spinnman.interfaces.transceiver_tools.app_calls, run against
+a local SC&MP emulator which records the flood fill packets, and a benchmark
+of the time taken to load a binary to increasing numbers of chips.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103.core.spinnman.interfaces.transceiver import Transceiver
+from pacman103.core.spinnman.interfaces.transceiver_tools.packet_calls \
+    import NN_CMD_FFS, NN_CMD_FFE
+from pacman103.core.spinnman.interfaces.transceiver_tools.utility import \
+    Utility
+from pacman103.core.spinnman.scp import scamp
+from pacman103.test.scp.scamp_emulator import SCAMPEmulator
+from pacman103.test.scp.test_machine_description import BOARD48_GAPS
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+# the chips of a 48 chip board, in order of their coordinates
+BOARD48 = [(x, y) for y in range(8) for x in range(8)
+           if (x, y) not in BOARD48_GAPS]
+
+
+def decode_region(region):
+    """
+    Returns the set of the (x, y) of the chips within 256x256 selected by a
+    region word
+    """
+    level = (region >> 16) & 3
+    shift = 2 * (3 - level)
+    base_x, base_y = (region >> 24) & 0xFF, (region >> 16) & 0xFC
+    chips = set()
+    for m in range(16):
+        if (region >> m) & 0x1:
+            block_x = base_x + ((m & 3) << shift)
+            block_y = base_y + ((m >> 2) << shift)
+            for x in range(block_x, block_x + (1 << shift)):
+                for y in range(block_y, block_y + (1 << shift)):
+                    chips.add((x, y))
+    return chips
+
+
+def get_flood_fills(board):
+    """
+    Returns a list of the (region, core mask, number of data blocks) of the
+    flood fills of which the emulator received packets
+    """
+    flood_fills = list()
+    for (_, _, _, cmd_rc, arg1, arg2, _, _) in board.commands:
+        if cmd_rc == scamp.CMD_NNP and arg1 >> 24 == NN_CMD_FFS:
+            flood_fills.append([arg2, None, 0])
+        elif cmd_rc == scamp.CMD_FFD:
+            flood_fills[-1][2] += 1
+        elif cmd_rc == scamp.CMD_NNP and arg1 >> 24 == NN_CMD_FFE:
+            flood_fills[-1][1] = arg2 & 0x3ffff
+    return [tuple(flood_fill) for flood_fill in flood_fills]
+
+
+class CalculateRegionsTestCase(unittest.TestCase):
+
+    def assertSelects(self, chips, occupied_chips):
+        regions = Utility.calculate_regions(chips, occupied_chips)
+        selected = set()
+        for region in regions:
+            selected |= decode_region(region)
+        self.assertTrue(set(chips) <= selected)
+        self.assertEqual(selected & set(occupied_chips), set())
+        return regions
+
+    def test_single_chip(self):
+        # A chip among others is selected as a region of one chip would be
+        regions = self.assertSelects([(1, 2)], [(1, 1), (2, 2)])
+        self.assertEqual(regions, [Utility().parse_region(
+            Utility.calculate_region_id(1, 2), None, None)])
+
+    def test_board(self):
+        # All the chips of a board are selected together, whichever are not
+        # on it
+        self.assertEqual(len(self.assertSelects(BOARD48, [])), 1)
+        self.assertEqual(len(self.assertSelects(BOARD48[:40],
+                                                BOARD48[40:])), 2)
+
+    def test_random(self):
+        random = numpy.random.RandomState(4)
+        for _ in range(50):
+            coordinates = [(int(x), int(y)) for (x, y) in
+                           random.randint(0, 80, (300, 2))]
+            n_chips = random.randint(1, 200)
+            chips = set(coordinates[:n_chips])
+            self.assertSelects(chips, set(coordinates[n_chips:]) - chips)
+
+
+class AppLoadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.board = SCAMPEmulator()
+        self.board.start()
+        self.txrx = Transceiver("127.0.0.1", self.board.port)
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "binary.aplx")
+        with open(self.filename, "wb") as f:
+            f.write(numpy.arange(2500, dtype=numpy.uint32).tostring())
+
+    def tearDown(self):
+        self.txrx.conn.close()
+        self.board.stop()
+        shutil.rmtree(self.directory)
+
+    def test_one_flood_fill(self):
+        chip_cores = dict([(chip, range(1, 17)) for chip in BOARD48])
+        loads = self.txrx.app_calls.app_load_targets(
+            self.filename, chip_cores, 30, BOARD48)
+        flood_fills = get_flood_fills(self.board)
+        self.assertEqual(len(flood_fills), 1)
+        (region, mask, n_blocks) = flood_fills[0]
+        self.assertEqual(loads, [(region, mask)])
+        self.assertEqual(mask, 0x1fffe)
+        self.assertEqual(n_blocks, 40)
+        self.assertTrue(set(BOARD48) <= decode_region(region))
+
+    def test_cores_of_chips(self):
+        # The chips using each set of cores are flood filled together, and no
+        # chip is loaded with cores it does not use
+        chip_cores = dict([(chip, range(1, 17)) for chip in BOARD48[:30]])
+        for chip in BOARD48[30:40]:
+            chip_cores[chip] = [1, 2, 3]
+        self.txrx.app_calls.app_load_targets(self.filename, chip_cores, 30,
+                                             BOARD48)
+        loaded = dict()
+        for (region, mask, n_blocks) in get_flood_fills(self.board):
+            self.assertEqual(n_blocks, 40)
+            for chip in decode_region(region) & set(BOARD48):
+                self.assertFalse(chip in loaded)
+                loaded[chip] = mask
+        self.assertEqual(loaded, dict([
+            (chip, sum([1 << core for core in cores]))
+            for (chip, cores) in chip_cores.items()]))
+
+    def test_reload_region(self):
+        # A region word written to the reload steps loads the same chips
+        region = Utility.calculate_regions(BOARD48[:5], BOARD48[5:])[0]
+        self.txrx.app_calls.app_load(self.filename, "0x{:08x}".format(region),
+                                     "1,2,3", 30)
+        self.assertEqual(get_flood_fills(self.board),
+                         [(region, 0xe, 40)])
+
+
+@benchmark
+class AppLoadBenchmark(unittest.TestCase):
+    """
+    Times loading a binary of 10kB to increasing numbers of chips of a 48 chip
+    board with a round trip latency of 1ms, flood filling each chip in turn
+    against flood filling the chips together.
+    """
+
+    def test_load_time(self):
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, "binary.aplx")
+        with open(filename, "wb") as f:
+            f.write(numpy.arange(2500, dtype=numpy.uint32).tostring())
+        try:
+            with SCAMPEmulator(latency=0.001) as board:
+                txrx = Transceiver("127.0.0.1", board.port)
+                try:
+                    for n_chips in (4, 16, 48):
+                        chips = BOARD48[:n_chips]
+                        start = time.time()
+                        for (x, y) in chips:
+                            txrx.app_calls.app_load(
+                                filename, Utility.calculate_region_id(x, y),
+                                "1-16", 30)
+                        per_chip_elapsed = time.time() - start
+
+                        n_commands = len(board.commands)
+                        start = time.time()
+                        loads = txrx.app_calls.app_load_targets(
+                            filename, dict([(chip, range(1, 17))
+                                            for chip in chips]),
+                            30, BOARD48)
+                        elapsed = time.time() - start
+                        self.assertEqual(len(board.commands) - n_commands,
+                                         42 * len(loads))
+                        self.assertTrue(len(loads) <= 2)
+                        self.assertTrue(elapsed < per_chip_elapsed)
+                        logger.info("Loaded {} chips in {:.3f}s flood filling "
+                                    "each chip, and {:.3f}s with {} flood "
+                                    "fills".format(n_chips, per_chip_elapsed,
+                                                   elapsed, len(loads)))
+                finally:
+                    txrx.conn.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,364 @@
+"""
+Tests for the differential load of
+pacman103.core.spinnman.interfaces.transceiver_tools.load_manifest, run
+against a local SC&MP emulator.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103 import conf
+from pacman103.core import output_generator
+from pacman103.core.spinnman.interfaces.transceiver import Transceiver
+from pacman103.core.spinnman.interfaces.transceiver_tools.load_manifest \
+    import LoadManifest, get_ranges
+from pacman103.front import pynn
+from pacman103.front.common.population_vertex import REGIONS
+from pacman103.lib import lib_map
+from pacman103.lib.machine import machine as lib_machine
+from pacman103.test.scp.scamp_emulator import SCAMPEmulator
+from pacman103.test.scp.test_memory_calls import ReloadStepsRecorder
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+BASE_ADDRESS = 0x70000000
+
+
+def random_data(size, seed=0):
+    return numpy.random.RandomState(seed).randint(
+        0, 256, size).astype(numpy.uint8).tostring()
+
+
+def change(data, offset, length):
+    """
+    Returns the data with the bytes from offset inverted
+    """
+    changed = numpy.frombuffer(data, dtype=numpy.uint8).copy()
+    changed[offset:offset + length] ^= 0xFF
+    return changed.tostring()
+
+
+class LoadManifestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_plan(self):
+        manifest = LoadManifest(block_size=256)
+        data = random_data(1000)
+        blocks = manifest.plan(0, 0, BASE_ADDRESS + 100, data)
+        self.assertEqual([(start - BASE_ADDRESS, end - BASE_ADDRESS, dirty)
+                          for (start, end, _, dirty) in blocks],
+                         [(100, 256, True), (256, 512, True),
+                          (512, 768, True), (768, 1024, True),
+                          (1024, 1100, True)])
+        manifest.record(0, 0, blocks)
+
+        changed = change(data, 300, 10)
+        blocks = manifest.plan(0, 0, BASE_ADDRESS + 100, changed)
+        self.assertEqual([dirty for (_, _, _, dirty) in blocks],
+                         [False, True, False, False, False])
+        self.assertEqual(get_ranges(blocks, True),
+                         [(BASE_ADDRESS + 256, BASE_ADDRESS + 512)])
+        self.assertEqual(get_ranges(blocks, False),
+                         [(BASE_ADDRESS + 100, BASE_ADDRESS + 256),
+                          (BASE_ADDRESS + 512, BASE_ADDRESS + 1100)])
+
+        # The same data on another chip, or at another address, is new
+        self.assertTrue(all([dirty for (_, _, _, dirty) in
+                             manifest.plan(0, 1, BASE_ADDRESS + 100, data)]))
+        self.assertTrue(manifest.plan(0, 0, BASE_ADDRESS + 104, data)[0][3])
+
+    def test_record_overlapping(self):
+        manifest = LoadManifest(block_size=256)
+        first = random_data(200, seed=1)
+        second = random_data(200, seed=2)
+        manifest.record(0, 0, manifest.plan(0, 0, BASE_ADDRESS, first))
+        manifest.record(0, 0, manifest.plan(0, 0, BASE_ADDRESS + 200, second))
+
+        # Targets either side of a block boundary are tracked separately
+        self.assertFalse(any([dirty for (_, _, _, dirty) in
+                              manifest.plan(0, 0, BASE_ADDRESS, first)]))
+
+        # Data overwritten by another target is forgotten
+        manifest.record(0, 0, manifest.plan(0, 0, BASE_ADDRESS + 100, second))
+        self.assertTrue(manifest.plan(0, 0, BASE_ADDRESS, first)[0][3])
+
+    def test_read_and_write(self):
+        path = os.path.join(self.directory, "board" + LoadManifest.SUFFIX)
+        manifest = LoadManifest(block_size=512)
+        data = random_data(2000)
+        manifest.record(1, 2, manifest.plan(1, 2, BASE_ADDRESS, data))
+        manifest.write(path)
+
+        read = LoadManifest.read(path, block_size=512)
+        self.assertEqual(read.chips, manifest.chips)
+
+        # A manifest of another block size, or one which cannot be read,
+        # gives an empty manifest
+        self.assertEqual(LoadManifest.read(path, block_size=1024).chips,
+                         dict())
+        with open(path, "wb") as manifest_file:
+            manifest_file.write("not a manifest")
+        self.assertEqual(LoadManifest.read(path, block_size=512).chips,
+                         dict())
+        self.assertEqual(LoadManifest.read(
+            os.path.join(self.directory, "missing"), block_size=512).chips,
+            dict())
+
+
+    def test_plan_written_ranges(self):
+        manifest = LoadManifest(block_size=256)
+        data = random_data(1024)
+        manifest.record(0, 0, manifest.plan(0, 0, BASE_ADDRESS, data))
+
+        # The blocks which the application may have written are written
+        # again although they are unchanged
+        blocks = manifest.plan(0, 0, BASE_ADDRESS, data,
+                               [(BASE_ADDRESS + 300, BASE_ADDRESS + 600),
+                                (BASE_ADDRESS + 1024, BASE_ADDRESS + 2048)])
+        self.assertEqual([dirty for (_, _, _, dirty) in blocks],
+                         [False, True, True, False])
+
+
+class DifferentialLoadTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.board = SCAMPEmulator(seed=3)
+        self.board.start()
+        self.txrx = Transceiver("127.0.0.1", self.board.port)
+        self.txrx.conn._sock.settimeout(0.05)
+        self.txrx.utility = ReloadStepsRecorder()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.txrx.conn.close()
+        self.board.stop()
+        shutil.rmtree(self.directory)
+
+    def write_targets(self, images, name):
+        targets = list()
+        for (i, ((x, y, p, address), data)) in enumerate(sorted(
+                images.items())):
+            filename = os.path.join(self.directory, "%s_%d.dat" % (name, i))
+            with open(filename, "wb") as f:
+                f.write(data)
+            targets.append(lib_map.LoadTarget(filename, x, y, p, address))
+        return targets
+
+    def check_board(self, images):
+        for ((x, y, p, address), data) in images.items():
+            self.assertEqual(self.board.read(x, y, address, len(data)), data)
+
+    def test_differential_load(self):
+        images = dict()
+        for (i, (x, y, p)) in enumerate([(0, 0, 1), (0, 0, 2), (1, 0, 1)]):
+            images[(x, y, p, BASE_ADDRESS + 10000 * p)] = \
+                random_data(4096 + 100 * i, seed=i)
+        manifest = LoadManifest(block_size=1024)
+        statistics = self.txrx.load_targets_raw(
+            self.write_targets(images, "first"), manifest)
+        self.check_board(images)
+        self.assertEqual(statistics.n_bytes, 4096 * 3 + 300)
+        self.assertEqual(statistics.n_bytes_skipped, 0)
+
+        # Only the block which changed is written again
+        images[(0, 0, 2, BASE_ADDRESS + 20000)] = change(
+            images[(0, 0, 2, BASE_ADDRESS + 20000)], 2000, 4)
+        n_writes = self.board.n_writes
+        statistics = self.txrx.load_targets_raw(
+            self.write_targets(images, "second"), manifest)
+        self.check_board(images)
+        self.assertEqual(statistics.n_bytes, 1024)
+        self.assertEqual(statistics.n_bytes_skipped, 4096 * 3 + 300 - 1024)
+        self.assertEqual(self.board.n_writes - n_writes, 1024 // 256)
+        self.assertEqual(statistics.n_targets, 3)
+
+        # Nothing is written when nothing changed
+        n_writes = self.board.n_writes
+        statistics = self.txrx.load_targets_raw(
+            self.write_targets(images, "third"), manifest)
+        self.assertEqual(statistics.n_bytes, 0)
+        self.assertEqual(self.board.n_writes, n_writes)
+
+    def test_verify(self):
+        images = {(0, 0, 1, BASE_ADDRESS): random_data(8192)}
+        manifest = LoadManifest(block_size=1024)
+        self.txrx.load_targets_raw(self.write_targets(images, "first"),
+                                   manifest)
+
+        # Memory changed on the board behind the manifest's back is only
+        # restored when verifying
+        self.board.write(0, 0, BASE_ADDRESS + 5000, "\0\0\0\0")
+        statistics = self.txrx.load_targets_raw(
+            self.write_targets(images, "second"), manifest)
+        self.assertEqual(statistics.n_bytes, 0)
+        self.assertNotEqual(self.board.read(0, 0, BASE_ADDRESS, 8192),
+                            images[(0, 0, 1, BASE_ADDRESS)])
+
+        statistics = self.txrx.load_targets_raw(
+            self.write_targets(images, "third"), manifest, verify=True)
+        self.check_board(images)
+        self.assertEqual(statistics.n_bytes, 1024)
+        self.assertEqual(statistics.n_bytes_verified, 8192)
+
+    def test_written_ranges(self):
+        images = {(0, 0, 1, BASE_ADDRESS): random_data(8192)}
+        manifest = LoadManifest(block_size=1024)
+        self.txrx.load_targets_raw(self.write_targets(images, "first"),
+                                   manifest)
+
+        # Memory written by the application as it ran is restored without
+        # verifying, and the rest of the target is skipped
+        self.board.write(0, 0, BASE_ADDRESS + 5000, "\0\0\0\0")
+        targets = self.write_targets(images, "second")
+        targets[0].written_ranges = [(BASE_ADDRESS + 4096,
+                                      BASE_ADDRESS + 6144)]
+        statistics = self.txrx.load_targets_raw(targets, manifest)
+        self.check_board(images)
+        self.assertEqual(statistics.n_bytes, 2048)
+        self.assertEqual(statistics.n_bytes_skipped, 8192 - 2048)
+        self.assertEqual(statistics.n_bytes_verified, 0)
+
+    def test_full_load_without_manifest(self):
+        images = {(0, 0, 1, BASE_ADDRESS): random_data(2048)}
+        targets = self.write_targets(images, "first")
+        self.txrx.load_targets_raw(targets, LoadManifest())
+        statistics = self.txrx.load_targets_raw(targets)
+        self.assertEqual(statistics.n_bytes, 2048)
+        self.assertEqual(statistics.n_bytes_skipped, 0)
+
+
+class WrittenRangesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.enable_cache = conf.config.get("App_data_cache", "enable")
+        conf.config.set("App_data_cache", "enable", "False")
+
+    def tearDown(self):
+        conf.config.set("App_data_cache", "enable", self.enable_cache)
+        shutil.rmtree(self.directory)
+
+    def test_plastic_recording_population(self):
+        pynn.setup(timestep=1.0, max_delay=16.0, machine="test")
+        pre = pynn.Population(10, pynn.IF_curr_exp, {}, label="pre")
+        post = pynn.Population(10, pynn.IF_curr_exp, {}, label="post")
+        stdp_model = pynn.STDPMechanism(
+            timing_dependence=pynn.SpikePairRule(tau_plus=20.0,
+                                                 tau_minus=50.0),
+            weight_dependence=pynn.AdditiveWeightDependence(
+                w_min=0, w_max=1, A_plus=0.02, A_minus=0.02))
+        pynn.Projection(pre, post, pynn.OneToOneConnector(weights=0.5),
+                        synapse_dynamics=pynn.SynapseDynamics(
+                            slow=stdp_model))
+        post.record()
+        controller = pynn.controller
+        dao = controller.dao
+        dao.machine = lib_machine.Machine("test", type="spinn4")
+        dao.run_time = 100
+        dao.writeTextSpecs = False
+        controller.execute_partitioning()
+        if not dao.done_placer:
+            controller.execute_placer()
+        controller.execute_key_alloc()
+        controller.filterSubEdges(dao)
+        dao.get_binaries_directory = lambda: self.directory
+        dao.get_reports_directory = lambda subdirectory=None: self.directory
+        output_generator.generate_output_raw(dao)
+
+        # The recorded spikes and the plastic synaptic matrix of the post
+        # population are written by its application, and nothing of the pre
+        # population
+        written_ranges = dict()
+        for target in dao.load_targets:
+            if "_appData_" in target.filename:
+                placement = [placement for placement in dao.placements
+                             if placement.processor.get_coordinates() ==
+                             (target.x, target.y, target.p)][0]
+                written_ranges[placement.subvertex.vertex.label] = \
+                    (target, target.written_ranges)
+        self.assertEqual(written_ranges["pre"][1], [])
+        (target, ranges) = written_ranges["post"]
+        pointers = numpy.fromfile(target.filename, dtype=numpy.uint32)[4:]
+        memory_map = dao.memMaps["%d %d %d" % (target.x, target.y, target.p)]
+        self.assertEqual(ranges, [
+            (target.address + int(pointers[region]),
+             target.address + int(pointers[region]) +
+             4 * memory_map[region][3])
+            for region in (REGIONS.SYNAPTIC_MATRIX, REGIONS.SPIKE_HISTORY)])
+
+
+@benchmark
+class DifferentialLoadBenchmark(unittest.TestCase):
+    """
+    Times loading 48 cores of 64KB of appData with 1ms of emulated
+    round-trip latency in full, against loading them differentially after 1
+    block in 64 has changed.
+    """
+
+    def test_reload_time(self):
+        directory = tempfile.mkdtemp()
+        try:
+            with SCAMPEmulator(latency=0.001) as board:
+                txrx = Transceiver("127.0.0.1", board.port)
+                txrx.utility = ReloadStepsRecorder()
+                images = dict()
+                for chip in range(3):
+                    for p in range(1, 17):
+                        images[(chip, 0, p, BASE_ADDRESS + 0x10000 * p)] = \
+                            random_data(0x10000, seed=chip * 17 + p)
+
+                targets = list()
+                for (i, ((x, y, p, address), data)) in enumerate(
+                        sorted(images.items())):
+                    filename = os.path.join(directory, "%d.dat" % i)
+                    with open(filename, "wb") as f:
+                        f.write(change(data, (i % 64) * 1024, 4))
+                    targets.append(
+                        lib_map.LoadTarget(filename, x, y, p, address))
+
+                manifest = LoadManifest(block_size=1024)
+                for target in targets:
+                    data = images[(target.x, target.y, target.p,
+                                   target.address)]
+                    manifest.record(target.x, target.y, manifest.plan(
+                        target.x, target.y, target.address, data))
+                    board.write(target.x, target.y, target.address, data)
+
+                start = time.time()
+                full = txrx.load_targets_raw(targets)
+                full_time = time.time() - start
+
+                for target in targets:
+                    data = images[(target.x, target.y, target.p,
+                                   target.address)]
+                    board.write(target.x, target.y, target.address, data)
+                start = time.time()
+                differential = txrx.load_targets_raw(targets, manifest)
+                differential_time = time.time() - start
+                txrx.conn.close()
+
+            self.assertEqual(differential.n_bytes * 64, full.n_bytes)
+            logger.info("Loaded {} bytes in {:.3f}s in full and {} bytes in "
+                        "{:.3f}s differentially, estimated saving {:.3f}s"
+                        .format(full.n_bytes, full_time,
+                                differential.n_bytes, differential_time,
+                                differential.time_saved))
+            self.assertTrue(differential_time < full_time)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
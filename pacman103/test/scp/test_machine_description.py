@@ -0,0 +1,286 @@
+"""
+Tests for the batched exploration and cached description of a board of
+pacman103.lib.machine.machine_description, run against a local SC&MP
+emulator, and a benchmark of exploring a board against probing each byte of
+each chip in turn as it was before.
+"""
+
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103 import conf
+from pacman103.core.spinnman.interfaces.transceiver import Transceiver
+from pacman103.core.spinnman.scp import scamp
+from pacman103.lib.machine.machine import Machine
+from pacman103.lib.machine.machine_description import MachineDescription, \
+    CHIP_STATUS_ADDRESS, LINKS_OFFSET, CORE_MAP_OFFSET
+from pacman103.test.scp.scamp_emulator import SCAMPEmulator, LINK_OFFSETS
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+# the chips missing from the corners of a 48 chip board
+BOARD48_GAPS = [(0, 4), (0, 5), (0, 6), (0, 7), (1, 5), (1, 6), (1, 7),
+                (2, 6), (2, 7), (3, 7), (5, 0), (6, 0), (6, 1), (7, 0),
+                (7, 1), (7, 2)]
+
+
+def create_board(latency=0.0, dead_cores=dict()):
+    """
+    Returns an emulator of a 48 chip board whose chips hold their status
+    blocks, with cores 1 to 16 working except for the dead cores of each chip
+    """
+    chips = set([(x, y) for x in range(8) for y in range(8)
+                 if (x, y) not in BOARD48_GAPS])
+    emulator = SCAMPEmulator(latency=latency, chips=chips)
+    for (x, y) in chips:
+        write_status(emulator, x, y, dead_cores.get((x, y), ()))
+    return emulator
+
+
+def write_status(emulator, x, y, dead_cores=()):
+    links = 0
+    for (i, (dx, dy)) in enumerate(LINK_OFFSETS):
+        if emulator.chip_exists(x + dx, y + dy):
+            links |= 1 << i
+    core_map = numpy.array([0] + range(1, 17) + [-1], dtype=numpy.int8)
+    core_map[list(dead_cores)] = -1
+    emulator.write(x, y, CHIP_STATUS_ADDRESS, chr(y) + chr(x))
+    emulator.write(x, y, CHIP_STATUS_ADDRESS + LINKS_OFFSET, chr(links))
+    emulator.write(x, y, CHIP_STATUS_ADDRESS + CORE_MAP_OFFSET,
+                   core_map.tostring())
+
+
+class BoardTransceiver(Transceiver):
+    """
+    A transceiver to an emulated board, which finds the dimensions of the
+    board without pinging it
+    """
+
+    def check_target_machine(self, hostname, x, y):
+        return (8, 8)
+
+
+def explore(txrx):
+    """
+    Explores the board of the transceiver as a dynamic machine does, and
+    returns the machine
+    """
+    machine = Machine.__new__(Machine)
+    machine.hostname = "127.0.0.1"
+    machine.machine_type = "dynamic"
+    machine.link_count = 0
+    machine.virtual_chips = list()
+    machine.boards = list()
+    machine._chips = dict()
+    machine.determine_board_structure(machine.hostname, None, None,
+                                      "dynamic", txrx)
+    machine.remove_downed_cores()
+    machine.remove_downed_chips()
+    machine.determine_board_routing(machine.hostname, txrx)
+    return machine
+
+
+def describe(machine):
+    return dict([((chip.x, chip.y), (
+        sorted([(p.idx, p.phyid) for p in chip.get_processors()]),
+        list(chip.router.linksuplist),
+        [None if link is None else (link['x'], link['y'], link['16bit'])
+         for link in chip.router.neighbourlist]))
+        for chip in machine.get_chips_as_list()])
+
+
+def probe_each_byte(txrx, x_dim, y_dim, core_limit):
+    """
+    Returns the cores and links of each chip found by reading each byte of
+    each chip in turn, as exploring the board did before
+    """
+    chips = dict()
+    for x in range(x_dim):
+        for y in range(y_dim):
+            txrx.select(x, y, 0)
+            try:
+                txrx.memory_calls.read_mem(0xf5007f00, scamp.TYPE_BYTE, 1)
+                txrx.memory_calls.read_mem(0xf5007f01, scamp.TYPE_BYTE, 1)
+                cores = dict()
+                for i in range(1, core_limit + 1):
+                    phycpu = int(numpy.fromstring(txrx.memory_calls.read_mem(
+                        0xf5007fa8 + i, scamp.TYPE_BYTE, 1),
+                        dtype=numpy.int8))
+                    if phycpu != -1:
+                        cores[i] = phycpu
+                chips[(x, y)] = [cores, [None] * 6]
+            except Exception:
+                pass
+    for ((x, y), (_, links)) in chips.items():
+        txrx.select(x, y, 0)
+        link_status = int(numpy.fromstring(txrx.memory_calls.read_mem(
+            0xf5007f0c, scamp.TYPE_BYTE, 1), dtype=numpy.uint8))
+        for i in range(6):
+            if (link_status >> i) & 0x1:
+                coord = int(numpy.fromstring(Machine.read_link_word(
+                    0xf5007f00, i, txrx), dtype=numpy.uint32) & 0xFFFF)
+                links[i] = (coord / 256, coord % 256)
+    return chips
+
+
+class MachineDescriptionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.options = [(option, conf.config.get("Machine", option))
+                        for option in ("machine_description_cache",
+                                       "machine_description_directory")]
+        conf.config.set("Machine", "machine_description_cache", "True")
+        conf.config.set("Machine", "machine_description_directory",
+                        self.directory)
+        self.board = create_board(dead_cores={(1, 1): (3, 16), (4, 4): (1,)})
+        self.board.start()
+        self.txrx = BoardTransceiver("127.0.0.1", self.board.port)
+        self.txrx.conn._sock.settimeout(0.05)
+
+    def tearDown(self):
+        self.txrx.conn.close()
+        self.board.stop()
+        shutil.rmtree(self.directory)
+        for (option, value) in self.options:
+            conf.config.set("Machine", option, value)
+
+    def test_discover(self):
+        description = MachineDescription.discover(self.txrx, 8, 8, 16)
+        self.assertEqual(sorted(description.chips.keys()),
+                         sorted(self.board.chips))
+        self.assertEqual(description.chips[(1, 1)].cores,
+                         dict([(i, i) for i in range(1, 17)
+                               if i not in (3, 16)]))
+        self.assertEqual(description.chips[(0, 0)].links,
+                         [(1, 0), (1, 1), (0, 1), None, None, None])
+
+        # The same chips, cores and links are found as by probing each byte
+        expected = probe_each_byte(self.txrx, 8, 8, 16)
+        self.assertEqual(dict([(coordinates, [chip.cores, chip.links])
+                               for (coordinates, chip)
+                               in description.chips.items()]), expected)
+
+    def test_machine(self):
+        machine = explore(self.txrx)
+        self.assertEqual(len(machine.get_chips_as_list()), 48)
+        self.assertEqual(len(machine.get_processors()), 48 * 16 - 3)
+        chip = machine.get_chip(0, 0)
+        self.assertEqual(chip.router.linksuplist, [0, 1, 2])
+        self.assertEqual(chip.router.linksdownlist, [3, 4, 5])
+        self.assertTrue(chip.router.neighbourlist[1]['object'] is
+                        machine.get_chip(1, 1).router)
+        self.assertEqual(chip.router.neighbourlist[1]['16bit'], 257)
+        self.assertEqual(machine.link_count, 2 * 120)
+
+    def test_cached(self):
+        machine = explore(self.txrx)
+        path = MachineDescription.get_path("127.0.0.1")
+        self.assertEqual(os.path.dirname(path), self.directory)
+        self.assertTrue(os.path.exists(path))
+
+        # The cached description is used after reading a few chips
+        n_reads = self.board.n_reads
+        cached = explore(self.txrx)
+        self.assertEqual(describe(cached), describe(machine))
+        self.assertEqual(self.board.n_reads - n_reads, 4)
+        self.assertEqual(self.board.n_link_reads, 2 * 120)
+
+    def test_changed_board(self):
+        explore(self.txrx)
+
+        # A chip whose cores changed is found by a spot check of it
+        write_status(self.board, 2, 2, (5,))
+        description = MachineDescription.read(
+            MachineDescription.get_path("127.0.0.1"))
+        self.assertFalse(description.spot_check(self.txrx, 1,
+                                                SampleOf((2, 2))))
+        self.assertTrue(description.spot_check(self.txrx, 1,
+                                               SampleOf((3, 3))))
+
+        # If every chip is checked, the board is explored again
+        conf_checks = conf.config.get("Machine",
+                                      "machine_description_spot_checks")
+        conf.config.set("Machine", "machine_description_spot_checks", "48")
+        try:
+            machine = explore(self.txrx)
+        finally:
+            conf.config.set("Machine", "machine_description_spot_checks",
+                            conf_checks)
+        self.assertEqual(len(machine.get_chip(2, 2).get_processors()), 15)
+        self.assertEqual(MachineDescription.read(
+            MachineDescription.get_path("127.0.0.1")).chips[(2, 2)].cores,
+            machine.description.chips[(2, 2)].cores)
+
+    def test_unreadable(self):
+        path = os.path.join(self.directory, "broken" +
+                            MachineDescription.SUFFIX)
+        with open(path, "wb") as f:
+            f.write("not a description")
+        self.assertEqual(MachineDescription.read(path), None)
+        self.assertEqual(MachineDescription.read(
+            os.path.join(self.directory, "missing")), None)
+
+    def test_wrong_coordinates(self):
+        self.board.write(3, 3, CHIP_STATUS_ADDRESS, chr(4))
+        self.assertRaises(Exception, MachineDescription.discover,
+                          self.txrx, 8, 8, 16)
+
+
+class SampleOf(object):
+    """
+    A generator of samples which always chooses the given chips
+    """
+
+    def __init__(self, *coordinates):
+        self.coordinates = list(coordinates)
+
+    def sample(self, population, k):
+        return self.coordinates[:k]
+
+
+@benchmark
+class MachineDescriptionBenchmark(unittest.TestCase):
+    """
+    Times exploring a 48 chip board with a round trip latency of 1ms by
+    reading each byte of each chip in turn, against reading the status block
+    of every chip at once, and against spot checking a cached description.
+    """
+
+    def test_explore_time(self):
+        with create_board(latency=0.001) as board:
+            txrx = Transceiver("127.0.0.1", board.port)
+            try:
+                start = time.time()
+                expected = probe_each_byte(txrx, 8, 8, 16)
+                sequential_elapsed = time.time() - start
+
+                start = time.time()
+                description = MachineDescription.discover(txrx, 8, 8, 16)
+                elapsed = time.time() - start
+
+                start = time.time()
+                self.assertTrue(description.spot_check(
+                    txrx, 4, random.Random(1)))
+                cached_elapsed = time.time() - start
+            finally:
+                txrx.conn.close()
+        self.assertEqual(len(description.chips), len(expected))
+        self.assertTrue(elapsed < sequential_elapsed)
+        self.assertTrue(cached_elapsed < elapsed)
+        logger.info("Explored 48 chips in {:.3f}s probing each byte, {:.3f}s "
+                    "reading the status blocks at once, and {:.3f}s spot "
+                    "checking the cached description".format(
+                        sequential_elapsed, elapsed, cached_elapsed))
+
+
+if __name__ == "__main__":
+    unittest.main()
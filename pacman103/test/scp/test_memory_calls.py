@@ -0,0 +1,237 @@
+"""
+Tests for the memory operations of
+pacman103.core.spinnman.interfaces.transceiver_tools.memory_calls, run against
+a local SC&MP emulator.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103.core.spinnman.interfaces.transceiver import Transceiver
+from pacman103.core.spinnman.scp import scamp
+from pacman103.lib import lib_map
+from pacman103.test.scp.scamp_emulator import SCAMPEmulator
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+BASE_ADDRESS = 0x70000000
+
+
+def random_data(size, seed=0):
+    return numpy.random.RandomState(seed).randint(
+        0, 256, size).astype(numpy.uint8).tostring()
+
+
+class ReadMemTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.board = SCAMPEmulator(seed=1)
+        self.board.start()
+        self.txrx = Transceiver("127.0.0.1", self.board.port)
+        self.txrx.conn._sock.settimeout(0.05)
+        self.txrx.select(1, 2, 3)
+
+    def tearDown(self):
+        self.txrx.conn.close()
+        self.board.stop()
+
+    def test_read_mem(self):
+        data = random_data(3000)
+        self.board.write(1, 2, BASE_ADDRESS, data)
+        for window in (1, 4, 16):
+            self.assertEqual(self.txrx.memory_calls.read_mem(
+                BASE_ADDRESS, scamp.TYPE_WORD, 3000, window=window), data)
+        self.assertEqual(self.board.n_reads, 3 * 12)
+
+    def test_read_mem_into_numpy(self):
+        data = random_data(1024)
+        self.board.write(1, 2, BASE_ADDRESS, data)
+        buf = numpy.zeros(1028, dtype=numpy.uint8)
+        self.txrx.memory_calls.read_mem_into(
+            BASE_ADDRESS, scamp.TYPE_WORD, 1024, buf, offset=4)
+        self.assertEqual(buf[4:].tostring(), data)
+        self.assertEqual(list(buf[:4]), [0, 0, 0, 0])
+
+    def test_read_memory(self):
+        words = numpy.arange(100, dtype=numpy.uint32)
+        self.board.write(1, 2, BASE_ADDRESS, words.tostring())
+        read = self.txrx.read_memory(1, 2, 3, BASE_ADDRESS, 400,
+                                     numpy.uint32)
+        self.assertTrue(numpy.array_equal(read, words))
+
+    def test_read_mem_with_loss(self):
+        data = random_data(64 * 256)
+        self.board.write(1, 2, BASE_ADDRESS, data)
+        self.board.drop_rate = 0.2
+        self.assertEqual(self.txrx.memory_calls.read_mem(
+            BASE_ADDRESS, scamp.TYPE_WORD, len(data), window=8), data)
+        self.assertTrue(self.board.n_dropped > 0)
+
+        # a synchronous command after the pipelined read must not pick up
+        # any late responses
+        self.board.drop_rate = 0.0
+        version = self.txrx.conn.version()
+        self.assertEqual(version.desc, "SC&MP/Emulator")
+
+
+class WriteMemTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.board = SCAMPEmulator(seed=2)
+        self.board.start()
+        self.txrx = Transceiver("127.0.0.1", self.board.port)
+        self.txrx.conn._sock.settimeout(0.05)
+        self.txrx.select(0, 1, 2)
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.txrx.conn.close()
+        self.board.stop()
+        shutil.rmtree(self.directory)
+
+    def write_file(self, name, data):
+        filename = os.path.join(self.directory, name)
+        with open(filename, "wb") as f:
+            f.write(data)
+        return filename
+
+    def test_write_mem(self):
+        data = random_data(1000)
+        for window in (1, 8):
+            self.txrx.memory_calls.write_mem(BASE_ADDRESS, scamp.TYPE_WORD,
+                                             data, window=window)
+            self.assertEqual(self.board.read(0, 1, BASE_ADDRESS, 1000), data)
+        self.assertEqual(self.board.n_writes, 2 * 4)
+
+    def test_write_mem_buffers(self):
+        data = random_data(600)
+        self.txrx.memory_calls.write_mem(BASE_ADDRESS, scamp.TYPE_BYTE,
+                                         bytearray(data))
+        self.assertEqual(self.board.read(0, 1, BASE_ADDRESS, 600), data)
+        self.txrx.memory_calls.write_mem(BASE_ADDRESS + 1000,
+                                         scamp.TYPE_BYTE, memoryview(data))
+        self.assertEqual(self.board.read(0, 1, BASE_ADDRESS + 1000, 600),
+                         data)
+
+    def test_write_mem_from_file_with_loss(self):
+        data = random_data(40 * 1024)
+        filename = self.write_file("image.dat", data)
+        self.board.drop_rate = 0.2
+        size = self.txrx.memory_calls.write_mem_from_file(
+            BASE_ADDRESS, scamp.TYPE_WORD, filename)
+        self.assertEqual(size, len(data))
+        self.assertEqual(self.board.read(0, 1, BASE_ADDRESS, len(data)), data)
+        self.assertTrue(self.board.n_dropped > 0)
+
+    def test_write_mem_from_empty_file(self):
+        filename = self.write_file("empty.dat", "")
+        self.assertEqual(self.txrx.memory_calls.write_mem_from_file(
+            BASE_ADDRESS, scamp.TYPE_WORD, filename), 0)
+        self.assertEqual(self.board.n_writes, 0)
+
+    def test_load_targets_raw(self):
+        self.txrx.utility = ReloadStepsRecorder()
+        targets = list()
+        images = dict()
+        for i, (x, y, p) in enumerate([(1, 1, 3), (0, 0, 2), (1, 1, 1),
+                                       (0, 1, 5), (0, 0, 1)]):
+            data = random_data(512 * (i + 1), seed=i)
+            address = BASE_ADDRESS + (0x10000 * p)
+            images[(x, y, address)] = data
+            targets.append(lib_map.LoadTarget(
+                self.write_file("%d.dat" % i, data), x, y, p, address))
+
+        statistics = self.txrx.load_targets_raw(targets)
+
+        for (x, y, address), data in images.iteritems():
+            self.assertEqual(self.board.read(x, y, address, len(data)), data)
+        self.assertEqual(statistics.n_targets, 5)
+        self.assertEqual(statistics.n_chips, 3)
+        self.assertEqual(statistics.n_bytes, 512 * 15)
+        self.assertTrue(statistics.bandwidth > 0)
+
+        # targets are loaded chip by chip
+        self.assertEqual(self.txrx.utility.selects,
+                         [(0, 0, 1), (0, 0, 2), (0, 1, 5), (1, 1, 1),
+                          (1, 1, 3)])
+
+    def test_plan_load_targets_is_stable(self):
+        first = lib_map.LoadTarget("a", 0, 0, 1, BASE_ADDRESS)
+        second = lib_map.LoadTarget("b", 0, 0, 1, BASE_ADDRESS)
+        self.assertEqual(self.txrx.plan_load_targets([first, second]),
+                         [first, second])
+
+
+class ReloadStepsRecorder(object):
+    """
+    Stands in for SpinnmanUtilities, recording the selects made.
+    """
+
+    def __init__(self):
+        self.selects = list()
+
+    def write_selects(self, x, y, p):
+        self.selects.append((x, y, p))
+
+    def write_mem_from_file(self, address, type_word, filename):
+        pass
+
+
+@benchmark
+class ReadMemBenchmark(unittest.TestCase):
+    """
+    Compares read throughput with and without pipelining, with 1ms of
+    emulated round-trip latency.
+    """
+
+    def test_read_throughput(self):
+        size = 128 * 1024
+        with SCAMPEmulator(latency=0.001) as board:
+            board.write(0, 0, BASE_ADDRESS, random_data(size))
+            txrx = Transceiver("127.0.0.1", board.port)
+            times = dict()
+            for window in (1, 16):
+                start = time.time()
+                txrx.memory_calls.read_mem(BASE_ADDRESS, scamp.TYPE_WORD,
+                                           size, window=window)
+                times[window] = time.time() - start
+                logger.info("Read %d bytes with window %d at %.1f KB/s"
+                            % (size, window, size / 1024.0 / times[window]))
+            txrx.conn.close()
+        self.assertTrue(times[16] < times[1])
+
+
+@benchmark
+class WriteMemBenchmark(unittest.TestCase):
+    """
+    Compares write throughput with and without pipelining, with 1ms of
+    emulated round-trip latency.
+    """
+
+    def test_write_throughput(self):
+        size = 128 * 1024
+        data = random_data(size)
+        with SCAMPEmulator(latency=0.001) as board:
+            txrx = Transceiver("127.0.0.1", board.port)
+            times = dict()
+            for window in (1, 16):
+                start = time.time()
+                txrx.memory_calls.write_mem(BASE_ADDRESS, scamp.TYPE_WORD,
+                                            data, window=window)
+                times[window] = time.time() - start
+                logger.info("Wrote %d bytes with window %d at %.1f KB/s"
+                            % (size, window, size / 1024.0 / times[window]))
+            txrx.conn.close()
+            self.assertEqual(board.read(0, 0, BASE_ADDRESS, size), data)
+        self.assertTrue(times[16] < times[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
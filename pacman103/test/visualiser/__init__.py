@@ -0,0 +1,3 @@
+"""
+Tests for modules in the `visualiser` package which do not need gtk.
+"""
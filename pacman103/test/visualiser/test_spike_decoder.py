@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+"""
+Tests for visualiser.spike_decoder, checking that spikes reach the pages of
+the subvertices which sent them, and timing the decoding of synthetic spikes
+against the search of the masks and placements which it replaced.
+"""
+
+import logging
+import random
+import time
+import unittest
+
+import numpy
+
+from pacman103.core.utilities import packet_conversions
+from pacman103.lib import graph
+from pacman103.lib import lib_map
+from pacman103.lib.machine import machine
+from visualiser.spike_decoder import SpikeDecoder
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+MASK = 0xFFFFF800
+
+
+class DAO(object):
+
+    def __init__(self, used_masks, inverse_map):
+        self.used_masks = used_masks
+        self.inverseMap = inverse_map
+
+
+class Page(object):
+    """
+    Records the spikes passed to it, as a raster page would plot them.
+    """
+
+    def __init__(self, vertices):
+        self.vertices = vertices
+        self.spikes = list()
+
+    def recieved_spike(self, details):
+        subvertex = details['subvertex']
+        self.spikes.append((subvertex.vertex, subvertex.lo_atom +
+                            details['neuron_id'], details['time_in_ticks']))
+
+    def recieved_spikes(self, spikes, time_in_ticks):
+        for subvertex, neuron_id, spike_word in spikes:
+            self.spikes.append((subvertex.vertex, subvertex.lo_atom +
+                                neuron_id, time_in_ticks))
+
+
+class SearchingPage(Page):
+    """
+    Finds the subvertex which sent each spike from its core, as the raster
+    page did before the subvertex was decoded from the spike.
+    """
+
+    def recieved_spike(self, details):
+        for vertex in self.vertices:
+            for subvertex in vertex.subvertices:
+                processor = subvertex.placement.processor
+                if (processor.chip.get_coords()[0] == details['coords'][0] and
+                        processor.chip.get_coords()[1] ==
+                        details['coords'][1] and
+                        processor.idx == details['coords'][2]):
+                    self.spikes.append((vertex, subvertex.lo_atom +
+                                        details['neuron_id'],
+                                        details['time_in_ticks']))
+
+
+def create_mapping(n_vertices, subvertices_per_vertex, seed):
+    """
+    Places the subvertices of n_vertices vertices on the cores of a 48-chip
+    board, each with a subedge to a random subvertex, and returns the DAO and
+    the subvertices
+    """
+    rng = random.Random(seed)
+    the_machine = machine.Machine("test", 8, 8, "spinn4")
+    processors = [processor
+                  for chip in sorted(the_machine.get_chips_as_list(),
+                                     key=lambda chip: (chip.x, chip.y))
+                  for processor in sorted(chip.get_processors(),
+                                          key=lambda processor: processor.idx)
+                  if processor.idx != 0]
+    subvertices = list()
+    for index in range(n_vertices):
+        vertex = graph.Vertex(subvertices_per_vertex * 256,
+                              label="pop {}".format(index))
+        for lo_atom in range(0, vertex.atoms, 256):
+            subvertex = graph.Subvertex(vertex, lo_atom, lo_atom + 255, None)
+            subvertex.placement = lib_map.Placement(
+                subvertex, processors[len(subvertices)])
+            subvertices.append(subvertex)
+
+    used_masks = {MASK: list()}
+    inverse_map = dict()
+    for subvertex in subvertices:
+        x, y, p = subvertex.placement.processor.get_coordinates()
+        postsubvertex = rng.choice(subvertices)
+        edge = graph.Edge(subvertex.vertex, postsubvertex.vertex)
+        subedge = graph.Subedge(edge, subvertex, postsubvertex)
+        subedge.key = packet_conversions.get_key_from_coords(x, y, p)
+        subedge.mask = MASK
+        subedge.key_mask_combo = subedge.key & MASK
+        used_masks[MASK].append(subedge.key)
+        inverse_map[subedge.key_mask_combo] = [subedge]
+    return DAO(used_masks, inverse_map), subvertices
+
+
+def create_spikes(subvertices, n_spikes, seed):
+    rng = random.Random(seed)
+    spike_words = list()
+    for _ in range(n_spikes):
+        subvertex = rng.choice(subvertices)
+        spike_words.append(subvertex.out_subedges[0].key |
+                           rng.randint(0, 255))
+    return spike_words
+
+
+def get_details(spike_word, time_in_ticks):
+    return {'coords': [packet_conversions.get_x_from_key(spike_word),
+                       packet_conversions.get_y_from_key(spike_word),
+                       packet_conversions.get_p_from_key(spike_word)],
+            'neuron_id': packet_conversions.get_nid_from_key(spike_word),
+            'tag': None,
+            'time_in_ticks': time_in_ticks,
+            'spike_word': spike_word}
+
+
+def search_spike(dao, vertex_to_page_mapping, details):
+    """
+    Passes a spike to the page of its vertex as the visualiser did before the
+    spikes were decoded by SpikeDecoder
+    """
+    key = details['spike_word']
+    mask = None
+    for used_mask in dao.used_masks:
+        key = key & used_mask
+        if key in dao.used_masks[used_mask]:
+            mask = used_mask
+            break
+    for subedge in dao.inverseMap[details['spike_word'] & mask]:
+        vertex = subedge.presubvertex.vertex
+        if vertex in vertex_to_page_mapping.keys():
+            vertex_to_page_mapping[vertex].recieved_spike(details)
+
+
+class SpikeDecoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dao, self.subvertices = create_mapping(20, 4, 0)
+        vertices = list()
+        for subvertex in self.subvertices:
+            if subvertex.vertex not in vertices:
+                vertices.append(subvertex.vertex)
+
+        # The last vertex has no page
+        self.pages = [Page(vertices[:10]), Page(vertices[10:19])]
+        self.vertex_to_page_mapping = dict()
+        for page in self.pages:
+            for vertex in page.vertices:
+                self.vertex_to_page_mapping[vertex] = page
+        self.decoder = SpikeDecoder(self.dao, self.vertex_to_page_mapping)
+
+    def expected_spikes(self, spike_words, time_in_ticks):
+        pages = [SearchingPage(page.vertices) for page in self.pages]
+        vertex_to_page_mapping = dict()
+        for page in pages:
+            for vertex in page.vertices:
+                vertex_to_page_mapping[vertex] = page
+        for spike_word in spike_words:
+            search_spike(self.dao, vertex_to_page_mapping,
+                         get_details(spike_word, time_in_ticks))
+        return [page.spikes for page in pages]
+
+    def test_decode(self):
+        for subvertex in self.subvertices:
+            key = subvertex.out_subedges[0].key
+            self.assertEqual(self.decoder.decode(key | 0x7F),
+                             [(subvertex.vertex, subvertex,
+                               subvertex.lo_atom)])
+        self.assertEqual(self.decoder.decode(0xFFFF0000), ())
+
+    def test_spike_recieved(self):
+        spike_words = create_spikes(self.subvertices, 1000, 1)
+        for spike_word in spike_words:
+            self.decoder.spike_recieved(get_details(spike_word, 7))
+        self.decoder.spike_recieved(get_details(0xFFFF0000, 7))
+        self.assertEqual([page.spikes for page in self.pages],
+                         self.expected_spikes(spike_words, 7))
+        self.assertEqual(self.decoder.n_unknown_spikes, 1)
+
+    def test_spike_recieved_many(self):
+        spike_words = create_spikes(self.subvertices, 1000, 2)
+        self.decoder.spike_recieved_many(spike_words + [0xFFFF0000], 3)
+        self.assertEqual([page.spikes for page in self.pages],
+                         self.expected_spikes(spike_words, 3))
+        self.assertEqual(self.decoder.n_unknown_spikes, 1)
+
+    def test_spike_recieved_many_array(self):
+        spike_words = create_spikes(self.subvertices, 1000, 4)
+        self.decoder.spike_recieved_many(
+            numpy.array(spike_words + [0xFFFF0000], dtype="<u4"), 5)
+        self.assertEqual([page.spikes for page in self.pages],
+                         self.expected_spikes(spike_words, 5))
+        self.assertEqual(self.decoder.n_unknown_spikes, 1)
+
+    def test_pages_changed_while_running(self):
+        vertex = self.subvertices[0].vertex
+        del self.vertex_to_page_mapping[vertex]
+        self.decoder.spike_recieved_many(
+            [self.subvertices[0].out_subedges[0].key], 0)
+        self.assertEqual([page.spikes for page in self.pages], [[], []])
+        self.vertex_to_page_mapping[vertex] = self.pages[1]
+        self.decoder.spike_recieved_many(
+            [self.subvertices[0].out_subedges[0].key], 0)
+        self.assertEqual([page.spikes for page in self.pages],
+                         [[], [(vertex, 0, 0)]])
+
+
+@benchmark
+class SpikeDecoderBenchmark(unittest.TestCase):
+    """
+    Times the decoding of synthetic spikes from 40 populations of 16 cores
+    one at a time and a tick at a time, against the search of the masks and
+    placements which it replaced.
+    """
+
+    def test_throughput(self):
+        dao, subvertices = create_mapping(40, 16, 0)
+        vertices = list()
+        for subvertex in subvertices:
+            if subvertex.vertex not in vertices:
+                vertices.append(subvertex.vertex)
+        spike_words = create_spikes(subvertices, 20000, 3)
+
+        searching_page = SearchingPage(vertices)
+        start = time.time()
+        for spike_word in spike_words:
+            search_spike(dao, dict([(vertex, searching_page)
+                                    for vertex in vertices]),
+                         get_details(spike_word, 0))
+        search_time = time.time() - start
+
+        page = Page(vertices)
+        decoder = SpikeDecoder(dao, dict([(vertex, page)
+                                          for vertex in vertices]))
+        start = time.time()
+        for spike_word in spike_words:
+            decoder.spike_recieved(get_details(spike_word, 0))
+        decode_time = time.time() - start
+
+        batched_page = Page(vertices)
+        decoder = SpikeDecoder(dao, dict([(vertex, batched_page)
+                                          for vertex in vertices]))
+        start = time.time()
+        for index in range(0, len(spike_words), 100):
+            decoder.spike_recieved_many(spike_words[index:index + 100], 0)
+        batch_time = time.time() - start
+
+        self.assertEqual(page.spikes, searching_page.spikes)
+        self.assertEqual(batched_page.spikes, searching_page.spikes)
+        logger.info("{} spikes: searched at {:.0f}/s, decoded at {:.0f}/s, "
+                    "decoded 100 at a time at {:.0f}/s".format(
+                        len(spike_words), len(spike_words) / search_time,
+                        len(spike_words) / decode_time,
+                        len(spike_words) / batch_time))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Tests for visualiser.spike_packets and visualiser.spike_replay, checking that
+datagrams of spikes are decoded into arrays of spike words, and timing their
+decoding against the unpacking of each spike word which it replaced.
+"""
+
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import time
+import unittest
+
+import numpy
+
+from pacman103.core.utilities import packet_conversions
+from visualiser import spike_packets
+from visualiser import spike_replay
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def unpack_datagram(data):
+    """
+    Returns the list of the details of the spikes of a datagram, as the
+    listener made them before the datagrams were decoded into arrays
+    """
+    (ip_time_out_byte, pad_byte, flags_byte, tag_byte,
+     dest_port_byte, source_port_byte, dest_addr_short,
+     source_addr_short, command_short, sequence_short,
+     arg1_int, arg2_int, arg3_int) = \
+        struct.unpack_from("<BBBBBBHHHHiii", data, 0)
+    header_length = 26
+    spikes = list()
+    for spike in range(0, len(data) - header_length, 4):
+        spike_word = struct.unpack_from("<I", data, spike + header_length)[0]
+        spikes.append({'coords': [packet_conversions.get_x_from_key(spike_word),
+                                  packet_conversions.get_y_from_key(spike_word),
+                                  packet_conversions.get_p_from_key(spike_word)],
+                       'neuron_id': packet_conversions.get_nid_from_key(
+                           spike_word),
+                       'tag': tag_byte,
+                       'time_in_ticks': arg1_int,
+                       'spike_word': spike_word})
+    return spikes
+
+
+class SpikePacketsTestCase(unittest.TestCase):
+
+    def test_decode_datagram(self):
+        spike_words = [0x01020801, 0x07070000 | 15 << 11 | 255, 0xFFFFFFFF]
+        data = spike_packets.encode_datagram(42, spike_words, tag=3)
+        self.assertEqual(spike_packets.HEADER_LENGTH, 26)
+        self.assertEqual(len(data), 26 + 12)
+        tag, time_in_ticks, decoded = spike_packets.decode_datagram(data)
+        self.assertEqual((tag, time_in_ticks), (3, 42))
+        self.assertEqual(decoded.tolist(), spike_words)
+        self.assertEqual([spike['spike_word']
+                          for spike in unpack_datagram(data)], spike_words)
+
+        # Bytes after the last whole spike word are ignored
+        tag, time_in_ticks, decoded = \
+            spike_packets.decode_datagram(data + "\x01\x02")
+        self.assertEqual(decoded.tolist(), spike_words)
+
+    def test_decode_datagrams(self):
+        datagrams = [spike_packets.encode_datagram(1, [1, 2]),
+                     spike_packets.encode_datagram(1, [3]),
+                     spike_packets.encode_datagram(2, []),
+                     spike_packets.encode_datagram(3, [4]),
+                     spike_packets.encode_datagram(1, [5])]
+        self.assertEqual([(time_in_ticks, spike_words.tolist())
+                          for (time_in_ticks, spike_words) in
+                          spike_packets.decode_datagrams(datagrams)],
+                         [(1, [1, 2, 3]), (2, []), (3, [4]), (1, [5])])
+        self.assertEqual(spike_packets.decode_datagrams([]), [])
+
+    def test_vectorised_conversions(self):
+        datagrams = spike_replay.generate_recording(10, 50, seed=0)
+        for (_, data) in datagrams:
+            _, _, spike_words = spike_packets.decode_datagram(data)
+            for (spike, x, y, p, nid) in zip(
+                    unpack_datagram(data),
+                    packet_conversions.get_x_from_key(spike_words),
+                    packet_conversions.get_y_from_key(spike_words),
+                    packet_conversions.get_p_from_key(spike_words),
+                    packet_conversions.get_nid_from_key(spike_words)):
+                self.assertEqual(spike['coords'], [x, y, p])
+                self.assertEqual(spike['neuron_id'], nid)
+
+    def test_recording(self):
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, "spikes.rec")
+            datagrams = spike_replay.generate_recording(20, 10, seed=1)
+            spike_replay.write_recording(filename, datagrams)
+            self.assertEqual(spike_replay.read_recording(filename), datagrams)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_replay(self):
+        datagrams = spike_replay.generate_recording(100, 20, seed=2)
+        counter = spike_replay.SpikeCounter()
+        stats = spike_replay.replay(datagrams, visualiser=counter, speed=10.0)
+        self.assertEqual(stats['n_packets_recieved'], 100)
+        self.assertEqual(stats['n_packets_dropped'], 0)
+        self.assertEqual(stats['n_spikes_recieved'], 2000)
+        self.assertEqual(counter.n_spikes, 2000)
+
+
+@benchmark
+class SpikePacketsBenchmark(unittest.TestCase):
+    """
+    Times the decoding of bursts of synthetic datagrams of 64 spikes into
+    arrays of spike words, against the unpacking of each spike word into its
+    details which it replaced.
+    """
+
+    def test_decode_throughput(self):
+        datagrams = [data for (_, data) in
+                     spike_replay.generate_recording(5000, 64, seed=3)]
+
+        start = time.time()
+        unpacked = list()
+        for data in datagrams:
+            unpacked.extend(unpack_datagram(data))
+        unpack_time = time.time() - start
+
+        start = time.time()
+        decoded = list()
+        for index in range(0, len(datagrams), 16):
+            for (_, spike_words) in spike_packets.decode_datagrams(
+                    datagrams[index:index + 16]):
+                decoded.append(spike_words)
+                packet_conversions.get_nid_from_key(spike_words)
+        decode_time = time.time() - start
+
+        self.assertEqual(numpy.concatenate(decoded).tolist(),
+                         [spike['spike_word'] for spike in unpacked])
+        logger.info("{} datagrams: unpacked at {:.0f}/s, decoded 16 at a "
+                    "time at {:.0f}/s".format(
+                        len(datagrams), len(datagrams) / unpack_time,
+                        len(datagrams) / decode_time))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Tests for visualiser.pages.spike_ring_buffer, checking that the rows held are
+those most recently appended, and timing the fading of a raster plot over a
+long stream of spikes against the lists which it replaced.
+"""
+
+import logging
+import random
+import time
+import unittest
+
+import numpy
+
+from visualiser.pages.spike_ring_buffer import SpikeRingBuffer
+from pacman103.test.benchmark import benchmark
+
+logger = logging.getLogger(__name__)
+
+
+def rows(first, last):
+    return [[time_in_ms, time_in_ms * 10] for time_in_ms in range(first, last)]
+
+
+class SpikeRingBufferTestCase(unittest.TestCase):
+
+    def test_append(self):
+        buffer = SpikeRingBuffer(4)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.view().shape, (0, 2))
+        for row in rows(0, 3):
+            buffer.append(row)
+        self.assertEqual(buffer.view().tolist(), rows(0, 3))
+        for row in rows(3, 10):
+            buffer.append(row)
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.view().tolist(), rows(6, 10))
+        self.assertEqual(buffer.n_dropped, 6)
+
+    def test_extend(self):
+        buffer = SpikeRingBuffer(5)
+        buffer.extend(rows(0, 3))
+        self.assertEqual(buffer.view().tolist(), rows(0, 3))
+
+        # Wraps round the end of the ring
+        buffer.extend(rows(3, 7))
+        self.assertEqual(buffer.view().tolist(), rows(2, 7))
+        self.assertEqual(buffer.n_dropped, 2)
+
+        # More rows than the buffer holds
+        buffer.extend(rows(7, 20))
+        self.assertEqual(buffer.view().tolist(), rows(15, 20))
+        self.assertEqual(buffer.n_dropped, 15)
+        buffer.extend(numpy.empty((0, 2)))
+        self.assertEqual(buffer.view().tolist(), rows(15, 20))
+
+    def test_extend_matches_append(self):
+        rng = random.Random(0)
+        appended = SpikeRingBuffer(16)
+        extended = SpikeRingBuffer(16)
+        first = 0
+        for _ in range(200):
+            last = first + rng.randint(0, 20)
+            for row in rows(first, last):
+                appended.append(row)
+            extended.extend(rows(first, last))
+            first = last
+            self.assertEqual(extended.view().tolist(),
+                             appended.view().tolist())
+            self.assertEqual(extended.n_dropped, appended.n_dropped)
+
+    def test_view_is_contiguous(self):
+        buffer = SpikeRingBuffer(8)
+        buffer.extend(rows(0, 13))
+        view = buffer.view()
+        self.assertTrue(view.flags['C_CONTIGUOUS'])
+        self.assertTrue(numpy.may_share_memory(view, buffer._buffer))
+
+    def test_expire(self):
+        buffer = SpikeRingBuffer(8)
+        buffer.extend(rows(0, 12))
+        buffer.expire(6)
+        self.assertEqual(buffer.view().tolist(), rows(6, 12))
+        buffer.expire(6)
+        self.assertEqual(buffer.view().tolist(), rows(6, 12))
+        buffer.expire(100)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.n_dropped, 4)
+
+    def test_expire_out_of_order(self):
+
+        # Spikes held in the order they arrived, not of their times
+        buffer = SpikeRingBuffer(8)
+        times = [3, 1, 7, 5, 2, 9, 6, 4, 8, 0]
+        buffer.extend([[time_in_ms, time_in_ms * 10] for time_in_ms in times])
+        buffer.expire(5)
+        self.assertEqual(buffer.view().tolist(),
+                         [[7, 70], [5, 50], [9, 90], [6, 60], [8, 80]])
+        buffer.append((1, 10))
+        buffer.expire(6)
+        self.assertEqual(buffer.view().tolist(),
+                         [[7, 70], [9, 90], [6, 60], [8, 80]])
+        self.assertTrue(numpy.may_share_memory(buffer.view(), buffer._buffer))
+
+    def test_take(self):
+        buffer = SpikeRingBuffer(4, n_columns=3)
+        buffer.append((1, 2, 1))
+        buffer.append((3, 4, 0))
+        taken = buffer.take()
+        self.assertEqual(taken.tolist(), [[1, 2, 1], [3, 4, 0]])
+        self.assertEqual(len(buffer), 0)
+        buffer.append((5, 6, 1))
+        self.assertEqual(taken.tolist(), [[1, 2, 1], [3, 4, 0]])
+        self.assertEqual(buffer.take().tolist(), [[5, 6, 1]])
+        buffer.append((7, 8, 1))
+        buffer.clear()
+        self.assertEqual(buffer.take().shape, (0, 3))
+
+
+def fade_lists(data, time_in_ms, scope):
+    """
+    Removes the points older than the scope from a list of points, as the
+    raster page did before its points were held in ring buffers (which
+    skips the point after each one removed, leaving it for the next tick)
+    """
+    for data_piece in data:
+        if (time_in_ms - data_piece[0]) > scope:
+            data.remove(data_piece)
+
+
+@benchmark
+class SpikeRingBufferBenchmark(unittest.TestCase):
+    """
+    Streams the spikes of a population of 1000 neurons firing at 10 Hz into
+    a raster plot which fades out spikes older than a second, and times the
+    storing, fading and reading of the spikes for the plot.
+    """
+
+    N_NEURONS = 1000
+    SCOPE = 1000
+
+    def stream(self, n_ticks, seed):
+        rng = numpy.random.RandomState(seed)
+        for tick in range(n_ticks):
+            neuron_ids = numpy.flatnonzero(
+                rng.random_sample(self.N_NEURONS) < 0.01)
+            points = numpy.empty((len(neuron_ids), 2))
+            points[:, 0] = tick
+            points[:, 1] = neuron_ids
+            yield tick, points
+
+    def time_ring_buffer(self, n_ticks):
+        buffer = SpikeRingBuffer(self.N_NEURONS * self.SCOPE)
+        start = time.time()
+        for tick, points in self.stream(n_ticks, 0):
+            buffer.extend(points)
+            buffer.expire(tick - self.SCOPE)
+            if tick % 100 == 0:
+                buffer.view().tolist()
+        return buffer, (time.time() - start) / n_ticks
+
+    def test_long_session(self):
+        n_ticks = 3 * self.SCOPE
+        data = list()
+        start = time.time()
+        for tick, points in self.stream(n_ticks, 0):
+            data.extend([tuple(point) for point in points.tolist()])
+            fade_lists(data, tick, self.SCOPE)
+        list_time = (time.time() - start) / n_ticks
+
+        buffer, buffer_time = self.time_ring_buffer(n_ticks)
+        self.assertEqual(buffer.view().tolist(),
+                         [list(point) for point in data
+                          if point[0] >= n_ticks - 1 - self.SCOPE])
+
+        # The memory held and the time taken per tick do not grow with the
+        # length of the session
+        long_buffer, long_buffer_time = self.time_ring_buffer(10 * n_ticks)
+        self.assertEqual(long_buffer._buffer.nbytes, buffer._buffer.nbytes)
+        self.assertEqual(long_buffer.n_dropped, 0)
+        self.assertTrue(len(long_buffer) < 2 * len(buffer))
+        logger.info("{:.3f} ms per tick with lists, {:.3f} ms per tick with a "
+                    "ring buffer over {} ticks and {:.3f} ms over {} "
+                    "ticks".format(list_time * 1000, buffer_time * 1000,
+                                   n_ticks, long_buffer_time * 1000,
+                                   10 * n_ticks))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 __author__ = 'stokesa6'
 import gtk
 from pacman103.core import exceptions
+from pacman103.core.utilities import packet_conversions
 
 class AbstractPage(object):
     def __init__(self, dao, windows, main_pages, real_pages):
@@ -17,6 +18,22 @@ class AbstractPage(object):
         raise exceptions.VisuliserException("abstract page does not "
                                             "impliment this method")
 
+    def recieved_spikes(self, spikes, time_in_ticks):
+        '''
+        takes the (subvertex, neuron_id, spike_word) of the spikes of a timer
+        tick, and passes each one to recieved_spike
+        '''
+        for subvertex, neuron_id, spike_word in spikes:
+            self.recieved_spike({
+                'coords': [packet_conversions.get_x_from_key(spike_word),
+                           packet_conversions.get_y_from_key(spike_word),
+                           packet_conversions.get_p_from_key(spike_word)],
+                'neuron_id': neuron_id,
+                'tag': None,
+                'time_in_ticks': time_in_ticks,
+                'spike_word': spike_word,
+                'subvertex': subvertex})
+
     def reset_values(self):
         raise exceptions.VisuliserException("abstract page does not "
                                             "impliment this method")
@@ -25,6 +25,12 @@ class ScatterplotChart(Plot):
         self._data = self._data + ((data, key),)
         self.queue_draw()
 
+    def clear_data(self):
+        """
+        Removes the plot's data, so that it can be set again.
+        """
+        self._data = ()
+
     def plot(self):
         """
         Initializes chart (if needed), set data and plots.
@@ -4,7 +4,9 @@ import gtk
 from pacman103.conf import config
 from visualiser.pages.plotter.scatter_plotter import ScatterplotChart
 from visualiser.pages.abstract_page import AbstractPage
+from visualiser.pages.spike_ring_buffer import SpikeRingBuffer
 import math
+import numpy
 import logging
 logger = logging.getLogger(__name__)
 
@@ -32,13 +34,16 @@ class RasterPage(AbstractPage):
             self.x_axis_scope = 2000.0
         
         self.do_fading = config.getboolean("Visualiser", "raster_plot_do_fading")
+        #holds the label and a ring buffer of the (time in ms, neuron id) of
+        # the spikes of each vertex
+        self.buffer_size = config.getint("Visualiser",
+                                         "raster_plot_buffer_size")
         self.data_stores = []
             
         for vertex in self.vertex_in_question:
             label = str(vertex.label)
             self.data_stores.append(label)
-            tuple_data = [(-1, -1), (-1, -1)]
-            self.data_stores.append(tuple_data)
+            self.data_stores.append(SpikeRingBuffer(self.buffer_size))
             self.off_sets.append(current_off_set)
             current_off_set += vertex.atoms + 15
 
@@ -67,8 +72,7 @@ class RasterPage(AbstractPage):
         if label == None:
             label = "Unknown"
         self.data_stores.append(label)
-        tuple_data = [(-1, -1), (-1, -1)]
-        self.data_stores.append(tuple_data)
+        self.data_stores.append(SpikeRingBuffer(self.buffer_size))
         self.off_sets.append(self.max_y_value)
 
         #records the maxiumum neuron value
@@ -155,17 +159,28 @@ class RasterPage(AbstractPage):
                 }
 
         self.plot.set_options(options)
-        index = 0
+        #hand the plot the spikes held, read from a contiguous view of each
+        # ring buffer, so the cost does not grow with the spikes recieved
+        self.plot.clear_data()
+        for index in range(len(self.vertex_in_question)):
+            true_index = (index * 2)
+            self.plot.set_data(self.data_stores[true_index],
+                               self.get_points(true_index + 1))
         if initial:
-            for vertex in self.vertex_in_question:
-                true_index = (index * 2)
-                self.plot.set_data(self.data_stores[true_index],
-                                   self.data_stores[true_index+1])
-                index += 1
             self.page.add(self.plot)
             self.page.show_all()
         self.page.queue_draw()
 
+    def get_points(self, data_store_index):
+        '''
+        returns the points to plot from a data store, with points off the
+        plot if there are none, as the plot needs some
+        '''
+        points = self.data_stores[data_store_index].view().tolist()
+        if len(points) == 0:
+            points = [(-1, -1), (-1, -1)]
+        return points
+
     def redraw(self, timer_tic):
         if timer_tic <= (self.dao.run_time * 1000.0) / (self.dao.machineTimeStep):
             self.generate_plot(timer_tic, False)
@@ -176,6 +191,15 @@ class RasterPage(AbstractPage):
         '''
         translates the spike into a x and y axis and updates the data_store
         '''
+        subvertex = details.get('subvertex')
+        if subvertex is not None:
+            if subvertex.vertex in self.vertex_in_question:
+                self.update_data_store_with_spike(subvertex,
+                                                  details['neuron_id'],
+                                                  details['time_in_ticks'])
+            if self.do_fading:
+                self.remove_stale_values(details['time_in_ticks'])
+            return
         for vert in self.vertex_in_question:
             for subvert in vert.subvertices:
                 chip = subvert.placement.processor.chip
@@ -189,6 +213,28 @@ class RasterPage(AbstractPage):
         if self.do_fading:
             self.remove_stale_values(details['time_in_ticks'])
 
+    def recieved_spikes(self, spikes, time_in_ticks):
+        '''
+        updates the data_store with the (subvertex, neuron_id, spike_word) of
+        the spikes of a timer tick, removing stale values once for them all
+        '''
+        xaxix = (time_in_ticks * self.dao.machineTimeStep) / 1000 #convert to ms
+        neuron_ids = dict()
+        for subvertex, neuron_id, spike_word in spikes:
+            if subvertex.vertex in self.vertex_in_question:
+                index = self.vertex_in_question.index(subvertex.vertex)
+                if index not in neuron_ids:
+                    neuron_ids[index] = list()
+                neuron_ids[index].append(self.off_sets[index] +
+                                         subvertex.lo_atom + neuron_id)
+        for index in neuron_ids.keys():
+            points = numpy.empty((len(neuron_ids[index]), 2))
+            points[:, 0] = xaxix
+            points[:, 1] = neuron_ids[index]
+            self.data_stores[(index * 2) + 1].extend(points)
+        if self.do_fading:
+            self.remove_stale_values(time_in_ticks)
+
     def update_data_store_with_spike(self, subvertex, local_neuron_id,
                                      time_in_tics):
         '''
@@ -211,8 +257,8 @@ class RasterPage(AbstractPage):
         remove all data points that are over the theshold ago
         '''
         xaxix = (time_in_tics * self.dao.machineTimeStep) / 1000 #convert to ms
+        #the spikes are held in the order they were recieved, which may not
+        #be the order of their times
         for data_store_index in range(1, len(self.data_stores), 2):
-            data = self.data_stores[data_store_index]
-            for data_piece in data:
-                if (xaxix - data_piece[0]) > int(self.x_axis_scope):
-                    data.remove(data_piece)
+            self.data_stores[data_store_index].expire(
+                xaxix - int(self.x_axis_scope))
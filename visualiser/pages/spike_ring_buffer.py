@@ -0,0 +1,105 @@
+__author__ = 'stokesa6'
+
+import numpy
+
+
+class SpikeRingBuffer(object):
+    '''
+    a preallocated ring buffer of rows of values, such as the time in ticks
+    and neuron id of each spike, which holds the most recent rows appended
+    to it up to its capacity.
+
+    each row is written twice, at its position in the ring and again
+    capacity rows after it, so that the rows held are always a contiguous
+    view of the buffer however the ring has wrapped round. rows expire by
+    advancing the start pointer, so memory stays bounded however long the
+    buffer is streamed to.
+    '''
+
+    def __init__(self, capacity, n_columns=2, dtype="float64"):
+        self.capacity = capacity
+        self._buffer = numpy.zeros((2 * capacity, n_columns), dtype=dtype)
+        #counts of rows ever appended, the first held being at start
+        self.start = 0
+        self.end = 0
+        #count of rows overwritten before they expired or were taken
+        self.n_dropped = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, row):
+        '''
+        appends a row, overwriting the oldest row held if full
+        '''
+        position = self.end % self.capacity
+        self._buffer[position] = row
+        self._buffer[position + self.capacity] = row
+        self.end += 1
+        if self.end - self.start > self.capacity:
+            self.start += 1
+            self.n_dropped += 1
+
+    def extend(self, rows):
+        '''
+        appends an array of rows, overwriting the oldest rows held if full
+        '''
+        rows = numpy.asarray(rows, dtype=self._buffer.dtype).reshape(
+            -1, self._buffer.shape[1])
+        if len(rows) > self.capacity:
+            self.n_dropped += len(rows) - self.capacity
+            self.start += len(rows) - self.capacity
+            self.end += len(rows) - self.capacity
+            rows = rows[-self.capacity:]
+        self._write(self.end, rows)
+        self.end += len(rows)
+        if self.end - self.start > self.capacity:
+            self.n_dropped += self.end - self.start - self.capacity
+            self.start = self.end - self.capacity
+
+    def _write(self, count, rows):
+        '''
+        writes rows, no more than the capacity, to both copies of the ring
+        from the position of the row appended count rows from the first
+        '''
+        position = count % self.capacity
+        first = min(len(rows), self.capacity - position)
+        for offset in (0, self.capacity):
+            self._buffer[position + offset:position + offset + first] = \
+                rows[:first]
+            self._buffer[offset:offset + len(rows) - first] = rows[first:]
+
+    def view(self):
+        '''
+        returns a view of the rows held, oldest first
+        '''
+        position = self.start % self.capacity
+        return self._buffer[position:position + self.end - self.start]
+
+    def expire(self, oldest, column=0):
+        '''
+        drops the rows held whose value in the column is less than oldest,
+        keeping the order of the others. the values need not increase from
+        row to row, as spikes may arrive out of order
+        '''
+        rows = self.view()
+        keep = rows[:, column] >= oldest
+        n_kept = int(numpy.count_nonzero(keep))
+        if n_kept < len(rows):
+            kept = rows[keep]
+            self.start = self.end - n_kept
+            self._write(self.start, kept)
+
+    def take(self):
+        '''
+        returns a copy of the rows held and drops them, leaving any rows
+        appended while taking them
+        '''
+        end = self.end
+        position = self.start % self.capacity
+        rows = self._buffer[position:position + end - self.start].copy()
+        self.start = end
+        return rows
+
+    def clear(self):
+        self.start = self.end
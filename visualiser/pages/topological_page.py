@@ -2,6 +2,7 @@ __author__ = 'stokesa6'
 from pacman103.conf import config
 from pacman103.core.utilities import packet_conversions
 from visualiser.pages.abstract_page import AbstractPage
+from visualiser.pages.spike_ring_buffer import SpikeRingBuffer
 import math
 import gtk
 import cairo
@@ -66,7 +67,11 @@ class TopologicalPage(AbstractPage):
         self.max_seen_value = 50
         self.min_seen_value = 0
         self.needs_reseting = False
-        self.spikes_that_need_processing = list()
+        #holds the (x, y, spike value) of the spikes recieved since the last
+        # redraw, dropping the oldest if more are recieved than it holds
+        self.spikes_that_need_processing = SpikeRingBuffer(
+            config.getint("Visualiser", "topological_plot_buffer_size"),
+            n_columns=3)
         self.drawing = False
 
         #holders for determining if you need to redraw
@@ -395,19 +400,9 @@ class TopologicalPage(AbstractPage):
         '''
         if not self.drawing:
             self.drawing = True
-            blocked_list = self.spikes_that_need_processing
-            self.spikes_that_need_processing = list()
-            for details in blocked_list:
+            blocked_list = self.spikes_that_need_processing.take()
+            for x, y, spike_value in blocked_list:
                 self.redraw_everything = False
-                if getattr(self.vertex_in_question,
-                           "get_packet_retina_coords", None) is not None:
-                    x, y, spike_value = \
-                        self.vertex_in_question.\
-                            get_packet_retina_coords(details['spike_word'],
-                                                     self.y_dim)
-                else:
-                    ##assuming its a normal pop with a topolgoical view, use x then y
-                    x, y, spike_value = self.convert_normal_pop_spike_to_x_y(details['spike_word'])
                 #translate spike value into a increase or decrease in color
                 if spike_value != 1:
                     spike_value = -1
@@ -437,7 +432,16 @@ class TopologicalPage(AbstractPage):
         '''
         takes a spike detials and converts it into a update in the retina screen
         '''
-        self.spikes_that_need_processing.append(details)
+        if getattr(self.vertex_in_question,
+                   "get_packet_retina_coords", None) is not None:
+            x, y, spike_value = \
+                self.vertex_in_question.\
+                    get_packet_retina_coords(details['spike_word'], self.y_dim)
+        else:
+            ##assuming its a normal pop with a topolgoical view, use x then y
+            x, y, spike_value = self.convert_normal_pop_spike_to_x_y(
+                details['spike_word'], details.get('subvertex'))
+        self.spikes_that_need_processing.append((x, y, spike_value))
 
     def set_min_seen_value(self, new_value):
         '''
@@ -459,16 +463,17 @@ class TopologicalPage(AbstractPage):
         self.max_seen_value = new_value
 
 
-    def convert_normal_pop_spike_to_x_y(self, spike_word):
+    def convert_normal_pop_spike_to_x_y(self, spike_word, subvert=None):
         '''
         takes the spike_word (key) and converts it into a neuron id, for the vertex
         it then converts the neuron id into a x and y coord and adds one to the colour
         '''
         neuron_id = packet_conversions.get_nid_from_key(spike_word)
-        x = packet_conversions.get_x_from_key(spike_word)
-        y = packet_conversions.get_y_from_key(spike_word)
-        p = packet_conversions.get_p_from_key(spike_word)
-        subvert = self.locate_subvert(x, y, p)
+        if subvert is None:
+            x = packet_conversions.get_x_from_key(spike_word)
+            y = packet_conversions.get_y_from_key(spike_word)
+            p = packet_conversions.get_p_from_key(spike_word)
+            subvert = self.locate_subvert(x, y, p)
         real_neuron_id = subvert.lo_atom + neuron_id
         x_coord = math.floor(real_neuron_id/self.y_dim)
         y_coord = real_neuron_id - (x_coord * self.y_dim)
@@ -1,7 +1,6 @@
 __author__ = 'stokesa6'
 
 import socket
-import struct
 import threading
 import thread
 import time
@@ -10,8 +9,8 @@ import datetime
 import traceback
 from pacman103.conf import config
 logger = logging.getLogger(__name__)
-from pacman103.core.utilities import packet_conversions
 from port_queuer import PortQueuer
+import spike_packets
 
 
 def _timeout(visualiser, timeout):
@@ -29,6 +28,9 @@ class VisulaiserListener(threading.Thread):
         self.done = False
         self.queuer = PortQueuer()
         self.DEBUG = config.getboolean("Visualiser", "debug")
+        #counts of the datagrams and spikes recieved
+        self.n_packets = 0
+        self.n_spikes = 0
 
     def set_visualiser(self, vis):
         self.visualiser = vis
@@ -66,34 +68,22 @@ class VisulaiserListener(threading.Thread):
 
 
                 if not self.DEBUG:
-                    #print "trying to recive"
-                    data = self.queuer.get_packet()
-                    if data is None:
+                    #takes all the datagrams queued, and hands the spike words
+                    # of each timer tick to the visualiser as an array
+                    datagrams = self.queuer.get_packets()
+                    stopped = datagrams[-1] is None
+                    if stopped:
+                        datagrams.pop()
+                    if len(datagrams) != 0:
+                        last_time_packet_recieved = datetime.datetime.now()
+                    for time_in_ticks, spike_words in \
+                            spike_packets.decode_datagrams(datagrams):
+                        t_tic = time_in_ticks
+                        self.n_spikes += len(spike_words)
+                        self.visualiser.spike_recieved_many(spike_words, t_tic)
+                    self.n_packets += len(datagrams)
+                    if stopped:
                         break
-                    
-                    # print "received"
-                    (ip_time_out_byte, pad_byte, flags_byte, tag_byte,
-                     dest_port_byte, source_port_byte, dest_addr_short,
-                     source_addr_short, command_short, sequence_short,
-                     arg1_int, arg2_int, arg3_int) =\
-                        struct.unpack_from("<BBBBBBHHHHiii", data, 0)
-                    header_length = 26
-                    spikedatalen = len(data) - header_length
-                    t_tic = arg1_int
-                    last_time_packet_recieved = datetime.datetime.now()
-
-                    for spike in range(0, spikedatalen, 4):
-                        spikeWord = struct.unpack_from("<I", data, spike + header_length)[0]
-                        x = packet_conversions.get_x_from_key(spikeWord)
-                        y = packet_conversions.get_y_from_key(spikeWord)
-                        p = packet_conversions.get_p_from_key(spikeWord)
-                        nid = packet_conversions.get_nid_from_key(spikeWord)
-                        # logger.debug("received packet from {},{},{}".format(x,y,p))
-                        self.visualiser.spike_recieved({'coords':[x,y,p],
-                                                       'neuron_id':nid,
-                                                       'tag': tag_byte,
-                                                       'time_in_ticks': t_tic,
-                                                       'spike_word': spikeWord})
                 else:#create fake spikes
                     t_tic = self.generate_fake_spikes(packet_count, t_tic)
 
@@ -93,6 +93,17 @@ class PortQueuer(threading.Thread):
                 got = True
         return packet
 
+    def get_packets(self):
+        '''
+        allows the port listener to pull all the packets in the non-blocking
+        queue at once, waiting for one if there are none. the last packet is
+        None if the queuer has stopped
+        '''
+        packets = [self.get_packet()]
+        while len(self.queue) != 0 and packets[-1] is not None:
+            packets.append(self.queue.popleft())
+        return packets
+
 
 
 
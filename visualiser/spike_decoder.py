@@ -0,0 +1,99 @@
+__author__ = 'stokesa6'
+
+from pacman103.core.utilities import packet_conversions
+import numpy
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SpikeDecoder(object):
+    '''
+    decodes the spike words received from spinnaker into the subvertex which
+    sent them, and passes them on to the page of its vertex.
+
+    the table from each key and mask combo to the (vertex, subvertex, lo_atom)
+    of the subvertices which send it is built once after mapping, so that
+    decoding a spike is a dictionary lookup for each mask in use (usually
+    one). the page of a vertex is looked up in vertex_to_page_mapping as each
+    spike arrives, so that pages added or removed while running are followed.
+    '''
+
+    def __init__(self, dao, vertex_to_page_mapping):
+        self.vertex_to_page_mapping = vertex_to_page_mapping
+        self.n_unknown_spikes = 0
+        #the table of each mask, in the order in which the masks are stored
+        self.tables = list()
+        tables_by_mask = dict()
+        for mask in dao.used_masks:
+            tables_by_mask[mask] = dict()
+            self.tables.append((mask, tables_by_mask[mask]))
+        for key_mask_combo, subedges in dao.inverseMap.items():
+            for subedge in subedges:
+                table = tables_by_mask[subedge.mask]
+                subvertex = subedge.presubvertex
+                entries = table.setdefault(key_mask_combo, list())
+                entry = (subvertex.vertex, subvertex, subvertex.lo_atom)
+                if entry not in entries:
+                    entries.append(entry)
+
+    def decode(self, spike_word):
+        '''
+        returns the list of (vertex, subvertex, lo_atom) of the subvertices
+        which send the spike word, which is empty if it is not known
+        '''
+        for mask, table in self.tables:
+            entries = table.get(spike_word & mask)
+            if entries is not None:
+                return entries
+        return ()
+
+    def spike_recieved(self, details):
+        '''
+        passes a spike to the pages of the vertices which sent it, adding the
+        subvertex which sent it to its details
+        '''
+        entries = self.decode(details['spike_word'])
+        if len(entries) == 0:
+            self.n_unknown_spikes += 1
+        for vertex, subvertex, lo_atom in entries:
+            page = self.vertex_to_page_mapping.get(vertex)
+            if page is not None:
+                details['subvertex'] = subvertex
+                page.recieved_spike(details)
+
+    def spike_recieved_many(self, spike_words, time_in_ticks):
+        '''
+        passes the spikes of a timer tick to the pages of the vertices which
+        sent them, giving each page its spikes in a single list of
+        (subvertex, neuron_id, spike_word)
+
+        the neuron ids and the key and mask combos of the spike words, which
+        may be an array, are found for them all at once
+        '''
+        spike_words = numpy.asarray(spike_words, dtype=numpy.uint32)
+        neuron_ids = packet_conversions.get_nid_from_key(spike_words).tolist()
+        combos_of_tables = [((spike_words & mask).tolist(), table)
+                            for mask, table in self.tables]
+        spikes_of_page = dict()
+        pages = list()
+        for index, spike_word in enumerate(spike_words.tolist()):
+            entries = None
+            for combos, table in combos_of_tables:
+                entries = table.get(combos[index])
+                if entries is not None:
+                    break
+            if entries is None:
+                self.n_unknown_spikes += 1
+                continue
+            neuron_id = neuron_ids[index]
+            for vertex, subvertex, lo_atom in entries:
+                page = self.vertex_to_page_mapping.get(vertex)
+                if page is None:
+                    continue
+                if page not in spikes_of_page:
+                    spikes_of_page[page] = list()
+                    pages.append(page)
+                spikes_of_page[page].append((subvertex, neuron_id,
+                                             spike_word))
+        for page in pages:
+            page.recieved_spikes(spikes_of_page[page], time_in_ticks)
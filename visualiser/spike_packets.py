@@ -0,0 +1,56 @@
+__author__ = 'stokesa6'
+
+import numpy
+
+#the sdp header of the datagrams of spikes sent to the visualiser, the time
+# in ticks of the spikes being sent as arg1
+HEADER_DTYPE = numpy.dtype([('ip_time_out', '<u1'), ('pad', '<u1'),
+                            ('flags', '<u1'), ('tag', '<u1'),
+                            ('dest_port', '<u1'), ('source_port', '<u1'),
+                            ('dest_addr', '<u2'), ('source_addr', '<u2'),
+                            ('command', '<u2'), ('sequence', '<u2'),
+                            ('arg1', '<i4'), ('arg2', '<i4'),
+                            ('arg3', '<i4')])
+HEADER_LENGTH = HEADER_DTYPE.itemsize
+SPIKE_WORD_DTYPE = numpy.dtype('<u4')
+
+
+def decode_datagram(data):
+    '''
+    returns the tag, the time in ticks and an array of the spike words of a
+    datagram of spikes, ignoring any bytes after the last whole spike word
+    '''
+    header = numpy.frombuffer(data, HEADER_DTYPE, count=1)[0]
+    n_spike_words = (len(data) - HEADER_LENGTH) // SPIKE_WORD_DTYPE.itemsize
+    spike_words = numpy.frombuffer(data, SPIKE_WORD_DTYPE, count=n_spike_words,
+                                   offset=HEADER_LENGTH)
+    return int(header['tag']), int(header['arg1']), spike_words
+
+
+def decode_datagrams(datagrams):
+    '''
+    returns a list of the (time in ticks, array of spike words) of a burst of
+    datagrams, joining the spike words of consecutive datagrams of the same
+    timer tick into a single array
+    '''
+    ticks = list()
+    spike_words_of_tick = list()
+    for data in datagrams:
+        _, time_in_ticks, spike_words = decode_datagram(data)
+        if len(ticks) == 0 or ticks[-1] != time_in_ticks:
+            ticks.append(time_in_ticks)
+            spike_words_of_tick.append(list())
+        spike_words_of_tick[-1].append(spike_words)
+    return [(time_in_ticks, numpy.concatenate(spike_words))
+            for time_in_ticks, spike_words in zip(ticks, spike_words_of_tick)]
+
+
+def encode_datagram(time_in_ticks, spike_words, tag=0):
+    '''
+    returns a datagram of spikes of a timer tick, as sent by spinnaker
+    '''
+    header = numpy.zeros(1, HEADER_DTYPE)
+    header['tag'] = tag
+    header['arg1'] = time_in_ticks
+    return (header.tostring() +
+            numpy.asarray(spike_words, SPIKE_WORD_DTYPE).tostring())
@@ -0,0 +1,228 @@
+"""Spike Stream Replay
+
+Replays a recorded stream of the datagrams of spikes sent to the visualiser
+through a local UDP socket into the visualiser's listener, and reports the
+sustained rate at which they are received and decoded and how many are
+dropped.  Streams can be recorded from a running simulation with --record,
+or a synthetic stream is generated if no recording is given.
+
+Run with -h for command-line arguments.
+"""
+
+from __future__ import absolute_import
+
+import argparse
+import random
+import socket
+import struct
+import time
+
+from visualiser import spike_packets
+from visualiser.port_listener import VisulaiserListener
+
+#recordings are a header and then each datagram preceded by the time in
+# seconds at which it was recieved and its length
+RECORDING_HEADER = "SPIKEREC"
+RECORD_HEADER = struct.Struct("<dI")
+
+
+def write_recording(filename, datagrams):
+    """
+    Writes a list of the (time, data) of datagrams to a recording
+    """
+    with open(filename, "wb") as f:
+        f.write(RECORDING_HEADER)
+        for (time_received, data) in datagrams:
+            f.write(RECORD_HEADER.pack(time_received, len(data)))
+            f.write(data)
+
+
+def read_recording(filename):
+    """
+    Returns the list of the (time, data) of the datagrams of a recording
+    """
+    with open(filename, "rb") as f:
+        recording = f.read()
+    if not recording.startswith(RECORDING_HEADER):
+        raise IOError("{} is not a recording of spikes".format(filename))
+    datagrams = list()
+    offset = len(RECORDING_HEADER)
+    while offset < len(recording):
+        (time_received, length) = RECORD_HEADER.unpack_from(recording, offset)
+        offset += RECORD_HEADER.size
+        datagrams.append((time_received, recording[offset:offset + length]))
+        offset += length
+    return datagrams
+
+
+def record(port, duration):
+    """
+    Returns the list of the (time, data) of the datagrams recieved on the
+    port in the duration in seconds
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("0.0.0.0", port))
+    sock.settimeout(0.1)
+    datagrams = list()
+    start = time.time()
+    try:
+        while time.time() - start < duration:
+            try:
+                data, _ = sock.recvfrom(65536)
+                datagrams.append((time.time() - start, data))
+            except socket.timeout:
+                pass
+    finally:
+        sock.close()
+    return datagrams
+
+
+def generate_recording(n_packets, spikes_per_packet, packets_per_tick=4,
+                       seed=None):
+    """
+    Returns the list of the (time, data) of a synthetic stream of datagrams
+    of spikes from the cores of a 48-chip board, a timer tick of 1ms apart
+    """
+    rng = random.Random(seed)
+    datagrams = list()
+    for index in range(n_packets):
+        time_in_ticks = index // packets_per_tick
+        spike_words = [rng.randint(0, 7) << 24 | rng.randint(0, 7) << 16 |
+                       rng.randint(0, 15) << 11 | rng.randint(0, 255)
+                       for _ in range(spikes_per_packet)]
+        datagrams.append((time_in_ticks / 1000.0,
+                          spike_packets.encode_datagram(time_in_ticks,
+                                                        spike_words)))
+    return datagrams
+
+
+class SpikeCounter(object):
+    """
+    Stands in for the visualiser, counting the spikes handed to it by the
+    listener
+    """
+
+    def __init__(self):
+        self.n_spikes = 0
+        self.n_ticks = 0
+
+    def spike_recieved_many(self, spike_words, time_in_ticks):
+        self.n_spikes += len(spike_words)
+        self.n_ticks += 1
+
+    def cool_downer(self):
+        pass
+
+    def redraw_graphs(self, timer_tic):
+        pass
+
+    def get_resets(self):
+        return list()
+
+
+def replay(datagrams, port=0, speed=None, visualiser=None, settle_time=1.0):
+    """
+    Sends the datagrams to a listener on the local port, at the speed times
+    that at which they were recorded or as fast as possible if the speed is
+    None, and returns a dictionary of the counts of the datagrams and spikes
+    sent and recieved and the rates at which they were recieved.
+
+    The port is chosen by the system if it is 0.  The spikes are handed to
+    the visualiser, a SpikeCounter if it is None.
+    """
+    if visualiser is None:
+        visualiser = SpikeCounter()
+    listener = VisulaiserListener(1000, 1)
+    listener.set_port(port)
+    listener.set_visualiser(visualiser)
+    port = listener.queuer.sock.getsockname()[1]
+    listener.start()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    n_spikes_sent = 0
+    start = time.time()
+    try:
+        for (time_received, data) in datagrams:
+            if speed is not None:
+                delay = start + time_received / speed - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            sock.sendto(data, ("127.0.0.1", port))
+            n_spikes_sent += ((len(data) - spike_packets.HEADER_LENGTH) //
+                              spike_packets.SPIKE_WORD_DTYPE.itemsize)
+        sent_time = time.time() - start
+
+        # Wait for the datagrams still queued to be decoded, until none have
+        # been recieved for the settle time
+        n_packets = -1
+        last_progress = time.time()
+        while (listener.n_packets < len(datagrams) and
+               time.time() - last_progress < settle_time):
+            if listener.n_packets != n_packets:
+                n_packets = listener.n_packets
+                last_progress = time.time()
+            time.sleep(0.001)
+        elapsed = time.time() - start
+        if listener.n_packets < len(datagrams):
+            elapsed = last_progress - start
+    finally:
+        sock.close()
+        listener.stop()
+        listener.join()
+
+    return {'n_packets_sent': len(datagrams),
+            'n_packets_recieved': listener.n_packets,
+            'n_packets_dropped': len(datagrams) - listener.n_packets,
+            'n_spikes_sent': n_spikes_sent,
+            'n_spikes_recieved': listener.n_spikes,
+            'send_time': sent_time,
+            'elapsed_time': elapsed,
+            'packets_per_second': listener.n_packets / elapsed,
+            'spikes_per_second': listener.n_spikes / elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "recording", nargs="?",
+        help="the recording to replay (a synthetic stream by default)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="the local port to replay through")
+    parser.add_argument(
+        "--speed", type=float, default=None,
+        help="replay at this multiple of the recorded speed (as fast as "
+             "possible by default)")
+    parser.add_argument(
+        "--record", type=float, metavar="SECONDS", default=None,
+        help="record the datagrams recieved on --port for this long to the "
+             "recording instead of replaying it")
+    parser.add_argument("--packets", type=int, default=100000,
+                        help="the number of datagrams of a synthetic stream")
+    parser.add_argument(
+        "--spikes-per-packet", type=int, default=64,
+        help="the number of spikes in each datagram of a synthetic stream")
+    args = parser.parse_args()
+
+    if args.record is not None:
+        if args.recording is None:
+            parser.error("--record needs a recording to write to")
+        datagrams = record(args.port, args.record)
+        write_recording(args.recording, datagrams)
+        print "recorded {} datagrams to {}".format(len(datagrams),
+                                                   args.recording)
+    else:
+        if args.recording is None:
+            datagrams = generate_recording(args.packets,
+                                           args.spikes_per_packet, seed=0)
+        else:
+            datagrams = read_recording(args.recording)
+        stats = replay(datagrams, args.port, args.speed)
+        print "sent {} datagrams of {} spikes in {:.3f}s".format(
+            stats['n_packets_sent'], stats['n_spikes_sent'],
+            stats['send_time'])
+        print "recieved {} datagrams of {} spikes in {:.3f}s".format(
+            stats['n_packets_recieved'], stats['n_spikes_recieved'],
+            stats['elapsed_time'])
+        print "sustained {:.0f} packets/s, {:.0f} spikes/s, {} dropped".format(
+            stats['packets_per_second'], stats['spikes_per_second'],
+            stats['n_packets_dropped'])
@@ -8,6 +8,7 @@ from pages.raster_page import RasterPage
 from pages.topological_page import TopologicalPage
 from pages.configuration_page import ConfigPage
 from pages.population_page import PopulationView
+from spike_decoder import SpikeDecoder
 import visualiser_modes
 from pacman103.conf import config
 import logging
@@ -33,6 +34,8 @@ class VisualiserMain(object):
         self.add_menus()
         #add the pages
         self.create_pages(dao)
+        #build the table decoding spikes into the pages they update
+        self.spike_decoder = SpikeDecoder(dao, self.vertex_to_page_mapping)
         #set current page to X
         self.pages.set_current_page(2)
         #display window
@@ -293,19 +296,18 @@ class VisualiserMain(object):
         if not self.received:
             print "receiving spikes"
             self.received = True
-        #print "packet recieved from {}".format(details)
-        #check that packet came from a real chip, if so, update raster and pop
-        chip_x, chip_y = details['coords'][0], details['coords'][1]
-        #locate which mask was used in the application
-        mask = self.locate_mask(details['spike_word'])
-        key_mask_combo = details['spike_word'] & mask
-
-        #update the page which deals with this vertex
-        for subedge in self.dao.inverseMap[key_mask_combo]:
-            vertex = subedge.presubvertex.vertex
-            if vertex in self.vertex_to_page_mapping.keys():
-                updateable_page = self.vertex_to_page_mapping[vertex]
-                updateable_page.recieved_spike(details)
+        #update the pages which deal with the vertex which sent it
+        self.spike_decoder.spike_recieved(details)
+
+    def spike_recieved_many(self, spike_words, time_in_ticks):
+        '''
+        updates the corrapsonding pages with the spikes of a timer tick
+        recieved from spinnaker
+        '''
+        if not self.received:
+            print "receiving spikes"
+            self.received = True
+        self.spike_decoder.spike_recieved_many(spike_words, time_in_ticks)
 
     def cool_downer(self):
         '''
@@ -317,16 +319,6 @@ class VisualiserMain(object):
         pass
 
 
-    def locate_mask(self, key):
-        '''
-        helper method to locate the mask used for a key
-        '''
-        for mask in self.dao.used_masks:
-            key = key & mask
-            if key in self.dao.used_masks[mask]:
-                return mask
-        return None
-
     def get_resets(self):
         resets= list()
         for page in self.real_pages: